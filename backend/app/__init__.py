@@ -1,5 +1,5 @@
 import os
-from flask import Flask, send_from_directory, send_file
+from flask import Flask, send_file
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
@@ -10,6 +10,8 @@ load_dotenv()
 
 # 导入日志配置
 from app.utils.logger import setup_logger
+from app.middleware.compression import send_precompressed
+from app.utils.json_provider import GriderJSONProvider
 
 db = SQLAlchemy()
 migrate = Migrate()
@@ -30,6 +32,9 @@ def create_app():
         app = Flask(__name__)
         app.logger.info("开发环境模式：仅提供API服务")
     
+    # JSON序列化（安装orjson时使用orjson，支持datetime、NumPy类型和dataclass）
+    app.json = GriderJSONProvider(app)
+
     # 配置
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -101,7 +106,7 @@ def setup_static_routes(app):
         
         # 尝试提供静态文件
         try:
-            return send_from_directory('../../static', path)
+            return send_precompressed('../../static', path)
         except FileNotFoundError:
             # 文件不存在时返回index.html（支持其他前端路由）
             try:
@@ -3,18 +3,27 @@ ETF网格交易回测算法模块
 
 本模块包含回测引擎核心组件：
 - BacktestEngine: 回测引擎核心
+- VectorizedBacktestEngine: 向量化回测引擎
+- MultiStrategyBacktestEngine: 多策略同步回测引擎
+- PortfolioBacktestEngine: 共享资金池的多标的组合回测引擎
 - TradingLogic: 网格交易逻辑
 - FeeCalculator: 手续费计算器
 - 数据模型定义
 """
 
 from .engine import BacktestEngine
+from .vectorized_engine import VectorizedBacktestEngine
+from .multi_engine import MultiStrategyBacktestEngine
+from .portfolio import PortfolioBacktestEngine
 from .trading_logic import TradingLogic
 from .fee_calculator import FeeCalculator
 from .models import KBar, TradeRecord, BacktestState, BacktestConfig
 
 __all__ = [
     'BacktestEngine',
+    'VectorizedBacktestEngine',
+    'MultiStrategyBacktestEngine',
+    'PortfolioBacktestEngine',
     'TradingLogic',
     'FeeCalculator',
     'KBar',
@@ -0,0 +1,176 @@
+"""
+回测检查点
+
+回测结束时保存引擎状态（BacktestState、交易记录、资产曲线和最后一根K线时间），
+同一策略在延长回测窗口后再次回测时，从检查点恢复并只模拟新增的K线。
+
+检查点按 证券/首根K线时间/策略/手续费配置 的哈希键存储，策略或手续费配置变化时
+键随之变化，旧检查点不再命中；K线摘要保证已模拟部分的数据未被修订。
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+from .models import KBarSeries, EquityCurve, TradeRecord, BacktestState, BacktestConfig
+
+logger = logging.getLogger(__name__)
+
+# 检查点格式版本（格式或交易逻辑变化时递增，使旧检查点全部失效）
+CHECKPOINT_VERSION = 5
+
+
+def kline_digest(series: KBarSeries, count: int) -> str:
+    """计算前count根K线的摘要"""
+    digest = hashlib.md5()
+    for column in (series.times, series.open, series.high, series.low, series.close):
+        digest.update(np.ascontiguousarray(column[:count]).tobytes())
+    return digest.hexdigest()
+
+
+def build_checkpoint_key(symbol: str, series: KBarSeries, grid_strategy: dict,
+                   config: BacktestConfig, country: str = 'CHN') -> str:
+    """
+    生成检查点键
+
+    Args:
+        symbol: 证券标识（如 XSHG:510300）
+        series: K线序列（使用首根K线时间，窗口向后延长时键不变）
+        grid_strategy: 网格策略
+        config: 回测配置（仅手续费相关字段参与计算）
+        country: 市场国家代码
+
+    Returns:
+        检查点键
+    """
+    payload = json.dumps({
+        'version': CHECKPOINT_VERSION,
+        'symbol': symbol,
+        'country': country,
+        'start': int(series.times[0]),
+        'strategy': grid_strategy,
+        'fee': {'commission_rate': config.commission_rate, 'min_commission': config.min_commission}
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+@dataclass
+class BacktestCheckpoint:
+    """回测检查点"""
+    state: BacktestState               # 最后一根K线处理后的状态
+    trade_records: List[TradeRecord]   # 交易记录
+    equity_times: np.ndarray           # 资产曲线时间
+    equity_assets: np.ndarray          # 资产曲线总资产
+    equity_prices: np.ndarray          # 资产曲线价格
+    bar_count: int                     # 已模拟的K线数
+    last_bar_time: int                 # 最后一根K线时间（epoch秒）
+    digest: str                        # 已模拟K线的摘要
+
+    @classmethod
+    def capture(cls, state: BacktestState, trade_records: List[TradeRecord],
+                equity_curve: EquityCurve, series: KBarSeries) -> 'BacktestCheckpoint':
+        """由回测结束时的引擎状态创建检查点"""
+        return cls(
+            state=copy.deepcopy(state),
+            trade_records=list(trade_records),
+            equity_times=equity_curve.times.copy(),
+            equity_assets=equity_curve.assets.copy(),
+            equity_prices=equity_curve.prices.copy(),
+            bar_count=len(series),
+            last_bar_time=int(series.times[-1]),
+            digest=kline_digest(series, len(series))
+        )
+
+    def matches(self, series: KBarSeries) -> bool:
+        """检查点是否可用于该K线序列（已模拟部分完全一致）"""
+        return (
+            len(series) >= self.bar_count and
+            int(series.times[self.bar_count - 1]) == self.last_bar_time and
+            kline_digest(series, self.bar_count) == self.digest
+        )
+
+    def restore_equity_curve(self, capacity: int) -> EquityCurve:
+        """恢复资产曲线（预留capacity容量）"""
+        curve = EquityCurve(capacity)
+        curve.extend(self.equity_times, self.equity_assets, self.equity_prices)
+        return curve
+
+
+class CheckpointStore:
+    """检查点文件存储（按键保存，超出数量上限时淘汰最久未写入的检查点）"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 256):
+        self.cache_dir = Path(cache_dir or os.getenv('BACKTEST_CHECKPOINT_DIR', 'cache/backtest_checkpoints'))
+        self.max_entries = max_entries
+
+    def get(self, key: str) -> Optional[BacktestCheckpoint]:
+        """读取检查点，不存在或损坏时返回None"""
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                checkpoint = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"读取回测检查点失败: {path}, {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if not isinstance(checkpoint, BacktestCheckpoint):
+            path.unlink(missing_ok=True)
+            return None
+        return checkpoint
+
+    def set(self, key: str, checkpoint: BacktestCheckpoint):
+        """写入检查点（先写临时文件再原子替换）"""
+        tmp_path = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"写入回测检查点失败: {key}, {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def delete(self, key: str):
+        """删除检查点"""
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        """清除所有检查点"""
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*.ckpt'):
+                path.unlink(missing_ok=True)
+
+    def _evict(self):
+        """淘汰超出数量上限的检查点"""
+        paths = list(self.cache_dir.glob('*.ckpt'))
+        if len(paths) <= self.max_entries:
+            return
+
+        def mtime(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        paths.sort(key=mtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.ckpt"
@@ -0,0 +1,169 @@
+"""
+长区间分段回测
+
+超过普通回测区间的长区间回测按月分段加载K线，逐段送入同一个回测引擎（段间沿用引擎状态）。
+每段的资产曲线和K线在到达时按交易日聚合，段数据随即释放，内存占用与区间长度基本无关；
+最大回撤和收益率的个数、和与平方和（用于波动率和夏普比率）在聚合前按5分钟K线逐段累计，
+与整段回测的指标口径一致，不因聚合而改变。
+"""
+
+import itertools
+from typing import Dict, Iterable, List
+import numpy as np
+from .models import KBarSeries, EquityCurve
+from .engine import BacktestEngine
+
+# 超过该天数的回测区间使用分段回测
+CHUNKED_BACKTEST_MIN_DAYS = 120
+
+# 分段回测的最大时间跨度（天）
+MAX_CHUNKED_BACKTEST_DAYS = 1830
+
+
+def month_chunks(trading_days: Iterable[str]) -> List[List[str]]:
+    """
+    按自然月切分交易日
+
+    Args:
+        trading_days: 交易日列表（YYYY-MM-DD，任意顺序）
+
+    Returns:
+        每月的交易日列表（升序）
+    """
+    return [list(days) for _, days in itertools.groupby(sorted(trading_days), key=lambda day: day[:7])]
+
+
+class ChunkedBacktestRunner:
+    """分段回测执行器：逐段推进引擎，并按交易日聚合资产曲线和价格曲线"""
+
+    def __init__(self, engine: BacktestEngine):
+        self.engine = engine
+        self.bar_count = 0
+        self.trade_records = []
+
+        # 按交易日聚合的数据（第一个点为首根K线，之后为每个交易日的最后一根K线）
+        self._times: List[np.ndarray] = []
+        self._assets: List[np.ndarray] = []
+        self._open: List[np.ndarray] = []
+        self._high: List[np.ndarray] = []
+        self._low: List[np.ndarray] = []
+        self._close: List[np.ndarray] = []
+        self._volume: List[np.ndarray] = []
+
+        # 按5分钟K线累计的峰值资产和最大回撤
+        self._peak_asset = 0.0
+        self._max_drawdown = 0.0
+
+        # 按5分钟K线累计的收益率个数、和与平方和（含跨段的相邻K线）
+        self._last_asset = None
+        self._return_count = 0
+        self._return_sum = 0.0
+        self._return_square_sum = 0.0
+
+    def feed(self, series: KBarSeries):
+        """
+        模拟一段K线并聚合其资产曲线
+
+        Args:
+            series: 本段K线序列（时间须晚于已模拟的K线）
+        """
+        if not series:
+            return
+
+        first = self.bar_count == 0
+        result = self.engine.run_chunk(series)
+        self.trade_records.extend(result['trade_records'])
+        self.bar_count += len(series)
+
+        assets = result['equity_curve'].assets
+        self._update_drawdown(assets)
+        self._update_returns(assets)
+
+        if first:
+            self._append(series.times[:1], assets[:1], series.open[:1], series.high[:1],
+                         series.low[:1], series.close[:1], series.volume[:1])
+        self._aggregate_days(series, assets)
+
+    def result(self) -> Dict:
+        """
+        生成分段回测结果
+
+        Returns:
+            回测结果：交易记录、按交易日聚合的资产曲线和价格曲线、期末状态、总K线数、
+            按5分钟K线计算的最大回撤（负值）和收益率矩（个数, 和, 平方和）
+        """
+        if not self.bar_count:
+            raise ValueError("K线数据为空")
+
+        times = np.concatenate(self._times)
+        close = np.concatenate(self._close)
+        state = self.engine.state
+        return {
+            'trade_records': self.trade_records,
+            'equity_curve': EquityCurve.from_arrays(times, np.concatenate(self._assets), close),
+            'price_curve': KBarSeries(
+                times, np.concatenate(self._open), np.concatenate(self._high),
+                np.concatenate(self._low), close, np.concatenate(self._volume)
+            ),
+            'final_state': {
+                'cash': state.cash,
+                'position': state.position,
+                'total_asset': state.total_asset
+            },
+            'lot_ledger': state.ledger,
+            'bar_count': self.bar_count,
+            'max_drawdown': -self._max_drawdown,
+            'return_moments': (self._return_count, self._return_sum, self._return_square_sum)
+        }
+
+    def _update_drawdown(self, assets: np.ndarray):
+        """按本段每根K线的总资产累计峰值和最大回撤"""
+        peaks = np.maximum.accumulate(np.maximum(assets, self._peak_asset))
+        drawdowns = np.divide(peaks - assets, peaks, out=np.zeros_like(assets), where=peaks > 0)
+        self._max_drawdown = max(self._max_drawdown, float(drawdowns.max()))
+        self._peak_asset = float(peaks[-1])
+
+    def _update_returns(self, assets: np.ndarray):
+        """按本段每根K线的总资产累计收益率（与MetricsCalculator.calculate_all相同，跳过前值非正的点）"""
+        if self._last_asset is None:
+            prev_assets, curr_assets = assets[:-1], assets[1:]
+        else:
+            prev_assets, curr_assets = np.append(self._last_asset, assets[:-1]), assets
+        valid = prev_assets > 0
+        returns = (curr_assets[valid] - prev_assets[valid]) / prev_assets[valid]
+        self._return_count += returns.size
+        self._return_sum += float(returns.sum())
+        self._return_square_sum += float(np.dot(returns, returns))
+        self._last_asset = float(assets[-1])
+
+    def _aggregate_days(self, series: KBarSeries, assets: np.ndarray):
+        """将本段K线按交易日聚合为日线（与上一段的最后一个交易日相同时合并）"""
+        days = series.times // 86400
+        starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+        ends = np.append(starts[1:], len(series)) - 1
+
+        open_ = series.open[starts]
+        high = np.maximum.reduceat(series.high, starts)
+        low = np.minimum.reduceat(series.low, starts)
+        volume = np.add.reduceat(series.volume, starts)
+
+        # 分段边界落在交易日内部时，把首日并入上一段的最后一个交易日
+        if len(self._times) > 1 and self._times[-1][-1] // 86400 == days[0]:
+            open_[0] = self._open[-1][-1]
+            high[0] = max(high[0], self._high[-1][-1])
+            low[0] = min(low[0], self._low[-1][-1])
+            volume[0] += self._volume[-1][-1]
+            for column in (self._times, self._assets, self._open, self._high,
+                           self._low, self._close, self._volume):
+                column[-1] = column[-1][:-1]
+
+        self._append(series.times[ends], assets[ends], open_, high, low, series.close[ends], volume)
+
+    def _append(self, times, assets, open_, high, low, close, volume):
+        self._times.append(np.array(times, dtype=np.int64))
+        self._assets.append(np.array(assets, dtype=np.float64))
+        self._open.append(np.array(open_, dtype=np.float64))
+        self._high.append(np.array(high, dtype=np.float64))
+        self._low.append(np.array(low, dtype=np.float64))
+        self._close.append(np.array(close, dtype=np.float64))
+        self._volume.append(np.array(volume, dtype=np.float64))
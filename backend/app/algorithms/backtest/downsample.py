@@ -0,0 +1,143 @@
+"""
+图表曲线降采样
+
+资产曲线使用LTTB（Largest-Triangle-Three-Buckets）算法选取保留形态的代表点，
+价格曲线按更粗的K线周期重新聚合为OHLC（列式reduceat运算）。
+指标计算始终使用完整数据，降采样只作用于返回给图表的曲线。
+"""
+
+import math
+from typing import Optional, Tuple
+import numpy as np
+from .models import KBarSeries, EquityCurve
+
+# 图表K线周期（秒）：5分钟K线的时间为区间结束时间，日内周期按 (时间 - 1) // 周期 分组
+CHART_RESOLUTIONS = {
+    '5min': 300,
+    '15min': 900,
+    '30min': 1800,
+    '60min': 3600,
+    '1d': 86400
+}
+
+# 图表数据点数上下限
+MIN_CHART_POINTS = 50
+MAX_CHART_POINTS = 100_000
+
+
+def lttb_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    LTTB降采样，返回保留点的下标
+
+    以点的序号为横坐标（与图表按类目等距排列一致）；首末点始终保留，
+    其余每个分桶选取与上一保留点、下一分桶均值点构成三角形面积最大的点。
+
+    Args:
+        values: 纵坐标序列
+        max_points: 最多保留的点数（至少3）
+
+    Returns:
+        升序下标数组
+    """
+    count = len(values)
+    if max_points >= count or max_points < 3:
+        return np.arange(count)
+
+    values = np.asarray(values, dtype=np.float64)
+    # 中间count-2个点均分为max_points-2个分桶，bounds[i]:bounds[i+1]为第i个分桶
+    bounds = np.arange(max_points - 1, dtype=np.int64) * (count - 2) // (max_points - 2) + 1
+    # 各分桶的均值点（最后一个分桶之后为末点）
+    sizes = np.diff(bounds)
+    mean_x = (bounds[:-1] + bounds[1:] - 1) / 2
+    mean_y = np.add.reduceat(values[:-1], bounds[:-1]) / sizes
+    mean_x = np.append(mean_x[1:], count - 1)
+    mean_y = np.append(mean_y[1:], values[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = bounds[i], bounds[i + 1]
+        x = np.arange(start, end)
+        y = values[start:end]
+        # 三角形面积的两倍：|(a - c) × (b - a)|，a为上一保留点，b为候选点，c为下一分桶均值点
+        ax, ay = a, values[a]
+        area = np.abs((ax - mean_x[i]) * (y - ay) - (ax - x) * (mean_y[i] - ay))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_equity_curve(equity_curve: EquityCurve, max_points: int) -> EquityCurve:
+    """
+    按总资产做LTTB降采样
+
+    Args:
+        equity_curve: 资产曲线
+        max_points: 最多保留的点数
+
+    Returns:
+        降采样后的资产曲线（点数不超过max_points时返回原曲线）
+    """
+    if len(equity_curve) <= max_points:
+        return equity_curve
+    index = lttb_indices(equity_curve.assets, max_points)
+    return EquityCurve.from_arrays(equity_curve.times[index], equity_curve.assets[index], equity_curve.prices[index])
+
+
+def resample_ohlc(series: KBarSeries, resolution: str, max_bars: Optional[int] = None) -> Tuple[KBarSeries, np.ndarray]:
+    """
+    将K线聚合为更粗周期的OHLC
+
+    日内周期按K线结束时间所在的周期区间分组，1d按交易日分组；提供max_bars且聚合后仍超出时，
+    再将相邻的若干根合并，使K线数不超过max_bars。聚合K线的时间为组内最后一根K线的时间。
+
+    Args:
+        series: K线序列（按时间升序）
+        resolution: 目标周期（CHART_RESOLUTIONS中的键）
+        max_bars: 最多保留的K线数（可选）
+
+    Returns:
+        (聚合后的K线序列, 每根聚合K线在原序列中的最后一根下标)
+    """
+    if resolution not in CHART_RESOLUTIONS:
+        raise ValueError(f"图表周期必须是以下之一：{', '.join(CHART_RESOLUTIONS)}")
+    if not len(series):
+        return series, np.empty(0, dtype=np.int64)
+
+    interval = CHART_RESOLUTIONS[resolution]
+    keys = series.times // interval if resolution == '1d' else (series.times - 1) // interval
+    group = np.concatenate(([0], np.cumsum(keys[1:] != keys[:-1])))
+    group_count = int(group[-1]) + 1
+    if max_bars and group_count > max_bars:
+        group //= math.ceil(group_count / max_bars)
+
+    starts = np.flatnonzero(np.diff(group, prepend=-1))
+    ends = np.append(starts[1:], len(series)) - 1
+    resampled = KBarSeries(
+        series.times[ends],
+        series.open[starts],
+        np.maximum.reduceat(series.high, starts),
+        np.minimum.reduceat(series.low, starts),
+        series.close[ends],
+        np.add.reduceat(series.volume, starts)
+    )
+    return resampled, ends
+
+
+def chart_resolution_for(series: KBarSeries, max_bars: int) -> str:
+    """
+    选取聚合后K线数不超过max_bars的最细周期（都超出时返回1d，由resample_ohlc继续合并）
+
+    Args:
+        series: K线序列
+        max_bars: 最多保留的K线数
+
+    Returns:
+        图表周期
+    """
+    for resolution, interval in CHART_RESOLUTIONS.items():
+        keys = series.times // interval if resolution == '1d' else (series.times - 1) // interval
+        if int(np.count_nonzero(keys[1:] != keys[:-1])) + 1 <= max_bars:
+            return resolution
+    return '1d'
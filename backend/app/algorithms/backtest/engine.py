@@ -4,9 +4,10 @@
 负责编排整个回测流程，包括数据处理、交易执行、结果汇总等。
 """
 
-from typing import List, Dict
-from datetime import datetime
-from .models import KBar, TradeRecord, BacktestState, BacktestConfig
+import copy
+from typing import Callable, List, Dict, Optional, Union
+from .models import KBar, KBarSeries, EquityCurve, TradeRecord, BacktestState, BacktestConfig
+from .checkpoint import BacktestCheckpoint
 from .trading_logic import TradingLogic
 from .fee_calculator import FeeCalculator
 
@@ -14,6 +15,9 @@ from .fee_calculator import FeeCalculator
 class BacktestEngine:
     """回测引擎核心"""
 
+    # 进度回调的间隔（K线数）
+    PROGRESS_INTERVAL = 5000
+
     def __init__(self, grid_strategy: dict, backtest_config: BacktestConfig, country: str = 'CHN'):
         self.grid_strategy = grid_strategy
         self.config = backtest_config
@@ -29,20 +33,28 @@ class BacktestEngine:
         self.trading_logic = TradingLogic(
             grid_config=grid_strategy['grid_config'],
             fee_calculator=self.fee_calc,
-            country=country  # 传递country参数
+            country=country,  # 传递country参数
+            price_levels=grid_strategy.get('price_levels')
         )
 
         # 状态追踪
         self.state: BacktestState = None
         self.trade_records: List[TradeRecord] = []
-        self.equity_curve: List[Dict] = []
+        self.equity_curve: EquityCurve = EquityCurve()
+        self._series: Optional[KBarSeries] = None
+        self._carry_state = False
 
-    def run(self, kline_data: List[KBar]) -> Dict:
+    def run(self, kline_data: Union[KBarSeries, List[KBar]],
+            checkpoint: Optional[BacktestCheckpoint] = None,
+            progress: Optional[Callable[[int, int], None]] = None) -> Dict:
         """
         执行回测
 
         Args:
-            kline_data: K线数据列表
+            kline_data: K线序列（或K线数据列表）
+            checkpoint: 回测检查点（可选），提供时从检查点恢复并只模拟其后的K线
+            progress: 进度回调（可选），每模拟PROGRESS_INTERVAL根K线及结束时以
+                (已模拟K线数, 累计交易笔数) 调用
 
         Returns:
             回测结果
@@ -50,33 +62,20 @@ class BacktestEngine:
         if not kline_data:
             raise ValueError("K线数据为空")
 
-        # 1. 获取资金配置
-        fund_alloc = self.grid_strategy['fund_allocation']
-        total_capital = fund_alloc['base_position_amount'] + fund_alloc['grid_trading_amount']
-
-        # 2. 执行初始底仓购买（使用第一根K线）
-        first_kbar = kline_data[0]
-        self.state, initial_trade = self.trading_logic.execute_initial_position(
-            first_kbar=first_kbar,
-            base_position_amount=fund_alloc['base_position_amount'],
-            total_capital=total_capital,
-            strategy_base_price=self.grid_strategy['current_price'],
-            price_lower=self.grid_strategy['price_range']['lower'],
-            price_upper=self.grid_strategy['price_range']['upper']
-        )
+        series = kline_data if isinstance(kline_data, KBarSeries) else KBarSeries.from_kbars(kline_data)
 
-        # 记录初始建仓交易
-        if initial_trade:
-            self.trade_records.append(initial_trade)
+        # 1. 初始化：从检查点恢复，或执行初始底仓购买
+        start = self._restore_checkpoint(checkpoint, series) if checkpoint else self._initialize(series)
 
-        # 3. 逐K线扫描交易（从第一根K线开始，不跳过）
-        for kbar in kline_data:
+        # 2. 逐K线扫描交易（从第一根K线开始，不跳过）
+        resumed = series[start:]
+        for index, (time, kbar) in enumerate(zip(resumed.times.tolist(), resumed), start=start + 1):
             # 更新总资产（按收盘价）
             self.state.total_asset = self.state.cash + self.state.position * kbar.close
             self.state.peak_asset = max(self.state.peak_asset, self.state.total_asset)
 
             # 记录资产曲线
-            self._record_equity_point(kbar.time, kbar.close)
+            self._record_equity_point(time, kbar.close)
 
             # 检查并执行交易
             new_state, trade_record = self.trading_logic.check_and_execute(
@@ -88,18 +87,90 @@ class BacktestEngine:
                 self.trade_records.append(trade_record)
                 self.state = new_state
 
-        # 4. 返回回测结果
+            if progress is not None and index % self.PROGRESS_INTERVAL == 0:
+                progress(index, len(self.trade_records))
+
+        if progress is not None:
+            progress(len(series), len(self.trade_records))
+
+        # 3. 返回回测结果
+        self._series = series
         return self._generate_result(kline_data)
 
-    def _record_equity_point(self, time: datetime, price: float):
-        """记录资产曲线点"""
-        self.equity_curve.append({
-            'time': time,
-            'total_asset': self.state.total_asset,
-            'price': price
-        })
+    def run_chunk(self, series: KBarSeries) -> Dict:
+        """
+        分段回测：模拟下一段K线
+
+        首段执行初始底仓购买，之后的分段沿用上一段结束时的状态；
+        返回结果中的交易记录和资产曲线只包含本段。
+
+        Args:
+            series: 本段K线序列（时间须晚于上一段）
+
+        Returns:
+            本段回测结果（结构与run一致）
+        """
+        self._carry_state = self.state is not None
+        try:
+            return self.run(series)
+        finally:
+            self._carry_state = False
+
+    def create_checkpoint(self) -> BacktestCheckpoint:
+        """由最近一次回测的结束状态创建检查点"""
+        if self._series is None:
+            raise ValueError("尚未执行回测")
+        return BacktestCheckpoint.capture(self.state, self.trade_records, self.equity_curve, self._series)
+
+    def _initialize(self, series: KBarSeries) -> int:
+        """
+        执行初始底仓购买（使用第一根K线），分段回测的后续分段沿用上一段结束时的状态
+
+        Returns:
+            开始模拟的K线下标
+        """
+        if self._carry_state:
+            self.trade_records = []
+            self.equity_curve = EquityCurve(len(series))
+            return 0
+
+        fund_alloc = self.grid_strategy['fund_allocation']
+        total_capital = fund_alloc['base_position_amount'] + fund_alloc['grid_trading_amount']
+
+        self.state, initial_trade = self.trading_logic.execute_initial_position(
+            first_kbar=series[0],
+            base_position_amount=fund_alloc['base_position_amount'],
+            total_capital=total_capital,
+            strategy_base_price=self.grid_strategy['current_price'],
+            price_lower=self.grid_strategy['price_range']['lower'],
+            price_upper=self.grid_strategy['price_range']['upper']
+        )
+
+        # 记录初始建仓交易
+        self.trade_records = [initial_trade] if initial_trade else []
+        self.equity_curve = EquityCurve(len(series))
+        return 0
+
+    def _restore_checkpoint(self, checkpoint: BacktestCheckpoint, series: KBarSeries) -> int:
+        """
+        从检查点恢复状态、交易记录和资产曲线
+
+        Returns:
+            开始模拟的K线下标（检查点之后的第一根K线）
+        """
+        if not checkpoint.matches(series):
+            raise ValueError("回测检查点与K线数据不一致")
+
+        self.state = copy.deepcopy(checkpoint.state)
+        self.trade_records = list(checkpoint.trade_records)
+        self.equity_curve = checkpoint.restore_equity_curve(len(series))
+        return checkpoint.bar_count
+
+    def _record_equity_point(self, time: int, price: float):
+        """记录资产曲线点（time为epoch秒）"""
+        self.equity_curve.append(time, self.state.total_asset, price)
 
-    def _generate_result(self, kline_data: List[KBar]) -> Dict:
+    def _generate_result(self, kline_data: Union[KBarSeries, List[KBar]]) -> Dict:
         """生成回测结果"""
         return {
             'trade_records': self.trade_records,
@@ -109,5 +180,6 @@ class BacktestEngine:
                 'position': self.state.position,
                 'total_asset': self.state.total_asset
             },
+            'lot_ledger': self.state.ledger,
             'kline_data': kline_data
         }
\ No newline at end of file
@@ -4,6 +4,9 @@
 负责计算交易手续费，支持费率和最低收费配置。
 """
 
+import numpy as np
+
+
 class FeeCalculator:
     """手续费计算器"""
 
@@ -41,4 +44,26 @@ class FeeCalculator:
         """计算卖出实际收入（扣除手续费）"""
         amount = price * quantity
         commission = self.calculate(amount)
-        return amount - commission
\ No newline at end of file
+        return amount - commission
+
+    def calculate_array(self, amount: np.ndarray) -> np.ndarray:
+        """
+        批量计算手续费（与calculate逐元素一致）
+
+        Args:
+            amount: 成交金额数组
+
+        Returns:
+            实际手续费数组
+        """
+        return np.maximum(amount * self.commission_rate, self.min_commission)
+
+    def calculate_buy_cost_array(self, price: float, quantity: np.ndarray) -> np.ndarray:
+        """批量计算买入总成本（含手续费）"""
+        amount = price * quantity
+        return amount + self.calculate_array(amount)
+
+    def calculate_sell_income_array(self, price: float, quantity: np.ndarray) -> np.ndarray:
+        """批量计算卖出实际收入（扣除手续费）"""
+        amount = price * quantity
+        return amount - self.calculate_array(amount)
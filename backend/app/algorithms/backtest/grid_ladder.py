@@ -0,0 +1,156 @@
+"""
+网格阶梯
+
+以整数价格tick（1 tick = 0.0001）表示网格买卖点，回测开始时一次性构建：
+- 等差网格：步长换算为整数tick，买卖点和跨越档位数均为整数运算；
+- 等比网格：预计算 (1+步长比例)^k 的升序倍数阶梯，跨越档位数用bisect查找，
+  不再对每根触发K线调用math.log。
+
+网格在每次成交后以成交价为新基准，因此阶梯以相对基准价的档位表示。
+"""
+
+import math
+from bisect import bisect_right
+from typing import List, Tuple
+import numpy as np
+
+# 每元的tick数（价格精度0.0001）
+TICKS_PER_UNIT = 10000
+
+# 浮点误差容忍度（tick），价格×TICKS_PER_UNIT与整数相差不超过该值时视为整数
+_TICK_EPSILON = 1e-6
+
+
+def to_ticks(price: float) -> int:
+    """价格换算为最接近的整数tick"""
+    return round(price * TICKS_PER_UNIT)
+
+
+def floor_ticks(price: float) -> int:
+    """价格向下取整为tick（容忍浮点误差）"""
+    value = price * TICKS_PER_UNIT
+    nearest = round(value)
+    return nearest if abs(value - nearest) <= _TICK_EPSILON else math.floor(value)
+
+
+def ceil_ticks(price: float) -> int:
+    """价格向上取整为tick（容忍浮点误差）"""
+    value = price * TICKS_PER_UNIT
+    nearest = round(value)
+    return nearest if abs(value - nearest) <= _TICK_EPSILON else math.ceil(value)
+
+
+def floor_ticks_array(price: np.ndarray) -> np.ndarray:
+    """批量向下取整为tick（与floor_ticks逐元素一致）"""
+    value = np.asarray(price, dtype=np.float64) * TICKS_PER_UNIT
+    nearest = np.rint(value)
+    return np.where(np.abs(value - nearest) <= _TICK_EPSILON, nearest, np.floor(value))
+
+
+def ceil_ticks_array(price: np.ndarray) -> np.ndarray:
+    """批量向上取整为tick（与ceil_ticks逐元素一致）"""
+    value = np.asarray(price, dtype=np.float64) * TICKS_PER_UNIT
+    nearest = np.rint(value)
+    return np.where(np.abs(value - nearest) <= _TICK_EPSILON, nearest, np.ceil(value))
+
+
+def from_ticks(ticks: int) -> float:
+    """tick换算为价格"""
+    return ticks / TICKS_PER_UNIT
+
+
+def step_size_to_ticks(step_size: float) -> int:
+    """等差网格步长换算为tick，步长不是最小价格单位的正整数倍时抛出ValueError（不静默舍入）"""
+    value = step_size * TICKS_PER_UNIT
+    ticks = round(value)
+    if ticks <= 0 or abs(value - ticks) > _TICK_EPSILON:
+        raise ValueError(f"等差网格步长{step_size}必须是最小价格单位{from_ticks(1)}的正整数倍")
+    return ticks
+
+
+def validate_grid_config(grid_config: dict):
+    """
+    校验网格配置的步长，不合法时抛出ValueError
+
+    等差网格的step_size必须是最小价格单位（0.0001）的正整数倍，等比网格的step_ratio必须大于0。
+    """
+    if grid_config.get('type') == '等差':
+        step_size_to_ticks(grid_config.get('step_size', 0))
+    elif grid_config.get('step_ratio', 0) <= 0:
+        raise ValueError(f"等比网格步长比例{grid_config.get('step_ratio', 0)}必须大于0")
+
+
+class GridLadder:
+    """网格阶梯"""
+
+    # 等比网格倍数阶梯的初始上限（按需扩展）
+    INITIAL_RATIO = 2.0
+
+    def __init__(self, grid_type: str, step_size: float = 0, step_ratio: float = 0):
+        """
+        构建网格阶梯
+
+        Args:
+            grid_type: 网格类型（等差/等比）
+            step_size: 等差网格步长（元）
+            step_ratio: 等比网格步长比例（小数）
+        """
+        self.arithmetic = grid_type == '等差'
+        self.step_size = step_size
+        self.step_ratio = step_ratio
+
+        if self.arithmetic:
+            self.step_ticks = step_size_to_ticks(step_size)
+        else:
+            if step_ratio <= 0:
+                raise ValueError(f"等比网格步长比例{step_ratio}必须大于0")
+            self.step_ticks = 0
+            self._down = 1 - step_ratio
+            self._up = 1 + step_ratio
+            # 倍数阶梯：_multipliers[k] = (1+步长比例)^k，严格升序
+            self._multipliers: List[float] = [1.0]
+            self._extend_multipliers(self.INITIAL_RATIO)
+
+    def grid_ticks(self, base_price: float) -> Tuple[int, int]:
+        """
+        计算基准价对应的买入点和卖出点（tick）
+
+        Returns:
+            (买入点tick, 卖出点tick)
+        """
+        if self.arithmetic:
+            base_ticks = to_ticks(base_price)
+            return base_ticks - self.step_ticks, base_ticks + self.step_ticks
+        return to_ticks(base_price * self._down), to_ticks(base_price * self._up)
+
+    def grid_prices(self, base_price: float) -> Tuple[float, float]:
+        """
+        计算基准价对应的买入点和卖出点（价格，精度0.0001）
+
+        Returns:
+            (买入点, 卖出点)
+        """
+        buy_ticks, sell_ticks = self.grid_ticks(base_price)
+        return from_ticks(buy_ticks), from_ticks(sell_ticks)
+
+    def levels_between(self, upper: float, lower: float) -> int:
+        """
+        upper相对lower跨越的完整网格档位数（upper >= lower）
+
+        等差网格为 floor((upper - lower) / 步长)，等比网格为满足 (1+步长比例)^k <= upper/lower 的最大k。
+        """
+        if self.arithmetic:
+            return max(0, (floor_ticks(upper) - ceil_ticks(lower)) // self.step_ticks)
+
+        if upper <= 0 or lower <= 0:
+            return 0
+        ratio = upper / lower
+        if ratio > self._multipliers[-1]:
+            self._extend_multipliers(ratio)
+        return max(0, bisect_right(self._multipliers, ratio) - 1)
+
+    def _extend_multipliers(self, ratio: float):
+        """扩展等比倍数阶梯，直到覆盖ratio"""
+        multipliers = self._multipliers
+        while multipliers[-1] <= ratio:
+            multipliers.append(self._up ** len(multipliers))
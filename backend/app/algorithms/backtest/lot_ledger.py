@@ -0,0 +1,115 @@
+"""
+FIFO持仓批次账本
+
+回测过程中按成交顺序维护持仓批次（deque）：买入时在队尾追加批次，卖出时从最早的批次开始
+配对，按批次买入价和双向手续费（按数量分摊）计算每个配对和每笔卖出的已实现盈亏。
+指标计算直接读取账本中的配对盈亏，不再事后重新配对交易记录。
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Deque, Iterable, List
+import numpy as np
+
+if TYPE_CHECKING:
+    from .models import TradeRecord
+
+
+@dataclass
+class LotLedger:
+    """FIFO持仓批次账本"""
+    # 未平仓批次：[剩余数量, 买入价, 每股买入手续费]，按买入顺序排列
+    lots: Deque[list] = field(default_factory=deque)
+    # 每个配对（一个买入批次与一笔卖出的匹配部分）的已实现净盈亏，按平仓顺序排列
+    pair_profits: List[float] = field(default_factory=list)
+
+    @classmethod
+    def from_trades(cls, trade_records: Iterable['TradeRecord']) -> 'LotLedger':
+        """
+        按时间顺序重放交易记录生成账本（用于没有引擎账本的交易记录）
+
+        Args:
+            trade_records: 交易记录
+
+        Returns:
+            账本
+        """
+        ledger = cls()
+        for trade in sorted(trade_records, key=lambda record: record.time):
+            if trade.type == 'BUY':
+                ledger.buy(trade.price, trade.quantity, trade.commission)
+            elif trade.type == 'SELL':
+                ledger.sell(trade.price, trade.quantity, trade.commission)
+        return ledger
+
+    @classmethod
+    def combine(cls, ledgers: Iterable['LotLedger']) -> 'LotLedger':
+        """合并多个标的的账本（配对盈亏按账本顺序拼接，用于组合层面的统计）"""
+        combined = cls()
+        for ledger in ledgers:
+            combined.lots.extend(list(lot) for lot in ledger.lots)
+            combined.pair_profits.extend(ledger.pair_profits)
+        return combined
+
+    def buy(self, price: float, quantity: int, commission: float):
+        """
+        记录买入批次
+
+        Args:
+            price: 成交价格
+            quantity: 成交数量
+            commission: 手续费
+        """
+        if quantity > 0:
+            self.lots.append([quantity, price, commission / quantity])
+
+    def sell(self, price: float, quantity: int, commission: float) -> float:
+        """
+        按FIFO平仓并记录配对盈亏
+
+        Args:
+            price: 成交价格
+            quantity: 成交数量
+            commission: 手续费
+
+        Returns:
+            本笔卖出的已实现净盈亏（各配对盈亏之和；超出未平仓数量的部分不计成本）
+        """
+        if quantity <= 0:
+            return 0.0
+
+        sell_commission = commission / quantity
+        remaining = quantity
+        profit = 0.0
+        while remaining > 0 and self.lots:
+            lot = self.lots[0]
+            matched = min(remaining, lot[0])
+            pair_profit = (price - lot[1] - lot[2] - sell_commission) * matched
+            self.pair_profits.append(pair_profit)
+            profit += pair_profit
+
+            lot[0] -= matched
+            remaining -= matched
+            if lot[0] == 0:
+                self.lots.popleft()
+
+        if remaining > 0:
+            profit += (price - sell_commission) * remaining
+        return profit
+
+    @property
+    def open_quantity(self) -> int:
+        """未平仓数量"""
+        return sum(lot[0] for lot in self.lots)
+
+    @property
+    def realized_profit(self) -> float:
+        """累计已实现净盈亏"""
+        return sum(self.pair_profits)
+
+    @property
+    def win_rate(self) -> float:
+        """配对胜率（盈利配对数 / 配对总数）"""
+        if not self.pair_profits:
+            return 0.0
+        return int(np.count_nonzero(np.asarray(self.pair_profits) > 0)) / len(self.pair_profits)
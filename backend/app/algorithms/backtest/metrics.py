@@ -1,14 +1,25 @@
 """
 回测性能指标计算器
 
-实现完整的性能指标计算体系，包括收益指标、风险指标、交易指标和基准对比。
+实现完整的性能指标计算体系，包括收益指标、风险指标、交易指标和基准对比，
+以及可选的滚动指标序列（回撤曲线、滚动收益率、波动率和夏普比率）。
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from dataclasses import dataclass
-from datetime import timedelta
 import numpy as np
-from .models import TradeRecord
+from .models import TradeRecord, KBarSeries, EquityCurve
+from .lot_ledger import LotLedger
+
+# 滚动指标的时间粒度：daily按每个交易日最后一个资产点，intraday按每根K线
+ROLLING_RESOLUTIONS = ('daily', 'intraday')
+
+# 默认滚动窗口（周期数）：日线约1个月/1个季度，日内约1天/1周（每日48根5分钟K线）
+DEFAULT_ROLLING_WINDOWS = {'daily': (20, 60), 'intraday': (48, 240)}
+
+# 单次请求的最大窗口数与最大窗口长度
+MAX_ROLLING_WINDOWS = 5
+MAX_ROLLING_WINDOW_SIZE = 5000
 
 
 @dataclass
@@ -42,8 +53,49 @@ class BenchmarkComparison:
     excess_return_rate: float
 
 
+# 1970-01-01的公历序数（datetime.toordinal），用于换算epoch天数
+_EPOCH_ORDINAL = 719163
+
+
+@dataclass(eq=False)
+class TradeColumns:
+    """按成交时间排序的交易记录列式数组（指标计算一次性转换，避免逐项遍历交易记录）"""
+    days: np.ndarray       # 成交日期（epoch天数）
+    is_buy: np.ndarray     # 是否买入
+    is_sell: np.ndarray    # 是否卖出
+    price: np.ndarray      # 成交价格
+    profit: np.ndarray     # 已实现盈亏（买入为NaN）
+    cash: np.ndarray       # 成交后现金
+
+    @classmethod
+    def from_records(cls, trade_records: List[TradeRecord]) -> 'TradeColumns':
+        """由交易记录列表创建（引擎生成的记录已按时间排序，否则先稳定排序）"""
+        times = [t.time for t in trade_records]
+        if not all(a <= b for a, b in zip(times, times[1:])):
+            trade_records = sorted(trade_records, key=lambda t: t.time)
+            times = [t.time for t in trade_records]
+
+        count = len(trade_records)
+        types = np.array([t.type for t in trade_records], dtype=object)
+        return cls(
+            days=np.fromiter((time.toordinal() for time in times), np.int64, count) - _EPOCH_ORDINAL,
+            is_buy=types == 'BUY',
+            is_sell=types == 'SELL',
+            price=np.array([t.price for t in trade_records], dtype=np.float64),
+            profit=np.array([np.nan if t.profit is None else t.profit for t in trade_records], dtype=np.float64),
+            cash=np.array([t.cash for t in trade_records], dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+
 class MetricsCalculator:
-    """性能指标计算器"""
+    """
+    性能指标计算器
+
+    calculate_all将资产曲线和交易记录转换为NumPy数组后一次性向量化计算全部指标。
+    """
 
     def __init__(self, trading_days_per_year: int = 244, risk_free_rate: float = 0.03):
         self.trading_days_per_year = trading_days_per_year
@@ -52,10 +104,11 @@ class MetricsCalculator:
     def calculate_all(self,
                      initial_capital: float,
                      final_capital: float,
-                     equity_curve: List[Dict],
+                     equity_curve: Union[EquityCurve, List[Dict]],
                      trade_records: List[TradeRecord],
-                     price_curve: List[Dict],
-                     grid_count: int) -> tuple[PerformanceMetrics, BenchmarkComparison]:
+                     price_curve: Union[KBarSeries, List[Dict]],
+                     grid_count: int,
+                     lot_ledger: Optional[LotLedger] = None) -> tuple[PerformanceMetrics, BenchmarkComparison]:
         """
         计算所有指标
 
@@ -64,34 +117,47 @@ class MetricsCalculator:
             final_capital: 期末资金
             equity_curve: 资产曲线
             trade_records: 交易记录
-            price_curve: 价格曲线
+            price_curve: 价格曲线（K线序列或含close的字典列表）
             grid_count: 网格总数
+            lot_ledger: 引擎维护的FIFO持仓批次账本（可选，提供时直接读取配对盈亏）
 
         Returns:
             (性能指标, 基准对比)
         """
-        # 计算收益指标
+        times, assets = self._equity_arrays(equity_curve)
+        trades = TradeColumns.from_records(trade_records)
+
+        # 计算收益指标（资产曲线按时间升序，相邻K线日期不同即为新交易日）
         total_return = self._calculate_total_return(initial_capital, final_capital)
-        trading_days = self._get_trading_days(equity_curve)
+        days = times // 86400
+        trading_days = int(np.count_nonzero(np.diff(days))) + 1 if days.size else 0
         annualized_return = self._calculate_annualized_return(total_return, trading_days)
         absolute_profit = final_capital - initial_capital
 
         # 计算风险指标
-        max_drawdown = self._calculate_max_drawdown(equity_curve)
-        daily_returns = self._calculate_daily_returns(equity_curve)
-        volatility = self._calculate_volatility(daily_returns)
+        max_drawdown = 0.0
+        volatility = 0.0
+        if assets.size:
+            peaks = np.maximum.accumulate(assets)
+            drawdowns = np.divide(peaks - assets, peaks, out=np.zeros_like(assets), where=peaks > 0)
+            max_drawdown = -max(0.0, float(drawdowns.max()))
+
+            prev_assets, curr_assets = assets[:-1], assets[1:]
+            valid = prev_assets > 0
+            returns = (curr_assets[valid] - prev_assets[valid]) / prev_assets[valid]
+            if returns.size >= 2:
+                volatility = float(np.std(returns, ddof=1)) * np.sqrt(self.trading_days_per_year)
         sharpe_ratio = self._calculate_sharpe_ratio(annualized_return, volatility)
 
         # 计算交易指标
-        buy_trades = sum(1 for t in trade_records if t.type == 'BUY')
-        sell_trades = sum(1 for t in trade_records if t.type == 'SELL')
-        win_rate = self._calculate_win_rate(trade_records)
-        profit_loss_ratio = self._calculate_profit_loss_ratio(trade_records)
-        grid_trigger_rate = self._calculate_grid_trigger_rate(trade_records, grid_count)
-        capital_utilization_rate = self._calculate_capital_utilization_rate(trade_records, equity_curve, initial_capital)
-
-        # 计算基准对比
-        benchmark = self._calculate_benchmark(price_curve, total_return)
+        if lot_ledger is None:
+            lot_ledger = LotLedger.from_trades(trade_records)
+        profits = trades.profit[trades.profit > 0]
+        losses = -trades.profit[trades.profit < 0]
+        profit_loss_ratio = None
+        if profits.size and losses.size:
+            avg_loss = float(losses.mean())
+            profit_loss_ratio = float(profits.mean()) / avg_loss if avg_loss > 0 else None
 
         metrics = PerformanceMetrics(
             total_return=total_return,
@@ -100,295 +166,213 @@ class MetricsCalculator:
             max_drawdown=max_drawdown,
             sharpe_ratio=sharpe_ratio,
             volatility=volatility,
-            total_trades=len(trade_records),
-            buy_trades=buy_trades,
-            sell_trades=sell_trades,
-            win_rate=win_rate,
+            total_trades=len(trades),
+            buy_trades=int(trades.is_buy.sum()),
+            sell_trades=int(trades.is_sell.sum()),
+            win_rate=lot_ledger.win_rate,
             profit_loss_ratio=profit_loss_ratio,
-            grid_trigger_rate=grid_trigger_rate,
-            capital_utilization_rate=capital_utilization_rate
+            grid_trigger_rate=np.unique(trades.price).size / grid_count if grid_count > 0 else 0.0,
+            capital_utilization_rate=self._capital_utilization_from_arrays(trades, days, initial_capital)
         )
 
+        # 计算基准对比
+        benchmark = self._calculate_benchmark(price_curve, total_return)
+
         return metrics, benchmark
 
-    def _calculate_total_return(self, initial: float, final: float) -> float:
-        """计算总收益率"""
-        return (final - initial) / initial
+    def _equity_arrays(self, equity_curve: Union[EquityCurve, List[Dict]]) -> tuple[np.ndarray, np.ndarray]:
+        """获取资产曲线的时间（int64 epoch秒）和总资产数组"""
+        if isinstance(equity_curve, EquityCurve):
+            return equity_curve.times, equity_curve.assets
+        times = np.array([point['time'] for point in equity_curve], dtype='datetime64[s]').astype(np.int64)
+        return times, self._asset_array(equity_curve)
 
-    def _calculate_annualized_return(self, total_return: float, trading_days: int) -> float:
-        """计算年化收益率"""
-        if trading_days == 0:
-            return 0.0
-        return total_return * (self.trading_days_per_year / trading_days)
+    def _capital_utilization_from_arrays(self, trades: TradeColumns, equity_days: np.ndarray,
+                                         initial_capital: float) -> float:
+        """
+        向量化计算时间加权的资金利用率
 
-    def _calculate_max_drawdown(self, equity_curve: List[Dict]) -> float:
-        """计算最大回撤"""
-        if not equity_curve:
-            return 0.0
+        资金利用率 = 1 - (时间加权平均现金余额 / 总资金)，每个现金状态（每日最后一笔交易后的现金余额）
+        持续到下一个状态，最后一个状态持续到回测结束。
 
-        peak = equity_curve[0]['total_asset']
-        max_dd = 0.0
+        Args:
+            trades: 列式交易记录
+            equity_days: 资产曲线每个点的日期（epoch天数）
+            initial_capital: 初始资金
+        """
+        if initial_capital <= 0 or not len(trades):
+            return 0.0
 
-        for point in equity_curve:
-            asset = point['total_asset']
-            peak = max(peak, asset)
-            drawdown = (peak - asset) / peak if peak > 0 else 0
-            max_dd = max(max_dd, drawdown)
+        # 没有资产曲线时无法确定时间范围，回退到简单平均
+        if not equity_days.size:
+            avg_cash = (initial_capital + trades.cash.sum()) / (len(trades) + 1)
+            return max(0.0, min(1.0, 1 - (avg_cash / initial_capital)))
 
-        return -max_dd  # 返回负值表示回撤
+        start_day, end_day = int(equity_days[0]), int(equity_days[-1])
 
-    def _calculate_volatility(self, daily_returns: List[float]) -> float:
-        """计算波动率（年化）"""
-        if len(daily_returns) < 2:
-            return 0.0
+        # 取每日最后一笔交易的现金余额（交易已按时间排序）
+        trade_days, cash = trades.days, trades.cash
+        last_of_day = np.append(trade_days[1:] != trade_days[:-1], True)
+        trade_days, cash = trade_days[last_of_day], cash[last_of_day]
 
-        std = np.std(daily_returns, ddof=1)
-        return std * np.sqrt(self.trading_days_per_year)
+        # 现金余额时间序列：回测开始日（当日有交易时取当日余额）+ 其余交易日
+        on_start = trade_days == start_day
+        start_cash = cash[on_start][0] if on_start.any() else initial_capital
+        timeline_days = np.append(start_day, trade_days[~on_start])
+        timeline_cash = np.append(start_cash, cash[~on_start])
 
-    def _calculate_sharpe_ratio(self, annualized_return: float, volatility: float) -> Optional[float]:
-        """计算夏普比率"""
-        if volatility == 0:
-            return None
+        total_days = end_day - start_day + 1
+        if timeline_days.size == 1:
+            avg_cash = float(timeline_cash[0])
+        elif total_days <= 0:
+            avg_cash = float(timeline_cash.mean())
+        else:
+            # 每个现金状态持续到下一个状态，最后一个状态持续到回测结束（含结束日）
+            durations = np.append(timeline_days[1:], end_day + 1) - timeline_days
+            weights = np.where(durations > 0, durations / total_days, 0.0)
+            avg_cash = float(np.dot(timeline_cash, weights))
 
-        return (annualized_return - self.risk_free_rate) / volatility
+        return max(0.0, min(1.0, 1 - (avg_cash / initial_capital)))
 
-    def _calculate_daily_returns(self, equity_curve: List[Dict]) -> List[float]:
-        """计算日收益率序列"""
-        if len(equity_curve) < 2:
-            return []
+    def calculate_rolling(self, equity_curve: EquityCurve, windows: Optional[List[int]] = None,
+                          resolution: str = 'daily') -> Dict:
+        """
+        计算滚动指标序列
 
-        returns = []
-        for i in range(1, len(equity_curve)):
-            prev_asset = equity_curve[i-1]['total_asset']
-            curr_asset = equity_curve[i]['total_asset']
-            if prev_asset > 0:
-                returns.append((curr_asset - prev_asset) / prev_asset)
+        滚动均值和方差由周期收益率的累积和（及平方累积和）相减得到，计算量和内存与窗口长度无关；
+        年化周期数按粒度确定：daily为年交易日数，intraday为年交易日数 × 平均每日K线数。
 
-        return returns
+        Args:
+            equity_curve: 资产曲线（按时间升序）
+            windows: 滚动窗口（周期数）列表，默认按粒度取DEFAULT_ROLLING_WINDOWS
+            resolution: 时间粒度（daily / intraday）
 
-    def _calculate_win_rate(self, trade_records: List[TradeRecord]) -> float:
-        """
-        计算配对交易胜率
-        
-        基于FIFO原则匹配买入和卖出交易，计算配对交易的胜率。
-        这种方法更适合网格交易策略，能够真实反映策略的盈利能力。
-        
         Returns:
-            float: 配对交易胜率 (0.0 - 1.0)
+            {'resolution', 'periods_per_year', 'windows', 'times', 'drawdown',
+             'rolling': {窗口: {'return', 'volatility', 'sharpe'}}}；
+            各序列与times等长，窗口未满的位置为NaN
         """
-        return self._calculate_paired_win_rate(trade_records)
-    
-    def _calculate_paired_win_rate(self, trade_records: List[TradeRecord]) -> float:
+        if resolution not in ROLLING_RESOLUTIONS:
+            raise ValueError(f"滚动指标粒度必须是以下之一：{', '.join(ROLLING_RESOLUTIONS)}")
+        windows = list(windows or DEFAULT_ROLLING_WINDOWS[resolution])
+        if any(not 2 <= window <= MAX_ROLLING_WINDOW_SIZE for window in windows):
+            raise ValueError(f"滚动窗口必须在2-{MAX_ROLLING_WINDOW_SIZE}之间")
+
+        times, assets = equity_curve.times, equity_curve.assets
+        days = times // 86400
+        day_count = int(np.count_nonzero(np.diff(days))) + 1 if days.size else 0
+        if resolution == 'daily':
+            # 每个交易日最后一个资产点
+            day_end = np.append(days[1:] != days[:-1], True) if days.size else np.empty(0, dtype=bool)
+            times, assets = times[day_end], assets[day_end]
+            periods_per_year = self.trading_days_per_year
+        else:
+            bars_per_day = round(len(assets) / day_count) if day_count else 1
+            periods_per_year = self.trading_days_per_year * max(bars_per_day, 1)
+
+        # 回撤曲线（水下曲线）：相对历史峰值的跌幅，非正
+        peaks = np.maximum.accumulate(assets) if assets.size else assets
+        drawdown = np.divide(assets - peaks, peaks, out=np.zeros_like(assets), where=peaks > 0)
+
+        # 周期收益率：returns[i]为第i个点到第i+1个点的收益率
+        prev_assets = assets[:-1]
+        returns = np.divide(assets[1:] - prev_assets, prev_assets,
+                            out=np.zeros_like(prev_assets), where=prev_assets > 0)
+        # 去均值后再做平方累积和，降低方差相减时的舍入误差
+        centered = returns - returns.mean() if returns.size else returns
+        sums = np.concatenate(([0.0], np.cumsum(centered)))
+        square_sums = np.concatenate(([0.0], np.cumsum(centered * centered)))
+
+        rolling = {}
+        for window in windows:
+            series = {name: np.full(len(assets), np.nan) for name in ('return', 'volatility', 'sharpe')}
+            if window <= returns.size:
+                # 第i个窗口为returns[i:i+window]，结束于第i+window个点
+                centered_sum = sums[window:] - sums[:-window]
+                mean = centered_sum / window + (returns.mean() if returns.size else 0.0)
+                variance = np.maximum(
+                    (square_sums[window:] - square_sums[:-window] - centered_sum * centered_sum / window) / (window - 1),
+                    0.0
+                )
+                # 舍入残差（收益率恒定的窗口）视为零方差
+                variance[variance < 1e-20] = 0.0
+                volatility = np.sqrt(variance * periods_per_year)
+                start = assets[:-window]
+                series['return'][window:] = np.divide(assets[window:] - start, start,
+                                                      out=np.zeros_like(start), where=start > 0)
+                series['volatility'][window:] = volatility
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    series['sharpe'][window:] = np.where(
+                        volatility > 0, (mean * periods_per_year - self.risk_free_rate) / volatility, np.nan
+                    )
+            rolling[window] = series
+
+        return {
+            'resolution': resolution,
+            'periods_per_year': periods_per_year,
+            'windows': windows,
+            'times': times,
+            'drawdown': drawdown,
+            'rolling': rolling
+        }
+
+    def risk_from_return_moments(self, annualized_return: float, count: int, total: float,
+                                 square_total: float) -> tuple[float, Optional[float]]:
         """
-        配对交易胜率计算
-        
-        使用FIFO（先进先出）原则匹配买入和卖出交易：
-        1. 按时间排序所有交易
-        2. 维护买入队列，每次卖出时从最早的买入开始匹配
-        3. 计算每个配对的净盈亏（包含双向手续费）
-        4. 统计盈利配对的比例
-        
+        由周期收益率的个数、和与平方和计算年化波动率和夏普比率
+
+        与calculate_all口径一致（样本标准差 × √年交易日数），用于分段累计收益率、不保留完整资产曲线的场景。
+
         Args:
-            trade_records: 交易记录列表
-            
+            annualized_return: 年化收益率
+            count: 收益率个数
+            total: 收益率之和
+            square_total: 收益率平方和
+
         Returns:
-            float: 配对交易胜率
+            (波动率, 夏普比率)
         """
-        if not trade_records:
-            return 0.0
-        
-        # 按时间排序交易记录
-        sorted_trades = sorted(trade_records, key=lambda x: x.time)
-        
-        # 买入队列：存储 (买入价格, 数量, 手续费)
-        buy_queue = []
-        paired_profits = []
-        
-        for trade in sorted_trades:
-            if trade.type == 'BUY':
-                # 买入交易加入队列
-                buy_queue.append({
-                    'price': trade.price,
-                    'quantity': trade.quantity,
-                    'commission': trade.commission,
-                    'time': trade.time
-                })
-            
-            elif trade.type == 'SELL' and buy_queue:
-                # 卖出交易，与买入队列配对
-                sell_quantity = trade.quantity
-                sell_price = trade.price
-                sell_commission = trade.commission
-                
-                # 从最早的买入开始匹配
-                while sell_quantity > 0 and buy_queue:
-                    buy_record = buy_queue[0]
-                    
-                    # 确定本次配对的数量
-                    paired_quantity = min(sell_quantity, buy_record['quantity'])
-                    
-                    # 计算配对交易的净盈亏
-                    buy_cost = buy_record['price'] * paired_quantity
-                    sell_revenue = sell_price * paired_quantity
-                    
-                    # 按比例分摊手续费
-                    buy_commission_portion = (buy_record['commission'] * 
-                                            paired_quantity / buy_record['quantity'])
-                    sell_commission_portion = (sell_commission * 
-                                             paired_quantity / trade.quantity)
-                    
-                    # 净盈亏 = 卖出收入 - 买入成本 - 总手续费
-                    net_profit = (sell_revenue - buy_cost - 
-                                buy_commission_portion - sell_commission_portion)
-                    
-                    paired_profits.append(net_profit)
-                    
-                    # 更新队列和剩余数量
-                    buy_record['quantity'] -= paired_quantity
-                    sell_quantity -= paired_quantity
-                    
-                    # 如果买入记录已完全匹配，从队列中移除
-                    if buy_record['quantity'] == 0:
-                        buy_queue.pop(0)
-        
-        # 计算胜率
-        if not paired_profits:
+        volatility = 0.0
+        if count >= 2:
+            variance = max((square_total - total * total / count) / (count - 1), 0.0)
+            volatility = float(np.sqrt(variance)) * np.sqrt(self.trading_days_per_year)
+        return volatility, self._calculate_sharpe_ratio(annualized_return, volatility)
+
+    def _calculate_total_return(self, initial: float, final: float) -> float:
+        """计算总收益率"""
+        return (final - initial) / initial
+
+    def _calculate_annualized_return(self, total_return: float, trading_days: int) -> float:
+        """计算年化收益率"""
+        if trading_days == 0:
             return 0.0
-        
-        profitable_pairs = sum(1 for profit in paired_profits if profit > 0)
-        total_pairs = len(paired_profits)
-        
-        return profitable_pairs / total_pairs
-
-    def _calculate_profit_loss_ratio(self, trade_records: List[TradeRecord]) -> Optional[float]:
-        """计算盈亏比"""
-        profits = [t.profit for t in trade_records if t.profit is not None and t.profit > 0]
-        losses = [abs(t.profit) for t in trade_records if t.profit is not None and t.profit < 0]
-
-        if not profits or not losses:
-            return None
+        return total_return * (self.trading_days_per_year / trading_days)
 
-        avg_profit = sum(profits) / len(profits)
-        avg_loss = sum(losses) / len(losses)
+    def _calculate_sharpe_ratio(self, annualized_return: float, volatility: float) -> Optional[float]:
+        """计算夏普比率"""
+        if volatility == 0:
+            return None
 
-        return avg_profit / avg_loss if avg_loss > 0 else None
+        return (annualized_return - self.risk_free_rate) / volatility
 
-    def _calculate_grid_trigger_rate(self, trade_records: List[TradeRecord],
-                                    grid_count: int) -> float:
-        """计算网格触发率"""
-        triggered_prices = set(t.price for t in trade_records)
-        return len(triggered_prices) / grid_count if grid_count > 0 else 0.0
+    def _asset_array(self, equity_curve: Union[EquityCurve, List[Dict]]) -> np.ndarray:
+        """获取总资产数组（EquityCurve直接读取缓冲区）"""
+        if isinstance(equity_curve, EquityCurve):
+            return equity_curve.assets
+        return np.array([point['total_asset'] for point in equity_curve], dtype=np.float64)
 
-    def _calculate_capital_utilization_rate(self, trade_records: List[TradeRecord],
-                                          equity_curve: List[Dict], 
-                                          initial_capital: float) -> float:
-        """
-        计算时间加权的资金利用率
-        
-        资金利用率 = 1 - (时间加权平均现金余额 / 总资金)
-        
-        使用时间加权方式计算平均现金余额，考虑每个现金状态持续的时间长度。
-        时间单位按天计算，同一天内的交易取平均值。
-        
-        Args:
-            trade_records: 交易记录，包含每次交易后的现金余额
-            equity_curve: 资产曲线，用于确定回测时间范围
-            initial_capital: 初始资金
-            
-        Returns:
-            float: 资金利用率 (0.0 - 1.0)
-        """
-        if initial_capital <= 0:
-            return 0.0
-        
-        # 如果没有交易记录，利用率为0（未投资）
-        if not trade_records:
-            return 0.0
-        
-        # 如果没有资产曲线，无法确定时间范围，回退到简单平均
-        if not equity_curve:
-            cash_samples = [initial_capital] + [trade.cash for trade in trade_records]
-            avg_cash = sum(cash_samples) / len(cash_samples)
-            return max(0.0, min(1.0, 1 - (avg_cash / initial_capital)))
-        
-        # 确定回测时间范围
-        start_time = equity_curve[0]['time']
-        end_time = equity_curve[-1]['time']
-        
-        # 按时间排序交易记录
-        sorted_trades = sorted(trade_records, key=lambda x: x.time)
-        
-        # 构建现金余额时间序列：[(日期, 现金余额)]
-        cash_timeline = []
-        
-        # 添加初始状态（回测开始时的现金）
-        start_date = start_time.date()
-        cash_timeline.append((start_date, initial_capital))
-        
-        # 按天聚合交易记录，同一天内取最后的现金余额
-        daily_cash = {}
-        for trade in sorted_trades:
-            trade_date = trade.time.date()
-            daily_cash[trade_date] = trade.cash
-        
-        # 将每日现金余额添加到时间序列
-        for date, cash in sorted(daily_cash.items()):
-            # 如果与起始日期相同，更新起始现金；否则添加新记录
-            if date == start_date:
-                cash_timeline[0] = (date, cash)
-            else:
-                cash_timeline.append((date, cash))
-        
-        # 计算时间加权平均现金余额
-        if len(cash_timeline) == 1:
-            # 只有一个时间点，直接使用该现金余额
-            time_weighted_avg_cash = cash_timeline[0][1]
-        else:
-            total_weighted_cash = 0.0
-            end_date = end_time.date()
-            total_days = (end_date - start_date).days + 1
-            
-            if total_days <= 0:
-                # 时间范围异常，回退到简单平均
-                cash_values = [cash for _, cash in cash_timeline]
-                time_weighted_avg_cash = sum(cash_values) / len(cash_values)
-            else:
-                # 计算每个时间段的加权现金
-                for i in range(len(cash_timeline)):
-                    current_date, current_cash = cash_timeline[i]
-                    
-                    # 确定当前状态的结束日期
-                    if i < len(cash_timeline) - 1:
-                        next_date = cash_timeline[i + 1][0]
-                        period_end = next_date
-                    else:
-                        # 最后一个状态持续到回测结束
-                        period_end = end_date + timedelta(days=1)  # 包含结束日期
-                    
-                    # 计算持续天数
-                    duration_days = (period_end - current_date).days
-                    
-                    # 确保持续天数为正
-                    if duration_days > 0:
-                        weight = duration_days / total_days
-                        total_weighted_cash += current_cash * weight
-                
-                time_weighted_avg_cash = total_weighted_cash
-        
-        # 资金利用率 = 1 - (时间加权平均现金余额 / 总资金)
-        utilization_rate = 1 - (time_weighted_avg_cash / initial_capital)
-        
-        # 确保利用率在合理范围内 (0-1)
-        return max(0.0, min(1.0, utilization_rate))
-
-    def _calculate_benchmark(self, price_curve: List[Dict],
+    def _calculate_benchmark(self, price_curve: Union[KBarSeries, List[Dict]],
                            grid_return: float) -> BenchmarkComparison:
         """计算基准对比"""
         if len(price_curve) < 2:
             return BenchmarkComparison(0.0, 0.0, 0.0)
 
-        initial_price = price_curve[0]['close']
-        final_price = price_curve[-1]['close']
+        if isinstance(price_curve, KBarSeries):
+            initial_price = float(price_curve.close[0])
+            final_price = float(price_curve.close[-1])
+        else:
+            initial_price = price_curve[0]['close']
+            final_price = price_curve[-1]['close']
 
         hold_return = (final_price - initial_price) / initial_price
         excess_return = grid_return - hold_return
@@ -399,15 +383,3 @@ class MetricsCalculator:
             excess_return=excess_return,
             excess_return_rate=excess_return_rate
         )
-
-    def _get_trading_days(self, equity_curve: List[Dict]) -> int:
-        """获取实际交易日数量"""
-        if not equity_curve:
-            return 0
-
-        # 通过时间戳计算交易日
-        dates = set()
-        for point in equity_curve:
-            dates.add(point['time'].date())
-
-        return len(dates)
\ No newline at end of file
@@ -4,9 +4,25 @@
 使用dataclass定义核心数据结构，确保类型安全和代码简洁。
 """
 
-from dataclasses import dataclass
-from typing import List, Literal
-from datetime import datetime
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Literal, Optional, Union
+from datetime import datetime, timedelta
+import numpy as np
+from .lot_ledger import LotLedger
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_seconds(time: datetime) -> int:
+    """将（无时区）datetime转换为epoch秒"""
+    return int((time - _EPOCH) // timedelta(seconds=1))
+
+
+def from_epoch_seconds(seconds: int) -> datetime:
+    """将epoch秒转换为（无时区）datetime"""
+    return _EPOCH + timedelta(seconds=int(seconds))
 
 
 @dataclass
@@ -20,7 +36,145 @@ class KBar:
     volume: int
 
 
-@dataclass
+@dataclass(eq=False)
+class KBarSeries:
+    """
+    列式K线序列（struct-of-arrays）
+
+    times为int64 epoch秒，OHLC和成交量为float64数组。切片返回共享底层
+    数组的视图，按下标访问或迭代时按需生成KBar，兼容List[KBar]调用方。
+    """
+    times: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __post_init__(self):
+        self.times = np.asarray(self.times, dtype=np.int64)
+        for field in ('open', 'high', 'low', 'close', 'volume'):
+            setattr(self, field, np.asarray(getattr(self, field), dtype=np.float64))
+
+    @classmethod
+    def empty(cls) -> 'KBarSeries':
+        """创建空序列"""
+        return cls(*(np.empty(0) for _ in range(6)))
+
+    @classmethod
+    def from_kbars(cls, kbars: Iterable[KBar]) -> 'KBarSeries':
+        """由KBar列表创建序列"""
+        kbars = list(kbars)
+        return cls(
+            times=np.array([k.time for k in kbars], dtype='datetime64[s]').astype(np.int64),
+            open=[k.open for k in kbars],
+            high=[k.high for k in kbars],
+            low=[k.low for k in kbars],
+            close=[k.close for k in kbars],
+            volume=[k.volume for k in kbars]
+        )
+
+    @classmethod
+    def concat(cls, parts: Iterable['KBarSeries']) -> 'KBarSeries':
+        """
+        按时间拼接多段K线序列（分段获取的长区间数据），重复时间的K线只保留首次出现的一根
+
+        Args:
+            parts: K线序列列表
+
+        Returns:
+            按时间升序的K线序列
+        """
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+
+        times = np.concatenate([part.times for part in parts])
+        # 稳定排序后去重，保证分段边界重叠时结果确定
+        order = np.argsort(times, kind='stable')
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = times[order][1:] != times[order][:-1]
+        order = order[keep]
+        return cls(times[order], *(
+            np.concatenate([getattr(part, column) for part in parts])[order]
+            for column in ('open', 'high', 'low', 'close', 'volume')
+        ))
+
+    @classmethod
+    def from_records(cls, rows: List[dict], time_field: str = 'date') -> 'KBarSeries':
+        """
+        由行情接口返回的行数据创建序列，并按时间升序排列
+
+        Args:
+            rows: 行数据列表，时间格式为 YYYY-MM-DD HH:MM:SS
+            time_field: 时间字段名
+
+        Returns:
+            K线序列
+        """
+        if not rows:
+            return cls.empty()
+
+        times = np.array([row[time_field] for row in rows], dtype='datetime64[s]').astype(np.int64)
+        order = np.argsort(times, kind='stable')
+        return cls(
+            times=times[order],
+            open=np.array([row['open'] for row in rows], dtype=np.float64)[order],
+            high=np.array([row['high'] for row in rows], dtype=np.float64)[order],
+            low=np.array([row['low'] for row in rows], dtype=np.float64)[order],
+            close=np.array([row['close'] for row in rows], dtype=np.float64)[order],
+            volume=np.array([row['volume'] for row in rows], dtype=np.float64)[order]
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[KBar, 'KBarSeries']:
+        if isinstance(index, slice):
+            if index.step not in (None, 1):
+                raise ValueError("KBarSeries仅支持连续切片")
+            return KBarSeries(self.times[index], self.open[index], self.high[index],
+                              self.low[index], self.close[index], self.volume[index])
+        return KBar(
+            time=from_epoch_seconds(self.times[index]),
+            open=float(self.open[index]),
+            high=float(self.high[index]),
+            low=float(self.low[index]),
+            close=float(self.close[index]),
+            volume=int(self.volume[index])
+        )
+
+    def __iter__(self) -> Iterator[KBar]:
+        for time, o, h, l, c, v in zip(self.datetimes.tolist(), self.open.tolist(), self.high.tolist(),
+                                        self.low.tolist(), self.close.tolist(), self.volume.tolist()):
+            yield KBar(time, o, h, l, c, int(v))
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        """datetime64[s]视图（零拷贝）"""
+        return self.times.view('datetime64[s]')
+
+    def slice_time(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> 'KBarSeries':
+        """
+        按时间范围切片（闭区间，零拷贝）
+
+        Args:
+            start: 开始时间，None表示不限
+            end: 结束时间，None表示不限
+
+        Returns:
+            K线序列视图
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.times, to_epoch_seconds(start), side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.times, to_epoch_seconds(end), side='right'))
+        return self[lo:hi]
+
+    def to_kbars(self) -> List[KBar]:
+        """转换为KBar列表"""
+        return list(self)
+
+
+@dataclass(slots=True)
 class TradeRecord:
     """交易记录"""
     time: datetime
@@ -31,6 +185,95 @@ class TradeRecord:
     profit: float | None
     position: int
     cash: float
+    # 成交所在的网格档位在策略price_levels中的下标（底仓、未提供价格水平或档位超出价格水平范围时为None）
+    grid_level: Optional[int] = None
+
+
+class EquityCurve:
+    """
+    资产曲线缓冲区
+
+    使用预分配的NumPy数组保存时间（int64 epoch秒）、总资产和价格，
+    避免逐K线创建字典。按下标访问或迭代时返回字典视图，兼容旧调用方。
+    """
+
+    __slots__ = ('_times', '_assets', '_prices', '_size')
+
+    def __init__(self, capacity: int = 0):
+        self._times = np.empty(capacity, dtype=np.int64)
+        self._assets = np.empty(capacity, dtype=np.float64)
+        self._prices = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    @classmethod
+    def from_arrays(cls, times: np.ndarray, assets: np.ndarray, prices: np.ndarray) -> 'EquityCurve':
+        """由整列数组创建资产曲线（不拷贝）"""
+        curve = cls(0)
+        curve._times = np.asarray(times, dtype=np.int64)
+        curve._assets = np.asarray(assets, dtype=np.float64)
+        curve._prices = np.asarray(prices, dtype=np.float64)
+        curve._size = len(curve._times)
+        return curve
+
+    def append(self, time: int, total_asset: float, price: float):
+        """追加资产曲线点，容量不足时倍增扩容"""
+        if self._size == len(self._times):
+            capacity = max(16, 2 * self._size)
+            self._times = np.resize(self._times, capacity)
+            self._assets = np.resize(self._assets, capacity)
+            self._prices = np.resize(self._prices, capacity)
+        self._times[self._size] = time
+        self._assets[self._size] = total_asset
+        self._prices[self._size] = price
+        self._size += 1
+
+    def extend(self, times: np.ndarray, assets: np.ndarray, prices: np.ndarray):
+        """批量追加资产曲线点"""
+        count = len(times)
+        required = self._size + count
+        if required > len(self._times):
+            capacity = max(16, 2 * self._size, required)
+            self._times = np.resize(self._times, capacity)
+            self._assets = np.resize(self._assets, capacity)
+            self._prices = np.resize(self._prices, capacity)
+        self._times[self._size:required] = times
+        self._assets[self._size:required] = assets
+        self._prices[self._size:required] = prices
+        self._size = required
+
+    @property
+    def times(self) -> np.ndarray:
+        """时间（int64 epoch秒）"""
+        return self._times[:self._size]
+
+    @property
+    def assets(self) -> np.ndarray:
+        """总资产"""
+        return self._assets[:self._size]
+
+    @property
+    def prices(self) -> np.ndarray:
+        """价格"""
+        return self._prices[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("资产曲线下标越界")
+        return {
+            'time': from_epoch_seconds(self._times[index]),
+            'total_asset': float(self._assets[index]),
+            'price': float(self._prices[index])
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for time, asset, price in zip(self.times.view('datetime64[s]').tolist(),
+                                      self.assets.tolist(), self.prices.tolist()):
+            yield {'time': time, 'total_asset': asset, 'price': price}
 
 
 @dataclass
@@ -45,6 +288,41 @@ class BacktestState:
     peak_asset: float             # 峰值资产
     price_lower: float            # 价格下限
     price_upper: float            # 价格上限
+    ledger: LotLedger = field(default_factory=LotLedger)  # FIFO持仓批次账本
+    grid_index: Optional[int] = None  # 当前基准价所在的网格档位（价格水平升序位置，未提供价格水平时为None）
+
+
+@dataclass(eq=False)
+class BacktestStateVector:
+    """多策略回测状态（每个字段为长度N的数组，第k个元素对应第k个策略）"""
+    cash: np.ndarray               # 可用资金
+    position: np.ndarray           # 持仓股数（float64存储，整数值精确表示）
+    base_price: np.ndarray         # 当前基准价
+    buy_price: np.ndarray          # 当前买入点
+    sell_price: np.ndarray         # 当前卖出点
+    total_asset: np.ndarray        # 总资产
+    peak_asset: np.ndarray         # 峰值资产
+    price_lower: np.ndarray        # 价格下限
+    price_upper: np.ndarray        # 价格上限
+    grid_index: np.ndarray         # 当前基准价所在的网格档位（NaN表示未提供价格水平）
+
+    @classmethod
+    def from_states(cls, states: List[BacktestState]) -> 'BacktestStateVector':
+        """由单策略状态列表创建（持仓批次账本不向量化，由调用方按策略保存）"""
+        return cls(*(
+            np.array([getattr(state, name) for state in states], dtype=np.float64)
+            for name in cls.__dataclass_fields__
+        ))
+
+    def __len__(self) -> int:
+        return len(self.cash)
+
+    def to_state(self, index: int, ledger: Optional[LotLedger] = None) -> BacktestState:
+        """取出第index个策略的状态（ledger为该策略的持仓批次账本，未提供时为空账本）"""
+        values = {name: float(getattr(self, name)[index]) for name in self.__dataclass_fields__}
+        values['position'] = int(values['position'])
+        values['grid_index'] = None if math.isnan(values['grid_index']) else int(values['grid_index'])
+        return BacktestState(**values, ledger=ledger if ledger is not None else LotLedger())
 
 
 @dataclass
@@ -53,4 +331,5 @@ class BacktestConfig:
     commission_rate: float = 0.0002   # 手续费率
     min_commission: float = 5.0        # 最低收费
     risk_free_rate: float = 0.03       # 无风险利率
-    trading_days_per_year: int = 244   # 年交易日数
\ No newline at end of file
+    trading_days_per_year: int = 244   # 年交易日数
+    engine: Literal['vectorized', 'reference'] = 'vectorized'  # 回测引擎
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+蒙特卡洛稳健性检验
+
+按交易日对历史K线做分块自助重采样（block bootstrap）：随机抽取连续若干个交易日为一块，
+拼接成与历史等长的合成路径。每根K线按其相对前一根收盘价的比例重建价格，保留日内走势、
+隔夜跳空和块内的日间相关性。路径生成为整列数组运算，每条路径使用独立的随机数种子，
+结果与进程调度无关、可复现。
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .models import KBarSeries
+
+# 单次检验的路径数上限与默认值
+MAX_MONTE_CARLO_PATHS = 1000
+DEFAULT_MONTE_CARLO_PATHS = 200
+
+# 默认分块交易日数
+DEFAULT_BLOCK_DAYS = 5
+
+# 每个进程池任务包含的路径数
+MONTE_CARLO_BATCH_SIZE = 8
+
+# 分布统计的分位数
+MONTE_CARLO_PERCENTILES = (5, 25, 50, 75, 95)
+
+SECONDS_PER_DAY = 86400
+
+
+def day_offsets(series: KBarSeries) -> np.ndarray:
+    """
+    按日期分组K线
+
+    Returns:
+        长度为 交易日数 + 1 的下标数组，第i个交易日的K线为 [offsets[i], offsets[i + 1])
+    """
+    days = series.times // SECONDS_PER_DAY
+    starts = np.flatnonzero(np.diff(days)) + 1
+    return np.concatenate([[0], starts, [len(series)]])
+
+
+class BootstrapPathGenerator:
+    """分块自助重采样路径生成器"""
+
+    def __init__(self, series: KBarSeries, block_days: int = DEFAULT_BLOCK_DAYS):
+        """
+        Args:
+            series: 历史K线序列
+            block_days: 每块连续交易日数（超过历史交易日数时取历史交易日数）
+        """
+        if not len(series):
+            raise ValueError("K线数据为空")
+        if block_days < 1:
+            raise ValueError("分块交易日数必须大于0")
+
+        self.series = series
+        self.offsets = day_offsets(series)
+        self.day_count = len(self.offsets) - 1
+        self.block_days = min(block_days, self.day_count)
+
+        # 每根K线的开高低收相对前一根收盘价的比例（首根相对自身开盘价）
+        previous_close = np.concatenate([[series.open[0]], series.close[:-1]])
+        self._ratios = np.stack([series.open, series.high, series.low, series.close]) / previous_close
+        self._day_counts = np.diff(self.offsets)
+        # 时间由 历史第k个交易日的日期 + 源K线的日内时间 组成，保证合成路径时间递增
+        self._time_of_day = series.times % SECONDS_PER_DAY
+        self._day_dates = series.times[self.offsets[:-1]] - self._time_of_day[self.offsets[:-1]]
+
+    def generate(self, rng: np.random.Generator) -> KBarSeries:
+        """
+        生成一条合成路径（交易日数与历史一致，以历史首根K线开盘价为起点）
+
+        Args:
+            rng: 随机数生成器
+
+        Returns:
+            合成K线序列
+        """
+        # 1. 随机抽取块起始交易日，展开为交易日序列
+        block_count = math.ceil(self.day_count / self.block_days)
+        block_starts = rng.integers(0, self.day_count - self.block_days + 1, block_count)
+        days = (block_starts[:, None] + np.arange(self.block_days)).ravel()[:self.day_count]
+
+        # 2. 交易日序列展开为源K线下标
+        counts = self._day_counts[days]
+        within_day = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        index = np.repeat(self.offsets[days], counts) + within_day
+
+        # 3. 按比例链式重建价格
+        ratios = self._ratios[:, index]
+        close = self.series.open[0] * np.cumprod(ratios[3])
+        previous_close = np.concatenate([[self.series.open[0]], close[:-1]])
+        open_, high, low = ratios[:3] * previous_close
+
+        # 4. 时间取历史交易日日期 + 源K线日内时间（合成路径的第k个交易日对应历史第k个交易日）
+        times = np.repeat(self._day_dates[:len(days)], counts) + self._time_of_day[index]
+
+        return KBarSeries(
+            times,
+            np.round(open_, 4), np.round(high, 4), np.round(low, 4), np.round(close, 4),
+            self.series.volume[index]
+        )
+
+
+def path_seeds(path_count: int, seed: Optional[int] = None) -> Tuple[int, List[np.random.SeedSequence]]:
+    """
+    为每条路径派生独立的随机数种子
+
+    Args:
+        path_count: 路径数
+        seed: 根种子，None时随机生成
+
+    Returns:
+        (根种子熵值, 每条路径的SeedSequence列表)，使用相同根种子可复现全部路径
+    """
+    root = np.random.SeedSequence(seed)
+    return root.entropy, root.spawn(path_count)
+
+
+def summarize_distribution(values: Iterable[float], digits: int = 4) -> Dict:
+    """
+    计算样本分布统计
+
+    Returns:
+        均值、标准差、最小值、最大值和各分位数
+    """
+    values = np.asarray(list(values), dtype=np.float64)
+    if not values.size:
+        return {}
+
+    summary = {
+        'mean': round(float(values.mean()), digits),
+        'std': round(float(values.std()), digits),
+        'min': round(float(values.min()), digits),
+        'max': round(float(values.max()), digits)
+    }
+    for q, value in zip(MONTE_CARLO_PERCENTILES, np.percentile(values, MONTE_CARLO_PERCENTILES)):
+        summary[f'p{q}'] = round(float(value), digits)
+    return summary
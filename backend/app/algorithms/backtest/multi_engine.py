@@ -0,0 +1,308 @@
+"""
+多策略同步回测引擎
+
+将N个网格策略的回测状态保存为长度N的数组（BacktestStateVector），
+一次遍历K线同时推进所有策略：买卖判断、倍数计算、手续费和资金/持仓更新均为
+掩码数组运算，交易结果与逐K线的BacktestEngine逐笔一致。适用于参数扫描等
+同一K线序列上评估大量网格配置的场景。
+"""
+
+import math
+from typing import List, Dict, Optional, Union
+import numpy as np
+from .models import (
+    KBar, KBarSeries, EquityCurve, TradeRecord, BacktestStateVector, BacktestConfig,
+    from_epoch_seconds
+)
+from .lot_ledger import LotLedger
+from .trading_logic import TradingLogic
+from .fee_calculator import FeeCalculator
+from .trigger_index import TriggerIndex
+from .grid_ladder import TICKS_PER_UNIT, floor_ticks_array, ceil_ticks_array
+
+
+class MultiStrategyBacktestEngine:
+    """多策略同步回测引擎"""
+
+    def __init__(self, grid_strategies: List[dict], backtest_config: BacktestConfig, country: str = 'CHN'):
+        if not grid_strategies:
+            raise ValueError("策略列表为空")
+
+        self.grid_strategies = grid_strategies
+        self.config = backtest_config
+        self.country = country
+
+        # 所有策略共用手续费配置
+        self.fee_calc = FeeCalculator(
+            commission_rate=backtest_config.commission_rate,
+            min_commission=backtest_config.min_commission
+        )
+
+        # 每个策略的交易逻辑（用于初始建仓和网格档位查找，保证与单策略引擎一致）
+        self.trading_logics = [
+            TradingLogic(grid_config=strategy['grid_config'], fee_calculator=self.fee_calc, country=country,
+                         price_levels=strategy.get('price_levels'))
+            for strategy in grid_strategies
+        ]
+
+        # 网格参数向量
+        self.geometric = np.array([logic.grid_type != '等差' for logic in self.trading_logics])
+        self.step_ratio = np.array([logic.step_ratio for logic in self.trading_logics], dtype=np.float64)
+        self.single_quantity = np.array([logic.single_quantity for logic in self.trading_logics], dtype=np.float64)
+        # 网格阶梯参数：等差网格的步长tick数，等比网格的买卖点倍率（与GridLadder一致）
+        self.step_ticks = np.array([logic.ladder.step_ticks for logic in self.trading_logics], dtype=np.float64)
+        self._down = 1 - self.step_ratio
+        self._up = 1 + self.step_ratio
+
+        # 状态追踪
+        self.state: BacktestStateVector = None
+        self.trade_records: List[List[TradeRecord]] = [[] for _ in grid_strategies]
+        self.ledgers: List[LotLedger] = []
+
+    def run(self, kline_data: Union[KBarSeries, List[KBar]]) -> List[Dict]:
+        """
+        执行回测
+
+        Args:
+            kline_data: K线序列（或K线数据列表）
+
+        Returns:
+            每个策略的回测结果列表（结构与BacktestEngine.run一致）
+        """
+        if not kline_data:
+            raise ValueError("K线数据为空")
+
+        if not isinstance(kline_data, KBarSeries):
+            kline_data = KBarSeries.from_kbars(kline_data)
+
+        # 1. 逐策略执行初始底仓购买（使用第一根K线）
+        first_kbar = kline_data[0]
+        states = []
+        for k, (strategy, logic) in enumerate(zip(self.grid_strategies, self.trading_logics)):
+            fund_alloc = strategy['fund_allocation']
+            state, initial_trade = logic.execute_initial_position(
+                first_kbar=first_kbar,
+                base_position_amount=fund_alloc['base_position_amount'],
+                total_capital=fund_alloc['base_position_amount'] + fund_alloc['grid_trading_amount'],
+                strategy_base_price=strategy['current_price'],
+                price_lower=strategy['price_range']['lower'],
+                price_upper=strategy['price_range']['upper']
+            )
+            states.append(state)
+            if initial_trade:
+                self.trade_records[k].append(initial_trade)
+        self.state = BacktestStateVector.from_states(states)
+        self.ledgers = [state.ledger for state in states]
+
+        # 2. 同步推进所有策略
+        state = self.state
+        bar_count = len(kline_data)
+        strategy_count = len(state)
+        open_list, high_list = kline_data.open.tolist(), kline_data.high.tolist()
+        low_list, close_list = kline_data.low.tolist(), kline_data.close.tolist()
+
+        # 现金/持仓只在成交后变化：记录每段的起始K线与快照，最后批量展开资产曲线
+        segment_start = [0]
+        segment_cash = [state.cash.copy()]
+        segment_position = [state.position.copy()]
+        last_trade_index = np.full(strategy_count, -1)
+
+        # 按所有策略中最高的买入点和最低的卖出点，通过触发索引直接跳到下一根可能触发的K线
+        trigger_index = TriggerIndex(kline_data.low, kline_data.high)
+        buy_max, sell_min = state.buy_price.max(), state.sell_price.min()
+
+        i = -1
+        while True:
+            i = trigger_index.find_next(i + 1, buy_max, sell_min)
+            if i < 0:
+                break
+
+            low, high = low_list[i], high_list[i]
+            close = close_list[i]
+            tradable = (state.price_lower <= close) & (close <= state.price_upper)
+            buy_hit = state.buy_price >= low
+            buy_mask = tradable & buy_hit
+            sell_mask = tradable & ~buy_hit & (state.sell_price <= high)
+            if not (buy_mask.any() or sell_mask.any()):
+                continue
+
+            # 与逐K线引擎一致：先按收盘价更新总资产，再检查交易
+            state.total_asset = state.cash + state.position * close
+
+            # 交易价格：使用K线均价 (最高+最低+开盘+收盘)/4
+            trade_price = (high + low + open_list[i] + close) / 4
+            time = from_epoch_seconds(kline_data.times[i])
+            traded = [
+                self._execute_buys(np.flatnonzero(buy_mask), low, trade_price, time),
+                self._execute_sells(np.flatnonzero(sell_mask), high, trade_price, time)
+            ]
+            traded = np.concatenate(traded)
+            if not traded.size:
+                continue
+
+            last_trade_index[traded] = i
+            buy_max, sell_min = state.buy_price.max(), state.sell_price.min()
+            if i + 1 < bar_count:
+                segment_start.append(i + 1)
+                segment_cash.append(state.cash.copy())
+                segment_position.append(state.position.copy())
+
+        # 3. 批量生成资产曲线（按收盘价计算每根K线的总资产）
+        close = kline_data.close
+        lengths = np.diff(np.append(segment_start, bar_count))
+        cash = np.repeat(np.stack(segment_cash), lengths, axis=0)
+        position = np.repeat(np.stack(segment_position), lengths, axis=0)
+        assets = np.ascontiguousarray((cash + position * close[:, None]).T)
+        state.peak_asset = np.maximum(state.peak_asset, assets.max(axis=1))
+
+        # 最后一根K线未成交的策略，总资产按最后收盘价计算
+        idle = last_trade_index != bar_count - 1
+        state.total_asset[idle] = state.cash[idle] + state.position[idle] * float(close[-1])
+
+        return [
+            {
+                'trade_records': self.trade_records[k],
+                'equity_curve': EquityCurve.from_arrays(kline_data.times, assets[k], close),
+                'final_state': {
+                    'cash': float(state.cash[k]),
+                    'position': int(state.position[k]),
+                    'total_asset': float(state.total_asset[k])
+                },
+                'lot_ledger': self.ledgers[k],
+                'kline_data': kline_data
+            }
+            for k in range(strategy_count)
+        ]
+
+    def _execute_buys(self, candidates: np.ndarray, low: float, trade_price: float, time) -> np.ndarray:
+        """
+        批量执行买入（K线最低价 <= 买入点的策略）
+
+        Returns:
+            实际成交的策略下标
+        """
+        if not candidates.size:
+            return candidates
+
+        state = self.state
+        deviation = self._deviation(candidates, state.buy_price[candidates], low)
+        quantity = self.single_quantity[candidates] * (1 + deviation)
+
+        # 资金充足的策略才成交
+        cost = self.fee_calc.calculate_buy_cost_array(trade_price, quantity)
+        filled = state.cash[candidates] >= cost
+        index, quantity, cost = candidates[filled], quantity[filled], cost[filled]
+        if not index.size:
+            return index
+
+        # 成交记入基准档位下方一档，基准档位下移跨越的档位数（与TradingLogic._execute_buy一致）
+        commission = cost - trade_price * quantity
+        grid_index = (state.grid_index[index] - 1).tolist()
+        state.grid_index[index] -= 1 + deviation[filled]
+        state.cash[index] -= cost
+        state.position[index] += quantity
+        self._update_after_trade(index, trade_price)
+
+        for k, qty, fee, level in zip(index.tolist(), quantity.tolist(), commission.tolist(), grid_index):
+            self.ledgers[k].buy(trade_price, int(qty), fee)
+            self.trade_records[k].append(TradeRecord(
+                time=time,
+                type='BUY',
+                price=trade_price,
+                quantity=int(qty),
+                commission=fee,
+                profit=None,
+                position=int(state.position[k]),
+                cash=float(state.cash[k]),
+                grid_level=self._grid_level(k, level)
+            ))
+        return index
+
+    def _execute_sells(self, candidates: np.ndarray, high: float, trade_price: float, time) -> np.ndarray:
+        """
+        批量执行卖出（K线最高价 >= 卖出点的策略）
+
+        Returns:
+            实际成交的策略下标
+        """
+        if not candidates.size:
+            return candidates
+
+        state = self.state
+        deviation = self._deviation(candidates, high, state.sell_price[candidates])
+        quantity = self.single_quantity[candidates] * (1 + deviation)
+
+        # 持仓充足的策略才成交
+        filled = state.position[candidates] >= quantity
+        index, quantity = candidates[filled], quantity[filled]
+        if not index.size:
+            return index
+
+        # 成交记入基准档位上方一档，基准档位上移跨越的档位数（与TradingLogic._execute_sell一致）
+        income = self.fee_calc.calculate_sell_income_array(trade_price, quantity)
+        commission = trade_price * quantity - income
+        grid_index = (state.grid_index[index] + 1).tolist()
+        state.grid_index[index] += 1 + deviation[filled]
+
+        state.cash[index] += income
+        state.position[index] -= quantity
+        self._update_after_trade(index, trade_price)
+
+        # 已实现盈亏按各策略的FIFO账本配对（与TradingLogic._execute_sell一致）
+        for k, qty, fee, level in zip(index.tolist(), quantity.tolist(), commission.tolist(), grid_index):
+            self.trade_records[k].append(TradeRecord(
+                time=time,
+                type='SELL',
+                price=trade_price,
+                quantity=int(qty),
+                commission=fee,
+                profit=self.ledgers[k].sell(trade_price, int(qty), fee),
+                position=int(state.position[k]),
+                cash=float(state.cash[k]),
+                grid_level=self._grid_level(k, level)
+            ))
+        return index
+
+    def _grid_level(self, k: int, grid_index: float) -> Optional[int]:
+        """第k个策略档位对应的price_levels下标（档位为NaN表示该策略未提供价格水平）"""
+        if math.isnan(grid_index):
+            return None
+        return self.trading_logics[k].grid_level(int(grid_index))
+
+    def _deviation(self, index: np.ndarray, upper, lower) -> np.ndarray:
+        """
+        计算触发倍数（upper相对lower跨越的完整网格档位数，与GridLadder.levels_between一致）
+
+        等差网格按整数tick批量计算，等比网格逐个在策略的倍数阶梯中查找。
+        """
+        # 等比网格的步长tick为0，先按等差计算后再逐个覆盖
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deviation = np.maximum(
+                0, (floor_ticks_array(upper) - ceil_ticks_array(lower)) // self.step_ticks[index]
+            )
+
+        geometric = self.geometric[index]
+        if geometric.any():
+            upper = np.broadcast_to(upper, index.shape)
+            lower = np.broadcast_to(lower, index.shape)
+            for j in np.flatnonzero(geometric).tolist():
+                ladder = self.trading_logics[int(index[j])].ladder
+                deviation[j] = ladder.levels_between(float(upper[j]), float(lower[j]))
+        return deviation
+
+    def _update_after_trade(self, index: np.ndarray, trade_price: float):
+        """成交后更新基准价、网格买卖点、总资产和峰值资产"""
+        state = self.state
+        state.base_price[index] = trade_price
+
+        # 网格买卖点按整数tick计算（np.rint与Python round同为四舍六入五成双，与GridLadder.grid_ticks一致）
+        geometric = self.geometric[index]
+        base_ticks = np.rint(trade_price * TICKS_PER_UNIT)
+        step_ticks = self.step_ticks[index]
+        buy_ticks = np.where(geometric, np.rint(trade_price * self._down[index] * TICKS_PER_UNIT), base_ticks - step_ticks)
+        sell_ticks = np.where(geometric, np.rint(trade_price * self._up[index] * TICKS_PER_UNIT), base_ticks + step_ticks)
+        state.buy_price[index] = buy_ticks / TICKS_PER_UNIT
+        state.sell_price[index] = sell_ticks / TICKS_PER_UNIT
+
+        state.total_asset[index] = state.cash[index] + state.position[index] * trade_price
+        state.peak_asset[index] = np.maximum(state.peak_asset[index], state.total_asset[index])
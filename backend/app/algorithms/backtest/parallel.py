@@ -0,0 +1,130 @@
+"""
+回测并行执行工具
+
+将K线序列放入共享内存，在进程池中并行执行回测任务，
+工作进程直接映射共享内存中的数组，避免为每个任务序列化K线数据。
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+import numpy as np
+from .models import KBarSeries
+
+# 使用spawn启动工作进程：宿主进程（gunicorn工作进程）可能持有线程和锁，fork不安全
+POOL_START_METHOD = 'spawn'
+
+
+def default_worker_count() -> int:
+    """默认进程数（可通过环境变量BACKTEST_POOL_WORKERS配置）"""
+    return int(os.getenv('BACKTEST_POOL_WORKERS', min(4, os.cpu_count() or 1)))
+
+
+class SharedKBarSeries:
+    """
+    共享内存中的K线序列
+
+    内存布局：times(int64) 后接 open/high/low/close/volume(float64)，每列长度相同。
+    """
+
+    COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, series: KBarSeries):
+        length = len(series)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(8, 8 * 6 * length))
+        self.descriptor = (self._shm.name, length)
+
+        shared = _series_from_buffer(self._shm.buf, length)
+        shared.times[:] = series.times
+        for column in self.COLUMNS:
+            getattr(shared, column)[:] = getattr(series, column)
+
+    def close(self):
+        """释放并删除共享内存"""
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> 'SharedKBarSeries':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def attach_shared_series(descriptor: Tuple[str, int]) -> Tuple[shared_memory.SharedMemory, KBarSeries]:
+    """
+    在工作进程中映射共享内存中的K线序列
+
+    Returns:
+        (共享内存句柄, K线序列视图)，调用方需持有句柄直到不再使用序列
+    """
+    name, length = descriptor
+    shm = shared_memory.SharedMemory(name=name, track=False)
+    return shm, _series_from_buffer(shm.buf, length)
+
+
+def _series_from_buffer(buffer, length: int) -> KBarSeries:
+    times = np.ndarray((length,), dtype=np.int64, buffer=buffer, offset=0)
+    values = np.ndarray((5, length), dtype=np.float64, buffer=buffer, offset=8 * length)
+    return KBarSeries(times, *values)
+
+
+# 工作进程内的全局状态（由进程池initializer设置）
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_series: Optional[KBarSeries] = None
+_worker_context: Any = None
+
+
+def _init_worker(descriptor: Tuple[str, int], context: Any):
+    global _worker_shm, _worker_series, _worker_context
+    _worker_shm, _worker_series = attach_shared_series(descriptor)
+    _worker_context = context
+
+
+def _call_in_worker(func: Callable, task: Any) -> Any:
+    return func(_worker_series, _worker_context, task)
+
+
+def run_parallel(func: Callable[[KBarSeries, Any, Any], Any], tasks: Iterable[Any],
+                 series: KBarSeries, context: Any = None,
+                 max_workers: Optional[int] = None, max_pending: Optional[int] = None) -> Iterator[Any]:
+    """
+    在进程池中并行执行回测任务
+
+    Args:
+        func: 模块级任务函数 func(series, context, task)
+        tasks: 任务迭代器（按需消费）
+        series: K线序列（放入共享内存供所有任务复用）
+        context: 所有任务共享的只读上下文（每个工作进程只传递一次）
+        max_workers: 进程数，<=1时在当前进程顺序执行
+        max_pending: 最大在途任务数，默认为进程数的4倍
+
+    Yields:
+        任务结果（按完成顺序）
+    """
+    max_workers = default_worker_count() if max_workers is None else max_workers
+    if max_workers <= 1:
+        for task in tasks:
+            yield func(series, context, task)
+        return
+
+    max_pending = max_pending or max_workers * 4
+    mp_context = multiprocessing.get_context(POOL_START_METHOD)
+    with SharedKBarSeries(series) as shared, ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=mp_context,
+        initializer=_init_worker, initargs=(shared.descriptor, context)
+    ) as executor:
+        pending = set()
+        for task in tasks:
+            pending.add(executor.submit(_call_in_worker, func, task))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -0,0 +1,243 @@
+"""
+多标的组合回测
+
+将多个标的的5分钟K线按时间对齐为面板（T × N数组，缺失K线为NaN），
+所有标的的网格共用一个资金池，按时间顺序一次遍历面板：每一步用数组比较找出
+触发网格的标的，再由各标的的TradingLogic依次在共享现金上成交。
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List
+import numpy as np
+from .models import KBar, KBarSeries, EquityCurve, TradeRecord, BacktestConfig, from_epoch_seconds
+from .trading_logic import TradingLogic
+from .fee_calculator import FeeCalculator
+
+# 组合最大标的数
+MAX_PORTFOLIO_SYMBOLS = 20
+
+# 查找下一个触发时间点时每次比较的面板行数
+PANEL_SCAN_ROWS = 256
+
+
+@dataclass(eq=False)
+class PricePanel:
+    """时间对齐的多标的价格面板（第k列对应第k个标的）"""
+    times: np.ndarray      # 所有标的K线时间的并集（int64 epoch秒，升序）
+    open: np.ndarray       # 开盘价 (T, N)，缺失为NaN
+    high: np.ndarray       # 最高价 (T, N)
+    low: np.ndarray        # 最低价 (T, N)
+    close: np.ndarray      # 收盘价 (T, N)
+
+    @classmethod
+    def from_series(cls, series_list: List[KBarSeries]) -> 'PricePanel':
+        """
+        对齐多个K线序列
+
+        Args:
+            series_list: 各标的K线序列（按时间升序）
+
+        Returns:
+            价格面板
+        """
+        times = np.unique(np.concatenate([series.times for series in series_list]))
+        shape = (len(times), len(series_list))
+        columns = {name: np.full(shape, np.nan) for name in ('open', 'high', 'low', 'close')}
+
+        for k, series in enumerate(series_list):
+            rows = np.searchsorted(times, series.times)
+            for name, values in columns.items():
+                values[rows, k] = getattr(series, name)
+
+        return cls(times, **columns)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def symbol_count(self) -> int:
+        return self.close.shape[1]
+
+    def filled_close(self) -> np.ndarray:
+        """
+        用于估值的收盘价：缺失K线沿用前一根收盘价，首根K线之前使用首根收盘价
+        """
+        valid = ~np.isnan(self.close)
+        rows = np.where(valid, np.arange(len(self))[:, None], 0)
+        rows = np.maximum.accumulate(rows, axis=0)
+        # 首根有效K线之前的行指向首根有效K线
+        first_valid = valid.argmax(axis=0)
+        rows = np.where(np.arange(len(self))[:, None] < first_valid, first_valid, rows)
+        return np.take_along_axis(self.close, rows, axis=0)
+
+    def column(self, k: int) -> KBarSeries:
+        """取出第k个标的的K线序列（去除缺失行）"""
+        valid = ~np.isnan(self.close[:, k])
+        return KBarSeries(
+            self.times[valid], self.open[valid, k], self.high[valid, k],
+            self.low[valid, k], self.close[valid, k], np.zeros(int(valid.sum()))
+        )
+
+
+class PortfolioBacktestEngine:
+    """共享资金池的多标的组合回测引擎"""
+
+    def __init__(self, grid_strategies: List[dict], backtest_config: BacktestConfig, country: str = 'CHN'):
+        if not grid_strategies:
+            raise ValueError("组合标的列表为空")
+        if len(grid_strategies) > MAX_PORTFOLIO_SYMBOLS:
+            raise ValueError(f"组合标的数不能超过{MAX_PORTFOLIO_SYMBOLS}")
+
+        self.grid_strategies = grid_strategies
+        self.config = backtest_config
+        self.fee_calc = FeeCalculator(
+            commission_rate=backtest_config.commission_rate,
+            min_commission=backtest_config.min_commission
+        )
+        self.trading_logics = [
+            TradingLogic(grid_config=strategy['grid_config'], fee_calculator=self.fee_calc, country=country,
+                         price_levels=strategy.get('price_levels'))
+            for strategy in grid_strategies
+        ]
+
+        # 状态追踪
+        self.states = []
+        self.cash = 0.0
+        self.trade_records: List[List[TradeRecord]] = [[] for _ in grid_strategies]
+
+    def run(self, panel: PricePanel) -> Dict:
+        """
+        执行组合回测
+
+        Args:
+            panel: 价格面板（列顺序与grid_strategies一致）
+
+        Returns:
+            组合回测结果：组合资产曲线、共享现金，以及每个标的的交易记录、
+            分账资产曲线（分配资金 + 该标的累计现金流 + 持仓市值）和期末状态
+        """
+        if not len(panel):
+            raise ValueError("K线数据为空")
+        if panel.symbol_count != len(self.grid_strategies):
+            raise ValueError("价格面板标的数与策略数不一致")
+
+        symbol_count = panel.symbol_count
+        bar_count = len(panel)
+
+        # 1. 各标的使用首根有效K线执行初始底仓购买，剩余资金汇入共享资金池
+        capital = np.zeros(symbol_count)
+        sleeve_cash = np.zeros(symbol_count)
+        for k, (strategy, logic) in enumerate(zip(self.grid_strategies, self.trading_logics)):
+            fund_alloc = strategy['fund_allocation']
+            capital[k] = fund_alloc['base_position_amount'] + fund_alloc['grid_trading_amount']
+            first = int(np.argmax(~np.isnan(panel.close[:, k])))
+            if np.isnan(panel.close[first, k]):
+                raise ValueError(f"第{k + 1}个标的没有K线数据")
+            state, initial_trade = logic.execute_initial_position(
+                first_kbar=KBar(
+                    from_epoch_seconds(panel.times[first]), float(panel.open[first, k]),
+                    float(panel.high[first, k]), float(panel.low[first, k]), float(panel.close[first, k]), 0
+                ),
+                base_position_amount=fund_alloc['base_position_amount'],
+                total_capital=capital[k],
+                strategy_base_price=strategy['current_price'],
+                price_lower=strategy['price_range']['lower'],
+                price_upper=strategy['price_range']['upper']
+            )
+            self.states.append(state)
+            sleeve_cash[k] = state.cash
+            if initial_trade:
+                self.trade_records[k].append(initial_trade)
+        self.cash = float(sleeve_cash.sum())
+        for state in self.states:
+            state.cash = self.cash
+
+        # 2. 按时间顺序推进，数组比较定位下一个有标的触发网格的时间点
+        buy_price = np.array([state.buy_price for state in self.states])
+        sell_price = np.array([state.sell_price for state in self.states])
+        position = np.array([state.position for state in self.states], dtype=np.float64)
+
+        segment_start = [0]
+        segment_cash = [self.cash]
+        segment_position = [position.copy()]
+        segment_sleeve_cash = [sleeve_cash.copy()]
+
+        i = 0
+        while i < bar_count:
+            end = min(i + PANEL_SCAN_ROWS, bar_count)
+            # NaN（无K线）比较结果为False，不会触发
+            hits = (panel.low[i:end] <= buy_price) | (panel.high[i:end] >= sell_price)
+            rows = np.flatnonzero(hits.any(axis=1))
+            if not rows.size:
+                i = end
+                continue
+
+            t = i + int(rows[0])
+            traded = False
+            for k in np.flatnonzero(hits[rows[0]]).tolist():
+                if self._step(k, panel, t, sleeve_cash):
+                    state = self.states[k]
+                    buy_price[k], sell_price[k], position[k] = state.buy_price, state.sell_price, state.position
+                    traded = True
+
+            if traded and t + 1 < bar_count:
+                segment_start.append(t + 1)
+                segment_cash.append(self.cash)
+                segment_position.append(position.copy())
+                segment_sleeve_cash.append(sleeve_cash.copy())
+            i = t + 1
+
+        # 3. 批量生成组合与分账资产曲线
+        lengths = np.diff(np.append(segment_start, bar_count))
+        close = panel.filled_close()
+        holdings = np.repeat(np.stack(segment_position), lengths, axis=0) * close
+        assets = np.repeat(segment_cash, lengths) + holdings.sum(axis=1)
+        sleeve_assets = np.repeat(np.stack(segment_sleeve_cash), lengths, axis=0) + holdings
+
+        return {
+            'equity_curve': EquityCurve.from_arrays(panel.times, assets, np.zeros(bar_count)),
+            'final_state': {
+                'cash': self.cash,
+                'total_asset': float(assets[-1])
+            },
+            'symbols': [
+                {
+                    'initial_capital': float(capital[k]),
+                    'trade_records': self.trade_records[k],
+                    'equity_curve': EquityCurve.from_arrays(
+                        panel.times, np.ascontiguousarray(sleeve_assets[:, k]), close[:, k]
+                    ),
+                    'final_state': {
+                        'cash': float(sleeve_cash[k]),
+                        'position': int(position[k]),
+                        'total_asset': float(sleeve_assets[-1, k])
+                    },
+                    'lot_ledger': self.states[k].ledger
+                }
+                for k in range(symbol_count)
+            ]
+        }
+
+    def _step(self, k: int, panel: PricePanel, t: int, sleeve_cash: np.ndarray) -> bool:
+        """
+        第k个标的在第t行使用共享现金检查并执行交易
+
+        Returns:
+            是否成交
+        """
+        o, h, l, c = (float(values[t, k]) for values in (panel.open, panel.high, panel.low, panel.close))
+        state = self.states[k]
+        # 与单标的引擎一致：先按收盘价更新总资产，再检查交易
+        state.cash = self.cash
+        state.total_asset = self.cash + state.position * c
+
+        state, trade_record = self.trading_logics[k].check_and_execute(state, KBar(None, o, h, l, c, 0))
+        if not trade_record:
+            return False
+
+        trade_record.time = from_epoch_seconds(panel.times[t])
+        self.trade_records[k].append(trade_record)
+        sleeve_cash[k] += state.cash - self.cash
+        self.cash = state.cash
+        self.states[k] = state
+        return True
@@ -0,0 +1,136 @@
+"""
+网格参数扫描
+
+负责展开参数范围、生成参数组合，并以在线Top-K方式维护排名，
+保证大量候选参数的结果不会同时驻留内存。
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+# 支持扫描的自定义网格参数
+SWEEP_PARAMS = ('gridStepSize', 'singleTradeQuantity', 'priceLower', 'priceUpper', 'totalCapital')
+
+# 支持的排序指标（均为越大越好；最大回撤为负值）
+SWEEP_SORT_KEYS = ('total_return', 'annualized_return', 'sharpe_ratio', 'max_drawdown')
+
+# 单次扫描允许的最大参数组合数
+MAX_SWEEP_CANDIDATES = 5000
+
+# Top-K上限
+MAX_SWEEP_TOP_K = 100
+
+# 每个进程池任务包含的参数组合数（由多策略引擎一次遍历K线完成）
+SWEEP_BATCH_SIZE = 64
+
+
+def expand_range(spec: Union[float, List[float], Dict[str, float]]) -> List[float]:
+    """
+    展开参数范围
+
+    Args:
+        spec: 单个数值、数值列表，或 {'start', 'end', 'step'} 闭区间范围
+
+    Returns:
+        参数取值列表
+    """
+    if isinstance(spec, (int, float)):
+        return [spec]
+
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError("参数取值列表不能为空")
+        return list(spec)
+
+    if isinstance(spec, dict):
+        try:
+            start, end, step = float(spec['start']), float(spec['end']), float(spec['step'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("参数范围必须包含数值型start、end、step")
+        if step <= 0:
+            raise ValueError("参数范围step必须大于0")
+        if end < start:
+            raise ValueError("参数范围end不能小于start")
+
+        # 容忍浮点误差，保证end本身被包含
+        count = int(math.floor((end - start) / step + 1e-9)) + 1
+        if count > MAX_SWEEP_CANDIDATES:
+            raise ValueError(f"参数范围取值过多，最多{MAX_SWEEP_CANDIDATES}个")
+        return [round(start + i * step, 10) for i in range(count)]
+
+    raise ValueError("参数范围格式无效")
+
+
+class SweepGrid:
+    """
+    参数组合网格（按需生成组合）
+
+    价格下限不低于价格上限的组合不生成：size为实际生成的组合数，skipped为跳过的组合数。
+    """
+
+    def __init__(self, sweep_params: Dict[str, Any]):
+        unknown = set(sweep_params) - set(SWEEP_PARAMS)
+        if unknown:
+            raise ValueError(f"不支持扫描的参数: {', '.join(sorted(unknown))}")
+        if not sweep_params:
+            raise ValueError("扫描参数不能为空")
+
+        self.keys = [key for key in SWEEP_PARAMS if key in sweep_params]
+        self.values = [expand_range(sweep_params[key]) for key in self.keys]
+        total = math.prod(len(values) for values in self.values)
+        self.size = self._valid_count()
+        self.skipped = total - self.size
+        if not self.size:
+            raise ValueError("没有有效的参数组合：价格下限必须低于价格上限")
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _valid_count(self) -> int:
+        """有效组合数：价格上下限同时扫描时按有效的(下限, 上限)对计数，不展开全部组合"""
+        if 'priceLower' not in self.keys or 'priceUpper' not in self.keys:
+            return math.prod(len(values) for values in self.values)
+
+        lower_index, upper_index = self.keys.index('priceLower'), self.keys.index('priceUpper')
+        uppers = sorted(self.values[upper_index])
+        pairs = sum(len(uppers) - bisect.bisect_right(uppers, lower) for lower in self.values[lower_index])
+        others = math.prod(len(values) for i, values in enumerate(self.values) if i not in (lower_index, upper_index))
+        return pairs * others
+
+    def __iter__(self) -> Iterator[Dict[str, float]]:
+        for combination in itertools.product(*self.values):
+            params = dict(zip(self.keys, combination))
+            # 价格下限必须低于价格上限
+            if 'priceLower' in params and 'priceUpper' in params and params['priceLower'] >= params['priceUpper']:
+                continue
+            yield params
+
+
+class TopK:
+    """在线Top-K选择（最小堆，内存占用O(k)）"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+
+    def push(self, score: float, item: Any):
+        """加入候选，分数为None或NaN时视为最差"""
+        if score is None or math.isnan(score):
+            score = -math.inf
+        # 计数器作为第二排序键：同分时保留先加入的候选
+        entry = (score, -next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def results(self) -> List[Any]:
+        """按分数从高到低返回"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
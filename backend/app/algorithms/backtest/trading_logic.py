@@ -7,6 +7,8 @@
 from typing import Tuple, Optional, List
 from .models import BacktestState, KBar, TradeRecord
 from .fee_calculator import FeeCalculator
+from .grid_ladder import GridLadder
+import bisect
 import math
 from datetime import datetime
 
@@ -14,7 +16,8 @@ from datetime import datetime
 class TradingLogic:
     """网格交易逻辑"""
 
-    def __init__(self, grid_config: dict, fee_calculator: FeeCalculator, country: str = 'CHN'):
+    def __init__(self, grid_config: dict, fee_calculator: FeeCalculator, country: str = 'CHN',
+                 price_levels: Optional[List[float]] = None):
         self.grid_config = grid_config
         self.fee_calc = fee_calculator
         self.grid_type = grid_config['type']
@@ -22,9 +25,46 @@ class TradingLogic:
         self.step_ratio = grid_config.get('step_ratio', 0)
         self.single_quantity = grid_config['single_trade_quantity']
 
+        # 网格阶梯（整数tick买卖点，倍数计算使用整数运算/阶梯查找）
+        self.ladder = GridLadder(self.grid_type, self.step_size, self.step_ratio)
+
         # 获取最小交易单位（复用GridOptimizer的逻辑）
         self.min_trade_unit = 1 if country == 'USA' else 100
 
+        # 网格价格水平（升序）及其在price_levels中的下标，用于标记成交所属的网格档位
+        order = sorted(range(len(price_levels or [])), key=lambda i: price_levels[i])
+        self._level_order = order
+        self._sorted_levels = [price_levels[i] for i in order]
+
+    def initial_grid_index(self, base_price: float) -> Optional[int]:
+        """
+        建仓时基准价所在的网格档位：与基准价最接近的价格水平的升序位置
+
+        之后的档位不再按价格查找（每次成交后网格以成交价为新基准，买卖点会偏离静态价格水平），
+        而是按成交跨越的档位数整数推进，见check_and_execute。
+
+        Returns:
+            档位（价格水平升序位置，未提供价格水平时为None）
+        """
+        levels = self._sorted_levels
+        if not levels:
+            return None
+        i = bisect.bisect_left(levels, base_price)
+        if i == len(levels) or (i > 0 and base_price - levels[i - 1] <= levels[i] - base_price):
+            i -= 1
+        return i
+
+    def grid_level(self, grid_index: Optional[int]) -> Optional[int]:
+        """
+        将档位（价格水平升序位置）转换为price_levels中的下标
+
+        Returns:
+            价格水平在price_levels中的下标（未提供价格水平或档位超出价格水平范围时为None）
+        """
+        if grid_index is None or not 0 <= grid_index < len(self._level_order):
+            return None
+        return self._level_order[grid_index]
+
     def initialize_empty_position(self, base_price: float, total_capital: float,
                                  price_lower: float, price_upper: float) -> BacktestState:
         """
@@ -56,7 +96,8 @@ class TradingLogic:
             total_asset=total_asset,
             peak_asset=total_asset,
             price_lower=price_lower,
-            price_upper=price_upper
+            price_upper=price_upper,
+            grid_index=self.initial_grid_index(base_price)
         )
 
     def handle_price_deviation(self, state: BacktestState,
@@ -110,21 +151,13 @@ class TradingLogic:
         if kbar.close < state.price_lower or kbar.close > state.price_upper:
             return state, None
 
-        # 2. 计算下一个网格买卖点
-        next_buy_price, next_sell_price = self._calculate_grid_prices(state.base_price)
+        # 2. 下一个网格买卖点（基准价变化时已由网格阶梯计算），成交记入基准档位下方/上方一档
+        next_buy_price, next_sell_price = state.buy_price, state.sell_price
 
         # 3. 优先判断买入：K线最低价 <= 下一买点
         if kbar.low <= next_buy_price:
-            # 计算买入倍数
-            if self.grid_type == '等差':
-                deviation = math.floor(abs(next_buy_price - kbar.low) / self.step_size)
-            else:  # 等比
-                if kbar.low > 0 and next_buy_price > 0:
-                    deviation = math.floor(
-                        abs(math.log(next_buy_price / kbar.low)) / math.log(1 + self.step_ratio)
-                    )
-                else:
-                    deviation = 0
+            # 计算买入倍数（最低价跌破买入点的完整网格档位数）
+            deviation = self.ladder.levels_between(next_buy_price, kbar.low)
 
             # 交易价格：使用K线均价 (最高+最低+开盘+收盘)/4
             trade_price = (kbar.high + kbar.low + kbar.open + kbar.close) / 4
@@ -135,20 +168,12 @@ class TradingLogic:
             # 检查资金是否充足
             required_cash = self.fee_calc.calculate_buy_cost(trade_price, quantity)
             if state.cash >= required_cash:
-                return self._execute_buy(state, trade_price, quantity)
+                return self._execute_buy(state, trade_price, quantity, levels=1 + deviation)
 
         # 4. 买入不满足，判断卖出：K线最高价 >= 下一卖点
         elif kbar.high >= next_sell_price:
-            # 计算卖出倍数
-            if self.grid_type == '等差':
-                deviation = math.floor(abs(kbar.high - next_sell_price) / self.step_size)
-            else:  # 等比
-                if kbar.high > 0 and next_sell_price > 0:
-                    deviation = math.floor(
-                        abs(math.log(kbar.high / next_sell_price)) / math.log(1 + self.step_ratio)
-                    )
-                else:
-                    deviation = 0
+            # 计算卖出倍数（最高价突破卖出点的完整网格档位数）
+            deviation = self.ladder.levels_between(kbar.high, next_sell_price)
 
             # 交易价格：使用K线均价 (最高+最低+开盘+收盘)/4
             trade_price = (kbar.high + kbar.low + kbar.open + kbar.close) / 4
@@ -158,23 +183,32 @@ class TradingLogic:
 
             # 检查持仓是否充足
             if state.position >= quantity:
-                return self._execute_sell(state, trade_price, quantity)
+                return self._execute_sell(state, trade_price, quantity, levels=1 + deviation)
 
         # 未触发网格点，不交易
         return state, None
 
-    def _execute_buy(self, state: BacktestState,
-                    price: float, quantity: int = None) -> Tuple[BacktestState, TradeRecord]:
-        """执行买入（支持倍数委托）"""
+    def _execute_buy(self, state: BacktestState, price: float, quantity: int = None,
+                     levels: Optional[int] = None) -> Tuple[BacktestState, TradeRecord]:
+        """
+        执行买入（支持倍数委托）
+
+        levels为网格成交跨越的档位数：成交记入基准档位下方一档，基准档位随之下移levels档
+        """
         if quantity is None:
             quantity = self.single_quantity
+        grid_level = None
+        if levels is not None and state.grid_index is not None:
+            grid_level = self.grid_level(state.grid_index - 1)
+            state.grid_index -= levels
 
         cost = self.fee_calc.calculate_buy_cost(price, quantity)
         commission = cost - price * quantity
 
-        # 更新状态
+        # 更新状态（买入批次记入FIFO账本）
         state.cash -= cost
         state.position += quantity
+        state.ledger.buy(price, quantity, commission)
         state.base_price = price
         state.buy_price, state.sell_price = self._calculate_grid_prices(price)
         state.total_asset = state.cash + state.position * price
@@ -189,24 +223,31 @@ class TradingLogic:
             commission=commission,
             profit=None,
             position=state.position,
-            cash=state.cash
+            cash=state.cash,
+            grid_level=grid_level
         )
 
         return state, record
 
-    def _execute_sell(self, state: BacktestState,
-                      price: float, quantity: int = None) -> Tuple[BacktestState, TradeRecord]:
-        """执行卖出（支持倍数委托）"""
+    def _execute_sell(self, state: BacktestState, price: float, quantity: int = None,
+                      levels: Optional[int] = None) -> Tuple[BacktestState, TradeRecord]:
+        """
+        执行卖出（支持倍数委托）
+
+        levels为网格成交跨越的档位数：成交记入基准档位上方一档，基准档位随之上移levels档
+        """
         if quantity is None:
             quantity = self.single_quantity
+        grid_level = None
+        if levels is not None and state.grid_index is not None:
+            grid_level = self.grid_level(state.grid_index + 1)
+            state.grid_index += levels
 
         income = self.fee_calc.calculate_sell_income(price, quantity)
         commission = price * quantity - income
 
-        # 计算盈亏（需要找到对应的买入成本）
-        # 简化处理：用平均成本估算
-        avg_cost = (state.total_asset - state.cash) / state.position if state.position > 0 else price
-        profit = (price - avg_cost) * quantity - commission
+        # 已实现盈亏：按FIFO从最早的买入批次开始配对（含双向手续费）
+        profit = state.ledger.sell(price, quantity, commission)
 
         # 更新状态
         state.cash += income
@@ -225,21 +266,15 @@ class TradingLogic:
             commission=commission,
             profit=profit,
             position=state.position,
-            cash=state.cash
+            cash=state.cash,
+            grid_level=grid_level
         )
 
         return state, record
 
     def _calculate_grid_prices(self, base_price: float) -> Tuple[float, float]:
-        """计算网格买卖点"""
-        if self.grid_type == '等差':
-            buy_price = round(base_price - self.step_size, 4)
-            sell_price = round(base_price + self.step_size, 4)
-        else:  # 等比
-            buy_price = round(base_price * (1 - self.step_ratio), 4)
-            sell_price = round(base_price * (1 + self.step_ratio), 4)
-
-        return buy_price, sell_price
+        """计算网格买卖点（精度0.0001）"""
+        return self.ladder.grid_prices(base_price)
 
     def execute_initial_position(self, first_kbar: KBar, base_position_amount: float,
                                 total_capital: float, strategy_base_price: float,
@@ -315,11 +350,13 @@ class TradingLogic:
             total_asset=total_asset,
             peak_asset=total_asset,
             price_lower=price_lower,
-            price_upper=price_upper
+            price_upper=price_upper,
+            grid_index=self.initial_grid_index(strategy_base_price)
         )
 
-        # 8. 创建交易记录
+        # 8. 创建交易记录，底仓作为第一个持仓批次
         commission = cost - purchase_price * shares
+        state.ledger.buy(purchase_price, shares, commission)
         record = TradeRecord(
             time=first_kbar.time,
             type='BUY',
@@ -360,7 +397,8 @@ class TradingLogic:
             total_asset=total_capital,
             peak_asset=total_capital,
             price_lower=price_lower,
-            price_upper=price_upper
+            price_upper=price_upper,
+            grid_index=self.initial_grid_index(strategy_base_price)
         )
 
         return state, None
\ No newline at end of file
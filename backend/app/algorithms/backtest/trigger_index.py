@@ -0,0 +1,71 @@
+"""
+网格触发索引
+
+基于稀疏表（sparse table）的区间最小/最大值索引：对最低价建区间最小值表、对最高价建
+区间最大值表，给定当前买入点和卖出点，在O(log d)时间内找到下一根可能触发网格的K线
+（d为与起点的距离），回测引擎据此直接跳到触发K线。
+"""
+
+import numpy as np
+
+
+class TriggerIndex:
+    """网格触发索引（稀疏表）"""
+
+    def __init__(self, low: np.ndarray, high: np.ndarray):
+        """
+        构建索引，O(n log n)
+
+        Args:
+            low: 最低价数组（不可交易的K线应置为+inf）
+            high: 最高价数组（不可交易的K线应置为-inf）
+        """
+        self.size = len(low)
+
+        # 第k层第i个元素为区间[i, i + 2^k)的最小最低价/最大最高价
+        min_low = [np.asarray(low, dtype=np.float64)]
+        max_high = [np.asarray(high, dtype=np.float64)]
+        span = 1
+        while 2 * span <= self.size:
+            min_low.append(np.minimum(min_low[-1][:-span], min_low[-1][span:]))
+            max_high.append(np.maximum(max_high[-1][:-span], max_high[-1][span:]))
+            span *= 2
+
+        self.levels = len(min_low)
+        # 查询为逐元素标量访问：memoryview零拷贝，下标访问直接返回Python float，比NumPy数组下标快
+        self._min_low = [memoryview(np.ascontiguousarray(level)) for level in min_low]
+        self._max_high = [memoryview(np.ascontiguousarray(level)) for level in max_high]
+
+    def find_next(self, start: int, buy_price: float, sell_price: float) -> int:
+        """
+        查找start及之后第一根满足 最低价 <= 买入点 或 最高价 >= 卖出点 的K线
+
+        先按1、2、4...倍增跳过无触发的区间，再从大到小二分逼近。
+
+        Args:
+            start: 起始下标
+            buy_price: 当前买入点
+            sell_price: 当前卖出点
+
+        Returns:
+            触发K线下标，不存在时返回-1
+        """
+        size = self.size
+        min_low, max_high = self._min_low, self._max_high
+        position = start
+        level = 0
+
+        # 1. 倍增：区间[position, position + 2^level)无触发时整体跳过
+        while (level < self.levels and position + (1 << level) <= size and
+               min_low[level][position] > buy_price and max_high[level][position] < sell_price):
+            position += 1 << level
+            level += 1
+
+        # 2. 二分：剩余的无触发前缀长度小于2^level
+        while level > 0:
+            level -= 1
+            if (position + (1 << level) <= size and
+                    min_low[level][position] > buy_price and max_high[level][position] < sell_price):
+                position += 1 << level
+
+        return position if position < size else -1
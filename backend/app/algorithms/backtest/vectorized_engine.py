@@ -0,0 +1,131 @@
+"""
+向量化回测引擎
+
+基于列式OHLC数组（KBarSeries）的回测引擎：一次性预计算可交易掩码并构建触发索引，
+直接跳到下一根可能触发网格的K线，只在触发K线上调用TradingLogic，从而与逐K线的
+BacktestEngine保持逐笔一致的交易结果；跳过的K线批量生成资产曲线。
+"""
+
+from typing import Callable, List, Dict, Optional, Union
+import numpy as np
+from .models import KBar, KBarSeries, EquityCurve, from_epoch_seconds
+from .checkpoint import BacktestCheckpoint
+from .trigger_index import TriggerIndex
+from .engine import BacktestEngine
+
+
+class VectorizedBacktestEngine(BacktestEngine):
+    """向量化回测引擎"""
+
+    def run(self, kline_data: Union[KBarSeries, List[KBar]],
+            checkpoint: Optional[BacktestCheckpoint] = None,
+            progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        执行回测
+
+        Args:
+            kline_data: K线序列（或K线数据列表）
+            checkpoint: 回测检查点（可选），提供时从检查点恢复并只模拟其后的K线
+            progress: 进度回调（可选），推进每越过PROGRESS_INTERVAL根K线及结束时以
+                (已模拟K线数, 累计交易笔数) 调用
+
+        Returns:
+            回测结果（结构与BacktestEngine.run一致）
+        """
+        if not kline_data:
+            raise ValueError("K线数据为空")
+
+        # 1. 列式化K线数据
+        if not isinstance(kline_data, KBarSeries):
+            kline_data = KBarSeries.from_kbars(kline_data)
+        self._load_arrays(kline_data)
+
+        # 2. 从检查点恢复，或执行初始底仓购买（使用第一根K线）
+        start = self._restore_checkpoint(checkpoint, kline_data) if checkpoint else self._initialize(kline_data)
+
+        # 3. 逐个触发K线推进，两次触发之间的现金/持仓保持不变
+        bar_count = len(self._close)
+        segment_cash, segment_position, segment_length = [], [], []
+
+        open_list, high_list = kline_data.open.tolist(), kline_data.high.tolist()
+        low_list, close_list = kline_data.low.tolist(), kline_data.close.tolist()
+
+        last_trade_index = -1
+        buy_price, sell_price = self.state.buy_price, self.state.sell_price
+        next_report = (start // self.PROGRESS_INTERVAL + 1) * self.PROGRESS_INTERVAL
+        i = start
+        while i < bar_count:
+            j = self._find_next_trigger(i, buy_price, sell_price)
+            end = bar_count if j < 0 else j + 1
+
+            segment_cash.append(self.state.cash)
+            segment_position.append(self.state.position)
+            segment_length.append(end - i)
+
+            if j < 0:
+                break
+
+            # 与逐K线引擎一致：先按收盘价更新总资产，再检查交易
+            self.state.total_asset = self.state.cash + self.state.position * close_list[j]
+
+            # 交易判断只使用OHLC，成交时再生成K线时间
+            kbar = KBar(None, open_list[j], high_list[j], low_list[j], close_list[j], 0)
+            new_state, trade_record = self.trading_logic.check_and_execute(self.state, kbar)
+            if trade_record:
+                trade_record.time = from_epoch_seconds(kline_data.times[j])
+                self.trade_records.append(trade_record)
+                self.state = new_state
+                last_trade_index = j
+                buy_price, sell_price = self.state.buy_price, self.state.sell_price
+
+            i = j + 1
+            if progress is not None and i >= next_report:
+                progress(i, len(self.trade_records))
+                next_report = (i // self.PROGRESS_INTERVAL + 1) * self.PROGRESS_INTERVAL
+
+        if progress is not None:
+            progress(bar_count, len(self.trade_records))
+
+        # 4. 批量生成新模拟部分的资产曲线（按收盘价计算每根K线的总资产）
+        close = self._close[start:]
+        cash = np.repeat(np.asarray(segment_cash, dtype=np.float64), segment_length)
+        position = np.repeat(np.asarray(segment_position, dtype=np.float64), segment_length)
+        assets = cash + position * close
+        if assets.size:
+            self.state.peak_asset = max(self.state.peak_asset, float(assets.max()))
+            # 最后一根K线未成交时，总资产按最后收盘价计算
+            if last_trade_index != bar_count - 1:
+                self.state.total_asset = self.state.cash + self.state.position * float(self._close[-1])
+
+        if start:
+            assets = np.concatenate((self.equity_curve.assets, assets))
+        self.equity_curve = EquityCurve.from_arrays(kline_data.times, assets, self._close)
+        self._series = kline_data
+
+        return self._generate_result(kline_data)
+
+    def _load_arrays(self, kline_data: KBarSeries):
+        """读取列式数组，预计算可交易掩码并构建触发索引"""
+        self._close = kline_data.close
+
+        # 收盘价超出网格范围的K线不交易：将其最低价/最高价置为不可触发的哨兵值
+        price_range = self.grid_strategy['price_range']
+        tradable = (self._close >= price_range['lower']) & (self._close <= price_range['upper'])
+        self._trigger_index = TriggerIndex(
+            np.where(tradable, kline_data.low, np.inf),
+            np.where(tradable, kline_data.high, -np.inf)
+        )
+
+    def _find_next_trigger(self, start: int, buy_price: float, sell_price: float) -> int:
+        """
+        查找start及之后第一根可能触发网格的K线
+
+        Args:
+            start: 起始下标
+            buy_price: 当前买入点
+            sell_price: 当前卖出点
+
+        Returns:
+            触发K线下标，不存在时返回-1
+        """
+        return self._trigger_index.find_next(start, buy_price, sell_price)
@@ -0,0 +1,130 @@
+"""
+滚动前向（walk-forward）优化
+
+将长区间K线按交易日切分为滚动的样本内/样本外窗口：在每个样本内窗口上扫描网格参数
+选出最优组合，再在紧随其后的样本外窗口上用该组合回测，评估参数在未参与优化的数据上的表现。
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .models import KBarSeries, to_epoch_seconds
+
+# 样本内/样本外窗口交易日数范围
+MIN_WINDOW_DAYS = 5
+MAX_WINDOW_DAYS = 250
+
+# 回测区间最大自然日跨度（约5年）
+MAX_WALK_FORWARD_SPAN_DAYS = 1830
+
+# 窗口数上限
+MAX_WALK_FORWARD_WINDOWS = 200
+
+# 单次请求的回测总次数上限（窗口数 × 参数组合数）
+MAX_WALK_FORWARD_EVALUATIONS = 50000
+
+# 分段获取K线时每段的交易日数（单次请求不超过普通回测的区间上限）
+KLINE_FETCH_CHUNK_DAYS = 60
+
+
+@dataclass
+class WalkForwardWindow:
+    """滚动窗口（K线下标为左闭右开区间）"""
+    index: int                              # 窗口序号
+    in_sample: Tuple[int, int]              # 样本内K线下标范围
+    out_of_sample: Tuple[int, int]          # 样本外K线下标范围
+    in_sample_dates: Tuple[str, str]        # 样本内起止交易日
+    out_of_sample_dates: Tuple[str, str]    # 样本外起止交易日
+
+
+def day_bar_offsets(trading_days: List[str], series: KBarSeries) -> np.ndarray:
+    """
+    计算每个交易日第一根K线的下标
+
+    Args:
+        trading_days: 交易日列表（升序，YYYY-MM-DD）
+        series: K线序列
+
+    Returns:
+        长度为 len(trading_days) + 1 的下标数组，第i个交易日的K线为 [offsets[i], offsets[i + 1])
+    """
+    day_starts = [to_epoch_seconds(datetime.strptime(day, '%Y-%m-%d')) for day in trading_days]
+    offsets = np.searchsorted(series.times, day_starts, side='left')
+    return np.append(offsets, len(series))
+
+
+def split_windows(trading_days: List[str], series: KBarSeries, in_sample_days: int,
+                  out_of_sample_days: int, step_days: Optional[int] = None) -> List[WalkForwardWindow]:
+    """
+    按交易日切分滚动窗口
+
+    第k个窗口的样本内区间从第 k × step_days 个交易日开始，样本外区间紧随样本内区间；
+    样本内或样本外没有K线的窗口（如停牌）被跳过。
+
+    Args:
+        trading_days: 交易日列表（升序）
+        series: K线序列
+        in_sample_days: 样本内交易日数
+        out_of_sample_days: 样本外交易日数
+        step_days: 窗口滚动步长（交易日），默认等于样本外交易日数
+
+    Returns:
+        窗口列表
+    """
+    step_days = step_days or out_of_sample_days
+    if min(in_sample_days, out_of_sample_days, step_days) <= 0:
+        raise ValueError("窗口交易日数必须大于0")
+
+    offsets = day_bar_offsets(trading_days, series)
+    windows = []
+    start = 0
+    while start + in_sample_days + out_of_sample_days <= len(trading_days):
+        split = start + in_sample_days
+        end = split + out_of_sample_days
+        in_sample = (int(offsets[start]), int(offsets[split]))
+        out_of_sample = (int(offsets[split]), int(offsets[end]))
+        if in_sample[1] > in_sample[0] and out_of_sample[1] > out_of_sample[0]:
+            windows.append(WalkForwardWindow(
+                index=len(windows),
+                in_sample=in_sample,
+                out_of_sample=out_of_sample,
+                in_sample_dates=(trading_days[start], trading_days[split - 1]),
+                out_of_sample_dates=(trading_days[split], trading_days[end - 1])
+            ))
+        start += step_days
+
+    return windows
+
+
+def summarize_windows(rows: List[Dict]) -> Dict:
+    """
+    汇总各窗口样本外表现
+
+    Args:
+        rows: 窗口结果列表（成功的窗口包含in_sample.best与out_of_sample指标）
+
+    Returns:
+        汇总指标：样本外复合收益、平均收益、盈利窗口占比，以及前向效率
+        （样本外平均年化收益 / 样本内平均年化收益）
+    """
+    completed = [row for row in rows if 'error' not in row]
+    if not completed:
+        return {'completed_windows': 0, 'failed_windows': len(rows)}
+
+    oos_returns = [row['out_of_sample']['total_return'] for row in completed]
+    is_annualized = float(np.mean([row['in_sample']['best']['annualized_return'] for row in completed]))
+    oos_annualized = float(np.mean([row['out_of_sample']['annualized_return'] for row in completed]))
+
+    return {
+        'completed_windows': len(completed),
+        'failed_windows': len(rows) - len(completed),
+        'compounded_return': round(math.prod(1 + r for r in oos_returns) - 1, 4),
+        'avg_out_of_sample_return': round(float(np.mean(oos_returns)), 4),
+        'avg_in_sample_return': round(
+            float(np.mean([row['in_sample']['best']['total_return'] for row in completed])), 4
+        ),
+        'profitable_windows_ratio': round(sum(r > 0 for r in oos_returns) / len(oos_returns), 4),
+        'walk_forward_efficiency': round(oos_annualized / is_annualized, 4) if is_annualized > 0 else None
+    }
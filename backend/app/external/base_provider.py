@@ -2,12 +2,14 @@
 
 import os
 import abc
+import copy
 from typing import Dict, Optional
 from app.external.token_manager import TokenManager
 from app.external.http_client import HTTPClient
 from app.external.file_cache_manager import FileCacheManager
 from app.external.auth_strategy import AuthStrategy
 from app.external.exceptions import ConfigurationError
+from app.external.single_flight import SingleFlight, single_flight_key, file_lock, file_lock_path
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -16,6 +18,12 @@ logger = get_logger(__name__)
 class BaseProvider(abc.ABC):
     """外部API提供商基类"""
 
+    # 进程内并发请求合并（类级别共享：每次业务请求都会新建提供商实例）
+    _single_flight = SingleFlight()
+
+    # 等待其他调用方（本进程或其他工作进程）请求结果的超时秒数，需小于gunicorn的请求超时（TIMEOUT，默认30秒）
+    SINGLE_FLIGHT_TIMEOUT = float(os.getenv('EXTERNAL_API_SINGLE_FLIGHT_TIMEOUT', 20))
+
     def __init__(self, config_path: str, provider_name: str):
         """初始化提供商"""
         self.provider_name = provider_name
@@ -71,7 +79,13 @@ class BaseProvider(abc.ABC):
         use_cache: bool = True,
         **kwargs
     ) -> dict:
-        """调用外部API（统一入口）"""
+        """
+        调用外部API（统一入口）
+
+        缓存未命中时合并并发的相同请求（同一提供商、接口和参数）：进程内只有首个调用方请求外部API，
+        其他调用方等待并共享其结果；使用缓存时首个调用方再持有跨进程文件锁，
+        其他工作进程获得锁后直接读取已写入的缓存。
+        """
         params = params or {}
 
         # 1. 检查缓存
@@ -81,11 +95,40 @@ class BaseProvider(abc.ABC):
                 logger.debug(f"使用缓存数据: {self.provider_name}.{endpoint_name}")
                 return cached_data
 
-        # 2. 构建基础URL（不包含认证信息）
+        # 2. 合并并发的相同请求
+        key = single_flight_key(self.provider_name, endpoint_name, params, {
+            name: kwargs.get(name) for name in ('headers', 'params', 'data')
+        })
+        result, shared = self._single_flight.do(
+            key, lambda: self._call_once(key, endpoint_name, params, use_cache, **kwargs),
+            timeout=self.SINGLE_FLIGHT_TIMEOUT
+        )
+        if shared:
+            logger.info(f"合并并发请求，共享结果: {self.provider_name}.{endpoint_name}")
+            # 各调用方可能修改返回数据，共享结果时返回副本
+            return copy.deepcopy(result)
+        return result
+
+    def _call_once(self, key: str, endpoint_name: str, params: dict, use_cache: bool, **kwargs) -> dict:
+        """持有跨进程文件锁调用外部API，获得锁后先复查缓存（其他工作进程可能已写入）"""
+        if not use_cache:
+            return self._request(endpoint_name, params, use_cache, **kwargs)
+
+        lock_path = file_lock_path(self.cache_manager.cache_dir / '.locks', key)
+        with file_lock(lock_path, self.SINGLE_FLIGHT_TIMEOUT):
+            cached_data = self.cache_manager.get(self.provider_name, endpoint_name, params)
+            if cached_data is not None:
+                logger.info(f"使用其他进程写入的缓存数据: {self.provider_name}.{endpoint_name}")
+                return cached_data
+            return self._request(endpoint_name, params, use_cache, **kwargs)
+
+    def _request(self, endpoint_name: str, params: dict, use_cache: bool, **kwargs) -> dict:
+        """请求外部API并写入缓存"""
+        # 1. 构建基础URL（不包含认证信息）
         endpoint_config = self.config['endpoints'][endpoint_name]
         url = self._build_url(endpoint_config, endpoint_name, params)
 
-        # 3. 发送请求（认证策略自动处理token）
+        # 2. 发送请求（认证策略自动处理token）
         logger.info(f"调用外部API: {self.provider_name}.{endpoint_name}")
         response = self.http_client.request_with_auth(
             auth_strategy=self.auth_strategy,
@@ -98,7 +141,7 @@ class BaseProvider(abc.ABC):
             data=kwargs.get('data')
         )
 
-        # 4. 缓存响应
+        # 3. 缓存响应
         if use_cache and self._should_cache(response):
             ttl = endpoint_config.get('cache_ttl', 300)
             self.cache_manager.set(
@@ -106,7 +149,7 @@ class BaseProvider(abc.ABC):
                 response, ttl
             )
 
-        # 5. 处理响应数据
+        # 4. 处理响应数据
         return self._handle_response(response)
 
     def _build_url(self, endpoint_config: dict, endpoint_name: str, params: dict) -> str:
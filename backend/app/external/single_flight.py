@@ -0,0 +1,151 @@
+"""请求合并（single-flight）"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+from app.utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # 非POSIX平台不支持文件锁，只在进程内合并
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# 跨进程文件锁池大小：合并键按哈希取模映射到固定数量的锁文件，锁文件数量不随请求参数增长
+FILE_LOCK_POOL_SIZE = 64
+
+
+def single_flight_key(provider_name: str, endpoint_name: str, params: dict, request_kwargs: Optional[dict] = None) -> str:
+    """
+    生成请求合并键
+
+    参数按键排序并统一转为字符串（与FileCacheManager的缓存文件名规则一致），
+    附加的请求头/查询参数/请求体也参与计算。
+
+    Args:
+        provider_name: 提供商名称
+        endpoint_name: 接口名称
+        params: 业务参数
+        request_kwargs: 附加请求参数（headers/params/data，值为None时忽略）
+
+    Returns:
+        合并键（十六进制摘要）
+    """
+    payload = json.dumps({
+        'provider': provider_name,
+        'endpoint': endpoint_name,
+        'params': sorted((str(key), str(value)) for key, value in params.items()),
+        'request': {key: value for key, value in (request_kwargs or {}).items() if value is not None}
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_lock_path(lock_dir: Path, key: str) -> Path:
+    """
+    合并键对应的锁文件（不同的键可能共用同一个锁文件，只会让少量无关请求串行等待）
+
+    Args:
+        lock_dir: 锁文件目录
+        key: 合并键（十六进制摘要）
+
+    Returns:
+        锁文件路径
+    """
+    return lock_dir / f"{int(key, 16) % FILE_LOCK_POOL_SIZE:02d}.lock"
+
+
+class SingleFlight:
+    """进程内请求合并：同一个键同时只执行一次，其他调用方等待并共享结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, func: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        执行或等待同键调用
+
+        Args:
+            key: 合并键
+            func: 实际调用
+            timeout: 等待其他调用方结果的超时秒数，超时后自行调用
+
+        Returns:
+            (结果, 是否共享了其他调用方的结果)；首个调用方的异常同样抛给所有等待者
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout), True
+            except TimeoutError:
+                logger.warning(f"等待合并请求结果超时（{timeout}秒），单独发起请求")
+                return func(), False
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def pending(self) -> int:
+        """执行中的合并键数量"""
+        with self._lock:
+            return len(self._calls)
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float) -> Iterator[bool]:
+    """
+    跨进程文件锁（flock），超时未获得锁时不加锁继续执行
+
+    锁文件保留在磁盘上（删除锁文件会让其他进程锁到不同的inode），通过file_lock_path
+    复用固定数量的锁文件。
+
+    Args:
+        path: 锁文件路径
+        timeout: 等待锁的超时秒数
+
+    Yields:
+        是否获得了锁
+    """
+    if fcntl is None:
+        yield False
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        deadline = time.monotonic() + timeout
+        acquired = False
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    logger.warning(f"等待跨进程请求锁超时（{timeout}秒）: {path.name}")
+                    break
+                time.sleep(0.05)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(f, fcntl.LOCK_UN)
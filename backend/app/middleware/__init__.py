@@ -4,6 +4,7 @@
 # 初始化中间件
 from .cors import init_cors
 from .request_logging import init_request_logging
+from .compression import init_compression
 
 def register(app):
     # 初始化CORS中间件
@@ -11,3 +12,6 @@ def register(app):
     
     # 初始化请求日志中间件
     init_request_logging(app)
+    
+    # 初始化响应压缩中间件
+    init_compression(app)
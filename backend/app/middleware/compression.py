@@ -0,0 +1,236 @@
+"""
+响应压缩中间件
+
+按Accept-Encoding协商brotli（安装brotli包时）或gzip压缩API响应：
+- 小于阈值的响应体不压缩，流式响应（NDJSON）逐块压缩并同步刷新，不影响逐块到达
+- 文件响应（send_file）不做动态压缩，静态资源优先返回构建时预压缩的 .br / .gz 文件
+- 累计压缩前后字节数和压缩耗时（CPU时间），便于评估节省的流量和CPU开销
+"""
+import gzip
+import mimetypes
+import os
+import threading
+import time
+import zlib
+from typing import Iterable, Iterator, Optional
+from flask import Flask, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖，未安装时只使用gzip
+    brotli = None
+
+
+# 可压缩的响应类型
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/vnd.grider.columnar',
+    'image/svg+xml',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain'
+}
+
+# 预压缩静态文件的扩展名（按优先级）
+PRECOMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+
+class CompressionStats:
+    """压缩统计：响应数、压缩前后字节数、压缩CPU耗时（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.cpu_seconds += cpu_seconds
+
+    def snapshot(self) -> dict:
+        """返回统计快照（节省字节数、压缩率和平均每MB原始数据的CPU毫秒数）"""
+        with self._lock:
+            return {
+                'responses': self.responses,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': self.bytes_in - self.bytes_out,
+                'ratio': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                'cpu_ms': round(self.cpu_seconds * 1000, 2),
+                'cpu_ms_per_mb': round(self.cpu_seconds * 1000 / (self.bytes_in / 1048576), 2)
+                if self.bytes_in else None
+            }
+
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """按Accept-Encoding选择压缩算法（brotli优先，未安装brotli时只支持gzip）"""
+    if brotli is not None and accept_encodings['br'] > 0:
+        return 'br'
+    if accept_encodings['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def _compress(data: bytes, encoding: str, config: dict) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['brotli_quality'])
+    return gzip.compress(data, compresslevel=config['gzip_level'], mtime=0)
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str, config: dict,
+                     stats: CompressionStats) -> Iterator[bytes]:
+    """逐块压缩流式响应，每块后同步刷新，客户端可立即解压已到达的数据"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['brotli_quality'])
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(config['gzip_level'], zlib.DEFLATED, 31)
+        compress = compressor.compress
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+        finish = compressor.flush
+
+    bytes_in = bytes_out = 0
+    cpu_seconds = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            start = time.thread_time()
+            data = compress(chunk) + flush()
+            cpu_seconds += time.thread_time() - start
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        start = time.thread_time()
+        data = finish()
+        cpu_seconds += time.thread_time() - start
+        bytes_out += len(data)
+        if data:
+            yield data
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        stats.record(bytes_in, bytes_out, cpu_seconds)
+
+
+def _add_vary(response):
+    vary = {value.strip().lower() for value in response.headers.get('Vary', '').split(',') if value.strip()}
+    if 'accept-encoding' not in vary:
+        response.headers.add('Vary', 'Accept-Encoding')
+
+
+def compress_response(response):
+    """
+    压缩响应（after_request钩子）
+
+    Args:
+        response: Flask响应对象
+
+    Returns:
+        压缩后的响应（不满足条件时原样返回）
+    """
+    config = current_app.config['COMPRESSION']
+    if (request.method == 'HEAD' or response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    _add_vary(response)
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    stats = current_app.extensions['compression']
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, config, stats)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    data = response.get_data()
+    if len(data) < config['min_size']:
+        return response
+
+    start = time.thread_time()
+    compressed = _compress(data, encoding, config)
+    cpu_seconds = time.thread_time() - start
+    stats.record(len(data), len(compressed), cpu_seconds)
+    current_app.logger.debug(
+        f"响应压缩 {request.path}: {encoding} {len(data)} -> {len(compressed)} 字节, "
+        f"{cpu_seconds * 1000:.2f}ms"
+    )
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def send_precompressed(directory: str, path: str):
+    """
+    发送静态文件，客户端支持且存在预压缩文件（.br / .gz）时返回预压缩版本
+
+    Args:
+        directory: 静态文件目录（相对路径相对于应用根目录，与send_from_directory一致）
+        path: 相对路径
+
+    Returns:
+        文件响应
+    """
+    full_path = safe_join(os.path.join(current_app.root_path, directory), path)
+    if full_path and os.path.isfile(full_path):
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if request.accept_encodings[encoding] <= 0 or not os.path.isfile(full_path + suffix):
+                continue
+            # 内容类型按原文件名推断，内容编码标记为对应的压缩算法
+            response = send_from_directory(
+                directory, path + suffix,
+                mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            )
+            response.headers['Content-Encoding'] = encoding
+            _add_vary(response)
+            return response
+
+    return send_from_directory(directory, path)
+
+
+def get_compression_stats(app: Flask) -> Optional[dict]:
+    """获取压缩统计快照（中间件未启用时返回None）"""
+    stats = app.extensions.get('compression')
+    return stats.snapshot() if stats else None
+
+
+def init_compression(app: Flask):
+    """
+    初始化响应压缩中间件
+
+    Args:
+        app: Flask应用实例
+    """
+    if os.getenv('ENABLE_COMPRESSION', 'true').lower() != 'true':
+        app.logger.info("响应压缩中间件已禁用")
+        return app
+
+    app.config['COMPRESSION'] = {
+        'min_size': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+        'gzip_level': int(os.getenv('COMPRESSION_GZIP_LEVEL', 6)),
+        'brotli_quality': int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    }
+    app.extensions['compression'] = CompressionStats()
+    app.after_request(compress_response)
+
+    app.logger.info(
+        f"响应压缩中间件已初始化 - 算法: {'br, gzip' if brotli is not None else 'gzip'}, "
+        f"最小压缩字节数: {app.config['COMPRESSION']['min_size']}"
+    )
+    return app
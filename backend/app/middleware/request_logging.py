@@ -145,12 +145,16 @@ def after_request_handler(response):
     duration_ms = round((time.time() - start_time) * 1000, 2)
     
     # 获取响应大小（避免在direct passthrough模式下调用get_data）
-    try:
-        response_data = response.get_data()
-        response_size = len(response_data) if response_data else 0
-    except RuntimeError:
-        # direct passthrough模式，无法获取数据大小
+    if response.is_streamed:
+        # 流式响应，读取数据会提前消耗生成器，无法获取数据大小
         response_size = 0
+    else:
+        try:
+            response_data = response.get_data()
+            response_size = len(response_data) if response_data else 0
+        except RuntimeError:
+            # direct passthrough模式，无法获取数据大小
+            response_size = 0
     
     # 提取请求数据
     request_data = extract_request_data()
@@ -177,7 +181,7 @@ def after_request_handler(response):
         log_data['body'] = request_data['body']
     
     # 添加响应体（如果启用且是JSON）
-    if (os.getenv('REQUEST_LOG_RESPONSE_BODY', 'false').lower() == 'true' and
+    if (os.getenv('REQUEST_LOG_RESPONSE_BODY', 'false').lower() == 'true' and not response.is_streamed and
         response.content_type and 'application/json' in response.content_type):
         try:
             # 获取响应数据
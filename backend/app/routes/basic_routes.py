@@ -1,19 +1,21 @@
 from flask import Blueprint, jsonify
 from datetime import datetime
 from app.constants import HTTP_OK, APP_VERSION
+from app.middleware.compression import get_compression_stats
 
 bp = Blueprint('basic_routes', __name__)
 
 @bp.route('/health', methods=['GET'])
 def health_check() -> tuple:
-    """健康检查接口"""
+    """健康检查接口（附带本工作进程的响应压缩统计，压缩中间件未启用时为null）"""
     from flask import current_app
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'service': 'Grid Trading Analysis System',
         'version': APP_VERSION,
-        'environment': current_app.config.get('ENV', 'development')
+        'environment': current_app.config.get('ENV', 'development'),
+        'compression': get_compression_stats(current_app)
     }), HTTP_OK
 
 @bp.route('/version', methods=['GET'])
@@ -1,19 +1,83 @@
-from flask import Blueprint, request, jsonify
+from typing import Optional
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.services.etf_analysis_service import ETFAnalysisService
 from app.services.backtest_service import BacktestService
 from app.utils.validation import (
-    validate_json, validate_query, validate_backtest_request
+    validate_json, validate_query, validate_backtest_request, validate_sweep_request,
+    validate_walk_forward_request, validate_monte_carlo_request, validate_portfolio_request,
+    validate_job_request
 )
+from app.algorithms.backtest.downsample import CHART_RESOLUTIONS, MIN_CHART_POINTS, MAX_CHART_POINTS
+from app.algorithms.backtest.metrics import ROLLING_RESOLUTIONS, MAX_ROLLING_WINDOWS, MAX_ROLLING_WINDOW_SIZE
+from app.algorithms.backtest.monte_carlo import DEFAULT_MONTE_CARLO_PATHS, DEFAULT_BLOCK_DAYS, MAX_MONTE_CARLO_PATHS
+from app.algorithms.backtest.portfolio import MAX_PORTFOLIO_SYMBOLS
+from app.algorithms.backtest.sweep import SWEEP_PARAMS, SWEEP_SORT_KEYS, MAX_SWEEP_TOP_K
+from app.algorithms.backtest.walk_forward import MIN_WINDOW_DAYS, MAX_WINDOW_DAYS
+from app.services.job_queue import JobQueueFullError, JOB_PRIORITIES
 from app.constants import (
-    GRID_ANALYZE_RULES, HTTP_OK, HTTP_INTERNAL_SERVER_ERROR, HTTP_BAD_REQUEST
+    GRID_ANALYZE_RULES, HTTP_OK, HTTP_ACCEPTED, HTTP_INTERNAL_SERVER_ERROR, HTTP_BAD_REQUEST,
+    HTTP_NOT_FOUND, HTTP_SERVICE_UNAVAILABLE
 )
 
+from app.utils.columnar import COLUMNAR_MIMETYPE
 from app.utils.logger import get_logger
 from app.utils.helper import determine_country
 
 logger = get_logger(__name__)
 bp = Blueprint('grid_routes', __name__)
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# 请求参数取值范围，各常量由对应的算法与服务模块定义，校验时传给app.utils.validation
+REQUEST_LIMITS = {
+    'chart_resolutions': CHART_RESOLUTIONS,
+    'min_chart_points': MIN_CHART_POINTS,
+    'max_chart_points': MAX_CHART_POINTS,
+    'rolling_resolutions': ROLLING_RESOLUTIONS,
+    'max_rolling_windows': MAX_ROLLING_WINDOWS,
+    'max_rolling_window_size': MAX_ROLLING_WINDOW_SIZE,
+    'sweep_params': SWEEP_PARAMS,
+    'sweep_sort_keys': SWEEP_SORT_KEYS,
+    'max_sweep_top_k': MAX_SWEEP_TOP_K,
+    'min_window_days': MIN_WINDOW_DAYS,
+    'max_window_days': MAX_WINDOW_DAYS,
+    'max_monte_carlo_paths': MAX_MONTE_CARLO_PATHS,
+    'max_portfolio_symbols': MAX_PORTFOLIO_SYMBOLS,
+    'job_priorities': JOB_PRIORITIES,
+}
+
+
+def _wants_ndjson(data: dict) -> bool:
+    """请求是否要求NDJSON流式响应（请求体stream=true或Accept头优先NDJSON）"""
+    if data.get('stream') is True:
+        return True
+    accept = request.accept_mimetypes
+    return accept[NDJSON_MIMETYPE] > accept['application/json']
+
+
+def _wants_columnar() -> bool:
+    """请求是否要求列式二进制响应（Accept头优先列式二进制）"""
+    accept = request.accept_mimetypes
+    return accept[COLUMNAR_MIMETYPE] > accept['application/json']
+
+
+def _rolling_metrics_options(value) -> Optional[dict]:
+    """将请求中的rollingMetrics转换为服务层选项（未请求时为None，true为默认窗口）"""
+    if not value:
+        return None
+    if value is True:
+        return {}
+    return {key: value[key] for key in ('windows', 'resolution') if key in value}
+
+
+def _chart_options(data: dict) -> Optional[dict]:
+    """将请求中的maxPoints/chartResolution转换为服务层图表选项（都未提供时为None）"""
+    options = {
+        key: data[field] for key, field in (('max_points', 'maxPoints'), ('resolution', 'chartResolution'))
+        if data.get(field) is not None
+    }
+    return options or None
+
 @bp.route('/analyze', methods=['POST'])
 @validate_json(GRID_ANALYZE_RULES)
 def analyze_strategy(validated_data):
@@ -90,8 +154,17 @@ def run_backtest():
             "singleTradeQuantity": 100,
             "startDate": "2024-01-01",  // 可选
             "endDate": "2024-12-31"     // 可选
-        }
+        },
+        "stream": true,  // 可选，以NDJSON流式返回（也可通过 Accept: application/x-ndjson 请求）
+        "rollingMetrics": {  // 可选，返回滚动指标序列（true 表示使用默认窗口）
+            "windows": [20, 60],
+            "resolution": "daily"  // daily / intraday
+        },
+        "maxPoints": 2000,  // 可选，图表曲线最多返回的点数（资产曲线LTTB降采样，价格曲线聚合为更粗周期）
+        "chartResolution": "30min"  // 可选，价格曲线聚合周期：5min / 15min / 30min / 60min / 1d
     }
+
+    响应格式默认为JSON；Accept: application/vnd.grider.columnar 时返回列式二进制（见 app.utils.columnar）
     """
     try:
         # 1. 获取并验证请求参数
@@ -104,7 +177,7 @@ def run_backtest():
             }), HTTP_BAD_REQUEST
 
         # 验证必需字段
-        validation_result = validate_backtest_request(data)
+        validation_result = validate_backtest_request(data, REQUEST_LIMITS)
         if not validation_result['valid']:
             return jsonify({
                 'success': False,
@@ -117,18 +190,56 @@ def run_backtest():
         backtest_config = data.get('backtestConfig')
         type_param = data.get('type', 'STOCK')  # 默认 'STOCK'
         custom_grid_params = data.get('customGridParams')  # 可选的自定义网格参数
+        rolling_metrics = _rolling_metrics_options(data.get('rollingMetrics'))
+        chart_options = _chart_options(data)
 
         logger.info(f"接收到的自定义网格参数: {custom_grid_params}")
 
         # 2. 执行回测
         backtest_service = BacktestService()
+
+        # 流式模式：按NDJSON输出回测区间，边模拟边分块输出资产曲线，随后输出价格曲线、交易记录和指标
+        if _wants_ndjson(data):
+            lines = backtest_service.run_backtest_stream(
+                etf_code=etf_code,
+                exchange_code=exchange_code,
+                grid_strategy=grid_strategy,
+                backtest_config=backtest_config,
+                type=type_param,
+                custom_grid_params=custom_grid_params,
+                rolling_metrics=rolling_metrics,
+                chart_options=chart_options
+            )
+            return Response(
+                stream_with_context(lines),
+                status=HTTP_OK,
+                mimetype=NDJSON_MIMETYPE,
+                headers={'X-Accel-Buffering': 'no'}
+            )
+
+        # 列式二进制：曲线和交易记录按列打包为小端数组，其余结果放在JSON头中
+        if _wants_columnar():
+            body = backtest_service.run_backtest_columnar(
+                etf_code=etf_code,
+                exchange_code=exchange_code,
+                grid_strategy=grid_strategy,
+                backtest_config=backtest_config,
+                type=type_param,
+                custom_grid_params=custom_grid_params,
+                rolling_metrics=rolling_metrics,
+                chart_options=chart_options
+            )
+            return Response(body, status=HTTP_OK, mimetype=COLUMNAR_MIMETYPE)
+
         result = backtest_service.run_backtest(
             etf_code=etf_code,
             exchange_code=exchange_code,
             grid_strategy=grid_strategy,
             backtest_config=backtest_config,
             type=type_param,
-            custom_grid_params=custom_grid_params
+            custom_grid_params=custom_grid_params,
+            rolling_metrics=rolling_metrics,
+            chart_options=chart_options
         )
 
         # 3. 返回结果
@@ -150,3 +261,374 @@ def run_backtest():
             'success': False,
             'error': '回测执行失败，请稍后重试'
         }), HTTP_INTERNAL_SERVER_ERROR
+
+
+@bp.route('/backtest/sweep', methods=['POST'])
+def run_backtest_sweep():
+    """
+    网格参数扫描：一次加载K线，批量回测多组网格参数并返回排名
+
+    请求格式（在 /backtest 请求基础上增加）:
+    {
+        ...,
+        "sweepParams": {
+            "gridStepSize": {"start": 0.01, "end": 0.05, "step": 0.01},
+            "singleTradeQuantity": [100, 200, 300],
+            "priceLower": 1.2,
+            "priceUpper": {"start": 1.5, "end": 1.7, "step": 0.1},
+            "totalCapital": [50000, 100000]
+        },
+        "topK": 20,                 // 可选，默认20
+        "sortBy": "total_return"    // 可选：total_return/annualized_return/sharpe_ratio/max_drawdown
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '请求参数不能为空'
+            }), HTTP_BAD_REQUEST
+
+        validation_result = validate_sweep_request(data, REQUEST_LIMITS)
+        if not validation_result['valid']:
+            return jsonify({
+                'success': False,
+                'error': validation_result['error']
+            }), HTTP_BAD_REQUEST
+
+        backtest_service = BacktestService()
+        result = backtest_service.run_sweep(
+            etf_code=data.get('etfCode'),
+            exchange_code=data.get('exchangeCode'),
+            grid_strategy=data.get('gridStrategy'),
+            sweep_params=data.get('sweepParams'),
+            backtest_config=data.get('backtestConfig'),
+            type=data.get('type', 'STOCK'),
+            custom_grid_params=data.get('customGridParams'),
+            top_k=data.get('topK', 20),
+            sort_by=data.get('sortBy', 'total_return')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        }), HTTP_OK
+
+    except ValueError as e:
+        logger.warning(f"参数验证错误: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), HTTP_BAD_REQUEST
+
+    except Exception as e:
+        logger.error(f"参数扫描执行异常: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': '参数扫描执行失败，请稍后重试'
+        }), HTTP_INTERNAL_SERVER_ERROR
+
+
+@bp.route('/backtest/jobs', methods=['POST'])
+def submit_backtest_job():
+    """
+    提交异步回测任务，立即返回任务ID，通过 GET /backtest/jobs/<job_id> 查询进度和结果
+
+    请求格式:
+    {
+        "kind": "backtest",          // 可选：backtest（默认，参数同 /backtest）/ sweep（参数同 /backtest/sweep）
+        "priority": "interactive",   // 可选：interactive / normal / batch，默认回测为interactive、扫描为batch
+        ...
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '请求参数不能为空'
+            }), HTTP_BAD_REQUEST
+
+        validation_result = validate_job_request(data, REQUEST_LIMITS)
+        if not validation_result['valid']:
+            return jsonify({
+                'success': False,
+                'error': validation_result['error']
+            }), HTTP_BAD_REQUEST
+
+        kind = data.get('kind', 'backtest')
+        params = {
+            'etf_code': data.get('etfCode'),
+            'exchange_code': data.get('exchangeCode'),
+            'grid_strategy': data.get('gridStrategy'),
+            'backtest_config': data.get('backtestConfig'),
+            'type': data.get('type', 'STOCK'),
+            'custom_grid_params': data.get('customGridParams')
+        }
+        if kind == 'sweep':
+            params.update({
+                'sweep_params': data.get('sweepParams'),
+                'top_k': data.get('topK', 20),
+                'sort_by': data.get('sortBy', 'total_return')
+            })
+        else:
+            params.update({
+                'rolling_metrics': _rolling_metrics_options(data.get('rollingMetrics')),
+                'chart_options': _chart_options(data)
+            })
+
+        job = BacktestService().submit_job(kind, params, data.get('priority'))
+        return jsonify({
+            'success': True,
+            'data': job
+        }), HTTP_ACCEPTED
+
+    except JobQueueFullError as e:
+        logger.warning(f"回测任务提交失败: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), HTTP_SERVICE_UNAVAILABLE
+
+    except ValueError as e:
+        logger.warning(f"参数验证错误: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), HTTP_BAD_REQUEST
+
+    except Exception as e:
+        logger.error(f"回测任务提交异常: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': '回测任务提交失败，请稍后重试'
+        }), HTTP_INTERNAL_SERVER_ERROR
+
+
+@bp.route('/backtest/jobs/<job_id>', methods=['GET'])
+def get_backtest_job(job_id):
+    """
+    查询异步回测任务：状态（queued / running / succeeded / failed）、进度，
+    成功时包含结果（与同步接口的data相同），失败时包含错误信息
+    """
+    try:
+        job = BacktestService().get_job(job_id)
+        if job is None:
+            return jsonify({
+                'success': False,
+                'error': '任务不存在或已过期'
+            }), HTTP_NOT_FOUND
+
+        return jsonify({
+            'success': True,
+            'data': job
+        }), HTTP_OK
+
+    except Exception as e:
+        logger.error(f"回测任务查询异常: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': '回测任务查询失败，请稍后重试'
+        }), HTTP_INTERNAL_SERVER_ERROR
+
+
+@bp.route('/backtest/walk-forward', methods=['POST'])
+def run_backtest_walk_forward():
+    """
+    滚动前向优化：样本内扫描网格参数选出最优组合，在紧随其后的样本外窗口验证
+
+    请求格式（在 /backtest/sweep 请求基础上增加，不使用topK）:
+    {
+        ...,
+        "walkForward": {
+            "startDate": "2021-01-01",
+            "endDate": "2024-12-31",
+            "inSampleDays": 60,        // 样本内交易日数
+            "outOfSampleDays": 20,     // 样本外交易日数
+            "stepDays": 20,            // 可选，窗口滚动步长，默认等于outOfSampleDays
+            "reanchor": true           // 可选，按窗口首根K线重新锚定基准价和价格区间，默认true
+        },
+        "sortBy": "total_return"       // 可选，样本内选优指标
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '请求参数不能为空'
+            }), HTTP_BAD_REQUEST
+
+        validation_result = validate_walk_forward_request(data, REQUEST_LIMITS)
+        if not validation_result['valid']:
+            return jsonify({
+                'success': False,
+                'error': validation_result['error']
+            }), HTTP_BAD_REQUEST
+
+        backtest_service = BacktestService()
+        result = backtest_service.run_walk_forward(
+            etf_code=data.get('etfCode'),
+            exchange_code=data.get('exchangeCode'),
+            grid_strategy=data.get('gridStrategy'),
+            sweep_params=data.get('sweepParams'),
+            walk_forward=data.get('walkForward'),
+            backtest_config=data.get('backtestConfig'),
+            type=data.get('type', 'STOCK'),
+            custom_grid_params=data.get('customGridParams'),
+            sort_by=data.get('sortBy', 'total_return')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        }), HTTP_OK
+
+    except ValueError as e:
+        logger.warning(f"参数验证错误: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), HTTP_BAD_REQUEST
+
+    except Exception as e:
+        logger.error(f"滚动前向优化执行异常: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': '滚动前向优化执行失败，请稍后重试'
+        }), HTTP_INTERNAL_SERVER_ERROR
+
+
+@bp.route('/backtest/monte-carlo', methods=['POST'])
+def run_backtest_monte_carlo():
+    """
+    蒙特卡洛稳健性检验：按交易日分块重采样历史K线生成合成路径，逐条回测并返回指标分布
+
+    请求格式（在 /backtest 请求基础上增加）:
+    {
+        ...,
+        "monteCarlo": {            // 可选
+            "paths": 200,          // 合成路径数，默认200，最多1000
+            "blockDays": 5,        // 每块连续交易日数，默认5
+            "seed": 42             // 随机数种子，相同种子结果可复现
+        }
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '请求参数不能为空'
+            }), HTTP_BAD_REQUEST
+
+        validation_result = validate_monte_carlo_request(data, REQUEST_LIMITS)
+        if not validation_result['valid']:
+            return jsonify({
+                'success': False,
+                'error': validation_result['error']
+            }), HTTP_BAD_REQUEST
+
+        monte_carlo = data.get('monteCarlo', {})
+        backtest_service = BacktestService()
+        result = backtest_service.run_monte_carlo(
+            etf_code=data.get('etfCode'),
+            exchange_code=data.get('exchangeCode'),
+            grid_strategy=data.get('gridStrategy'),
+            backtest_config=data.get('backtestConfig'),
+            type=data.get('type', 'STOCK'),
+            custom_grid_params=data.get('customGridParams'),
+            paths=monte_carlo.get('paths', DEFAULT_MONTE_CARLO_PATHS),
+            block_days=monte_carlo.get('blockDays', DEFAULT_BLOCK_DAYS),
+            seed=monte_carlo.get('seed')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        }), HTTP_OK
+
+    except ValueError as e:
+        logger.warning(f"参数验证错误: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), HTTP_BAD_REQUEST
+
+    except Exception as e:
+        logger.error(f"蒙特卡洛检验执行异常: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': '蒙特卡洛检验执行失败，请稍后重试'
+        }), HTTP_INTERNAL_SERVER_ERROR
+
+
+@bp.route('/backtest/portfolio', methods=['POST'])
+def run_portfolio_backtest():
+    """
+    多标的组合回测：所有标的的网格共用一个资金池，按时间顺序同步回测
+
+    请求格式:
+    {
+        "symbols": [
+            {
+                "etfCode": "510300",
+                "exchangeCode": "XSHG",
+                "type": "ETF",                  // 可选，默认STOCK
+                "gridStrategy": {...},          // 同 /backtest
+                "customGridParams": {...}       // 可选
+            },
+            ...
+        ],
+        "backtestConfig": {...},                // 可选，所有标的共用
+        "startDate": "2025-06-01",              // 可选，与endDate同时提供
+        "endDate": "2025-08-29"
+    }
+    """
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '请求参数不能为空'
+            }), HTTP_BAD_REQUEST
+
+        validation_result = validate_portfolio_request(data, REQUEST_LIMITS)
+        if not validation_result['valid']:
+            return jsonify({
+                'success': False,
+                'error': validation_result['error']
+            }), HTTP_BAD_REQUEST
+
+        backtest_service = BacktestService()
+        result = backtest_service.run_portfolio_backtest(
+            symbols=data['symbols'],
+            backtest_config=data.get('backtestConfig'),
+            start_date=data.get('startDate'),
+            end_date=data.get('endDate')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': result
+        }), HTTP_OK
+
+    except ValueError as e:
+        logger.warning(f"参数验证错误: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), HTTP_BAD_REQUEST
+
+    except Exception as e:
+        logger.error(f"组合回测执行异常: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': '组合回测执行失败，请稍后重试'
+        }), HTTP_INTERNAL_SERVER_ERROR
@@ -4,30 +4,313 @@
 整合数据获取、回测执行、指标计算，提供统一的回测业务接口。
 """
 
-from typing import Dict, Optional
+import copy
+import math
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+import numpy as np
 from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.vectorized_engine import VectorizedBacktestEngine
+from app.algorithms.backtest.multi_engine import MultiStrategyBacktestEngine
 from app.algorithms.backtest.metrics import MetricsCalculator
-from app.algorithms.backtest.models import BacktestConfig
+from app.algorithms.backtest.checkpoint import CheckpointStore, build_checkpoint_key
+from app.algorithms.backtest.chunked import (
+    ChunkedBacktestRunner, month_chunks, CHUNKED_BACKTEST_MIN_DAYS, MAX_CHUNKED_BACKTEST_DAYS
+)
+from app.algorithms.backtest.models import BacktestConfig, KBarSeries, EquityCurve, to_epoch_seconds
+from app.algorithms.backtest.downsample import (
+    CHART_RESOLUTIONS, downsample_equity_curve, resample_ohlc, chart_resolution_for
+)
+from app.algorithms.backtest.grid_ladder import validate_grid_config
+from app.algorithms.backtest.lot_ledger import LotLedger
+from app.algorithms.backtest.parallel import run_parallel
+from app.algorithms.backtest.sweep import (
+    SweepGrid, TopK, SWEEP_SORT_KEYS, MAX_SWEEP_CANDIDATES, SWEEP_BATCH_SIZE
+)
+from app.algorithms.backtest.monte_carlo import (
+    BootstrapPathGenerator, path_seeds, summarize_distribution,
+    MAX_MONTE_CARLO_PATHS, DEFAULT_MONTE_CARLO_PATHS, DEFAULT_BLOCK_DAYS, MONTE_CARLO_BATCH_SIZE
+)
+from app.algorithms.backtest.portfolio import PricePanel, PortfolioBacktestEngine
+from app.algorithms.backtest.walk_forward import (
+    WalkForwardWindow, split_windows, summarize_windows,
+    MAX_WALK_FORWARD_SPAN_DAYS, MAX_WALK_FORWARD_WINDOWS, MAX_WALK_FORWARD_EVALUATIONS,
+    KLINE_FETCH_CHUNK_DAYS
+)
 from app.algorithms.grid.optimizer import GridOptimizer
 from app.services.data_service import DataService
+from app.services.job_queue import JobQueue
+from app.services.result_cache import ResultCache, result_cache_key
+from app.utils.columnar import encode_columnar
+from app.utils.json_provider import dumps as json_dumps
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+def _format_epoch_times(times: np.ndarray) -> list:
+    """将epoch秒数组格式化为 YYYY-MM-DD HH:MM:SS 字符串列表"""
+    formatted = np.datetime_as_string(times.astype('datetime64[s]'), unit='s')
+    return np.char.replace(formatted, 'T', ' ').tolist()
+
+
+def _ndjson_line(record_type: str, data) -> str:
+    """生成一行NDJSON记录"""
+    return json_dumps({'type': record_type, 'data': data}) + '\n'
+
+
+def _evaluate_sweep_batch(kline_data: KBarSeries, context: dict, batch: List[dict]) -> List[dict]:
+    """
+    回测一批扫描参数组合（在进程池工作进程中执行）
+
+    向量化配置下使用多策略同步引擎一次遍历K线完成整批回测，
+    多策略引擎异常或配置为参考引擎时逐个参数组合回测。
+
+    Returns:
+        每个参数组合的指标摘要；参数组合无效或回测失败时为包含error的字典
+    """
+    config = context['config']
+    rows = [None] * len(batch)
+    strategies = []
+    for index, params in enumerate(batch):
+        try:
+            strategies.append((index, _build_sweep_strategy(context, params)))
+        except Exception as e:
+            rows[index] = {'params': params, 'error': str(e)}
+
+    if strategies and config.engine == 'vectorized':
+        try:
+            results = MultiStrategyBacktestEngine(
+                [strategy for _, strategy in strategies], config, country=context['country']
+            ).run(kline_data)
+            for (index, strategy), backtest_result in zip(strategies, results):
+                rows[index] = _summarize_sweep_candidate(
+                    batch[index], strategy, config, backtest_result, kline_data
+                )
+            return rows
+        except Exception as e:
+            logger.warning(f"多策略回测引擎执行失败，逐个回测参数组合: {str(e)}", exc_info=True)
+
+    for index, strategy in strategies:
+        try:
+            backtest_result = BacktestService._run_engine(strategy, config, kline_data, context['country'])
+            rows[index] = _summarize_sweep_candidate(batch[index], strategy, config, backtest_result, kline_data)
+        except Exception as e:
+            rows[index] = {'params': batch[index], 'error': str(e)}
+    return rows
+
+
+def _build_sweep_strategy(context: dict, params: dict) -> dict:
+    """基于基础策略和扫描参数生成网格策略（不修改基础策略）"""
+    custom_grid_params = {**context['custom_grid_params'], **params}
+    return BacktestService._apply_custom_grid_params(
+        copy.deepcopy(context['grid_strategy']), custom_grid_params, context['country']
+    )
+
+
+def _summarize_sweep_candidate(params: dict, grid_strategy: dict, config: BacktestConfig,
+                               backtest_result: Dict, kline_data: KBarSeries) -> dict:
+    """计算单个参数组合的指标摘要"""
+    initial_capital = (
+        grid_strategy['fund_allocation']['base_position_amount'] +
+        grid_strategy['fund_allocation']['grid_trading_amount']
+    )
+    metrics, benchmark = MetricsCalculator(
+        trading_days_per_year=config.trading_days_per_year,
+        risk_free_rate=config.risk_free_rate
+    ).calculate_all(
+        initial_capital=initial_capital,
+        final_capital=backtest_result['final_state']['total_asset'],
+        equity_curve=backtest_result['equity_curve'],
+        trade_records=backtest_result['trade_records'],
+        price_curve=kline_data,
+        grid_count=grid_strategy['grid_config']['count'],
+        lot_ledger=backtest_result.get('lot_ledger')
+    )
+
+    return {
+        'params': params,
+        'total_return': round(metrics.total_return, 4),
+        'annualized_return': round(metrics.annualized_return, 4),
+        'max_drawdown': round(metrics.max_drawdown, 4),
+        'sharpe_ratio': round(metrics.sharpe_ratio, 2) if metrics.sharpe_ratio else None,
+        'volatility': round(metrics.volatility, 4),
+        'total_trades': metrics.total_trades,
+        'win_rate': round(metrics.win_rate, 4),
+        'excess_return': round(benchmark.excess_return, 4),
+        'final_asset': round(backtest_result['final_state']['total_asset'], 2)
+    }
+
+
+def _evaluate_walk_forward_window(kline_data: KBarSeries, context: dict, window: WalkForwardWindow) -> dict:
+    """
+    执行一个滚动窗口（在进程池工作进程中执行）：样本内扫描参数选出最优组合，再在样本外回测
+
+    Returns:
+        窗口结果；样本内无有效参数组合或样本外回测失败时包含error
+    """
+    row = {
+        'index': window.index,
+        'in_sample': {
+            'start_date': window.in_sample_dates[0],
+            'end_date': window.in_sample_dates[1],
+            'total_bars': window.in_sample[1] - window.in_sample[0]
+        },
+        'out_of_sample': {
+            'start_date': window.out_of_sample_dates[0],
+            'end_date': window.out_of_sample_dates[1],
+            'total_bars': window.out_of_sample[1] - window.out_of_sample[0]
+        }
+    }
+
+    # 1. 样本内：在线维护最优参数组合
+    in_sample = kline_data[window.in_sample[0]:window.in_sample[1]]
+    in_sample_context = _anchor_window_context(context, in_sample)
+    sort_by = context['sort_by']
+    top = TopK(1)
+    evaluated = 0
+    for batch in itertools.batched(SweepGrid(context['sweep_params']), SWEEP_BATCH_SIZE):
+        for candidate in _evaluate_sweep_batch(in_sample, in_sample_context, batch):
+            if 'error' not in candidate:
+                evaluated += 1
+                top.push(candidate[sort_by], candidate)
+    row['in_sample']['evaluated'] = evaluated
+
+    if not len(top):
+        row['error'] = '样本内窗口没有可用的参数组合'
+        return row
+    best = top.results()[0]
+    row['in_sample']['best'] = best
+
+    # 2. 样本外：使用样本内最优参数回测
+    out_of_sample = kline_data[window.out_of_sample[0]:window.out_of_sample[1]]
+    out_of_sample_context = _anchor_window_context(context, out_of_sample)
+    try:
+        strategy = _build_sweep_strategy(out_of_sample_context, best['params'])
+        backtest_result = BacktestService._run_engine(
+            strategy, context['config'], out_of_sample, context['country']
+        )
+        summary = _summarize_sweep_candidate(
+            best['params'], strategy, context['config'], backtest_result, out_of_sample
+        )
+    except Exception as e:
+        row['error'] = f"样本外回测失败: {str(e)}"
+        return row
+
+    summary.pop('params')
+    row['out_of_sample'].update(summary)
+    return row
+
+
+def _anchor_window_context(context: dict, kline_data: KBarSeries) -> dict:
+    """
+    将基础策略重新锚定到窗口首根K线收盘价
+
+    基准价取窗口首根K线收盘价，价格区间（及等差网格步长）按基准价变化比例缩放；
+    扫描参数中的同名字段仍按原值覆盖。未开启重新锚定时原样返回上下文。
+    """
+    if not context['reanchor']:
+        return context
+
+    grid_strategy = context['grid_strategy']
+    custom_grid_params = dict(context['custom_grid_params'])
+    base_price = float(kline_data.close[0])
+    scale = base_price / custom_grid_params.get('benchmarkPrice', grid_strategy['current_price'])
+
+    custom_grid_params['priceLower'] = round(
+        custom_grid_params.get('priceLower', grid_strategy['price_range']['lower']) * scale, 4
+    )
+    custom_grid_params['priceUpper'] = round(
+        custom_grid_params.get('priceUpper', grid_strategy['price_range']['upper']) * scale, 4
+    )
+    if grid_strategy['grid_config'].get('type', '等差') == '等差':
+        custom_grid_params['gridStepSize'] = round(
+            custom_grid_params.get('gridStepSize', grid_strategy['grid_config']['step_size']) * scale, 4
+        )
+    custom_grid_params['benchmarkPrice'] = base_price
+    return {**context, 'custom_grid_params': custom_grid_params}
+
+
+def _simulate_bootstrap_paths(kline_data: KBarSeries, context: dict,
+                              batch: List[Tuple[int, np.random.SeedSequence]]) -> List[dict]:
+    """
+    生成一批自助重采样路径并逐条回测（在进程池工作进程中执行）
+
+    Returns:
+        每条路径的指标摘要；回测失败时为包含error的字典
+    """
+    generator = BootstrapPathGenerator(kline_data, context['block_days'])
+    rows = []
+    for index, seed in batch:
+        path = generator.generate(np.random.default_rng(seed))
+        try:
+            backtest_result = BacktestService._run_engine(
+                context['grid_strategy'], context['config'], path, context['country']
+            )
+            rows.append(_summarize_sweep_candidate(
+                {'path': index}, context['grid_strategy'], context['config'], backtest_result, path
+            ))
+        except Exception as e:
+            rows.append({'params': {'path': index}, 'error': str(e)})
+    return rows
+
+
+# 异步任务类型对应的服务方法和默认优先级（交互式回测先于批量扫描执行）
+JOB_KINDS = {
+    'backtest': ('run_backtest', 'interactive'),
+    'sweep': ('run_sweep', 'batch')
+}
+
+
+def _run_job(kind: str, params: dict, report: Callable[[dict], None]) -> dict:
+    """执行异步回测任务（在任务队列的工作线程中调用）"""
+    method, _ = JOB_KINDS[kind]
+    return getattr(BacktestService(), method)(**params, progress=report)
+
+
 class BacktestService:
     """回测业务服务"""
 
+    # 可选回测引擎，reference为逐K线参考实现
+    ENGINES = {
+        'vectorized': VectorizedBacktestEngine,
+        'reference': BacktestEngine
+    }
+
+    # 回测检查点存储（延长回测窗口时增量回测）
+    checkpoint_store = CheckpointStore()
+
+    # 回测结果缓存（相同请求直接返回，跨工作进程共享）
+    result_cache = ResultCache()
+
+    # 异步回测任务队列（SQLite持久化，跨工作进程共享，只在一个执行进程中执行任务）
+    job_queue = JobQueue(_run_job)
+
+    # 流式输出时每个分块包含的数据点数（边模拟边输出时也是每次推进引擎的K线数）
+    STREAM_CHUNK_SIZE = 500
+
+    # 流式输出的分块数据部分（按顺序输出，结束行给出各部分的数据点数）
+    STREAM_SECTIONS = ('equity_curve', 'price_curve', 'trade_records')
+
+    # 流式输出中回测开始前即可确定、放在首行meta中的结果部分，其余部分在summary行输出
+    STREAM_META_KEYS = ('backtest_period', 'grid_strategy')
+
     def __init__(self):
         self.data_service = DataService()
 
     def run_backtest(self, etf_code: str, exchange_code: str, grid_strategy: dict,
                      backtest_config: Optional[dict] = None, type: str = 'STOCK',
-                     country: str = 'CHN', custom_grid_params: Optional[dict] = None) -> Dict:
+                     country: str = 'CHN', custom_grid_params: Optional[dict] = None,
+                     rolling_metrics: Optional[dict] = None, chart_options: Optional[dict] = None,
+                     progress: Optional[Callable[[dict], None]] = None) -> Dict:
         """
         执行回测
 
+        结果按 证券/日期范围/策略/自定义参数/回测配置/滚动指标和图表选项/K线数据指纹 缓存，重复请求直接返回缓存结果。
+        超过CHUNKED_BACKTEST_MIN_DAYS天的区间按月分段回测，资产曲线和价格曲线按交易日聚合（不缓存）。
+
         Args:
             etf_code: ETF代码
             exchange_code: 交易所代码
@@ -36,108 +319,916 @@ class BacktestService:
             type: 证券类型 ('STOCK' 或 'ETF')
             country: 市场国家代码 ('CHN', 'HKG', 'USA')
             custom_grid_params: 自定义网格参数（可选）
+            rolling_metrics: 滚动指标选项（可选，{'windows': [...], 'resolution': 'daily' | 'intraday'}，
+                提供时结果增加rolling_metrics部分）
+            chart_options: 图表降采样选项（可选，{'max_points': int, 'resolution': '5min' | ... | '1d'}，
+                未提供时返回完整粒度的资产曲线和价格曲线）
+            progress: 进度回调（可选），以 {'stage', 'bars_processed', 'total_bars', 'trades'} 调用
 
         Returns:
             回测结果
         """
         try:
-            # 1. 准备回测配置
+            if progress:
+                progress({'stage': 'loading'})
             config = self._prepare_config(backtest_config)
+            start_date, end_date, trading_days = self._resolve_date_range(
+                exchange_code, custom_grid_params, max_days=MAX_CHUNKED_BACKTEST_DAYS
+            )
+            if self._is_long_horizon(start_date, end_date):
+                return self._format_result(**self._apply_chart_options(self._execute_chunked_backtest(
+                    etf_code, exchange_code, grid_strategy, config, type, country, custom_grid_params,
+                    start_date, end_date, trading_days, rolling_metrics=rolling_metrics, progress=progress
+                ), chart_options))
+
+            kline_data = self._load_kline_data(etf_code, exchange_code, start_date, end_date, type)
+
+            # 相同证券、日期、策略、配置和K线数据的回测直接返回缓存结果
+            cache_key = result_cache_key(
+                f"{exchange_code}:{etf_code}", start_date, end_date, grid_strategy,
+                custom_grid_params, config, kline_data, type, country,
+                options={
+                    key: value for key, value in (('rolling_metrics', rolling_metrics), ('chart', chart_options))
+                    if value is not None
+                }
+            )
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"命中回测结果缓存: {etf_code} {start_date} - {end_date}")
+                return cached
+
+            result = self._format_result(**self._apply_chart_options(self._execute_backtest(
+                etf_code, exchange_code, grid_strategy, backtest_config, type, country, custom_grid_params,
+                inputs=(config, start_date, end_date, trading_days, kline_data),
+                rolling_metrics=rolling_metrics, progress=progress
+            ), chart_options))
+            self.result_cache.set(cache_key, result)
+            return result
 
-            # 2. 确定回测日期范围
-            if custom_grid_params and 'startDate' in custom_grid_params and 'endDate' in custom_grid_params:
-                start_date = custom_grid_params['startDate']
-                end_date = custom_grid_params['endDate']
-                # 验证日期格式
-                try:
-                    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-                    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-                except ValueError:
-                    raise ValueError("自定义日期格式无效，应为YYYY-MM-DD")
-
-                # 验证日期范围
-                days_diff = (end_dt - start_dt).days
-                if days_diff < 30:
-                    raise ValueError("回测时间跨度至少30天")
-                if days_diff > 120:
-                    raise ValueError("回测时间跨度不能超过120天")
-
-                # 获取指定日期范围内的交易日历
-                trading_days = self.data_service.get_trading_calendar(
-                    exchange_code, start_date=start_date, end_date=end_date
+        except Exception as e:
+            logger.error(f"回测执行失败: {str(e)}", exc_info=True)
+            raise
+
+    def run_backtest_stream(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                            backtest_config: Optional[dict] = None, type: str = 'STOCK',
+                            country: str = 'CHN', custom_grid_params: Optional[dict] = None,
+                            chunk_size: Optional[int] = None,
+                            rolling_metrics: Optional[dict] = None,
+                            chart_options: Optional[dict] = None) -> Iterator[str]:
+        """
+        执行回测并以NDJSON流式返回结果
+
+        配置、日期范围和K线数据在调用时加载（参数或数据错误在开始输出前抛出），
+        返回的生成器每行输出一个JSON对象：
+        {"type": "meta" | "equity_curve" | "price_curve" | "trade_records" | "summary" | "end", "data": ...}
+
+        普通区间且未请求图表降采样时边模拟边输出：引擎每推进chunk_size根K线即输出一块资产曲线，
+        模拟结束后输出价格曲线、交易记录和指标汇总（不读写检查点和结果缓存）。
+        图表降采样需要完整曲线、长区间按交易日聚合曲线，这两种情况回测完成后再分块输出。
+
+        Args:
+            （同run_backtest）
+            chunk_size: 每个分块包含的数据点数（可选）
+
+        Returns:
+            NDJSON行生成器（滚动指标序列包含在summary中）
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        try:
+            config = self._prepare_config(backtest_config)
+            start_date, end_date, trading_days = self._resolve_date_range(
+                exchange_code, custom_grid_params, max_days=MAX_CHUNKED_BACKTEST_DAYS
+            )
+            if self._is_long_horizon(start_date, end_date):
+                context = self._execute_chunked_backtest(
+                    etf_code, exchange_code, grid_strategy, config, type, country, custom_grid_params,
+                    start_date, end_date, trading_days, rolling_metrics=rolling_metrics
                 )
-            else:
-                # 获取默认的交易日历（最近30个交易日）
-                trading_days = self.data_service.get_trading_calendar(
-                    exchange_code, limit=30
+                return self._stream_ndjson(
+                    self._iter_result_records(self._apply_chart_options(context, chart_options), chunk_size)
+                )
+
+            kline_data = self._load_kline_data(etf_code, exchange_code, start_date, end_date, type)
+            if chart_options:
+                context = self._execute_backtest(
+                    etf_code, exchange_code, grid_strategy, backtest_config, type, country, custom_grid_params,
+                    inputs=(config, start_date, end_date, trading_days, kline_data),
+                    rolling_metrics=rolling_metrics
                 )
-                if trading_days:
-                    start_date = trading_days[-1]
-                    end_date = trading_days[0]
-                else:
-                    raise ValueError("无法获取交易日历")
+                return self._stream_ndjson(
+                    self._iter_result_records(self._apply_chart_options(context, chart_options), chunk_size)
+                )
+
+            if custom_grid_params:
+                grid_strategy = self._apply_custom_grid_params(grid_strategy, custom_grid_params, country)
+        except Exception as e:
+            logger.error(f"回测执行失败: {str(e)}", exc_info=True)
+            raise
+
+        return self._stream_ndjson(self._iter_simulation_records(
+            grid_strategy, config, kline_data, country, start_date, end_date, trading_days,
+            rolling_metrics, chunk_size
+        ))
+
+    def run_backtest_columnar(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                              backtest_config: Optional[dict] = None, type: str = 'STOCK',
+                              country: str = 'CHN', custom_grid_params: Optional[dict] = None,
+                              rolling_metrics: Optional[dict] = None,
+                              chart_options: Optional[dict] = None) -> bytes:
+        """
+        执行回测并以列式二进制返回结果（不使用结果缓存）
+
+        JSON头的meta为除曲线和交易记录以外的结果（同普通JSON响应），
+        equity_curve / price_curve / trade_records 三张表的各列直接由引擎缓冲区打包，
+        时间列为epoch秒（与字符串时间同为交易所当地时间）。
+
+        Args:
+            （同run_backtest）
+
+        Returns:
+            app.utils.columnar格式的字节串
+        """
+        try:
+            context = self._apply_chart_options(self._execute_backtest(
+                etf_code, exchange_code, grid_strategy, backtest_config, type, country, custom_grid_params,
+                rolling_metrics=rolling_metrics
+            ), chart_options)
+            return self._format_columnar(context)
+        except Exception as e:
+            logger.error(f"回测执行失败: {str(e)}", exc_info=True)
+            raise
+
+    def submit_job(self, kind: str, params: dict, priority: Optional[str] = None) -> dict:
+        """
+        提交异步回测任务
 
-            logger.info(f"交易日历数据: {trading_days}")
-            logger.info(f"使用的日期范围: start_date={start_date}, end_date={end_date}")
+        Args:
+            kind: 任务类型（backtest / sweep）
+            params: 对应服务方法（run_backtest / run_sweep）的关键字参数
+            priority: 优先级（interactive / normal / batch，默认回测为interactive、扫描为batch）
+
+        Returns:
+            任务信息（包含job_id）
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"任务类型必须是以下之一：{', '.join(JOB_KINDS)}")
+        return self.job_queue.submit(kind, params, priority or JOB_KINDS[kind][1])
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """
+        查询异步回测任务
+
+        Returns:
+            任务状态、进度和结果（不存在或已过期时返回None）
+        """
+        return self.job_queue.get(job_id)
+
+    def _execute_backtest(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                          backtest_config: Optional[dict], type: str, country: str,
+                          custom_grid_params: Optional[dict], inputs: Optional[tuple] = None,
+                          rolling_metrics: Optional[dict] = None,
+                          progress: Optional[Callable[[dict], None]] = None) -> Dict:
+        """
+        加载数据、执行回测并计算指标
+
+        Args:
+            inputs: 已加载的 (回测配置, 开始日期, 结束日期, 交易日历, K线数据)（可选）
+            rolling_metrics: 滚动指标选项（可选）
+            progress: 进度回调（可选）
+
+        Returns:
+            _format_result所需的参数
+        """
+        if inputs:
+            config, start_date, end_date, trading_days, kline_data = inputs
+        else:
+            # 1. 准备回测配置
+            config = self._prepare_config(backtest_config)
+
+            # 2. 确定回测日期范围，长区间改为分段回测
+            start_date, end_date, trading_days = self._resolve_date_range(
+                exchange_code, custom_grid_params, max_days=MAX_CHUNKED_BACKTEST_DAYS
+            )
+            if self._is_long_horizon(start_date, end_date):
+                return self._execute_chunked_backtest(
+                    etf_code, exchange_code, grid_strategy, config, type, country, custom_grid_params,
+                    start_date, end_date, trading_days, rolling_metrics=rolling_metrics, progress=progress
+                )
 
             # 3. 获取K线数据
-            kline_data = self.data_service.get_5min_kline(
-                etf_code, exchange_code, start_date, end_date, type
+            kline_data = self._load_kline_data(etf_code, exchange_code, start_date, end_date, type)
+
+        # 4. 如果提供了自定义网格参数，修改网格策略
+        if custom_grid_params:
+            logger.info(f"应用自定义网格参数: {custom_grid_params}")
+            grid_strategy = self._apply_custom_grid_params(grid_strategy, custom_grid_params, country)
+            logger.info("已应用自定义网格参数进行回测")
+        else:
+            logger.info("未提供自定义网格参数，使用默认策略")
+
+        # 6. 执行回测（传递country参数），同一策略延长窗口时从检查点增量回测
+        checkpoint_key = build_checkpoint_key(
+            f"{exchange_code}:{etf_code}", kline_data, grid_strategy, config, country
+        )
+        engine_progress = None
+        if progress:
+            def engine_progress(bars_processed: int, trades: int):
+                progress({
+                    'stage': 'simulating',
+                    'bars_processed': bars_processed,
+                    'total_bars': len(kline_data),
+                    'trades': trades
+                })
+        backtest_result = self._run_engine(
+            grid_strategy, config, kline_data, country, checkpoint_key=checkpoint_key, progress=engine_progress
+        )
+
+        # 7. 计算性能指标
+        metrics, benchmark = self._calculate_metrics(grid_strategy, config, backtest_result, kline_data)
+
+        return {
+            'backtest_result': backtest_result,
+            'metrics': metrics,
+            'benchmark': benchmark,
+            'start_date': start_date,
+            'end_date': end_date,
+            'trading_days': len(trading_days),
+            'kline_data': kline_data,
+            'grid_strategy': grid_strategy,
+            'rolling_metrics': self._calculate_rolling_metrics(config, backtest_result, rolling_metrics)
+        }
+
+    def _execute_chunked_backtest(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                                  config: BacktestConfig, type: str, country: str,
+                                  custom_grid_params: Optional[dict], start_date: str, end_date: str,
+                                  trading_days: List[str], rolling_metrics: Optional[dict] = None,
+                                  progress: Optional[Callable[[dict], None]] = None) -> Dict:
+        """
+        长区间分段回测：按月加载K线送入同一引擎，资产曲线和价格曲线按交易日聚合
+
+        提供progress时每段模拟完成后报告进度（总K线数未知，total_bars为None）
+
+        Returns:
+            _format_result所需的参数（kline_data为按交易日聚合的价格曲线）
+        """
+        if rolling_metrics and rolling_metrics.get('resolution') == 'intraday':
+            raise ValueError(f"超过{CHUNKED_BACKTEST_MIN_DAYS}天的回测区间仅支持按日计算滚动指标")
+        if custom_grid_params:
+            grid_strategy = self._apply_custom_grid_params(grid_strategy, custom_grid_params, country)
+
+        engine_cls = self.ENGINES.get(config.engine, BacktestEngine)
+        runner = ChunkedBacktestRunner(engine_cls(grid_strategy, config, country=country))
+        chunks = month_chunks(trading_days)
+        logger.info(f"开始分段回测: {etf_code} {start_date} - {end_date}, 共{len(chunks)}段")
+
+        for days in chunks:
+            runner.feed(self.data_service.get_5min_kline(etf_code, exchange_code, days[0], days[-1], type))
+            if progress:
+                progress({
+                    'stage': 'simulating',
+                    'bars_processed': runner.bar_count,
+                    'total_bars': None,
+                    'trades': len(runner.trade_records)
+                })
+
+        if not runner.bar_count:
+            raise ValueError(f"无法获取K线数据: {start_date} - {end_date}")
+        logger.info(f"分段回测完成: 共{runner.bar_count}条K线, {len(runner.trade_records)}笔交易")
+
+        backtest_result = runner.result()
+        metrics, benchmark = self._calculate_metrics(
+            grid_strategy, config, backtest_result, backtest_result['price_curve']
+        )
+        # 最大回撤、波动率和夏普比率按5分钟K线计算，不受日线聚合影响（与不分段的回测口径一致）
+        metrics.max_drawdown = backtest_result['max_drawdown']
+        metrics.volatility, metrics.sharpe_ratio = MetricsCalculator(
+            trading_days_per_year=config.trading_days_per_year,
+            risk_free_rate=config.risk_free_rate
+        ).risk_from_return_moments(metrics.annualized_return, *backtest_result['return_moments'])
+
+        return {
+            'backtest_result': backtest_result,
+            'metrics': metrics,
+            'benchmark': benchmark,
+            'start_date': start_date,
+            'end_date': end_date,
+            'trading_days': len(trading_days),
+            'kline_data': backtest_result['price_curve'],
+            'grid_strategy': grid_strategy,
+            'total_bars': backtest_result['bar_count'],
+            'curve_resolution': '1d',
+            'rolling_metrics': self._calculate_rolling_metrics(config, backtest_result, rolling_metrics)
+        }
+
+    @staticmethod
+    def _calculate_metrics(grid_strategy: dict, config: BacktestConfig, backtest_result: Dict,
+                           price_curve: KBarSeries) -> tuple:
+        """计算回测结果的性能指标和基准对比"""
+        metrics_calc = MetricsCalculator(
+            trading_days_per_year=config.trading_days_per_year,
+            risk_free_rate=config.risk_free_rate
+        )
+
+        initial_capital = (
+            grid_strategy['fund_allocation']['base_position_amount'] +
+            grid_strategy['fund_allocation']['grid_trading_amount']
+        )
+
+        return metrics_calc.calculate_all(
+            initial_capital=initial_capital,
+            final_capital=backtest_result['final_state']['total_asset'],
+            equity_curve=backtest_result['equity_curve'],
+            trade_records=backtest_result['trade_records'],
+            price_curve=price_curve,
+            grid_count=grid_strategy['grid_config']['count'],
+            lot_ledger=backtest_result.get('lot_ledger')
+        )
+
+    @staticmethod
+    def _apply_chart_options(context: Dict, chart_options: Optional[dict]) -> Dict:
+        """
+        按图表选项降采样资产曲线和价格曲线（指标已按完整数据计算）
+
+        价格曲线聚合为resolution周期的OHLC（未指定时取K线数不超过max_points的最细周期），
+        仍超过max_points时合并相邻K线；资产曲线提供max_points时按LTTB降采样，
+        否则取每根聚合K线最后一个资产点，与价格曲线逐点对应。
+
+        Returns:
+            替换曲线后的_format_result参数
+        """
+        if not chart_options:
+            return context
+
+        kline_data = context['kline_data']
+        equity_curve = context['backtest_result']['equity_curve']
+        source_resolution = context.get('curve_resolution', '5min')
+        max_points = chart_options.get('max_points')
+        resolution = chart_options.get('resolution') or (
+            chart_resolution_for(kline_data, max_points) if max_points else source_resolution
+        )
+        if CHART_RESOLUTIONS[resolution] <= CHART_RESOLUTIONS[source_resolution]:
+            resolution = source_resolution
+
+        price_curve, ends = kline_data, None
+        if resolution != source_resolution or (max_points and len(kline_data) > max_points):
+            price_curve, ends = resample_ohlc(kline_data, resolution, max_points)
+
+        if max_points:
+            equity_curve = downsample_equity_curve(equity_curve, max_points)
+        elif ends is not None and len(equity_curve) == len(kline_data):
+            equity_curve = EquityCurve.from_arrays(
+                equity_curve.times[ends], equity_curve.assets[ends], equity_curve.prices[ends]
             )
 
-            if not kline_data:
-                raise ValueError(f"无法获取K线数据: {start_date} - {end_date}")
+        return {
+            **context,
+            'backtest_result': {**context['backtest_result'], 'equity_curve': equity_curve},
+            'kline_data': price_curve,
+            'total_bars': context.get('total_bars') or len(kline_data),
+            'curve_resolution': resolution
+        }
+
+    @staticmethod
+    def _calculate_rolling_metrics(config: BacktestConfig, backtest_result: Dict,
+                                   rolling_metrics: Optional[dict]) -> Optional[dict]:
+        """按请求选项计算滚动指标序列（未请求时返回None）"""
+        if rolling_metrics is None:
+            return None
+        metrics_calc = MetricsCalculator(
+            trading_days_per_year=config.trading_days_per_year,
+            risk_free_rate=config.risk_free_rate
+        )
+        return metrics_calc.calculate_rolling(
+            backtest_result['equity_curve'],
+            windows=rolling_metrics.get('windows'),
+            resolution=rolling_metrics.get('resolution', 'daily')
+        )
 
-            logger.info(f"获取到 {len(kline_data)} 条K线数据")
+    def run_sweep(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                  sweep_params: dict, backtest_config: Optional[dict] = None, type: str = 'STOCK',
+                  country: str = 'CHN', custom_grid_params: Optional[dict] = None,
+                  top_k: int = 20, sort_by: str = 'total_return',
+                  max_workers: Optional[int] = None,
+                  progress: Optional[Callable[[dict], None]] = None) -> Dict:
+        """
+        网格参数扫描：一次加载K线，在进程池中分批回测所有参数组合
+
+        Args:
+            etf_code: ETF代码
+            exchange_code: 交易所代码
+            grid_strategy: 网格策略参数
+            sweep_params: 扫描参数范围，键为自定义网格参数名
+                （gridStepSize/singleTradeQuantity/priceLower/priceUpper/totalCapital），
+                值为单个数值、数值列表或 {'start', 'end', 'step'}
+            backtest_config: 回测配置（可选）
+            type: 证券类型 ('STOCK' 或 'ETF')
+            country: 市场国家代码 ('CHN', 'HKG', 'USA')
+            custom_grid_params: 基础自定义网格参数（可选，扫描参数覆盖其中同名字段）
+            top_k: 返回排名前K的参数组合
+            sort_by: 排序指标
+            max_workers: 进程数（可选，默认读取BACKTEST_POOL_WORKERS）
+            progress: 进度回调（可选），每批完成后以 {'stage', 'candidates_processed', 'total_candidates'} 调用
+
+        Returns:
+            扫描结果排名
+        """
+        try:
+            if sort_by not in SWEEP_SORT_KEYS:
+                raise ValueError(f"不支持的排序指标: {sort_by}")
+
+            config = self._prepare_config(backtest_config)
+            grid = SweepGrid(sweep_params)
+            if grid.size > MAX_SWEEP_CANDIDATES:
+                raise ValueError(f"参数组合数{grid.size}超过上限{MAX_SWEEP_CANDIDATES}")
+
+            # 1. 一次性加载交易日历和K线数据
+            start_date, end_date, trading_days = self._resolve_date_range(exchange_code, custom_grid_params)
+            kline_data = self._load_kline_data(etf_code, exchange_code, start_date, end_date, type)
+            logger.info(f"开始参数扫描: {etf_code}, {grid.size}个参数组合, 排序指标{sort_by}")
+
+            # 2. 并行回测，在线维护Top-K
+            context = {
+                'grid_strategy': grid_strategy,
+                'custom_grid_params': custom_grid_params or {},
+                'config': config,
+                'country': country
+            }
+            top = TopK(top_k)
+            evaluated = 0
+            failed = 0
+            batches = itertools.batched(grid, SWEEP_BATCH_SIZE)
+            for rows in run_parallel(_evaluate_sweep_batch, batches, kline_data,
+                                     context=context, max_workers=max_workers):
+                for row in rows:
+                    if 'error' in row:
+                        failed += 1
+                        logger.debug(f"参数组合回测失败: {row['params']}, {row['error']}")
+                        continue
+                    evaluated += 1
+                    top.push(row[sort_by], row)
+                if progress:
+                    progress({
+                        'stage': 'simulating',
+                        'candidates_processed': evaluated + failed,
+                        'total_candidates': grid.size
+                    })
+
+            results = top.results()
+            for rank, row in enumerate(results, start=1):
+                row['rank'] = rank
+
+            logger.info(f"参数扫描完成: 成功{evaluated}个, 失败{failed}个")
+
+            return {
+                'backtest_period': {
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'trading_days': len(trading_days),
+                    'total_bars': len(kline_data)
+                },
+                'sweep': {
+                    'total_candidates': grid.size,
+                    'skipped': grid.skipped,
+                    'evaluated': evaluated,
+                    'failed': failed,
+                    'sort_by': sort_by,
+                    'top_k': top_k
+                },
+                'results': results
+            }
+
+        except Exception as e:
+            logger.error(f"参数扫描执行失败: {str(e)}", exc_info=True)
+            raise
+
+    def run_walk_forward(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                         sweep_params: dict, walk_forward: dict, backtest_config: Optional[dict] = None,
+                         type: str = 'STOCK', country: str = 'CHN',
+                         custom_grid_params: Optional[dict] = None, sort_by: str = 'total_return',
+                         max_workers: Optional[int] = None) -> Dict:
+        """
+        滚动前向优化：按交易日切分滚动的样本内/样本外窗口，样本内扫描参数、样本外验证
+
+        K线按段获取后一次性放入共享内存，各窗口在进程池中并行执行。
+        回测区间不受普通回测30-120天的限制，最长约5年。
+
+        Args:
+            etf_code: ETF代码
+            exchange_code: 交易所代码
+            grid_strategy: 网格策略参数
+            sweep_params: 扫描参数范围（同run_sweep）
+            walk_forward: 窗口配置
+                {'startDate', 'endDate', 'inSampleDays', 'outOfSampleDays',
+                 'stepDays'（可选，默认等于outOfSampleDays）, 'reanchor'（可选，默认True）}
+            backtest_config: 回测配置（可选）
+            type: 证券类型 ('STOCK' 或 'ETF')
+            country: 市场国家代码 ('CHN', 'HKG', 'USA')
+            custom_grid_params: 基础自定义网格参数（可选，扫描参数覆盖其中同名字段）
+            sort_by: 样本内选优指标
+            max_workers: 进程数（可选，默认读取BACKTEST_POOL_WORKERS）
+
+        Returns:
+            各窗口样本内最优参数、样本外表现及汇总
+        """
+        try:
+            if sort_by not in SWEEP_SORT_KEYS:
+                raise ValueError(f"不支持的排序指标: {sort_by}")
+
+            config = self._prepare_config(backtest_config)
+            grid = SweepGrid(sweep_params)
+            if grid.size > MAX_SWEEP_CANDIDATES:
+                raise ValueError(f"参数组合数{grid.size}超过上限{MAX_SWEEP_CANDIDATES}")
+
+            # 1. 获取交易日历，分段加载完整区间的K线
+            start_date, end_date = walk_forward['startDate'], walk_forward['endDate']
+            try:
+                span_days = (datetime.strptime(end_date, '%Y-%m-%d') -
+                             datetime.strptime(start_date, '%Y-%m-%d')).days
+            except ValueError:
+                raise ValueError("日期格式无效，应为YYYY-MM-DD")
+            if span_days <= 0:
+                raise ValueError("结束日期必须晚于开始日期")
+            if span_days > MAX_WALK_FORWARD_SPAN_DAYS:
+                raise ValueError(f"滚动前向优化时间跨度不能超过{MAX_WALK_FORWARD_SPAN_DAYS}天")
+
+            trading_days = sorted(self.data_service.get_trading_calendar(
+                exchange_code, start_date=start_date, end_date=end_date
+            ))
+            if not trading_days:
+                raise ValueError("无法获取交易日历")
+            kline_data = self._load_kline_range(etf_code, exchange_code, trading_days, type)
+
+            # 2. 切分滚动窗口
+            in_sample_days = walk_forward['inSampleDays']
+            out_of_sample_days = walk_forward['outOfSampleDays']
+            step_days = walk_forward.get('stepDays') or out_of_sample_days
+            windows = split_windows(trading_days, kline_data, in_sample_days, out_of_sample_days, step_days)
+            if not windows:
+                raise ValueError(
+                    f"{len(trading_days)}个交易日不足以切分样本内{in_sample_days}天+样本外{out_of_sample_days}天的窗口"
+                )
+            if len(windows) > MAX_WALK_FORWARD_WINDOWS:
+                raise ValueError(f"窗口数{len(windows)}超过上限{MAX_WALK_FORWARD_WINDOWS}，请增大stepDays")
+            if len(windows) * grid.size > MAX_WALK_FORWARD_EVALUATIONS:
+                raise ValueError(
+                    f"回测次数（窗口数{len(windows)} × 参数组合数{grid.size}）超过上限{MAX_WALK_FORWARD_EVALUATIONS}"
+                )
+            logger.info(f"开始滚动前向优化: {etf_code}, {len(windows)}个窗口, {grid.size}个参数组合")
+
+            # 3. 各窗口并行执行
+            context = {
+                'grid_strategy': grid_strategy,
+                'custom_grid_params': custom_grid_params or {},
+                'sweep_params': sweep_params,
+                'sort_by': sort_by,
+                'reanchor': walk_forward.get('reanchor', True),
+                'config': config,
+                'country': country
+            }
+            rows = list(run_parallel(_evaluate_walk_forward_window, windows, kline_data,
+                                     context=context, max_workers=max_workers))
+            rows.sort(key=lambda row: row['index'])
+
+            summary = summarize_windows(rows)
+            logger.info(f"滚动前向优化完成: 成功{summary['completed_windows']}个窗口, "
+                        f"失败{summary['failed_windows']}个")
+
+            return {
+                'backtest_period': {
+                    'start_date': trading_days[0],
+                    'end_date': trading_days[-1],
+                    'trading_days': len(trading_days),
+                    'total_bars': len(kline_data)
+                },
+                'walk_forward': {
+                    'in_sample_days': in_sample_days,
+                    'out_of_sample_days': out_of_sample_days,
+                    'step_days': step_days,
+                    'windows': len(windows),
+                    'candidates': grid.size,
+                    'sort_by': sort_by
+                },
+                'summary': summary,
+                'windows': rows
+            }
+
+        except Exception as e:
+            logger.error(f"滚动前向优化执行失败: {str(e)}", exc_info=True)
+            raise
+
+    def run_monte_carlo(self, etf_code: str, exchange_code: str, grid_strategy: dict,
+                        backtest_config: Optional[dict] = None, type: str = 'STOCK',
+                        country: str = 'CHN', custom_grid_params: Optional[dict] = None,
+                        paths: int = DEFAULT_MONTE_CARLO_PATHS, block_days: int = DEFAULT_BLOCK_DAYS,
+                        seed: Optional[int] = None, max_workers: Optional[int] = None) -> Dict:
+        """
+        蒙特卡洛稳健性检验：按交易日分块自助重采样生成合成路径，在进程池中逐条回测
+
+        Args:
+            etf_code: ETF代码
+            exchange_code: 交易所代码
+            grid_strategy: 网格策略参数
+            backtest_config: 回测配置（可选）
+            type: 证券类型 ('STOCK' 或 'ETF')
+            country: 市场国家代码 ('CHN', 'HKG', 'USA')
+            custom_grid_params: 自定义网格参数（可选）
+            paths: 合成路径数
+            block_days: 每块连续交易日数
+            seed: 随机数种子（可选，相同种子结果可复现）
+            max_workers: 进程数（可选，默认读取BACKTEST_POOL_WORKERS）
+
+        Returns:
+            总收益率、最大回撤和交易次数的分布，以及历史路径的对照结果
+        """
+        try:
+            if not 1 <= paths <= MAX_MONTE_CARLO_PATHS:
+                raise ValueError(f"路径数必须在1-{MAX_MONTE_CARLO_PATHS}之间")
+            if block_days < 1:
+                raise ValueError("分块交易日数必须大于0")
+
+            config = self._prepare_config(backtest_config)
+
+            # 1. 一次性加载交易日历和K线数据
+            start_date, end_date, trading_days = self._resolve_date_range(exchange_code, custom_grid_params)
+            kline_data = self._load_kline_data(etf_code, exchange_code, start_date, end_date, type)
 
-            # 4. 如果提供了自定义网格参数，修改网格策略
             if custom_grid_params:
-                logger.info(f"应用自定义网格参数: {custom_grid_params}")
-                grid_strategy = self._apply_custom_grid_params(grid_strategy, custom_grid_params, country)
-                logger.info("已应用自定义网格参数进行回测")
-            else:
-                logger.info("未提供自定义网格参数，使用默认策略")
+                grid_strategy = self._apply_custom_grid_params(
+                    copy.deepcopy(grid_strategy), custom_grid_params, country
+                )
 
-            # 6. 执行回测（传递country参数）
-            engine = BacktestEngine(grid_strategy, config, country=country)
-            backtest_result = engine.run(kline_data)
+            # 2. 历史路径对照
+            historical = _summarize_sweep_candidate(
+                {}, grid_strategy, config, self._run_engine(grid_strategy, config, kline_data, country), kline_data
+            )
+            historical.pop('params')
+
+            # 3. 每条路径使用独立派生种子，分批在进程池中生成并回测
+            entropy, seeds = path_seeds(paths, seed)
+            logger.info(f"开始蒙特卡洛检验: {etf_code}, {paths}条路径, 分块{block_days}个交易日")
+            context = {
+                'grid_strategy': grid_strategy,
+                'config': config,
+                'country': country,
+                'block_days': block_days
+            }
+            batches = itertools.batched(enumerate(seeds), MONTE_CARLO_BATCH_SIZE)
+            rows = [
+                row
+                for batch_rows in run_parallel(_simulate_bootstrap_paths, batches, kline_data,
+                                               context=context, max_workers=max_workers)
+                for row in batch_rows
+            ]
+            rows.sort(key=lambda row: row['params']['path'])
+
+            completed = [row for row in rows if 'error' not in row]
+            failed = len(rows) - len(completed)
+            logger.info(f"蒙特卡洛检验完成: 成功{len(completed)}条, 失败{failed}条")
+
+            total_returns = [row['total_return'] for row in completed]
+            return {
+                'backtest_period': {
+                    'start_date': start_date,
+                    'end_date': end_date,
+                    'trading_days': len(trading_days),
+                    'total_bars': len(kline_data)
+                },
+                'monte_carlo': {
+                    'paths': paths,
+                    'completed': len(completed),
+                    'failed': failed,
+                    'block_days': block_days,
+                    # 根种子以字符串返回，避免超出JavaScript安全整数范围
+                    'seed': str(entropy)
+                },
+                'historical': historical,
+                'distributions': {
+                    'total_return': summarize_distribution(total_returns),
+                    'max_drawdown': summarize_distribution(row['max_drawdown'] for row in completed),
+                    'total_trades': summarize_distribution((row['total_trades'] for row in completed), digits=2)
+                },
+                # 历史总收益率在合成路径中的分位（0-1）
+                'historical_return_rank': (
+                    round(sum(r <= historical['total_return'] for r in total_returns) / len(total_returns), 4)
+                    if total_returns else None
+                ),
+                'paths': [
+                    {
+                        'path': row['params']['path'],
+                        'total_return': row['total_return'],
+                        'max_drawdown': row['max_drawdown'],
+                        'total_trades': row['total_trades']
+                    }
+                    for row in completed
+                ]
+            }
 
-            # 7. 计算性能指标
+        except Exception as e:
+            logger.error(f"蒙特卡洛检验执行失败: {str(e)}", exc_info=True)
+            raise
+
+    def run_portfolio_backtest(self, symbols: List[dict], backtest_config: Optional[dict] = None,
+                               country: str = 'CHN', start_date: Optional[str] = None,
+                               end_date: Optional[str] = None) -> Dict:
+        """
+        多标的组合回测：并发获取各标的K线并按时间对齐，所有标的的网格共用一个资金池
+
+        Args:
+            symbols: 标的列表，每项包含 etfCode、exchangeCode、gridStrategy，
+                可选 type（默认STOCK）和 customGridParams
+            backtest_config: 回测配置（可选）
+            country: 市场国家代码 ('CHN', 'HKG', 'USA')
+            start_date: 开始日期（可选，与end_date同时提供，规则同run_backtest）
+            end_date: 结束日期（可选）
+
+        Returns:
+            组合与各标的的回测指标、组合资产曲线和交易记录
+        """
+        try:
+            config = self._prepare_config(backtest_config)
+            date_params = {'startDate': start_date, 'endDate': end_date} if start_date and end_date else None
+            start_date, end_date, trading_days = self._resolve_date_range(symbols[0]['exchangeCode'], date_params)
+
+            # 1. 并发获取各标的K线（I/O密集，使用线程池）
+            with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as executor:
+                series_list = list(executor.map(
+                    lambda symbol: self._load_kline_data(
+                        symbol['etfCode'], symbol['exchangeCode'], start_date, end_date, symbol.get('type', 'STOCK')
+                    ),
+                    symbols
+                ))
+
+            grid_strategies = []
+            for symbol in symbols:
+                grid_strategy = copy.deepcopy(symbol['gridStrategy'])
+                if symbol.get('customGridParams'):
+                    grid_strategy = self._apply_custom_grid_params(grid_strategy, symbol['customGridParams'], country)
+                grid_strategies.append(grid_strategy)
+
+            # 2. 对齐为价格面板，共享资金池一次遍历
+            panel = PricePanel.from_series(series_list)
+            logger.info(f"开始组合回测: {len(symbols)}个标的, 对齐后{len(panel)}个时间点")
+            result = PortfolioBacktestEngine(grid_strategies, config, country=country).run(panel)
+
+            # 3. 计算组合与各标的指标
             metrics_calc = MetricsCalculator(
                 trading_days_per_year=config.trading_days_per_year,
                 risk_free_rate=config.risk_free_rate
             )
-
-            initial_capital = (
-                grid_strategy['fund_allocation']['base_position_amount'] +
-                grid_strategy['fund_allocation']['grid_trading_amount']
+            initial_capital = sum(item['initial_capital'] for item in result['symbols'])
+            all_records = sorted(
+                itertools.chain.from_iterable(item['trade_records'] for item in result['symbols']),
+                key=lambda record: record.time
             )
-
+            # 组合基准：按分配资金加权的各标的买入持有
+            close = panel.filled_close()
+            weights = np.array([item['initial_capital'] for item in result['symbols']]) / initial_capital
+            hold_index = (close / close[0] * weights).sum(axis=1)
             metrics, benchmark = metrics_calc.calculate_all(
                 initial_capital=initial_capital,
-                final_capital=backtest_result['final_state']['total_asset'],
-                equity_curve=backtest_result['equity_curve'],
-                trade_records=backtest_result['trade_records'],
-                price_curve=[{'close': k.close} for k in kline_data],
-                grid_count=grid_strategy['grid_config']['count']
+                final_capital=result['final_state']['total_asset'],
+                equity_curve=result['equity_curve'],
+                trade_records=all_records,
+                price_curve=KBarSeries(panel.times, hold_index, hold_index, hold_index, hold_index,
+                                       np.zeros(len(panel))),
+                grid_count=sum(strategy['grid_config']['count'] for strategy in grid_strategies),
+                # 组合胜率按各标的账本的配对盈亏统计（不跨标的配对）
+                lot_ledger=LotLedger.combine(item['lot_ledger'] for item in result['symbols'])
             )
 
-            # 6. 格式化返回结果
-            return self._format_result(
-                backtest_result=backtest_result,
-                metrics=metrics,
-                benchmark=benchmark,
-                start_date=start_date,
-                end_date=end_date,
-                trading_days=len(trading_days),
-                kline_data=kline_data,
-                grid_strategy=grid_strategy
+            summary = self._format_summary(
+                result, metrics, benchmark, start_date, end_date, len(trading_days), panel
             )
+            for key in ('grid_analysis', 'grid_strategy'):
+                summary.pop(key)
+
+            summary['symbols'] = []
+            for symbol, grid_strategy, item, series in zip(symbols, grid_strategies, result['symbols'], series_list):
+                symbol_metrics, symbol_benchmark = metrics_calc.calculate_all(
+                    initial_capital=item['initial_capital'],
+                    final_capital=item['final_state']['total_asset'],
+                    equity_curve=item['equity_curve'],
+                    trade_records=item['trade_records'],
+                    price_curve=series,
+                    grid_count=grid_strategy['grid_config']['count'],
+                    lot_ledger=item['lot_ledger']
+                )
+                summary['symbols'].append({
+                    'etf_code': symbol['etfCode'],
+                    'exchange_code': symbol['exchangeCode'],
+                    'initial_capital': round(item['initial_capital'], 2),
+                    'total_bars': len(series),
+                    'total_return': round(symbol_metrics.total_return, 4),
+                    'absolute_profit': round(symbol_metrics.absolute_profit, 2),
+                    'max_drawdown': round(symbol_metrics.max_drawdown, 4),
+                    'total_trades': symbol_metrics.total_trades,
+                    'win_rate': round(symbol_metrics.win_rate, 4),
+                    'hold_return': round(symbol_benchmark.hold_return, 4),
+                    'final_state': item['final_state']
+                })
+
+            summary['equity_curve'] = self._format_equity_curve(result['equity_curve'])
+            summary['trade_records'] = [
+                {'etf_code': symbol['etfCode'], **record}
+                for symbol, item in zip(symbols, result['symbols'])
+                for record in self._format_trade_records(item['trade_records'])
+            ]
+            summary['trade_records'].sort(key=lambda record: record['time'])
+            return summary
 
         except Exception as e:
-            logger.error(f"回测执行失败: {str(e)}", exc_info=True)
+            logger.error(f"组合回测执行失败: {str(e)}", exc_info=True)
             raise
 
+    def _resolve_date_range(self, exchange_code: str, custom_grid_params: Optional[dict],
+                            max_days: int = CHUNKED_BACKTEST_MIN_DAYS) -> Tuple[str, str, List[str]]:
+        """
+        确定回测日期范围
+
+        Args:
+            exchange_code: 交易所代码
+            custom_grid_params: 自定义网格参数（含startDate/endDate时使用自定义日期）
+            max_days: 自定义日期的最大时间跨度（天），整段加载K线的场景为CHUNKED_BACKTEST_MIN_DAYS
+
+        Returns:
+            (开始日期, 结束日期, 交易日历)
+        """
+        if custom_grid_params and 'startDate' in custom_grid_params and 'endDate' in custom_grid_params:
+            start_date = custom_grid_params['startDate']
+            end_date = custom_grid_params['endDate']
+            # 验证日期格式
+            try:
+                start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+                end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError("自定义日期格式无效，应为YYYY-MM-DD")
+
+            # 验证日期范围
+            days_diff = (end_dt - start_dt).days
+            if days_diff < 30:
+                raise ValueError("回测时间跨度至少30天")
+            if days_diff > max_days:
+                raise ValueError(f"回测时间跨度不能超过{max_days}天")
+
+            # 获取指定日期范围内的交易日历
+            trading_days = self.data_service.get_trading_calendar(
+                exchange_code, start_date=start_date, end_date=end_date
+            )
+        else:
+            # 获取默认的交易日历（最近30个交易日）
+            trading_days = self.data_service.get_trading_calendar(
+                exchange_code, limit=30
+            )
+            if trading_days:
+                start_date = trading_days[-1]
+                end_date = trading_days[0]
+            else:
+                raise ValueError("无法获取交易日历")
+
+        logger.info(f"交易日历数据: {trading_days}")
+        logger.info(f"使用的日期范围: start_date={start_date}, end_date={end_date}")
+
+        return start_date, end_date, trading_days
+
+    @staticmethod
+    def _is_long_horizon(start_date: str, end_date: str) -> bool:
+        """回测区间是否超过普通回测的上限（需分段回测）"""
+        return (datetime.strptime(end_date, '%Y-%m-%d') -
+                datetime.strptime(start_date, '%Y-%m-%d')).days > CHUNKED_BACKTEST_MIN_DAYS
+
+    def _load_kline_data(self, etf_code: str, exchange_code: str,
+                         start_date: str, end_date: str, type: str = 'STOCK') -> KBarSeries:
+        """获取K线数据，为空时抛出ValueError"""
+        kline_data = self.data_service.get_5min_kline(
+            etf_code, exchange_code, start_date, end_date, type
+        )
+
+        if not kline_data:
+            raise ValueError(f"无法获取K线数据: {start_date} - {end_date}")
+
+        logger.info(f"获取到 {len(kline_data)} 条K线数据")
+        return kline_data
+
+    def _load_kline_range(self, etf_code: str, exchange_code: str,
+                          trading_days: List[str], type: str = 'STOCK') -> KBarSeries:
+        """
+        分段获取长区间K线数据并拼接，为空时抛出ValueError
+
+        Args:
+            trading_days: 交易日列表（升序），每KLINE_FETCH_CHUNK_DAYS个交易日请求一次
+        """
+        parts = [
+            self.data_service.get_5min_kline(etf_code, exchange_code, chunk[0], chunk[-1], type)
+            for chunk in itertools.batched(trading_days, KLINE_FETCH_CHUNK_DAYS)
+        ]
+        kline_data = KBarSeries.concat(parts)
+
+        if not kline_data:
+            raise ValueError(f"无法获取K线数据: {trading_days[0]} - {trading_days[-1]}")
+
+        logger.info(f"分{len(parts)}段获取到 {len(kline_data)} 条K线数据")
+        return kline_data
+
     def _prepare_config(self, backtest_config: Optional[dict]) -> BacktestConfig:
         """准备回测配置"""
         if not backtest_config:
@@ -147,10 +1238,51 @@ class BacktestService:
             commission_rate=backtest_config.get('commissionRate', 0.0002),
             min_commission=backtest_config.get('minCommission', 5.0),
             risk_free_rate=backtest_config.get('riskFreeRate', 0.03),
-            trading_days_per_year=backtest_config.get('tradingDaysPerYear', 244)
+            trading_days_per_year=backtest_config.get('tradingDaysPerYear', 244),
+            engine=backtest_config.get('engine', 'vectorized')
         )
 
-    def _apply_custom_grid_params(self, grid_strategy: dict, custom_grid_params: dict, country: str = 'CHN') -> dict:
+    @classmethod
+    def _run_engine(cls, grid_strategy: dict, config: BacktestConfig,
+                    kline_data: KBarSeries, country: str = 'CHN',
+                    checkpoint_key: Optional[str] = None,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        按配置选择回测引擎执行回测，向量化引擎异常时回退到逐K线引擎
+
+        提供checkpoint_key时，先读取该键的检查点并只模拟检查点之后的K线，
+        回测结束后将新的检查点写回存储。progress为引擎进度回调 (已模拟K线数, 累计交易笔数)。
+        """
+        checkpoint = None
+        if checkpoint_key:
+            checkpoint = cls.checkpoint_store.get(checkpoint_key)
+            if checkpoint and not checkpoint.matches(kline_data):
+                logger.info("回测检查点与K线数据不一致，重新完整回测")
+                checkpoint = None
+            elif checkpoint:
+                logger.info(f"从检查点恢复回测: 已模拟{checkpoint.bar_count}根K线，"
+                            f"新增{len(kline_data) - checkpoint.bar_count}根")
+
+        # 步长不合法属于参数错误，先于引擎构建校验，避免触发引擎回退
+        validate_grid_config(grid_strategy['grid_config'])
+
+        engine_cls = cls.ENGINES.get(config.engine, BacktestEngine)
+        try:
+            engine = engine_cls(grid_strategy, config, country=country)
+            result = engine.run(kline_data, checkpoint=checkpoint, progress=progress)
+        except Exception as e:
+            if engine_cls is BacktestEngine:
+                raise
+            logger.warning(f"{config.engine}回测引擎执行失败，回退到逐K线引擎: {str(e)}", exc_info=True)
+            engine = BacktestEngine(grid_strategy, config, country=country)
+            result = engine.run(kline_data, progress=progress)
+
+        if checkpoint_key:
+            cls.checkpoint_store.set(checkpoint_key, engine.create_checkpoint())
+        return result
+
+    @staticmethod
+    def _apply_custom_grid_params(grid_strategy: dict, custom_grid_params: dict, country: str = 'CHN') -> dict:
         """应用自定义网格参数到网格策略"""
         optimizer = GridOptimizer(country=country)
 
@@ -201,8 +1333,32 @@ class BacktestService:
 
     def _format_result(self, backtest_result: Dict, metrics, benchmark,
                        start_date: str, end_date: str, trading_days: int,
-                       kline_data: list, grid_strategy: dict = None) -> Dict:
+                       kline_data: KBarSeries, grid_strategy: dict = None,
+                       total_bars: Optional[int] = None, curve_resolution: str = '5min',
+                       rolling_metrics: Optional[dict] = None) -> Dict:
         """格式化回测结果"""
+        result = self._format_summary(
+            backtest_result, metrics, benchmark, start_date, end_date, trading_days, kline_data, grid_strategy,
+            total_bars, curve_resolution, rolling_metrics
+        )
+        result['equity_curve'] = self._format_equity_curve(backtest_result['equity_curve'])
+        result['price_curve'] = self._format_price_curve(kline_data)
+        result['trade_records'] = self._format_trade_records(backtest_result['trade_records'])
+        return result
+
+    def _format_summary(self, backtest_result: Dict, metrics, benchmark,
+                        start_date: str, end_date: str, trading_days: int,
+                        kline_data: KBarSeries, grid_strategy: dict = None,
+                        total_bars: Optional[int] = None, curve_resolution: str = '5min',
+                        rolling_metrics: Optional[dict] = None) -> Dict:
+        """
+        格式化回测结果中除资产曲线、价格曲线和交易记录以外的部分
+
+        Args:
+            total_bars: 回测的K线总数（价格曲线按交易日聚合时提供）
+            curve_resolution: 资产曲线和价格曲线的粒度（5min / 1d）
+            rolling_metrics: 滚动指标序列（MetricsCalculator.calculate_rolling的结果，提供时输出）
+        """
         # 计算网格分析（如果提供了网格策略）
         grid_analysis = None
         if grid_strategy and 'price_levels' in grid_strategy:
@@ -211,13 +1367,11 @@ class BacktestService:
                 grid_strategy['price_levels']
             )
 
-        return {
-            'backtest_period': {
-                'start_date': start_date,
-                'end_date': end_date,
-                'trading_days': trading_days,
-                'total_bars': len(kline_data)
-            },
+        result = {
+            'backtest_period': self._format_backtest_period(
+                start_date, end_date, trading_days,
+                len(kline_data) if total_bars is None else total_bars, curve_resolution
+            ),
             'performance_metrics': {
                 'total_return': round(metrics.total_return, 4),
                 'annualized_return': round(metrics.annualized_return, 4),
@@ -240,85 +1394,280 @@ class BacktestService:
                 'excess_return': round(benchmark.excess_return, 4),
                 'excess_return_rate': round(benchmark.excess_return_rate, 4)
             },
-            'equity_curve': self._format_equity_curve(backtest_result['equity_curve']),
-            'price_curve': self._format_price_curve(kline_data),
-            'trade_records': self._format_trade_records(backtest_result['trade_records']),
             'grid_analysis': grid_analysis,
             'final_state': backtest_result['final_state'],
             'grid_strategy': grid_strategy  # 包含更新后的网格策略
         }
+        if rolling_metrics is not None:
+            result['rolling_metrics'] = self._format_rolling_metrics(rolling_metrics)
+        return result
 
-    def _format_equity_curve(self, equity_curve: list) -> list:
-        """格式化资产曲线"""
-        return [
-            {
-                'time': point['time'].strftime('%Y-%m-%d %H:%M:%S') if hasattr(point['time'], 'strftime') else point['time'],
-                'total_asset': round(point['total_asset'], 2)
-            }
-            for point in equity_curve
-        ]
+    @staticmethod
+    def _format_backtest_period(start_date: str, end_date: str, trading_days: int, total_bars: int,
+                                curve_resolution: str = '5min') -> Dict:
+        """格式化回测区间信息"""
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'trading_days': trading_days,
+            'total_bars': total_bars,
+            'curve_resolution': curve_resolution
+        }
 
-    def _format_price_curve(self, kline_data: list) -> list:
-        """格式化价格曲线"""
-        return [
-            {
-                'time': k.time.strftime('%Y-%m-%d %H:%M:%S'),
-                'open': float(k.open),
-                'high': float(k.high),
-                'low': float(k.low),
-                'close': float(k.close),
-                'volume': int(k.volume)
-            }
-            for k in kline_data
-        ]
+    def _format_rolling_metrics(self, rolling_metrics: Dict) -> Dict:
+        """格式化滚动指标序列：各序列保留4位小数，窗口未满的位置为null"""
+        def to_list(values: np.ndarray) -> list:
+            return [None if math.isnan(value) else round(value, 4) for value in values.tolist()]
+
+        series = {'drawdown': to_list(rolling_metrics['drawdown'])}
+        for window, values in rolling_metrics['rolling'].items():
+            for name in ('return', 'volatility', 'sharpe'):
+                series[f'{name}_{window}'] = to_list(values[name])
+
+        return {
+            'resolution': rolling_metrics['resolution'],
+            'periods_per_year': rolling_metrics['periods_per_year'],
+            'windows': rolling_metrics['windows'],
+            'times': _format_epoch_times(rolling_metrics['times']),
+            'series': series
+        }
+
+    def _stream_ndjson(self, records: Iterator[Tuple[str, object]]) -> Iterator[str]:
+        """
+        将 (类型, 数据) 记录逐行编码为NDJSON，最后输出各分块部分的数据点数
+
+        记录生成过程中（模拟或格式化）出错时，响应头已发送，只能在流中报告错误。
+        """
+        counts = dict.fromkeys(self.STREAM_SECTIONS, 0)
+        try:
+            for record_type, data in records:
+                if record_type in counts:
+                    counts[record_type] += len(data)
+                yield _ndjson_line(record_type, data)
+        except Exception as e:
+            logger.error(f"回测结果流式输出失败: {str(e)}", exc_info=True)
+            yield json_dumps({'type': 'error', 'error': '回测结果输出失败'}) + '\n'
+            return
+
+        yield _ndjson_line('end', counts)
+
+    def _split_stream_summary(self, context: Dict) -> Tuple[Dict, Dict]:
+        """将_format_summary的结果拆分为流式输出的meta和summary两部分"""
+        summary = self._format_summary(**context)
+        return {key: summary.pop(key) for key in self.STREAM_META_KEYS}, summary
+
+    def _iter_result_records(self, context: Dict, chunk_size: int) -> Iterator[Tuple[str, object]]:
+        """
+        按流式输出顺序生成已完成回测的结果记录
+
+        资产曲线、价格曲线和交易记录按分块惰性格式化，任意时刻只有一个分块驻留内存。
+        """
+        meta, summary = self._split_stream_summary(context)
+        yield 'meta', meta
+        for chunk in self._iter_equity_curve(context['backtest_result']['equity_curve'], chunk_size):
+            yield 'equity_curve', chunk
+        yield from self._iter_tail_records(context, summary, chunk_size)
+
+    def _iter_simulation_records(self, grid_strategy: dict, config: BacktestConfig, kline_data: KBarSeries,
+                                 country: str, start_date: str, end_date: str, trading_days: List[str],
+                                 rolling_metrics: Optional[dict], chunk_size: int) -> Iterator[Tuple[str, object]]:
+        """
+        边模拟边生成结果记录：meta在模拟前输出，引擎每推进chunk_size根K线输出该段资产曲线
+
+        分段推进（run_chunk）与整段回测的交易和资产曲线一致；指标需要完整资产曲线，模拟结束后计算。
+        """
+        yield 'meta', {
+            'backtest_period': self._format_backtest_period(start_date, end_date, len(trading_days), len(kline_data)),
+            'grid_strategy': grid_strategy
+        }
+
+        engine = self.ENGINES.get(config.engine, BacktestEngine)(grid_strategy, config, country=country)
+        equity_curve = EquityCurve(len(kline_data))
+        trade_records = []
+        for start in range(0, len(kline_data), chunk_size):
+            result = engine.run_chunk(kline_data[start:start + chunk_size])
+            trade_records.extend(result['trade_records'])
+            curve = result['equity_curve']
+            equity_curve.extend(curve.times, curve.assets, curve.prices)
+            for chunk in self._iter_equity_curve(curve, chunk_size):
+                yield 'equity_curve', chunk
+
+        backtest_result = {
+            'trade_records': trade_records,
+            'equity_curve': equity_curve,
+            'final_state': {
+                'cash': engine.state.cash,
+                'position': engine.state.position,
+                'total_asset': engine.state.total_asset
+            },
+            'lot_ledger': engine.state.ledger,
+            'kline_data': kline_data
+        }
+        metrics, benchmark = self._calculate_metrics(grid_strategy, config, backtest_result, kline_data)
+        context = {
+            'backtest_result': backtest_result,
+            'metrics': metrics,
+            'benchmark': benchmark,
+            'start_date': start_date,
+            'end_date': end_date,
+            'trading_days': len(trading_days),
+            'kline_data': kline_data,
+            'grid_strategy': grid_strategy,
+            'rolling_metrics': self._calculate_rolling_metrics(config, backtest_result, rolling_metrics)
+        }
+        _, summary = self._split_stream_summary(context)
+        yield from self._iter_tail_records(context, summary, chunk_size)
+
+    def _iter_tail_records(self, context: Dict, summary: Dict, chunk_size: int) -> Iterator[Tuple[str, object]]:
+        """生成资产曲线之后的记录：价格曲线分块、交易记录分块和指标汇总"""
+        for chunk in self._iter_price_curve(context['kline_data'], chunk_size):
+            yield 'price_curve', chunk
+        for chunk in self._iter_trade_records(context['backtest_result']['trade_records'], chunk_size):
+            yield 'trade_records', chunk
+        yield 'summary', summary
+
+    def _format_columnar(self, context: Dict) -> bytes:
+        """按列式二进制编码回测结果"""
+        backtest_result = context['backtest_result']
+        equity_curve = backtest_result['equity_curve']
+        kline_data = context['kline_data']
+        return encode_columnar(self._format_summary(**context), {
+            'equity_curve': {'time': equity_curve.times, 'total_asset': equity_curve.assets},
+            'price_curve': {
+                'time': kline_data.times,
+                'open': kline_data.open,
+                'high': kline_data.high,
+                'low': kline_data.low,
+                'close': kline_data.close,
+                'volume': kline_data.volume
+            },
+            'trade_records': self._trade_record_columns(backtest_result['trade_records'])
+        })
+
+    @staticmethod
+    def _trade_record_columns(trade_records: list) -> Dict[str, np.ndarray]:
+        """
+        将交易记录转换为列式数组
+
+        type列买入为1、卖出为-1；profit列买入为NaN；grid_level列未标记档位时为-1。
+        """
+        count = len(trade_records)
+
+        def column(values, dtype):
+            return np.fromiter(values, dtype=dtype, count=count)
+
+        return {
+            'time': column((to_epoch_seconds(t.time) for t in trade_records), np.int64),
+            'type': column((1 if t.type == 'BUY' else -1 for t in trade_records), np.int8),
+            'price': column((t.price for t in trade_records), np.float64),
+            'quantity': column((t.quantity for t in trade_records), np.int64),
+            'commission': column((t.commission for t in trade_records), np.float64),
+            'profit': column((np.nan if t.profit is None else t.profit for t in trade_records), np.float64),
+            'position': column((t.position for t in trade_records), np.int64),
+            'cash': column((t.cash for t in trade_records), np.float64),
+            'grid_level': column((-1 if t.grid_level is None else t.grid_level for t in trade_records), np.int64)
+        }
+
+    def _format_equity_curve(self, equity_curve: EquityCurve) -> list:
+        """格式化资产曲线（直接读取资产曲线缓冲区）"""
+        return list(itertools.chain.from_iterable(self._iter_equity_curve(equity_curve, self.STREAM_CHUNK_SIZE)))
+
+    def _iter_equity_curve(self, equity_curve: EquityCurve, chunk_size: int) -> Iterator[list]:
+        """按分块格式化资产曲线"""
+        times, assets = equity_curve.times, equity_curve.assets
+        for start in range(0, len(times), chunk_size):
+            end = start + chunk_size
+            yield [
+                {'time': time, 'total_asset': round(total_asset, 2)}
+                for time, total_asset in zip(_format_epoch_times(times[start:end]), assets[start:end].tolist())
+            ]
+
+    def _format_price_curve(self, kline_data: KBarSeries) -> list:
+        """格式化价格曲线（直接读取列式数组）"""
+        return list(itertools.chain.from_iterable(self._iter_price_curve(kline_data, self.STREAM_CHUNK_SIZE)))
+
+    def _iter_price_curve(self, kline_data: KBarSeries, chunk_size: int) -> Iterator[list]:
+        """按分块格式化价格曲线"""
+        for start in range(0, len(kline_data), chunk_size):
+            chunk = kline_data[start:start + chunk_size]
+            yield [
+                {
+                    'time': time,
+                    'open': open_price,
+                    'high': high,
+                    'low': low,
+                    'close': close,
+                    'volume': volume
+                }
+                for time, open_price, high, low, close, volume in zip(
+                    _format_epoch_times(chunk.times), chunk.open.tolist(), chunk.high.tolist(),
+                    chunk.low.tolist(), chunk.close.tolist(),
+                    chunk.volume.astype(np.int64).tolist()
+                )
+            ]
 
     def _analyze_grid_performance(self, trade_records: list, price_levels: list) -> dict:
-        """分析网格表现"""
+        """
+        分析网格表现
+
+        按交易记录的grid_level（引擎按成交跨越的档位数推进的整数档位）归集，每笔成交只计入一个价格水平；
+        底仓建仓、档位超出价格水平范围等未标记档位的交易不计入。
+        """
         if not price_levels:
             return None
 
-        grid_performance = []
-        triggered_grids = 0
-
-        for price in price_levels:
-            # 统计在该价格附近（±1%）的交易次数
-            price_tolerance = price * 0.01  # 1%的容差
-            trigger_count = 0
-            profit_contribution = 0.0
-
-            for trade in trade_records:
-                if abs(trade.price - price) <= price_tolerance:
-                    trigger_count += 1
-                    if trade.profit is not None:
-                        profit_contribution += trade.profit
+        level_count = len(price_levels)
+        levels = np.fromiter(
+            (-1 if t.grid_level is None else t.grid_level for t in trade_records), dtype=np.int64, count=len(trade_records)
+        )
+        profits = np.fromiter(
+            (0.0 if t.profit is None else t.profit for t in trade_records), dtype=np.float64, count=len(trade_records)
+        )
+        tagged = (levels >= 0) & (levels < level_count)
+        trigger_counts = np.bincount(levels[tagged], minlength=level_count)
+        profit_contributions = np.bincount(levels[tagged], weights=profits[tagged], minlength=level_count)
 
-            grid_performance.append({
+        grid_performance = [
+            {
                 'price': round(price, 3),
                 'trigger_count': trigger_count,
                 'profit_contribution': round(profit_contribution, 2)
-            })
-
-            if trigger_count > 0:
-                triggered_grids += 1
+            }
+            for price, trigger_count, profit_contribution in zip(
+                price_levels, trigger_counts.tolist(), profit_contributions.tolist()
+            )
+        ]
 
         return {
             'grid_performance': grid_performance,
-            'triggered_grids': triggered_grids,
-            'total_grids': len(price_levels)
+            'triggered_grids': int(np.count_nonzero(trigger_counts)),
+            'total_grids': level_count
         }
 
     def _format_trade_records(self, trade_records: list) -> list:
         """格式化交易记录"""
-        return [
-            {
-                'time': t.time.strftime('%Y-%m-%d %H:%M:%S'),
-                'type': t.type,
-                'price': round(t.price, 3),
-                'quantity': t.quantity,
-                'commission': round(t.commission, 2),
-                'profit': round(t.profit, 2) if t.profit is not None else None,
-                'position': t.position,
-                'cash': round(t.cash, 2)
-            }
-            for t in trade_records
-        ]
\ No newline at end of file
+        return list(itertools.chain.from_iterable(self._iter_trade_records(trade_records, self.STREAM_CHUNK_SIZE)))
+
+    def _iter_trade_records(self, trade_records: list, chunk_size: int) -> Iterator[list]:
+        """
+        按分块格式化交易记录（先转换为列式数组，按列格式化时间，未标记档位的grid_level为None）
+
+        数值用Python的round舍入：np.round先按10的幂缩放再取整，在2.675这类小数上与round结果不同
+        """
+        for start in range(0, len(trade_records), chunk_size):
+            columns = self._trade_record_columns(trade_records[start:start + chunk_size])
+            keys = ('time', 'type', 'price', 'quantity', 'commission', 'profit', 'position', 'cash', 'grid_level')
+            yield [
+                dict(zip(keys, values))
+                for values in zip(
+                    _format_epoch_times(columns['time']),
+                    np.where(columns['type'] == 1, 'BUY', 'SELL').tolist(),
+                    [round(price, 3) for price in columns['price'].tolist()],
+                    columns['quantity'].tolist(),
+                    [round(commission, 2) for commission in columns['commission'].tolist()],
+                    [None if math.isnan(profit) else round(profit, 2) for profit in columns['profit'].tolist()],
+                    columns['position'].tolist(),
+                    [round(cash, 2) for cash in columns['cash'].tolist()],
+                    [None if level < 0 else level for level in columns['grid_level'].tolist()]
+                )
+            ]
@@ -1,10 +1,9 @@
 """数据业务服务"""
 import pandas as pd
-from datetime import datetime
 from typing import List
 
 from app.external.providers.tsanghi_provider import TsanghiProvider
-from app.algorithms.backtest.models import KBar
+from app.algorithms.backtest.models import KBarSeries
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -98,7 +97,7 @@ class DataService:
             raise
 
     def get_5min_kline(self, ticker: str, exchange_code: str,
-                        start_date: str, end_date: str, type: str = 'STOCK') -> List[KBar]:
+                        start_date: str, end_date: str, type: str = 'STOCK') -> KBarSeries:
         """
         获取5分钟K线数据
 
@@ -110,7 +109,7 @@ class DataService:
             type: 证券类型 ('STOCK' 或 'ETF')
 
         Returns:
-            K线数据列表
+            K线序列（按时间升序）
         """
         try:
             # 根据类型调用相应API
@@ -125,24 +124,10 @@ class DataService:
                 data = response['data']
             else:
                 logger.warning(f"获取5分钟K线数据失败: {response}")
-                return []
+                return KBarSeries.empty()
 
-            # 转换为KBar对象
-            kbars = []
-            for row in data:
-                kbars.append(KBar(
-                    time=datetime.strptime(row['date'], '%Y-%m-%d %H:%M:%S'),
-                    open=float(row['open']),
-                    high=float(row['high']),
-                    low=float(row['low']),
-                    close=float(row['close']),
-                    volume=int(row['volume'])
-                ))
-
-            # 按时间排序，确保从历史到现在的顺序
-            kbars.sort(key=lambda k: k.time)
-
-            return kbars
+            # 转换为列式K线序列（按时间排序，确保从历史到现在的顺序）
+            return KBarSeries.from_records(data)
         except Exception as e:
             logger.error(f"获取5分钟K线数据失败: {e}")
             raise
@@ -0,0 +1,381 @@
+"""
+回测异步任务队列
+
+SQLite持久化的任务队列和进程内工作线程池：
+- 提交任务立即返回任务ID，工作线程按优先级领取（优先级高的先执行，同优先级按提交顺序）
+- 执行过程中定期写入进度，结束后保存结果或错误信息
+- 多个工作进程（gunicorn）共享同一数据库文件：任一进程都可以提交和查询任务，但只有持有执行锁的
+  一个进程启动工作线程，同时执行的任务数不超过该进程的工作线程数（扫描任务各自再使用进程池）；
+  执行进程退出（如gunicorn按max_requests回收）后由其他进程接管，中断的任务重新排队
+- 已结束的任务保留ttl秒，且最多保留max_retained个，超出时删除最早结束的任务
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from app.utils.json_provider import dumps, loads
+from app.utils.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # 非POSIX平台不支持文件锁，每个进程都启动工作线程
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# 任务优先级（数值越大越先执行）
+JOB_PRIORITIES = {
+    'interactive': 2,
+    'normal': 1,
+    'batch': 0
+}
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+"""
+
+# 任务处理函数：handler(kind, params, report) -> 结果，report(progress) 写入进度
+JobHandler = Callable[[str, dict, Callable[[dict], None]], dict]
+
+
+class JobQueueFullError(Exception):
+    """排队和执行中的任务数达到上限"""
+    pass
+
+
+class JobQueue:
+    """SQLite持久化的任务队列（进程内工作线程执行）"""
+
+    # 进度写入的最小间隔（秒），结束时总会写入最后一次进度
+    PROGRESS_INTERVAL = 0.5
+
+    # 没有通知时轮询数据库的间隔（秒），用于领取其他进程提交的任务
+    POLL_INTERVAL = 1.0
+
+    # 任务最多执行次数：执行进程退出导致中断的任务在接管时重新排队，达到次数后标记为失败
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, handler: JobHandler, db_path: Optional[str] = None, workers: Optional[int] = None,
+                 ttl: Optional[float] = None, max_retained: Optional[int] = None,
+                 max_pending: Optional[int] = None, stale_after: Optional[float] = None):
+        """
+        Args:
+            handler: 任务处理函数
+            db_path: 数据库文件路径（默认读取BACKTEST_JOB_DB）
+            workers: 执行进程的工作线程数（默认读取BACKTEST_JOB_WORKERS，0表示不启动后台线程，由调用方执行run_next）
+            ttl: 已结束任务的保留秒数（默认读取BACKTEST_JOB_TTL）
+            max_retained: 已结束任务的最大保留数（默认读取BACKTEST_JOB_MAX_RETAINED）
+            max_pending: 排队和执行中任务的最大数量（默认读取BACKTEST_JOB_MAX_PENDING）
+            stale_after: 执行中任务超过该秒数没有更新时视为执行进程已退出，标记为失败
+        """
+        self.handler = handler
+        self.db_path = Path(db_path or os.getenv('BACKTEST_JOB_DB', 'cache/backtest_jobs.sqlite3'))
+        self.workers = int(os.getenv('BACKTEST_JOB_WORKERS', 2)) if workers is None else workers
+        self.ttl = float(os.getenv('BACKTEST_JOB_TTL', 3600)) if ttl is None else ttl
+        self.max_retained = int(os.getenv('BACKTEST_JOB_MAX_RETAINED', 200)) if max_retained is None else max_retained
+        self.max_pending = int(os.getenv('BACKTEST_JOB_MAX_PENDING', 100)) if max_pending is None else max_pending
+        self.stale_after = float(os.getenv('BACKTEST_JOB_STALE_SECONDS', 600)) if stale_after is None else stale_after
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._initialized = False
+        self._threads = []
+        self._stopping = False
+        self._executor_lock = None
+        self._executor_pid = None
+
+    def submit(self, kind: str, params: dict, priority: str = 'normal') -> dict:
+        """
+        提交任务
+
+        Args:
+            kind: 任务类型（由handler解释）
+            params: 任务参数（须可JSON序列化）
+            priority: 优先级（JOB_PRIORITIES中的键）
+
+        Returns:
+            任务信息
+
+        Raises:
+            ValueError: 优先级无效
+            JobQueueFullError: 排队和执行中的任务数达到上限
+        """
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"任务优先级必须是以下之一：{', '.join(JOB_PRIORITIES)}")
+
+        self._purge()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                conn.execute('ROLLBACK')
+                raise JobQueueFullError(f"任务队列已满（{self.max_pending}个），请稍后重试")
+            conn.execute(
+                "INSERT INTO jobs (id, kind, priority, status, params, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, JOB_PRIORITIES[priority], JOB_QUEUED, dumps(params), now, now)
+            )
+            conn.execute('COMMIT')
+
+        logger.info(f"提交回测任务: {job_id} {kind}, 优先级{priority}")
+        self._ensure_workers()
+        with self._wakeup:
+            self._wakeup.notify()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        查询任务
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            任务信息（已过期或不存在时返回None），成功的任务包含result，失败的任务包含error
+        """
+        self._purge()
+        self._ensure_workers()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job_dict(row) if row else None
+
+    def run_next(self) -> Optional[str]:
+        """
+        领取并执行一个排队中的任务
+
+        Returns:
+            执行的任务ID，没有排队任务时返回None
+        """
+        job = self._claim()
+        if job is None:
+            return None
+
+        job_id, kind, params = job
+        last_write = 0.0
+        latest = None
+
+        def report(progress: dict):
+            nonlocal last_write, latest
+            latest = progress
+            now = time.time()
+            if now - last_write >= self.PROGRESS_INTERVAL:
+                last_write = now
+                self._update(job_id, progress=dumps(progress), updated_at=now)
+
+        started = time.time()
+        try:
+            result = self.handler(kind, params, report)
+            self._finish(job_id, JOB_SUCCEEDED, latest, result=dumps(result))
+            logger.info(f"回测任务完成: {job_id} {kind}, 耗时{time.time() - started:.2f}秒")
+        except Exception as e:
+            logger.error(f"回测任务执行失败: {job_id} {kind}, {str(e)}", exc_info=True)
+            # 参数或数据错误返回具体原因，其他异常不暴露内部信息
+            error = str(e) if isinstance(e, ValueError) else '任务执行失败，请稍后重试'
+            self._finish(job_id, JOB_FAILED, latest, error=error)
+        return job_id
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """停止工作线程（执行中的任务完成后退出），并释放执行锁由其他进程接管"""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping = False
+        if self._executor_lock is not None and self._executor_pid == os.getpid():
+            self._executor_lock.close()
+            self._executor_lock = self._executor_pid = None
+
+    def _claim(self) -> Optional[tuple]:
+        """在写事务中领取优先级最高、提交最早的排队任务"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT id, kind, params FROM jobs WHERE status = ? "
+                "ORDER BY priority DESC, created_at, rowid LIMIT 1",
+                (JOB_QUEUED,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, updated_at = ? WHERE id = ?",
+                    (JOB_RUNNING, now, now, row['id'])
+                )
+            conn.execute('COMMIT')
+        return (row['id'], row['kind'], loads(row['params'])) if row else None
+
+    def _finish(self, job_id: str, status: str, progress: Optional[dict],
+                result: Optional[str] = None, error: Optional[str] = None):
+        now = time.time()
+        fields = {'status': status, 'result': result, 'error': error, 'updated_at': now, 'finished_at': now}
+        if progress is not None:
+            fields['progress'] = dumps(progress)
+        self._update(job_id, **fields)
+        self._purge()
+
+    def _update(self, job_id: str, **fields):
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _purge(self):
+        """删除过期和超出保留数的已结束任务，并将长时间没有更新的执行中任务标记为失败"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ? "
+                "WHERE status = ? AND updated_at < ?",
+                (JOB_FAILED, '任务执行中断', now, now, JOB_RUNNING, now - self.stale_after)
+            )
+            conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE finished_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_retained,)
+            )
+
+    def _ensure_workers(self):
+        """首次使用时启动工作线程（仅执行进程），其他进程每次提交或查询任务时尝试接管执行"""
+        if self._threads or self.workers <= 0:
+            return
+        with self._lock:
+            if self._threads or not self._acquire_executor():
+                return
+            self._recover_interrupted()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"backtest-job-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"回测任务工作线程已启动: {self.workers}个（执行进程{os.getpid()}）")
+
+    def _acquire_executor(self) -> bool:
+        """
+        尝试获得执行锁（flock，非阻塞），成为唯一启动工作线程的进程
+
+        锁随进程退出自动释放。锁文件在首次使用时按进程打开：gunicorn预加载应用时在主进程创建的实例
+        被fork到各工作进程，继承的文件描述符共享同一把锁，不能用于区分进程。
+
+        Returns:
+            是否为执行进程
+        """
+        if fcntl is None:
+            return True
+        if self._executor_pid != os.getpid():
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._executor_lock = open(self.db_path.with_name(f"{self.db_path.name}.executor.lock"), 'a')
+            self._executor_pid = os.getpid()
+        try:
+            fcntl.flock(self._executor_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _recover_interrupted(self):
+        """
+        接管执行时处理上一个执行进程退出时中断的任务：未达到最多执行次数的重新排队，否则标记为失败
+
+        只有执行进程执行任务，获得执行锁时数据库中执行中的任务都已中断，无需等待stale_after。
+        """
+        if fcntl is None:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, updated_at = ? WHERE status = ? AND attempts < ?",
+                (JOB_QUEUED, now, JOB_RUNNING, self.MAX_ATTEMPTS)
+            ).rowcount
+            failed = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ? WHERE status = ?",
+                (JOB_FAILED, '任务执行中断', now, now, JOB_RUNNING)
+            ).rowcount
+            conn.execute('COMMIT')
+        if requeued or failed:
+            logger.warning(f"接管回测任务执行: 中断的任务{requeued}个重新排队，{failed}个标记为失败")
+
+    def _worker_loop(self):
+        while not self._stopping:
+            try:
+                if self.run_next() is not None:
+                    continue
+            except Exception as e:
+                logger.error(f"回测任务工作线程异常: {str(e)}", exc_info=True)
+            with self._wakeup:
+                if not self._stopping:
+                    self._wakeup.wait(self.POLL_INTERVAL)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开数据库连接（自动提交模式，需要原子性的操作显式开启事务）"""
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            self._initialized = True
+
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _job_dict(self, row: sqlite3.Row) -> dict:
+        priority = next((name for name, value in JOB_PRIORITIES.items() if value == row['priority']), None)
+
+        def timestamp(value: Optional[float]) -> Optional[datetime]:
+            return datetime.fromtimestamp(value) if value is not None else None
+
+        job = {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'priority': priority,
+            'status': row['status'],
+            'progress': loads(row['progress']) if row['progress'] else None,
+            'created_at': timestamp(row['created_at']),
+            'started_at': timestamp(row['started_at']),
+            'finished_at': timestamp(row['finished_at']),
+            'expires_at': timestamp(row['finished_at'] + self.ttl) if row['finished_at'] is not None else None
+        }
+        if row['status'] == JOB_SUCCEEDED:
+            job['result'] = loads(row['result'])
+        elif row['status'] == JOB_FAILED:
+            job['error'] = row['error']
+        return job
@@ -0,0 +1,148 @@
+"""
+回测结果缓存
+
+以 证券/日期范围/策略/自定义参数/回测配置/请求选项/K线数据指纹 的哈希为键，缓存格式化后的回测结果。
+缓存为目录下的JSON文件，gunicorn各工作进程共享；命中时刷新文件修改时间，
+总大小超出上限时按修改时间淘汰最久未使用的结果（LRU）。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+from app.algorithms.backtest.checkpoint import kline_digest
+from app.algorithms.backtest.models import BacktestConfig, KBarSeries
+from app.utils.json_provider import dumps, loads
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 缓存格式版本（结果结构或回测逻辑变化时递增，使旧缓存全部失效）
+RESULT_CACHE_VERSION = 5
+
+
+def result_cache_key(symbol: str, start_date: str, end_date: str, grid_strategy: dict,
+                     custom_grid_params: Optional[dict], config: BacktestConfig,
+                     kline_data: KBarSeries, type: str = 'STOCK', country: str = 'CHN',
+                     options: Optional[dict] = None) -> str:
+    """
+    生成回测结果缓存键
+
+    Args:
+        symbol: 证券标识（如 XSHG:510300）
+        start_date: 开始日期
+        end_date: 结束日期
+        grid_strategy: 网格策略（应用自定义参数之前）
+        custom_grid_params: 自定义网格参数
+        config: 回测配置
+        kline_data: K线序列（计算数据指纹，数据修订后键随之变化）
+        type: 证券类型
+        country: 市场国家代码
+        options: 其他影响结果内容的请求选项（如滚动指标）
+
+    Returns:
+        缓存键
+    """
+    payload = json.dumps({
+        'version': RESULT_CACHE_VERSION,
+        'symbol': symbol,
+        'type': type,
+        'country': country,
+        'start_date': start_date,
+        'end_date': end_date,
+        'strategy': grid_strategy,
+        'custom_grid_params': custom_grid_params or {},
+        'config': asdict(config),
+        'options': options or {},
+        'klines': kline_digest(kline_data, len(kline_data))
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """回测结果文件缓存（总大小有上限，LRU淘汰）"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or os.getenv('BACKTEST_RESULT_CACHE_DIR', 'cache/backtest_results'))
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            int(os.getenv('BACKTEST_RESULT_CACHE_MAX_MB', 256)) * 1024 * 1024
+
+    def get(self, key: str) -> Optional[dict]:
+        """读取缓存结果，不存在或损坏时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取回测结果缓存失败: {path}, {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        # 刷新修改时间，作为最近使用时间
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def set(self, key: str, result: dict):
+        """
+        写入缓存结果（先写临时文件再原子替换），超出大小上限时淘汰
+
+        与接口响应使用同一套序列化（支持NumPy标量和数组、datetime）；无法序列化的结果抛出TypeError，
+        只有文件读写错误被忽略。
+        """
+        content = dumps(result, separators=(',', ':'))
+        tmp_path = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"写入回测结果缓存失败: {key}, {e}")
+            if tmp_path:
+                Path(tmp_path).unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def delete(self, key: str):
+        """删除缓存结果"""
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        """清除所有缓存结果"""
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*.json'):
+                path.unlink(missing_ok=True)
+
+    def _evict(self):
+        """按最近使用时间淘汰，直到总大小不超过上限"""
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
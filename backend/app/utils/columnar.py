@@ -0,0 +1,115 @@
+"""
+列式二进制编码
+
+将若干组等长数组按小端字节序原样打包，并附带一个JSON头，避免逐个数值构造JSON对象。
+
+格式：
+    magic(4字节, b'GRDC') | version(uint32) | header_length(uint32) | header(JSON, UTF-8) | 填充 | 数据区
+
+JSON头：
+    {"meta": {...}, "tables": {表名: {"length": 行数, "columns": [
+        {"name": 列名, "dtype": "<f8" | "<i8" | "|i1", "offset": 数据区偏移, "nbytes": 字节数}, ...]}}}
+
+数据区从8字节对齐处开始，每列起始位置也按8字节对齐，客户端可直接以
+Float64Array / BigInt64Array / Int8Array 视图读取，无需复制。
+"""
+
+import json
+import struct
+from typing import Dict, Tuple
+import numpy as np
+
+COLUMNAR_MAGIC = b'GRDC'
+COLUMNAR_VERSION = 1
+
+# 响应类型
+COLUMNAR_MIMETYPE = 'application/vnd.grider.columnar'
+
+_PREFIX = struct.Struct('<4sII')
+_ALIGNMENT = 8
+
+# 支持的列类型（统一为小端）
+_DTYPES = {
+    np.dtype(np.float64): '<f8',
+    np.dtype(np.int64): '<i8',
+    np.dtype(np.int8): '|i1'
+}
+
+
+def _padding(size: int) -> int:
+    return -size % _ALIGNMENT
+
+
+def encode_columnar(meta: dict, tables: Dict[str, Dict[str, np.ndarray]]) -> bytes:
+    """
+    编码为列式二进制
+
+    Args:
+        meta: 附加在JSON头中的元数据（须可JSON序列化）
+        tables: {表名: {列名: 一维数组}}，同一表的各列等长，类型为float64 / int64 / int8
+
+    Returns:
+        编码后的字节串
+    """
+    header_tables = {}
+    buffers = []
+    offset = 0
+    for table_name, columns in tables.items():
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"表{table_name}的列长度不一致")
+
+        header_columns = []
+        for column_name, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype not in _DTYPES:
+                raise ValueError(f"不支持的列类型: {table_name}.{column_name} {values.dtype}")
+            data = np.ascontiguousarray(values, dtype=_DTYPES[values.dtype]).tobytes()
+            header_columns.append({
+                'name': column_name,
+                'dtype': _DTYPES[values.dtype],
+                'offset': offset,
+                'nbytes': len(data)
+            })
+            buffers.append(data)
+            buffers.append(b'\0' * _padding(len(data)))
+            offset += len(data) + _padding(len(data))
+
+        header_tables[table_name] = {'length': lengths.pop() if lengths else 0, 'columns': header_columns}
+
+    header = json.dumps(
+        {'meta': meta, 'tables': header_tables}, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+    prefix = _PREFIX.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(header))
+    return b''.join([prefix, header, b'\0' * _padding(len(prefix) + len(header))] + buffers)
+
+
+def decode_columnar(data: bytes) -> Tuple[dict, Dict[str, Dict[str, np.ndarray]]]:
+    """
+    解码列式二进制
+
+    Args:
+        data: encode_columnar编码的字节串
+
+    Returns:
+        (元数据, {表名: {列名: 数组}})，数组为data上的只读视图
+    """
+    magic, version, header_length = _PREFIX.unpack_from(data)
+    if magic != COLUMNAR_MAGIC:
+        raise ValueError("不是列式二进制数据")
+    if version != COLUMNAR_VERSION:
+        raise ValueError(f"不支持的列式二进制版本: {version}")
+
+    header_end = _PREFIX.size + header_length
+    header = json.loads(bytes(data[_PREFIX.size:header_end]).decode('utf-8'))
+    body = header_end + _padding(header_end)
+
+    tables = {}
+    for table_name, table in header['tables'].items():
+        tables[table_name] = {
+            column['name']: np.frombuffer(
+                data, dtype=column['dtype'], count=table['length'], offset=body + column['offset']
+            )
+            for column in table['columns']
+        }
+    return header['meta'], tables
@@ -0,0 +1,103 @@
+"""
+JSON序列化
+
+Flask的JSON提供者及同一套序列化函数（NDJSON流式输出也使用）：
+- 安装orjson时使用orjson编码和解码，否则回退到标准库json
+- 原生支持datetime / date（与接口约定的 YYYY-MM-DD HH:MM:SS 格式一致）、NumPy标量和数组、dataclass
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, Optional
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+DATE_FORMAT = '%Y-%m-%d'
+
+if orjson is not None:
+    # datetime交给default按接口格式输出；NumPy数组和标量由orjson直接编码
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def json_default(o: Any) -> Any:
+    """
+    将标准JSON类型以外的对象转换为可编码的值
+
+    Args:
+        o: 待转换对象
+
+    Returns:
+        可JSON编码的值
+
+    Raises:
+        TypeError: 不支持的类型
+    """
+    if isinstance(o, datetime):
+        return o.strftime(DATETIME_FORMAT)
+    if isinstance(o, date):
+        return o.strftime(DATE_FORMAT)
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        # 只展开一层，嵌套的datetime等字段继续由编码器交给default处理
+        return {field.name: getattr(o, field.name) for field in dataclasses.fields(o)}
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, sort_keys: bool = False, indent: Optional[int] = None, ensure_ascii: bool = False, **kwargs) -> str:
+    """
+    序列化为JSON字符串
+
+    Args:
+        obj: 待序列化对象
+        sort_keys: 是否按键排序
+        indent: 缩进（orjson只支持2空格缩进，非空即按2空格输出）
+        ensure_ascii: 是否转义非ASCII字符（仅标准库json生效，orjson始终输出UTF-8）
+        **kwargs: 传给标准库json.dumps的其他参数
+
+    Returns:
+        JSON字符串
+    """
+    if orjson is not None:
+        option = _ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=json_default, option=option).decode('utf-8')
+
+    kwargs.setdefault('default', json_default)
+    return json.dumps(obj, sort_keys=sort_keys, indent=indent, ensure_ascii=ensure_ascii, **kwargs)
+
+
+def loads(s: str | bytes, **kwargs) -> Any:
+    """反序列化JSON字符串"""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s, **kwargs)
+
+
+class GriderJSONProvider(DefaultJSONProvider):
+    """Flask JSON提供者：jsonify、request.get_json等均经由此处编码和解码"""
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        return dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs) -> Any:
+        return loads(s, **kwargs)
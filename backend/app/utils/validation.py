@@ -326,12 +326,13 @@ def validate_combined(rules: List[Dict]):
     return validate_request(rules, data_source='combined')
 
 
-def validate_backtest_request(data: dict) -> dict:
+def validate_backtest_request(data: dict, limits: dict) -> dict:
     """
     验证回测请求参数
 
     Args:
         data: 请求数据
+        limits: 请求参数取值范围（由路由层从各算法与服务模块的常量汇总传入）
 
     Returns:
         {'valid': bool, 'error': str}
@@ -375,4 +376,233 @@ def validate_backtest_request(data: dict) -> dict:
             if min_fee < 0:
                 return {'valid': False, 'error': '最低收费不能为负'}
 
-    return {'valid': True, 'error': None}
\ No newline at end of file
+        # 验证回测引擎
+        if 'engine' in config and config['engine'] not in ('vectorized', 'reference'):
+            return {'valid': False, 'error': '回测引擎必须是vectorized或reference'}
+
+    # 验证流式响应开关（可选）
+    if 'stream' in data and not isinstance(data['stream'], bool):
+        return {'valid': False, 'error': 'stream必须是布尔值'}
+
+    # 验证滚动指标选项（可选）
+    if 'rollingMetrics' in data:
+        error = _validate_rolling_metrics(data['rollingMetrics'], limits)
+        if error:
+            return {'valid': False, 'error': error}
+
+    # 验证图表降采样选项（可选）
+    if 'maxPoints' in data:
+        max_points = data['maxPoints']
+        min_points, max_limit = limits['min_chart_points'], limits['max_chart_points']
+        if isinstance(max_points, bool) or not isinstance(max_points, int) or \
+                not (min_points <= max_points <= max_limit):
+            return {'valid': False, 'error': f'maxPoints必须是{min_points}-{max_limit}之间的整数'}
+
+    resolutions = limits['chart_resolutions']
+    if 'chartResolution' in data and data['chartResolution'] not in resolutions:
+        return {'valid': False, 'error': f'chartResolution必须是以下之一：{", ".join(resolutions)}'}
+
+    return {'valid': True, 'error': None}
+
+
+def _validate_rolling_metrics(options, limits: dict) -> Optional[str]:
+    """验证滚动指标选项（布尔值，或包含windows/resolution的对象），返回错误信息"""
+    if isinstance(options, bool):
+        return None
+    if not isinstance(options, dict):
+        return 'rollingMetrics必须是布尔值或对象'
+
+    resolutions = limits['rolling_resolutions']
+    if 'resolution' in options and options['resolution'] not in resolutions:
+        return f"rollingMetrics.resolution必须是以下之一：{', '.join(resolutions)}"
+
+    if 'windows' in options:
+        windows = options['windows']
+        max_windows, max_size = limits['max_rolling_windows'], limits['max_rolling_window_size']
+        if not isinstance(windows, list) or not windows:
+            return 'rollingMetrics.windows必须是非空数组'
+        if len(windows) > max_windows:
+            return f'rollingMetrics.windows最多{max_windows}个窗口'
+        for window in windows:
+            if isinstance(window, bool) or not isinstance(window, int) or not 2 <= window <= max_size:
+                return f'rollingMetrics.windows中的窗口必须是2-{max_size}之间的整数'
+        if len(set(windows)) != len(windows):
+            return 'rollingMetrics.windows不能重复'
+
+    return None
+
+
+def validate_sweep_request(data: dict, limits: dict) -> dict:
+    """
+    验证参数扫描请求参数
+
+    Args:
+        data: 请求数据
+        limits: 请求参数取值范围（由路由层从各算法与服务模块的常量汇总传入）
+
+    Returns:
+        {'valid': bool, 'error': str}
+    """
+    result = validate_backtest_request(data, limits)
+    if not result['valid']:
+        return result
+
+    # 验证扫描参数
+    sweep_params = data.get('sweepParams')
+    if not isinstance(sweep_params, dict) or not sweep_params:
+        return {'valid': False, 'error': '缺少sweepParams参数'}
+
+    unknown = [key for key in sweep_params if key not in limits['sweep_params']]
+    if unknown:
+        return {'valid': False, 'error': f'不支持扫描的参数: {", ".join(unknown)}'}
+
+    # 验证Top-K
+    if 'topK' in data:
+        top_k, max_top_k = data['topK'], limits['max_sweep_top_k']
+        if not isinstance(top_k, int) or not (1 <= top_k <= max_top_k):
+            return {'valid': False, 'error': f'topK必须是1-{max_top_k}之间的整数'}
+
+    # 验证排序指标
+    sort_keys = limits['sweep_sort_keys']
+    if 'sortBy' in data and data['sortBy'] not in sort_keys:
+        return {'valid': False, 'error': f'sortBy必须是以下之一：{", ".join(sort_keys)}'}
+
+    return {'valid': True, 'error': None}
+
+
+def validate_walk_forward_request(data: dict, limits: dict) -> dict:
+    """
+    验证滚动前向优化请求参数
+
+    Args:
+        data: 请求数据
+        limits: 请求参数取值范围（由路由层从各算法与服务模块的常量汇总传入）
+
+    Returns:
+        {'valid': bool, 'error': str}
+    """
+    result = validate_sweep_request(data, limits)
+    if not result['valid']:
+        return result
+
+    # 验证窗口配置
+    walk_forward = data.get('walkForward')
+    if not isinstance(walk_forward, dict):
+        return {'valid': False, 'error': '缺少walkForward参数'}
+
+    for field in ('startDate', 'endDate'):
+        if not isinstance(walk_forward.get(field), str):
+            return {'valid': False, 'error': f'walkForward缺少{field}字段'}
+
+    min_days, max_days = limits['min_window_days'], limits['max_window_days']
+    for field in ('inSampleDays', 'outOfSampleDays'):
+        days = walk_forward.get(field)
+        if not isinstance(days, int) or not (min_days <= days <= max_days):
+            return {'valid': False, 'error': f'{field}必须是{min_days}-{max_days}之间的整数'}
+
+    if 'stepDays' in walk_forward:
+        step_days = walk_forward['stepDays']
+        if not isinstance(step_days, int) or not (1 <= step_days <= max_days):
+            return {'valid': False, 'error': f'stepDays必须是1-{max_days}之间的整数'}
+
+    if 'reanchor' in walk_forward and not isinstance(walk_forward['reanchor'], bool):
+        return {'valid': False, 'error': 'reanchor必须是布尔值'}
+
+    return {'valid': True, 'error': None}
+
+
+def validate_monte_carlo_request(data: dict, limits: dict) -> dict:
+    """
+    验证蒙特卡洛检验请求参数
+
+    Args:
+        data: 请求数据
+        limits: 请求参数取值范围（由路由层从各算法与服务模块的常量汇总传入）
+
+    Returns:
+        {'valid': bool, 'error': str}
+    """
+    result = validate_backtest_request(data, limits)
+    if not result['valid']:
+        return result
+
+    # 验证检验配置（可选）
+    monte_carlo = data.get('monteCarlo', {})
+    if not isinstance(monte_carlo, dict):
+        return {'valid': False, 'error': 'monteCarlo必须是对象'}
+
+    if 'paths' in monte_carlo:
+        paths, max_paths = monte_carlo['paths'], limits['max_monte_carlo_paths']
+        if not isinstance(paths, int) or not (1 <= paths <= max_paths):
+            return {'valid': False, 'error': f'paths必须是1-{max_paths}之间的整数'}
+
+    if 'blockDays' in monte_carlo:
+        block_days = monte_carlo['blockDays']
+        if not isinstance(block_days, int) or block_days < 1:
+            return {'valid': False, 'error': 'blockDays必须是正整数'}
+
+    if 'seed' in monte_carlo and (not isinstance(monte_carlo['seed'], int) or monte_carlo['seed'] < 0):
+        return {'valid': False, 'error': 'seed必须是非负整数'}
+
+    return {'valid': True, 'error': None}
+
+
+def validate_portfolio_request(data: dict, limits: dict) -> dict:
+    """
+    验证组合回测请求参数
+
+    Args:
+        data: 请求数据
+        limits: 请求参数取值范围（由路由层从各算法与服务模块的常量汇总传入）
+
+    Returns:
+        {'valid': bool, 'error': str}
+    """
+    symbols = data.get('symbols')
+    if not isinstance(symbols, list) or not symbols:
+        return {'valid': False, 'error': '缺少symbols参数'}
+    if len(symbols) > limits['max_portfolio_symbols']:
+        return {'valid': False, 'error': f"组合标的数不能超过{limits['max_portfolio_symbols']}个"}
+
+    # 每个标的按单标的回测规则验证
+    for index, symbol in enumerate(symbols, start=1):
+        if not isinstance(symbol, dict):
+            return {'valid': False, 'error': f'第{index}个标的格式无效'}
+        result = validate_backtest_request({**symbol, **({'backtestConfig': data['backtestConfig']}
+                                                         if 'backtestConfig' in data else {})}, limits)
+        if not result['valid']:
+            return {'valid': False, 'error': f"第{index}个标的: {result['error']}"}
+
+    codes = [(symbol['exchangeCode'], symbol['etfCode']) for symbol in symbols]
+    if len(set(codes)) != len(codes):
+        return {'valid': False, 'error': '组合中存在重复标的'}
+
+    if ('startDate' in data) != ('endDate' in data):
+        return {'valid': False, 'error': 'startDate和endDate必须同时提供'}
+
+    return {'valid': True, 'error': None}
+
+
+def validate_job_request(data: dict, limits: dict) -> dict:
+    """
+    验证异步回测任务请求参数
+
+    Args:
+        data: 请求数据（kind为backtest时同回测请求，为sweep时同参数扫描请求）
+        limits: 请求参数取值范围（由路由层从各算法与服务模块的常量汇总传入）
+
+    Returns:
+        {'valid': bool, 'error': str}
+    """
+    kind = data.get('kind', 'backtest')
+    if kind not in ('backtest', 'sweep'):
+        return {'valid': False, 'error': 'kind必须是以下之一：backtest, sweep'}
+
+    priorities = limits['job_priorities']
+    if 'priority' in data and data['priority'] not in priorities:
+        return {'valid': False, 'error': f'priority必须是以下之一：{", ".join(priorities)}'}
+
+    if data.get('stream') is True:
+        return {'valid': False, 'error': '异步任务不支持流式返回'}
+
+    return validate_sweep_request(data, limits) if kind == 'sweep' else validate_backtest_request(data, limits)
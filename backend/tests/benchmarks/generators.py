@@ -0,0 +1,111 @@
+"""
+确定性的合成5分钟K线生成器
+
+每个交易日48根K线（9:35-11:30、13:05-15:00），跳过周末。相同的参数和种子
+总是生成相同的序列，便于不同版本之间对比耗时。
+"""
+
+from datetime import datetime
+from typing import Callable, Dict
+import numpy as np
+from app.algorithms.backtest.models import KBarSeries, to_epoch_seconds
+
+BARS_PER_DAY = 48
+
+# 每根K线相对当日零点的秒数
+_BAR_OFFSETS = np.array(
+    [(9 * 60 + 30 + 5 * (k + 1)) * 60 for k in range(24)] +
+    [(13 * 60 + 5 * (k + 1)) * 60 for k in range(24)],
+    dtype=np.int64
+)
+
+_START_DAY = datetime(2020, 1, 2)
+
+# 均值回归过程分块递推的块长度
+_OU_BLOCK = 512
+
+
+def session_times(count: int) -> np.ndarray:
+    """生成count根K线的交易时段时间（int64 epoch秒）"""
+    day_count = -(-count // BARS_PER_DAY)
+    # 连续的工作日（按周展开后过滤周末）
+    calendar = np.arange(day_count * 7 // 5 + 7)
+    weekdays = (calendar + _START_DAY.weekday()) % 7
+    days = calendar[weekdays < 5][:day_count]
+    day_seconds = to_epoch_seconds(_START_DAY) + days * 86400
+    return (day_seconds[:, None] + _BAR_OFFSETS[None, :]).ravel()[:count]
+
+
+def _build_series(close: np.ndarray, rng: np.random.Generator, gaps: np.ndarray = None,
+                  wick: float = 0.0015) -> KBarSeries:
+    """由收盘价路径生成OHLC（开盘价为前收盘价，可叠加跳空）"""
+    close = np.maximum(close, 0.05)
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    if gaps is not None:
+        open_ = open_ * (1 + gaps)
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    high = body_high * (1 + np.abs(rng.normal(0, wick, len(close))))
+    low = body_low * (1 - np.abs(rng.normal(0, wick, len(close))))
+    volume = rng.integers(1000, 100000, len(close))
+    return KBarSeries(
+        session_times(len(close)),
+        np.round(open_, 3), np.round(high, 3), np.round(low, 3), np.round(close, 3), volume
+    )
+
+
+def random_walk(count: int, seed: int = 0, start_price: float = 10.0, volatility: float = 0.002) -> KBarSeries:
+    """几何随机游走"""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+    return _build_series(close, rng)
+
+
+def trending(count: int, seed: int = 0, start_price: float = 10.0, volatility: float = 0.002,
+             total_return: float = 0.5) -> KBarSeries:
+    """带漂移的随机游走（漂移按序列长度折算，期望整体涨幅为total_return）"""
+    rng = np.random.default_rng(seed)
+    drift = np.log1p(total_return) / count
+    close = start_price * np.exp(np.cumsum(rng.normal(drift, volatility, count)))
+    return _build_series(close, rng)
+
+
+def mean_reverting(count: int, seed: int = 0, start_price: float = 10.0, volatility: float = 0.002,
+                   reversion: float = 0.01) -> KBarSeries:
+    """Ornstein-Uhlenbeck过程（对数价格向起始价格回归，网格交易的理想行情）"""
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, volatility, count)
+    phi = 1 - reversion
+
+    # x[t] = phi * x[t-1] + e[t]：分块使用闭式解 x[j] = phi^j * (phi * carry + cumsum(e[i] / phi^i))，
+    # 块长度控制 phi^-i 的量级，避免超长序列溢出
+    log_deviation = np.empty(count)
+    powers = phi ** np.arange(_OU_BLOCK)
+    carry = 0.0
+    for start in range(0, count, _OU_BLOCK):
+        block = shocks[start:start + _OU_BLOCK]
+        scale = powers[:len(block)]
+        values = scale * (phi * carry + np.cumsum(block / scale))
+        log_deviation[start:start + len(block)] = values
+        carry = values[-1]
+    return _build_series(start_price * np.exp(log_deviation), rng)
+
+
+def gap_heavy(count: int, seed: int = 0, start_price: float = 10.0, volatility: float = 0.002,
+              gap_volatility: float = 0.02) -> KBarSeries:
+    """每日开盘带大幅跳空的随机游走（触发大倍数成交）"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, volatility, count)
+    gaps = np.zeros(count)
+    day_open = np.arange(0, count, BARS_PER_DAY)
+    gaps[day_open] = rng.normal(0, gap_volatility, len(day_open))
+    close = start_price * np.exp(np.cumsum(returns + gaps))
+    return _build_series(close, rng, gaps=gaps)
+
+
+GENERATORS: Dict[str, Callable[..., KBarSeries]] = {
+    'random_walk': random_walk,
+    'trending': trending,
+    'mean_reverting': mean_reverting,
+    'gap_heavy': gap_heavy
+}
@@ -0,0 +1,284 @@
+"""
+回测引擎基准测试
+
+使用确定性的合成5分钟K线，分别计时 引擎回测 / 指标计算 / 结果格式化 三个阶段，
+结果写入JSON文件。指定基线文件时与基线对比，任一阶段变慢超过阈值即以非零状态退出，
+便于发布前发现热点路径的性能回退。
+
+用法（在backend目录下执行）：
+    python -m tests.benchmarks.run_benchmarks --sizes 1k,10k,100k --output bench.json
+    python -m tests.benchmarks.run_benchmarks --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import copy
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from app.algorithms.backtest.metrics import MetricsCalculator
+from app.algorithms.backtest.models import BacktestConfig, KBarSeries
+from app.services.backtest_service import BacktestService
+from tests.benchmarks.generators import GENERATORS
+
+DEFAULT_SIZES = '1k,10k,100k,1m'
+
+# 逐K线引擎的最大K线数（超过时跳过，避免基准测试耗时过长）
+REFERENCE_MAX_BARS = 100_000
+
+STAGES = ('engine', 'metrics', 'format')
+
+RESULT_FORMAT_VERSION = 1
+
+
+def parse_size(text: str) -> int:
+    """解析K线数量（支持k/m后缀，如 10k、1m）"""
+    text = text.strip().lower()
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    digits = text[:-1] if multiplier > 1 else text
+    size = int(float(digits) * multiplier)
+    if size < 2:
+        raise ValueError(f"K线数量必须大于1: {text}")
+    return size
+
+
+def make_strategy(series: KBarSeries, grid_type: str = '等差') -> dict:
+    """
+    按合成K线的价格范围构造网格策略，使网格覆盖整段行情
+
+    Args:
+        series: K线序列
+        grid_type: 网格类型
+
+    Returns:
+        网格策略
+    """
+    current_price = float(series.close[0])
+    lower = round(float(series.low.min()) * 0.98, 3)
+    upper = round(float(series.high.max()) * 1.02, 3)
+    step_size = max(round(current_price * 0.005, 3), 0.001)
+    return {
+        'current_price': current_price,
+        'price_range': {'lower': lower, 'upper': upper},
+        'grid_config': {
+            'type': grid_type,
+            'step_size': step_size,
+            'step_ratio': 0.005,
+            'count': max(int((upper - lower) / step_size), 1),
+            'single_trade_quantity': 1000
+        },
+        'fund_allocation': {
+            'base_position_amount': 300000,
+            'grid_trading_amount': 700000
+        }
+    }
+
+
+def _time(func: Callable, repeat: int):
+    """执行repeat次，返回最后一次的结果和每次耗时（秒）"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def _summarize(timings: List[float], bars: int) -> Dict:
+    best = min(timings)
+    return {
+        'min_seconds': round(best, 6),
+        'median_seconds': round(statistics.median(timings), 6),
+        'bars_per_second': round(bars / best) if best > 0 else None
+    }
+
+
+def run_case(generator: str, size: int, engine: str, repeat: int = 3, seed: int = 0) -> Dict:
+    """
+    执行一个基准用例：分别计时引擎回测、指标计算和结果格式化
+
+    Args:
+        generator: 行情生成器名称
+        size: K线数量
+        engine: 回测引擎（vectorized / reference）
+        repeat: 每个阶段的重复次数（取最小值作为结果）
+        seed: 随机种子
+
+    Returns:
+        用例结果
+    """
+    series = GENERATORS[generator](size, seed=seed)
+    strategy = make_strategy(series)
+    config = BacktestConfig(engine=engine)
+    engine_cls = BacktestService.ENGINES[engine]
+
+    backtest_result, engine_timings = _time(
+        lambda: engine_cls(copy.deepcopy(strategy), config).run(series), repeat
+    )
+
+    calculator = MetricsCalculator(
+        trading_days_per_year=config.trading_days_per_year,
+        risk_free_rate=config.risk_free_rate
+    )
+    initial_capital = sum(strategy['fund_allocation'].values())
+    (metrics, benchmark), metrics_timings = _time(
+        lambda: calculator.calculate_all(
+            initial_capital=initial_capital,
+            final_capital=backtest_result['final_state']['total_asset'],
+            equity_curve=backtest_result['equity_curve'],
+            trade_records=backtest_result['trade_records'],
+            price_curve=series,
+            grid_count=strategy['grid_config']['count']
+        ),
+        repeat
+    )
+
+    service = BacktestService.__new__(BacktestService)
+    start_date = datetime.fromtimestamp(int(series.times[0])).strftime('%Y%m%d')
+    end_date = datetime.fromtimestamp(int(series.times[-1])).strftime('%Y%m%d')
+    _, format_timings = _time(
+        lambda: service._format_result(
+            backtest_result, metrics, benchmark, start_date, end_date,
+            int(np.unique(series.times // 86400).size), series, strategy
+        ),
+        repeat
+    )
+
+    return {
+        'generator': generator,
+        'bars': size,
+        'engine': engine,
+        'trades': len(backtest_result['trade_records']),
+        'stages': {
+            'engine': _summarize(engine_timings, size),
+            'metrics': _summarize(metrics_timings, size),
+            'format': _summarize(format_timings, size)
+        }
+    }
+
+
+def case_id(case: Dict) -> str:
+    return f"{case['generator']}/{case['bars']}/{case['engine']}"
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    与基线对比，返回变慢超过阈值的阶段
+
+    Args:
+        results: 本次基准测试结果
+        baseline: 基线结果
+        threshold: 允许的相对变慢比例（0.2 表示慢20%以内不算回退）
+
+    Returns:
+        回退说明列表
+    """
+    baseline_cases = {case_id(case): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in results['cases']:
+        previous = baseline_cases.get(case_id(case))
+        if not previous:
+            continue
+        for stage in STAGES:
+            current = case['stages'][stage]['min_seconds']
+            before = previous['stages'].get(stage, {}).get('min_seconds')
+            if before and current > before * (1 + threshold):
+                regressions.append(
+                    f"{case_id(case)} {stage}: {before:.4f}s -> {current:.4f}s (+{current / before - 1:.0%})"
+                )
+    return regressions
+
+
+def run(sizes: List[int], generators: List[str], engines: List[str], repeat: int = 3,
+        seed: int = 0, reference_max_bars: int = REFERENCE_MAX_BARS,
+        log: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    执行全部基准用例
+
+    Returns:
+        基准测试结果（包含运行环境与各用例耗时）
+    """
+    cases = []
+    for size in sizes:
+        for generator in generators:
+            for engine in engines:
+                if engine == 'reference' and size > reference_max_bars:
+                    continue
+                case = run_case(generator, size, engine, repeat=repeat, seed=seed)
+                cases.append(case)
+                if log:
+                    stages = ', '.join(
+                        f"{stage}={case['stages'][stage]['min_seconds']:.4f}s" for stage in STAGES
+                    )
+                    log(f"{case_id(case)}: trades={case['trades']}, {stages}")
+
+    return {
+        'version': RESULT_FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine()
+        },
+        'repeat': repeat,
+        'seed': seed,
+        'cases': cases
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='回测引擎基准测试')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='K线数量列表，逗号分隔（支持k/m后缀）')
+    parser.add_argument('--generators', default=','.join(GENERATORS), help='行情生成器列表，逗号分隔')
+    parser.add_argument('--engines', default='vectorized,reference', help='回测引擎列表，逗号分隔')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段的重复次数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--reference-max-bars', type=int, default=REFERENCE_MAX_BARS,
+                        help='逐K线引擎的最大K线数')
+    parser.add_argument('--output', default='bench_output.json', help='结果输出文件')
+    parser.add_argument('--baseline', help='基线结果文件（与之对比检测性能回退）')
+    parser.add_argument('--threshold', type=float, default=0.2, help='允许的相对变慢比例')
+    args = parser.parse_args(argv)
+
+    generators = [name.strip() for name in args.generators.split(',') if name.strip()]
+    engines = [name.strip() for name in args.engines.split(',') if name.strip()]
+    unknown = [name for name in generators if name not in GENERATORS] + \
+              [name for name in engines if name not in BacktestService.ENGINES]
+    if unknown:
+        parser.error(f"未知的生成器或引擎: {', '.join(unknown)}")
+
+    results = run(
+        sizes=[parse_size(size) for size in args.sizes.split(',') if size.strip()],
+        generators=generators,
+        engines=engines,
+        repeat=max(args.repeat, 1),
+        seed=args.seed,
+        reference_max_bars=args.reference_max_bars,
+        log=print
+    )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"基准测试结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("检测到性能回退:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("未检测到性能回退")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
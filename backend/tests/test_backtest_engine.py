@@ -5,7 +5,7 @@
 import pytest
 from datetime import datetime, timedelta
 from app.algorithms.backtest.engine import BacktestEngine
-from app.algorithms.backtest.models import KBar, BacktestConfig
+from app.algorithms.backtest.models import KBar, BacktestConfig, to_epoch_seconds
 
 
 @pytest.fixture
@@ -126,4 +126,15 @@ def test_backtest_equity_curve_recording(grid_strategy, kline_data):
         assert 'time' in point
         assert 'total_asset' in point
         assert 'price' in point
-        assert point['total_asset'] > 0
\ No newline at end of file
+        assert point['total_asset'] > 0
+
+def test_equity_curve_buffer(grid_strategy, kline_data):
+    """测试资产曲线缓冲区的列式数组"""
+    config = BacktestConfig()
+    engine = BacktestEngine(grid_strategy, config, country='CHN')
+
+    equity_curve = engine.run(kline_data)['equity_curve']
+
+    assert equity_curve.times.tolist() == [to_epoch_seconds(k.time) for k in kline_data]
+    assert equity_curve.prices.tolist() == [k.close for k in kline_data]
+    assert equity_curve[-1]['total_asset'] == equity_curve.assets[-1]
@@ -6,6 +6,8 @@ import pytest
 from datetime import datetime
 from app.algorithms.backtest.engine import BacktestEngine
 from app.algorithms.backtest.models import BacktestConfig, KBar
+from app.services.backtest_service import BacktestService
+from tests.test_vectorized_engine import make_random_kline
 
 
 class TestBacktestIntegration:
@@ -187,4 +189,24 @@ class TestBacktestIntegration:
 
         # 验证最终状态一致性
         assert final_state['position'] == pytest.approx(expected_position)
-        assert final_state['cash'] == pytest.approx(expected_cash, rel=0.01)
\ No newline at end of file
+        assert final_state['cash'] == pytest.approx(expected_cash, rel=0.01)
+
+    def test_grid_analysis_by_level(self, grid_strategy, config):
+        """测试网格分析按成交标记的档位归集，每笔网格成交只计入一个价格水平"""
+        grid_strategy['price_levels'] = [round(9.0 + 0.1 * i, 1) for i in range(21)]
+        result = BacktestEngine(grid_strategy, config).run(make_random_kline(5, count=2000))
+        grid_trades = [t for t in result['trade_records'] if t.grid_level is not None]
+        # 底仓和网格阶梯移出价格水平范围后的成交不计入档位
+        assert 0 < len(grid_trades) < len(result['trade_records'])
+        assert all(0 <= t.grid_level < 21 for t in grid_trades)
+
+        analysis = BacktestService.__new__(BacktestService)._analyze_grid_performance(
+            result['trade_records'], grid_strategy['price_levels']
+        )
+        performance = analysis['grid_performance']
+        assert analysis['total_grids'] == 21
+        assert sum(item['trigger_count'] for item in performance) == len(grid_trades)
+        assert analysis['triggered_grids'] == len({t.grid_level for t in grid_trades})
+        assert sum(item['profit_contribution'] for item in performance) == pytest.approx(
+            sum(t.profit for t in grid_trades if t.profit is not None), abs=0.01 * len(performance)
+        )
@@ -0,0 +1,153 @@
+"""
+回测NDJSON流式响应测试
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+from app.algorithms.backtest.models import KBarSeries
+from app.algorithms.backtest.checkpoint import CheckpointStore
+from app.services.backtest_service import BacktestService
+from app.services.data_service import DataService
+from app.services.result_cache import ResultCache
+from tests.test_vectorized_engine import make_random_kline, make_strategy
+
+
+@pytest.fixture
+def backtest_request():
+    return {
+        'etfCode': '510300',
+        'exchangeCode': 'XSHG',
+        'gridStrategy': make_strategy('等差')
+    }
+
+
+@pytest.fixture
+def mock_data(tmp_path):
+    kline = KBarSeries.from_kbars(make_random_kline(3, count=1200))
+    with patch.object(DataService, 'get_trading_calendar', return_value=['2025-01-20', '2025-01-02']), \
+            patch.object(DataService, 'get_5min_kline', return_value=kline), \
+            patch.object(BacktestService, 'checkpoint_store', CheckpointStore(str(tmp_path))), \
+            patch.object(BacktestService, 'result_cache', ResultCache(str(tmp_path / 'results'))):
+        yield kline
+
+
+def parse_ndjson(body: bytes) -> list:
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+def test_stream_matches_json_response(client, mock_data, backtest_request):
+    """测试流式响应分块拼接后与普通JSON响应一致"""
+    expected = client.post('/api/grid/backtest', json=backtest_request).get_json()['data']
+
+    with patch.object(BacktestService, 'STREAM_CHUNK_SIZE', 100):
+        response = client.post('/api/grid/backtest', json={**backtest_request, 'stream': True})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+
+    records = parse_ndjson(response.data)
+    assert records[0]['type'] == 'meta'
+    assert records[-2]['type'] == 'summary'
+    assert records[-1]['type'] == 'end'
+
+    assert records[0]['data'] == {key: expected[key] for key in ('backtest_period', 'grid_strategy')}
+    summary = records[-2]['data']
+    for key in ('performance_metrics', 'trading_metrics', 'benchmark_comparison', 'grid_analysis', 'final_state'):
+        assert summary[key] == expected[key]
+
+    for name in ('equity_curve', 'price_curve', 'trade_records'):
+        chunks = [record['data'] for record in records if record['type'] == name]
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert [item for chunk in chunks for item in chunk] == expected[name]
+        assert records[-1]['data'][name] == len(expected[name])
+
+
+def test_trade_records_include_grid_level(client, mock_data, backtest_request):
+    """测试交易记录输出成交所在的网格档位，未标记档位为null，与网格分析的触发次数一致"""
+    strategy = {**backtest_request['gridStrategy'], 'price_levels': [round(9.0 + 0.05 * i, 2) for i in range(41)]}
+    expected = client.post('/api/grid/backtest', json={**backtest_request, 'gridStrategy': strategy}).get_json()['data']
+
+    trades = expected['trade_records']
+    assert trades[0]['grid_level'] is None  # 底仓
+    levels = [trade['grid_level'] for trade in trades if trade['grid_level'] is not None]
+    assert levels and all(0 <= level <= 40 for level in levels)
+    performance = expected['grid_analysis']['grid_performance']
+    assert [item['trigger_count'] for item in performance] == [levels.count(i) for i in range(41)]
+
+    response = client.post('/api/grid/backtest', json={**backtest_request, 'gridStrategy': strategy, 'stream': True})
+    records = parse_ndjson(response.data)
+    assert [item for record in records if record['type'] == 'trade_records' for item in record['data']] == trades
+
+
+def test_stream_emits_equity_while_simulating(mock_data, backtest_request):
+    """测试边模拟边输出：首行meta在模拟前输出，每推进一段K线即输出该段资产曲线"""
+    from app.algorithms.backtest.vectorized_engine import VectorizedBacktestEngine
+
+    service = BacktestService()
+    lines = service.run_backtest_stream(
+        backtest_request['etfCode'], backtest_request['exchangeCode'], backtest_request['gridStrategy'],
+        chunk_size=300
+    )
+
+    with patch.object(VectorizedBacktestEngine, 'run_chunk', autospec=True,
+                      side_effect=VectorizedBacktestEngine.run_chunk) as run_chunk:
+        assert json.loads(next(lines))['type'] == 'meta'
+        assert run_chunk.call_count == 0
+
+        first = json.loads(next(lines))
+        assert first['type'] == 'equity_curve' and len(first['data']) == 300
+        assert run_chunk.call_count == 1
+
+        records = [json.loads(line) for line in lines]
+    assert run_chunk.call_count == len(mock_data) // 300
+    assert [record['type'] for record in records[:3]] == ['equity_curve'] * 3
+    assert records[-1]['data']['equity_curve'] == len(mock_data)
+
+
+def test_stream_with_chart_options(client, mock_data, backtest_request):
+    """测试请求图表降采样时回测完成后输出降采样曲线，记录顺序不变"""
+    request = {**backtest_request, 'maxPoints': 200}
+    expected = client.post('/api/grid/backtest', json=request).get_json()['data']
+    records = parse_ndjson(client.post('/api/grid/backtest', json={**request, 'stream': True}).data)
+
+    assert [records[0]['type'], records[-2]['type'], records[-1]['type']] == ['meta', 'summary', 'end']
+    assert records[0]['data']['backtest_period'] == expected['backtest_period']
+    assert records[-1]['data']['equity_curve'] == len(expected['equity_curve']) <= 200
+    assert records[-2]['data']['performance_metrics'] == expected['performance_metrics']
+
+
+def test_stream_by_accept_header(client, mock_data, backtest_request):
+    """测试通过Accept头请求流式响应"""
+    response = client.post('/api/grid/backtest', json=backtest_request,
+                           headers={'Accept': 'application/x-ndjson'})
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert parse_ndjson(response.data)[0]['type'] == 'meta'
+
+    response = client.post('/api/grid/backtest', json=backtest_request, headers={'Accept': '*/*'})
+    assert response.mimetype == 'application/json'
+
+
+def test_non_tick_step_size_rejected(client, mock_data, backtest_request):
+    """测试等差步长不是最小价格单位整数倍时返回参数错误，不回退到逐K线引擎"""
+    backtest_request['gridStrategy']['grid_config']['step_size'] = 0.00015
+    with patch('app.services.backtest_service.BacktestEngine') as reference_engine:
+        response = client.post('/api/grid/backtest', json=backtest_request)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': '等差网格步长0.00015必须是最小价格单位0.0001的正整数倍'}
+    reference_engine.assert_not_called()
+
+
+def test_stream_error_before_output(client, backtest_request):
+    """测试回测失败时在开始输出前返回普通错误响应"""
+    with patch.object(DataService, 'get_trading_calendar', return_value=[]):
+        response = client.post('/api/grid/backtest', json={**backtest_request, 'stream': True})
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+    response = client.post('/api/grid/backtest', json={**backtest_request, 'stream': 'yes'})
+    assert response.status_code == 400
@@ -0,0 +1,59 @@
+"""
+基准测试工具单元测试
+"""
+
+import json
+import pytest
+import numpy as np
+from tests.benchmarks.generators import GENERATORS, BARS_PER_DAY
+from tests.benchmarks import run_benchmarks
+
+
+@pytest.mark.parametrize('name', list(GENERATORS))
+def test_generators_are_deterministic(name):
+    """测试生成器可复现且K线结构合法"""
+    series = GENERATORS[name](1000, seed=3)
+    again = GENERATORS[name](1000, seed=3)
+
+    assert len(series) == 1000
+    assert np.array_equal(series.close, again.close)
+    assert not np.array_equal(series.close, GENERATORS[name](1000, seed=4).close)
+    assert np.all(np.diff(series.times) > 0)
+    assert np.all(series.high >= np.maximum(series.open, series.close))
+    assert np.all(series.low <= np.minimum(series.open, series.close))
+    assert np.all(series.low > 0)
+    # 每个交易日48根K线
+    days = np.unique(series.times // 86400, return_counts=True)[1]
+    assert np.all(days[:-1] == BARS_PER_DAY)
+
+
+def test_parse_size():
+    """测试K线数量解析"""
+    assert run_benchmarks.parse_size('1k') == 1000
+    assert run_benchmarks.parse_size('1M') == 1_000_000
+    assert run_benchmarks.parse_size('2500') == 2500
+    with pytest.raises(ValueError):
+        run_benchmarks.parse_size('1')
+
+
+def test_benchmark_run_and_compare(tmp_path):
+    """测试基准测试输出JSON并能与基线对比"""
+    output = tmp_path / 'bench.json'
+    assert run_benchmarks.main([
+        '--sizes', '500', '--generators', 'random_walk', '--engines', 'vectorized,reference',
+        '--repeat', '1', '--output', str(output)
+    ]) == 0
+
+    results = json.loads(output.read_text(encoding='utf-8'))
+    assert [case['engine'] for case in results['cases']] == ['vectorized', 'reference']
+    # 两个引擎逐笔一致
+    assert results['cases'][0]['trades'] == results['cases'][1]['trades']
+    for stage in run_benchmarks.STAGES:
+        assert results['cases'][0]['stages'][stage]['min_seconds'] > 0
+
+    # 基线耗时缩小10倍时应检测到回退
+    for case in results['cases']:
+        for stage in case['stages'].values():
+            stage['min_seconds'] /= 10
+    assert run_benchmarks.compare(json.loads(output.read_text(encoding='utf-8')), results, 0.2)
+    assert not run_benchmarks.compare(results, results, 0.2)
@@ -0,0 +1,116 @@
+"""
+回测检查点单元测试
+"""
+
+import copy
+import numpy as np
+import pytest
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.vectorized_engine import VectorizedBacktestEngine
+from app.algorithms.backtest.models import KBarSeries, BacktestConfig
+from app.algorithms.backtest.checkpoint import CheckpointStore, build_checkpoint_key
+from tests.test_vectorized_engine import make_random_kline, make_strategy, assert_same_equity
+
+
+@pytest.fixture
+def series():
+    return KBarSeries.from_kbars(make_random_kline(3, count=1200))
+
+
+@pytest.mark.parametrize('engine_cls', [BacktestEngine, VectorizedBacktestEngine])
+@pytest.mark.parametrize('split', [1, 600, 1199, 1200])
+def test_resume_matches_full_run(engine_cls, split, series):
+    """测试从检查点恢复后只模拟新增K线，结果与完整回测一致"""
+    strategy = make_strategy('等差')
+    config = BacktestConfig()
+
+    full = BacktestEngine(copy.deepcopy(strategy), config).run(series)
+
+    first = engine_cls(copy.deepcopy(strategy), config)
+    first.run(series[:split])
+    checkpoint = first.create_checkpoint()
+    assert checkpoint.bar_count == split
+
+    resumed = engine_cls(copy.deepcopy(strategy), config).run(series, checkpoint=checkpoint)
+
+    assert resumed['trade_records'] == full['trade_records']
+    assert_same_equity(resumed['equity_curve'], full['equity_curve'])
+    assert resumed['final_state'] == full['final_state']
+    # 未平仓批次随检查点保存，恢复后的FIFO配对与完整回测一致
+    assert resumed['lot_ledger'] == full['lot_ledger']
+
+
+def test_checkpoint_rejects_revised_data(series):
+    """测试已模拟部分的K线被修订时检查点失效"""
+    engine = BacktestEngine(make_strategy('等比'), BacktestConfig())
+    engine.run(series[:500])
+    checkpoint = engine.create_checkpoint()
+
+    assert checkpoint.matches(series)
+    assert not checkpoint.matches(series[:499])
+
+    revised = KBarSeries(series.times, series.open, series.high, series.low, series.close.copy(), series.volume)
+    revised.close[10] += 0.001
+    assert not checkpoint.matches(revised)
+    with pytest.raises(ValueError, match="检查点"):
+        BacktestEngine(make_strategy('等比'), BacktestConfig()).run(revised, checkpoint=checkpoint)
+
+
+def test_checkpoint_key_changes_with_strategy_and_fee(series):
+    """测试策略或手续费配置变化时检查点键变化，延长窗口时键不变"""
+    strategy = make_strategy('等差')
+    key = build_checkpoint_key('XSHG:510300', series[:100], strategy, BacktestConfig())
+
+    assert build_checkpoint_key('XSHG:510300', series, strategy, BacktestConfig()) == key
+    assert build_checkpoint_key('XSHG:510300', series, strategy, BacktestConfig(min_commission=0.1)) != key
+    assert build_checkpoint_key('XSHG:510300', series, strategy, BacktestConfig(engine='reference')) == key
+
+    changed = copy.deepcopy(strategy)
+    changed['grid_config']['step_size'] = 0.06
+    assert build_checkpoint_key('XSHG:510300', series, changed, BacktestConfig()) != key
+
+
+def test_store_roundtrip_and_eviction(tmp_path, series):
+    """测试检查点存储读写、损坏文件处理和数量上限淘汰"""
+    store = CheckpointStore(str(tmp_path), max_entries=2)
+    engine = BacktestEngine(make_strategy('等差'), BacktestConfig())
+    engine.run(series)
+    checkpoint = engine.create_checkpoint()
+
+    store.set('a', checkpoint)
+    loaded = store.get('a')
+    assert loaded.trade_records == checkpoint.trade_records
+    assert np.array_equal(loaded.equity_assets, checkpoint.equity_assets)
+    assert loaded.state == checkpoint.state
+    assert store.get('missing') is None
+
+    (tmp_path / 'broken.ckpt').write_bytes(b'not a pickle')
+    assert store.get('broken') is None
+    assert not (tmp_path / 'broken.ckpt').exists()
+
+    store.set('b', checkpoint)
+    store.set('c', checkpoint)
+    assert len(list(tmp_path.glob('*.ckpt'))) == 2
+
+
+def test_service_resumes_from_checkpoint(tmp_path, series):
+    """测试回测服务延长窗口时从检查点增量回测"""
+    from unittest.mock import patch
+    from app.services.backtest_service import BacktestService
+
+    strategy = make_strategy('等差')
+    config = BacktestConfig()
+    key = build_checkpoint_key('XSHG:510300', series, strategy, config)
+    full = BacktestEngine(copy.deepcopy(strategy), config).run(series)
+
+    with patch.object(BacktestService, 'checkpoint_store', CheckpointStore(str(tmp_path))):
+        BacktestService._run_engine(copy.deepcopy(strategy), config, series[:800], checkpoint_key=key)
+        assert BacktestService.checkpoint_store.get(key).bar_count == 800
+
+        with patch.object(BacktestEngine, '_initialize', side_effect=AssertionError("不应重新建仓")):
+            result = BacktestService._run_engine(copy.deepcopy(strategy), config, series, checkpoint_key=key)
+
+        assert BacktestService.checkpoint_store.get(key).bar_count == len(series)
+
+    assert result['trade_records'] == full['trade_records']
+    assert result['final_state'] == full['final_state']
@@ -0,0 +1,137 @@
+"""
+长区间分段回测单元测试
+"""
+
+import copy
+import pytest
+from unittest.mock import patch
+import numpy as np
+from app.algorithms.backtest.chunked import ChunkedBacktestRunner, month_chunks
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.metrics import MetricsCalculator
+from app.algorithms.backtest.models import BacktestConfig, from_epoch_seconds
+from app.algorithms.backtest.vectorized_engine import VectorizedBacktestEngine
+from app.services.backtest_service import BacktestService
+from tests.test_metrics import BaselineMetricsCalculator
+from tests.test_vectorized_engine import make_strategy
+from tests.test_walk_forward import make_daily_kline, BARS_PER_DAY
+
+
+def test_month_chunks():
+    """测试按自然月切分交易日"""
+    days = ['2024-02-01', '2024-01-30', '2024-01-31', '2024-03-01', '2024-02-29']
+    assert month_chunks(days) == [
+        ['2024-01-30', '2024-01-31'], ['2024-02-01', '2024-02-29'], ['2024-03-01']
+    ]
+
+
+@pytest.mark.parametrize('engine_cls', [BacktestEngine, VectorizedBacktestEngine])
+@pytest.mark.parametrize('chunk_bars', [BARS_PER_DAY * 20, 1000])
+def test_runner_matches_full_run(engine_cls, chunk_bars):
+    """测试分段回测与整段回测逐笔一致（包括分段边界落在交易日内部）"""
+    _, series = make_daily_kline(60)
+    strategy = make_strategy('等差')
+    expected = engine_cls(copy.deepcopy(strategy), BacktestConfig()).run(series)
+
+    runner = ChunkedBacktestRunner(engine_cls(copy.deepcopy(strategy), BacktestConfig()))
+    for start in range(0, len(series), chunk_bars):
+        runner.feed(series[start:start + chunk_bars])
+    result = runner.result()
+
+    assert result['trade_records'] == expected['trade_records']
+    assert result['final_state'] == expected['final_state']
+    assert result['bar_count'] == len(series)
+    assert result['max_drawdown'] == pytest.approx(
+        BaselineMetricsCalculator()._calculate_max_drawdown(list(expected['equity_curve']))
+    )
+
+    # 逐段累计的收益率矩与整段资产曲线计算的波动率和夏普比率一致
+    calc = MetricsCalculator()
+    metrics, _ = calc.calculate_all(10000, 10000, expected['equity_curve'], [], [], 20)
+    volatility, sharpe_ratio = calc.risk_from_return_moments(metrics.annualized_return, *result['return_moments'])
+    assert result['return_moments'][0] == len(series) - 1
+    assert volatility == pytest.approx(metrics.volatility, rel=1e-9)
+    assert sharpe_ratio == pytest.approx(metrics.sharpe_ratio, rel=1e-9)
+
+    # 首根K线 + 每个交易日一个点，日终资产与整段回测一致
+    equity = result['equity_curve']
+    day_ends = np.arange(BARS_PER_DAY - 1, len(series), BARS_PER_DAY)
+    assert len(equity) == 61
+    assert np.array_equal(equity.assets[1:], expected['equity_curve'].assets[day_ends])
+
+    prices = result['price_curve']
+    assert np.array_equal(prices.close[1:], series.close[day_ends])
+    assert prices.high[1] == series.high[:BARS_PER_DAY].max()
+    assert prices.low[-1] == series.low[-BARS_PER_DAY:].min()
+    assert prices.volume[1:].sum() == series.volume.sum()
+
+
+def test_runner_rejects_empty():
+    """测试未送入K线时报错"""
+    runner = ChunkedBacktestRunner(BacktestEngine(make_strategy('等差'), BacktestConfig()))
+    runner.feed(make_daily_kline(1)[1][:0])
+    with pytest.raises(ValueError, match="K线数据为空"):
+        runner.result()
+
+
+def test_run_backtest_long_horizon():
+    """测试超过120天的回测按月分段加载并按交易日聚合曲线"""
+    trading_days, series = make_daily_kline(130)
+    dates = np.array([from_epoch_seconds(t).strftime('%Y-%m-%d') for t in series.times])
+
+    def get_5min_kline(code, exchange, start_date, end_date, type):
+        mask = (dates >= start_date) & (dates <= end_date)
+        return series[int(np.argmax(mask)):int(np.argmax(mask)) + int(mask.sum())]
+
+    service = BacktestService()
+    custom_params = {'startDate': trading_days[0], 'endDate': trading_days[-1]}
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days[::-1]), \
+            patch.object(service.data_service, 'get_5min_kline', side_effect=get_5min_kline) as mock_kline:
+        result = service.run_backtest('510300', 'XSHG', make_strategy('等差'),
+                                      custom_grid_params=custom_params)
+
+    assert mock_kline.call_count == len(month_chunks(trading_days))
+    assert result['backtest_period']['total_bars'] == len(series)
+    assert result['backtest_period']['curve_resolution'] == '1d'
+    assert len(result['equity_curve']) == len(result['price_curve']) == len(trading_days) + 1
+
+    strategy = BacktestService._apply_custom_grid_params(make_strategy('等差'), custom_params)
+    expected = VectorizedBacktestEngine(strategy, BacktestConfig()).run(series)
+    assert result['trading_metrics']['total_trades'] == len(expected['trade_records'])
+    assert result['final_state']['total_asset'] == pytest.approx(expected['final_state']['total_asset'])
+
+
+def test_long_horizon_risk_metrics_match_full_run():
+    """测试刚超过120天（分段回测）时最大回撤、波动率和夏普比率与不分段计算同一批K线一致"""
+    trading_days, series = make_daily_kline(100)
+    trading_days = [day for day in trading_days if day <= '2024-05-02']  # 2024-01-02起121天
+    series = series[:len(trading_days) * BARS_PER_DAY]
+    dates = np.array([from_epoch_seconds(t).strftime('%Y-%m-%d') for t in series.times])
+
+    def get_5min_kline(code, exchange, start_date, end_date, type):
+        mask = (dates >= start_date) & (dates <= end_date)
+        return series[int(np.argmax(mask)):int(np.argmax(mask)) + int(mask.sum())]
+
+    service = BacktestService()
+    custom_params = {'startDate': trading_days[0], 'endDate': trading_days[-1]}
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days[::-1]), \
+            patch.object(service.data_service, 'get_5min_kline', side_effect=get_5min_kline):
+        result = service.run_backtest('510300', 'XSHG', make_strategy('等差'),
+                                      custom_grid_params=custom_params)
+    assert result['backtest_period']['curve_resolution'] == '1d'
+
+    strategy = BacktestService._apply_custom_grid_params(make_strategy('等差'), custom_params)
+    expected = VectorizedBacktestEngine(strategy, BacktestConfig()).run(series)
+    metrics, _ = BacktestService._calculate_metrics(strategy, BacktestConfig(), expected, series)
+    performance = result['performance_metrics']
+    assert performance['max_drawdown'] == round(metrics.max_drawdown, 4)
+    assert performance['volatility'] == round(metrics.volatility, 4)
+    assert performance['sharpe_ratio'] == round(metrics.sharpe_ratio, 2)
+
+
+def test_run_backtest_rejects_too_long_range():
+    """测试超过最大跨度的回测被拒绝"""
+    service = BacktestService()
+    with pytest.raises(ValueError, match="回测时间跨度不能超过1830天"):
+        service.run_backtest('510300', 'XSHG', make_strategy('等差'),
+                             custom_grid_params={'startDate': '2015-01-01', 'endDate': '2025-01-01'})
@@ -0,0 +1,70 @@
+"""
+回测列式二进制响应测试
+"""
+
+import numpy as np
+import pytest
+from app.utils.columnar import encode_columnar, decode_columnar, COLUMNAR_MIMETYPE
+from tests.test_backtest_stream import backtest_request, mock_data  # noqa: F401 (fixtures)
+
+
+def test_encode_decode_roundtrip():
+    """测试编码后解码得到相同的元数据和数组，各列按8字节对齐"""
+    tables = {
+        'curve': {'time': np.arange(5, dtype=np.int64), 'value': np.linspace(0, 1, 5)},
+        'flags': {'side': np.array([1, -1, 1], dtype=np.int8)},
+        'empty': {'value': np.empty(0)}
+    }
+    data = encode_columnar({'name': '网格', 'count': 3}, tables)
+    meta, decoded = decode_columnar(data)
+
+    assert meta == {'name': '网格', 'count': 3}
+    for table_name, columns in tables.items():
+        for column_name, values in columns.items():
+            assert np.array_equal(decoded[table_name][column_name], values)
+            assert decoded[table_name][column_name].dtype == values.dtype
+    assert (decoded['curve']['value'].ctypes.data - np.frombuffer(data, np.uint8).ctypes.data) % 8 == 0
+
+
+def test_encode_rejects_invalid_tables():
+    """测试列长度不一致或类型不支持时报错"""
+    with pytest.raises(ValueError, match="列长度不一致"):
+        encode_columnar({}, {'curve': {'a': np.zeros(2), 'b': np.zeros(3)}})
+    with pytest.raises(ValueError, match="不支持的列类型"):
+        encode_columnar({}, {'curve': {'a': np.zeros(2, dtype=np.float32)}})
+    with pytest.raises(ValueError, match="不是列式二进制数据"):
+        decode_columnar(b'JSON' + bytes(8))
+
+
+def test_columnar_matches_json_response(client, mock_data, backtest_request):
+    """测试列式二进制响应与普通JSON响应的数据一致"""
+    expected = client.post('/api/grid/backtest', json=backtest_request).get_json()['data']
+    response = client.post('/api/grid/backtest', json=backtest_request, headers={'Accept': COLUMNAR_MIMETYPE})
+
+    assert response.status_code == 200
+    assert response.mimetype == COLUMNAR_MIMETYPE
+
+    meta, tables = decode_columnar(response.data)
+    assert meta['performance_metrics'] == expected['performance_metrics']
+    assert meta['final_state'] == expected['final_state']
+
+    equity = tables['equity_curve']
+    assert len(equity['time']) == len(expected['equity_curve'])
+    np.testing.assert_allclose(np.round(equity['total_asset'], 2),
+                               [point['total_asset'] for point in expected['equity_curve']])
+    assert np.array_equal(tables['price_curve']['close'], mock_data.close)
+    assert np.array_equal(tables['price_curve']['time'], mock_data.times)
+
+    trades = tables['trade_records']
+    assert len(trades['time']) == len(expected['trade_records'])
+    assert [('BUY' if side == 1 else 'SELL') for side in trades['type']] == \
+        [trade['type'] for trade in expected['trade_records']]
+    assert trades['quantity'].tolist() == [trade['quantity'] for trade in expected['trade_records']]
+    assert [None if np.isnan(profit) else round(profit, 2) for profit in trades['profit']] == \
+        [trade['profit'] for trade in expected['trade_records']]
+
+
+def test_json_remains_default(client, mock_data, backtest_request):
+    """测试未要求列式二进制时仍返回JSON"""
+    response = client.post('/api/grid/backtest', json=backtest_request, headers={'Accept': '*/*'})
+    assert response.mimetype == 'application/json'
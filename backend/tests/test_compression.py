@@ -0,0 +1,112 @@
+"""
+响应压缩中间件测试
+"""
+
+import gzip
+import json
+import zlib
+from flask import Response
+from app.middleware.compression import get_compression_stats, send_precompressed
+from tests.test_backtest_stream import backtest_request, mock_data  # noqa: F401 (fixtures)
+
+
+def test_gzip_large_json_response(app, client, mock_data, backtest_request):
+    """测试大于阈值的JSON响应按gzip压缩，解压后与未压缩响应一致，并记录统计"""
+    expected = client.post('/api/grid/backtest', json=backtest_request)
+    response = client.post('/api/grid/backtest', json=backtest_request, headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert 'Content-Encoding' not in expected.headers
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(response.data) < len(expected.data)
+    assert json.loads(gzip.decompress(response.data))['data'] == expected.get_json()['data']
+
+    stats = get_compression_stats(app)
+    assert stats['responses'] == 1
+    assert stats['bytes_in'] == len(expected.data)
+    assert stats['bytes_saved'] == len(expected.data) - len(response.data)
+
+    # 健康检查接口输出本进程的压缩统计
+    health = client.get('/api/health').get_json()
+    assert health['compression']['responses'] == 1
+    assert health['compression']['bytes_out'] == len(response.data)
+
+
+def test_small_and_unsupported_responses_skipped(app, client):
+    """测试小响应、客户端不支持或已编码的响应不压缩"""
+    @app.route('/test/small')
+    def small():
+        return {'success': True}
+
+    @app.route('/test/identity')
+    def identity():
+        return Response('x' * 4096, mimetype='text/plain')
+
+    assert 'Content-Encoding' not in client.get('/test/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/test/identity', headers={'Accept-Encoding': 'gzip;q=0'}).headers
+    assert 'Content-Encoding' not in client.get('/test/identity', headers={'Accept-Encoding': 'identity'}).headers
+    assert get_compression_stats(app)['responses'] == 0
+
+
+def test_stream_compressed_per_chunk(app, client):
+    """测试流式响应逐块压缩，每块单独可解压（同步刷新），完整内容一致"""
+    lines = [json.dumps({'type': 'progress', 'index': i}) + '\n' for i in range(50)]
+
+    @app.route('/test/stream')
+    def stream():
+        return Response(iter(lines), mimetype='application/x-ndjson')
+
+    response = client.get('/test/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+
+    decompressor = zlib.decompressobj(31)
+    received = []
+    for chunk in response.response:
+        received.append(decompressor.decompress(chunk).decode('utf-8'))
+    response.close()
+
+    # 每个压缩块都能立即解压出对应的完整行
+    assert received[:len(lines)] == lines
+    assert ''.join(received) == ''.join(lines)
+    assert get_compression_stats(app)['bytes_in'] == len(''.join(lines))
+
+
+def test_send_precompressed(app, tmp_path):
+    """测试存在预压缩文件时按客户端支持返回 .br / .gz，否则返回原文件"""
+    content = b'console.log("grider");' * 100
+    (tmp_path / 'app.js').write_bytes(content)
+    (tmp_path / 'app.js.gz').write_bytes(gzip.compress(content))
+    (tmp_path / 'app.js.br').write_bytes(b'brotli')
+    (tmp_path / 'plain.css').write_bytes(b'body{}')
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip, br'}):
+        response = send_precompressed(str(tmp_path), 'app.js')
+        assert response.headers['Content-Encoding'] == 'br'
+        assert response.mimetype == 'text/javascript'
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = send_precompressed(str(tmp_path), 'app.js')
+        response.direct_passthrough = False
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.mimetype == 'text/javascript'
+        assert gzip.decompress(response.get_data()) == content
+
+        response = send_precompressed(str(tmp_path), 'plain.css')
+        assert 'Content-Encoding' not in response.headers
+
+    with app.test_request_context():
+        response = send_precompressed(str(tmp_path), 'app.js')
+        response.direct_passthrough = False
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_data() == content
+
+
+def test_backtest_stream_compressed(client, mock_data, backtest_request):
+    """测试回测NDJSON流压缩后解压得到与未压缩流相同的内容"""
+    request = {**backtest_request, 'stream': True}
+    expected = client.post('/api/grid/backtest', json=request).data
+    response = client.post('/api/grid/backtest', json=request, headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompressobj(31).decompress(response.data) == expected
@@ -0,0 +1,137 @@
+"""
+测试图表曲线降采样（LTTB与OHLC重新聚合）
+"""
+
+import pytest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from app.algorithms.backtest.checkpoint import CheckpointStore
+from app.algorithms.backtest.downsample import lttb_indices, resample_ohlc, chart_resolution_for
+from app.services.backtest_service import BacktestService
+from app.services.result_cache import ResultCache
+from app.routes.grid_routes import REQUEST_LIMITS
+from app.utils.validation import validate_backtest_request
+from tests.test_vectorized_engine import make_strategy
+from tests.test_walk_forward import make_daily_kline, BARS_PER_DAY
+
+
+def naive_lttb(values: np.ndarray, max_points: int) -> list:
+    """逐点计算的LTTB参考实现"""
+    count = len(values)
+    bounds = [i * (count - 2) // (max_points - 2) + 1 for i in range(max_points - 1)]
+    selected = [0]
+    for i in range(max_points - 2):
+        if i + 2 < len(bounds):
+            next_range = range(bounds[i + 1], bounds[i + 2])
+        else:
+            next_range = range(count - 1, count)
+        cx = sum(next_range) / len(next_range)
+        cy = sum(values[j] for j in next_range) / len(next_range)
+        a = selected[-1]
+        areas = [abs((a - cx) * (values[b] - values[a]) - (a - b) * (cy - values[a]))
+                 for b in range(bounds[i], bounds[i + 1])]
+        selected.append(bounds[i] + areas.index(max(areas)))
+    return selected + [count - 1]
+
+
+@pytest.mark.parametrize('count, max_points', [(1000, 100), (1003, 37), (50, 49), (10, 3)])
+def test_lttb_matches_naive(count, max_points):
+    """测试LTTB与逐点参考实现一致，首末点保留且下标递增"""
+    values = np.cumsum(np.random.default_rng(count).normal(size=count))
+    index = lttb_indices(values, max_points)
+    assert index.tolist() == naive_lttb(values.tolist(), max_points)
+    assert len(index) == max_points
+    assert np.all(np.diff(index) > 0)
+
+
+def test_lttb_keeps_short_series():
+    """测试点数不超过上限时原样保留"""
+    assert lttb_indices(np.arange(10.0), 10).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize('resolution, minutes', [('15min', 15), ('30min', 30), ('60min', 60)])
+def test_resample_ohlc_matches_pandas(resolution, minutes):
+    """测试日内周期的OHLC聚合与pandas按区间结束时间重采样一致"""
+    _, series = make_daily_kline(5)
+    resampled, ends = resample_ohlc(series, resolution)
+
+    frame = pd.DataFrame({
+        'open': series.open, 'high': series.high, 'low': series.low,
+        'close': series.close, 'volume': series.volume
+    }, index=pd.to_datetime(series.times, unit='s'))
+    expected = frame.resample(f'{minutes}min', closed='right', label='right').agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'
+    }).dropna()
+
+    assert len(resampled) == len(expected)
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        np.testing.assert_allclose(getattr(resampled, column), expected[column].to_numpy())
+    assert np.array_equal(resampled.times, series.times[ends])
+
+
+def test_resample_ohlc_daily_and_max_bars():
+    """测试按交易日聚合，以及超过上限时合并相邻K线"""
+    _, series = make_daily_kline(10)
+    daily, ends = resample_ohlc(series, '1d')
+    assert len(daily) == 10
+    assert np.array_equal(ends, np.arange(1, 11) * BARS_PER_DAY - 1)
+    assert daily.high[0] == series.high[:BARS_PER_DAY].max()
+
+    merged, _ = resample_ohlc(series, '1d', max_bars=4)
+    assert len(merged) == 4
+    assert merged.volume.sum() == series.volume.sum()
+    assert merged.open[0] == series.open[0] and merged.close[-1] == series.close[-1]
+
+    with pytest.raises(ValueError, match="图表周期"):
+        resample_ohlc(series, '2h')
+
+
+def test_chart_resolution_for():
+    """测试按点数上限选取最细周期"""
+    _, series = make_daily_kline(20)
+    assert chart_resolution_for(series, len(series)) == '5min'
+    assert chart_resolution_for(series, 300) == '30min'
+    assert chart_resolution_for(series, 5) == '1d'
+
+
+@pytest.mark.parametrize('data, valid', [
+    ({'maxPoints': 2000}, True),
+    ({'chartResolution': '60min'}, True),
+    ({'maxPoints': 10}, False),
+    ({'maxPoints': '2000'}, False),
+    ({'chartResolution': '2h'}, False),
+])
+def test_validate_chart_options(data, valid):
+    """测试回测请求中的图表降采样选项校验"""
+    request = {'etfCode': '510300', 'exchangeCode': 'XSHG', 'gridStrategy': make_strategy('等差'), **data}
+    assert validate_backtest_request(request, REQUEST_LIMITS)['valid'] is valid
+
+
+def test_run_backtest_chart_options(tmp_path):
+    """测试回测结果按图表选项降采样，指标与完整粒度一致"""
+    trading_days, series = make_daily_kline(20)
+    service = BacktestService()
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days[::-1]), \
+            patch.object(service.data_service, 'get_5min_kline', return_value=series), \
+            patch.object(BacktestService, 'checkpoint_store', CheckpointStore(str(tmp_path / 'ckpt'))), \
+            patch.object(BacktestService, 'result_cache', ResultCache(str(tmp_path / 'results'))):
+        full = service.run_backtest('510300', 'XSHG', make_strategy('等差'))
+        sampled = service.run_backtest('510300', 'XSHG', make_strategy('等差'), chart_options={'max_points': 200})
+        hourly = service.run_backtest('510300', 'XSHG', make_strategy('等差'), chart_options={'resolution': '60min'})
+
+    assert len(full['equity_curve']) == len(full['price_curve']) == len(series)
+    assert full['backtest_period']['curve_resolution'] == '5min'
+
+    assert len(sampled['equity_curve']) == 200
+    assert sampled['equity_curve'][0] == full['equity_curve'][0]
+    assert sampled['equity_curve'][-1] == full['equity_curve'][-1]
+    assert len(sampled['price_curve']) <= 200
+    assert sampled['backtest_period']['curve_resolution'] == '30min'
+    assert sampled['backtest_period']['total_bars'] == len(series)
+    assert sampled['performance_metrics'] == full['performance_metrics']
+
+    # 只指定周期时资产曲线取每根聚合K线的最后一个点，与价格曲线逐点对应
+    assert len(hourly['equity_curve']) == len(hourly['price_curve']) == 100
+    assert [point['time'] for point in hourly['equity_curve']] == [bar['time'] for bar in hourly['price_curve']]
+    assert hourly['equity_curve'][-1] == full['equity_curve'][-1]
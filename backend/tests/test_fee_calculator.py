@@ -3,6 +3,7 @@
 """
 
 import pytest
+import numpy as np
 from app.algorithms.backtest.fee_calculator import FeeCalculator
 
 
@@ -47,4 +48,18 @@ def test_min_commission():
 def test_zero_amount():
     """测试零成交额"""
     calc = FeeCalculator()
-    assert calc.calculate(0.0) == 5.0  # 最低收费
\ No newline at end of file
+    assert calc.calculate(0.0) == 5.0  # 最低收费
+
+
+def test_array_matches_scalar():
+    """测试批量计算与逐笔计算一致（含最低收费）"""
+    calc = FeeCalculator(commission_rate=0.0002, min_commission=5.0)
+    quantity = np.array([100, 1000, 5000, 30000], dtype=np.float64)
+    price = 3.517
+
+    assert calc.calculate_buy_cost_array(price, quantity).tolist() == [
+        calc.calculate_buy_cost(price, int(q)) for q in quantity
+    ]
+    assert calc.calculate_sell_income_array(price, quantity).tolist() == [
+        calc.calculate_sell_income(price, int(q)) for q in quantity
+    ]
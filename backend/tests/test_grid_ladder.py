@@ -0,0 +1,100 @@
+"""
+网格阶梯单元测试
+"""
+
+import math
+import numpy as np
+import pytest
+from app.algorithms.backtest.grid_ladder import (
+    GridLadder, to_ticks, floor_ticks, ceil_ticks, floor_ticks_array, ceil_ticks_array, validate_grid_config
+)
+
+
+def test_tick_rounding_tolerates_float_error():
+    """测试tick取整容忍浮点误差"""
+    # 10.1 - 0.3 = 9.799999999999999
+    assert floor_ticks(10.1 - 0.3) == 98000
+    assert ceil_ticks(10.1 - 0.3) == 98000
+    assert floor_ticks(9.80005) == 98000
+    assert ceil_ticks(9.80005) == 98001
+    assert to_ticks(1.23456) == 12346
+
+
+def test_tick_array_matches_scalar():
+    """测试批量tick取整与逐元素一致"""
+    rng = np.random.default_rng(0)
+    prices = np.concatenate([rng.uniform(0.5, 50, 500), np.round(rng.uniform(0.5, 50, 500), 4)])
+    assert floor_ticks_array(prices).tolist() == [floor_ticks(p) for p in prices.tolist()]
+    assert ceil_ticks_array(prices).tolist() == [ceil_ticks(p) for p in prices.tolist()]
+
+
+def test_arithmetic_grid_prices():
+    """测试等差网格买卖点为整数tick"""
+    ladder = GridLadder('等差', step_size=0.1)
+    assert ladder.step_ticks == 1000
+    assert ladder.grid_prices(10.0) == (9.9, 10.1)
+    # 0.3步长下浮点相减的误差不再带入买卖点
+    assert GridLadder('等差', step_size=0.3).grid_prices(10.1) == (9.8, 10.4)
+
+
+def test_arithmetic_levels_between():
+    """测试等差网格跨越档位数"""
+    ladder = GridLadder('等差', step_size=0.1)
+    assert ladder.levels_between(9.9, 9.9) == 0
+    assert ladder.levels_between(9.9, 9.85) == 0
+    # 浮点计算 (10.0 - 9.8) / 0.1 = 1.999999999999993，整数tick下恰好为2档
+    assert ladder.levels_between(10.0, 9.8) == 2
+    assert ladder.levels_between(9.9, 9.3) == 6
+    assert ladder.levels_between(10.5, 10.1) == 4
+
+
+def test_geometric_grid_prices():
+    """测试等比网格买卖点"""
+    ladder = GridLadder('等比', step_ratio=0.01)
+    assert ladder.grid_prices(10.0) == (9.9, 10.1)
+
+
+@pytest.mark.parametrize('ratio', [0.005, 0.01, 0.03])
+def test_geometric_levels_between_matches_log(ratio):
+    """测试等比网格跨越档位数与对数公式一致（远离档位边界时）"""
+    ladder = GridLadder('等比', step_ratio=ratio)
+    rng = np.random.default_rng(1)
+    for upper, lower in zip(rng.uniform(5, 20, 500).tolist(), rng.uniform(1, 5, 500).tolist()):
+        expected = math.log(upper / lower) / math.log(1 + ratio)
+        if abs(expected - round(expected)) < 1e-9:
+            continue
+        assert ladder.levels_between(upper, lower) == math.floor(expected)
+
+
+def test_geometric_levels_between_invalid_price():
+    """测试非正价格时档位数为0"""
+    ladder = GridLadder('等比', step_ratio=0.01)
+    assert ladder.levels_between(10.0, 0) == 0
+    assert ladder.levels_between(0, 10.0) == 0
+
+
+def test_invalid_step():
+    """测试无效步长"""
+    with pytest.raises(ValueError):
+        GridLadder('等差', step_size=0.00001)
+    with pytest.raises(ValueError):
+        GridLadder('等比', step_ratio=0)
+
+
+@pytest.mark.parametrize('step_size', [0.00015, 0.00004, 0.05005, 0])
+def test_validate_grid_config_rejects_non_tick_step(step_size):
+    """测试等差步长不是0.0001的整数倍时报错（而不是静默舍入为最接近的tick）"""
+    with pytest.raises(ValueError, match='必须是最小价格单位0.0001的正整数倍'):
+        validate_grid_config({'type': '等差', 'step_size': step_size})
+    with pytest.raises(ValueError, match='必须是最小价格单位0.0001的正整数倍'):
+        GridLadder('等差', step_size=step_size)
+
+
+def test_validate_grid_config_accepts_tick_steps():
+    """测试tick整数倍的步长（含浮点误差）和正的等比步长比例通过校验"""
+    for step_size in (0.0001, 0.0003, 0.05, 0.1 + 0.2, 1.2345):
+        validate_grid_config({'type': '等差', 'step_size': step_size})
+    assert GridLadder('等差', step_size=0.0003).step_ticks == 3
+    validate_grid_config({'type': '等比', 'step_ratio': 0.005})
+    with pytest.raises(ValueError):
+        validate_grid_config({'type': '等比', 'step_ratio': 0})
@@ -0,0 +1,194 @@
+"""
+异步回测任务队列测试
+"""
+
+import time
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.models import BacktestConfig, KBarSeries
+from app.algorithms.backtest.vectorized_engine import VectorizedBacktestEngine
+from app.services.backtest_service import BacktestService, _run_job
+from app.services import job_queue
+from app.services.job_queue import JobQueue, JobQueueFullError
+from tests.test_backtest_stream import backtest_request, mock_data  # noqa: F401 (fixtures)
+from tests.test_vectorized_engine import make_random_kline, make_strategy
+
+
+def make_queue(tmp_path, handler, **kwargs) -> JobQueue:
+    return JobQueue(handler, db_path=str(tmp_path / 'jobs.sqlite3'), workers=kwargs.pop('workers', 0), **kwargs)
+
+
+def test_jobs_run_by_priority(tmp_path):
+    """测试高优先级任务先执行，同优先级按提交顺序执行"""
+    executed = []
+    queue = make_queue(tmp_path, lambda kind, params, report: executed.append(params['name']) or {})
+
+    for name, priority in [('sweep', 'batch'), ('normal', 'normal'), ('first', 'interactive'), ('second', 'interactive')]:
+        assert queue.submit('backtest', {'name': name}, priority)['status'] == 'queued'
+
+    while queue.run_next():
+        pass
+    assert executed == ['first', 'second', 'normal', 'sweep']
+
+    with pytest.raises(ValueError, match="任务优先级"):
+        queue.submit('backtest', {}, 'urgent')
+
+
+def test_job_progress_result_and_error(tmp_path):
+    """测试任务进度、结果（支持NumPy类型）和失败信息"""
+    def handler(kind, params, report):
+        if params.get('fail') == 'value':
+            raise ValueError("无法获取K线数据")
+        if params.get('fail') == 'internal':
+            raise RuntimeError("内部错误")
+        for bars in (100, 200):
+            report({'bars_processed': bars, 'total_bars': 200})
+        return {'total_return': np.float64(0.05), 'curve': np.arange(3)}
+
+    queue = make_queue(tmp_path, handler)
+    ok = queue.submit('backtest', {})['job_id']
+    value_error = queue.submit('backtest', {'fail': 'value'})['job_id']
+    internal_error = queue.submit('backtest', {'fail': 'internal'})['job_id']
+    while queue.run_next():
+        pass
+
+    job = queue.get(ok)
+    assert job['status'] == 'succeeded'
+    assert job['progress'] == {'bars_processed': 200, 'total_bars': 200}
+    assert job['result'] == {'total_return': 0.05, 'curve': [0, 1, 2]}
+    assert job['finished_at'] >= job['started_at'] >= job['created_at']
+
+    assert queue.get(value_error)['error'] == "无法获取K线数据"
+    assert queue.get(internal_error)['error'] == '任务执行失败，请稍后重试'
+    assert queue.get('missing') is None
+
+
+def test_job_retention_and_limits(tmp_path):
+    """测试已结束任务按数量和时间淘汰、排队任务数上限和中断任务标记"""
+    queue = make_queue(tmp_path, lambda kind, params, report: {}, max_retained=2, max_pending=3)
+    job_ids = [queue.submit('backtest', {})['job_id'] for _ in range(3)]
+    with pytest.raises(JobQueueFullError):
+        queue.submit('backtest', {})
+    while queue.run_next():
+        pass
+
+    # 最多保留2个已结束任务，最早结束的被删除
+    assert queue.get(job_ids[0]) is None
+    assert all(queue.get(job_id)['status'] == 'succeeded' for job_id in job_ids[1:])
+
+    expiring = make_queue(tmp_path, lambda kind, params, report: {}, ttl=0)
+    job_id = expiring.submit('backtest', {})['job_id']
+    expiring.run_next()
+    assert expiring.get(job_id) is None
+
+    # 执行进程退出后长时间没有更新的任务标记为失败
+    stale = make_queue(tmp_path, lambda kind, params, report: {}, stale_after=0)
+    job_id = stale.submit('backtest', {})['job_id']
+    stale._claim()
+    assert stale.get(job_id)['error'] == '任务执行中断'
+
+
+def test_worker_threads_execute_jobs(tmp_path):
+    """测试后台工作线程领取并执行任务"""
+    queue = make_queue(tmp_path, lambda kind, params, report: {'value': params['value'] * 2}, workers=2)
+    try:
+        job_ids = [queue.submit('backtest', {'value': i})['job_id'] for i in range(4)]
+        deadline = time.time() + 10
+        while time.time() < deadline and any(queue.get(job_id)['status'] != 'succeeded' for job_id in job_ids):
+            time.sleep(0.05)
+        assert [queue.get(job_id)['result']['value'] for job_id in job_ids] == [0, 2, 4, 6]
+    finally:
+        queue.shutdown(timeout=5)
+
+
+def wait_finished(queue, job_ids, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline and any(queue.get(job_id)['status'] in ('queued', 'running') for job_id in job_ids):
+        time.sleep(0.05)
+    return [queue.get(job_id) for job_id in job_ids]
+
+
+@pytest.mark.skipif(job_queue.fcntl is None, reason='当前平台不支持文件锁')
+def test_single_executor_process(tmp_path):
+    """测试共享数据库的多个队列只有一个启动工作线程，执行进程退出后由其他队列接管并恢复中断的任务"""
+    first = make_queue(tmp_path, lambda kind, params, report: {'executor': 'first'}, workers=1)
+    second = make_queue(tmp_path, lambda kind, params, report: {'executor': 'second'}, workers=1)
+    try:
+        job_ids = [first.submit('backtest', {})['job_id'], second.submit('backtest', {})['job_id']]
+        assert first._threads and not second._threads
+        assert [job['result'] for job in wait_finished(second, job_ids)] == [{'executor': 'first'}] * 2
+
+        # 执行进程退出时留下执行中的任务：执行过一次的重新排队，达到最多执行次数的标记为失败
+        first.shutdown(timeout=5)
+        manual = make_queue(tmp_path, lambda kind, params, report: {})
+        retried = manual.submit('backtest', {}, 'interactive')['job_id']
+        manual._claim()
+        exhausted = manual.submit('backtest', {}, 'interactive')['job_id']
+        manual._claim()
+        manual._update(exhausted, status='queued')
+        manual._claim()
+
+        retried, exhausted = wait_finished(second, [retried, exhausted])
+        assert second._threads
+        assert retried['status'] == 'succeeded' and retried['result'] == {'executor': 'second'}
+        assert exhausted['error'] == '任务执行中断'
+    finally:
+        first.shutdown(timeout=5)
+        second.shutdown(timeout=5)
+
+
+@pytest.mark.parametrize('engine_cls', [BacktestEngine, VectorizedBacktestEngine])
+def test_engine_progress_callback(engine_cls, monkeypatch):
+    """测试引擎按间隔报告已模拟K线数和累计交易笔数，最后一次为全部K线"""
+    monkeypatch.setattr(engine_cls, 'PROGRESS_INTERVAL', 100)
+    series = KBarSeries.from_kbars(make_random_kline(3, count=1050))
+    reports = []
+    result = engine_cls(make_strategy('等差'), BacktestConfig()).run(
+        series, progress=lambda bars, trades: reports.append((bars, trades))
+    )
+
+    bars = [bars for bars, _ in reports]
+    assert bars[-1] == len(series)
+    assert reports[-1][1] == len(result['trade_records'])
+    assert bars == sorted(bars) and len(bars) >= 5
+    assert all(later - earlier <= 200 for earlier, later in zip(bars, bars[1:]))
+
+
+def test_backtest_job_api(client, mock_data, backtest_request, tmp_path):
+    """测试提交回测任务、查询进度和结果，结果与同步回测一致"""
+    queue = make_queue(tmp_path, _run_job)
+
+    with patch.object(BacktestService, 'job_queue', queue):
+        response = client.post('/api/grid/backtest/jobs', json=backtest_request)
+        assert response.status_code == 202
+        job = response.get_json()['data']
+        assert job['status'] == 'queued' and job['priority'] == 'interactive'
+
+        queue.run_next()
+        response = client.get(f"/api/grid/backtest/jobs/{job['job_id']}")
+        assert response.status_code == 200
+        job = response.get_json()['data']
+
+        # 同步回测命中任务写入的结果缓存，结果相同
+        expected = client.post('/api/grid/backtest', json=backtest_request).get_json()['data']
+        assert job['status'] == 'succeeded'
+        assert job['result'] == expected
+        assert job['progress']['bars_processed'] == job['progress']['total_bars'] == len(mock_data)
+        assert job['progress']['trades'] == len(expected['trade_records'])
+
+        sweep = client.post('/api/grid/backtest/jobs', json={
+            **backtest_request, 'kind': 'sweep', 'sweepParams': {'singleTradeQuantity': [100, 200]}
+        }).get_json()['data']
+        assert sweep['kind'] == 'sweep' and sweep['priority'] == 'batch'
+        with patch.dict('os.environ', {'BACKTEST_POOL_WORKERS': '1'}):
+            queue.run_next()
+        sweep = client.get(f"/api/grid/backtest/jobs/{sweep['job_id']}").get_json()['data']
+        assert sweep['status'] == 'succeeded'
+        assert sweep['progress'] == {'stage': 'simulating', 'candidates_processed': 2, 'total_candidates': 2}
+        assert len(sweep['result']['results']) == 2
+
+        assert client.get('/api/grid/backtest/jobs/missing').status_code == 404
+        assert client.post('/api/grid/backtest/jobs', json={**backtest_request, 'priority': 'urgent'}).status_code == 400
+        assert client.post('/api/grid/backtest/jobs', json={**backtest_request, 'kind': 'walk'}).status_code == 400
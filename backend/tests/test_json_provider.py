@@ -0,0 +1,92 @@
+"""
+JSON提供者测试
+"""
+
+import json
+from datetime import date, datetime
+import numpy as np
+import pytest
+from app.algorithms.backtest.models import TradeRecord, EquityCurve
+from app.services.backtest_service import BacktestService
+from app.utils import json_provider
+from app.utils.json_provider import dumps, loads
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    """分别使用orjson（已安装时）和标准库json编码"""
+    if request.param == 'orjson':
+        if json_provider.orjson is None:
+            pytest.skip('未安装orjson')
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return request.param
+
+
+def test_dumps_native_types(encoder):
+    """测试datetime、NumPy标量和数组、dataclass按接口格式编码"""
+    record = TradeRecord(datetime(2025, 1, 2, 9, 35), 'BUY', 3.5, 100, 5.0, None, 800, 9645.0, grid_level=np.int64(3))
+    data = {
+        'time': datetime(2025, 1, 2, 14, 55, 0),
+        'day': date(2025, 1, 2),
+        'count': np.int64(7),
+        'ratio': np.float64(0.25),
+        'flag': np.bool_(True),
+        'values': np.array([1.5, 2.5]),
+        'matrix': np.arange(4).reshape(2, 2),
+        'record': record
+    }
+
+    assert loads(dumps(data)) == {
+        'time': '2025-01-02 14:55:00',
+        'day': '2025-01-02',
+        'count': 7,
+        'ratio': 0.25,
+        'flag': True,
+        'values': [1.5, 2.5],
+        'matrix': [[0, 1], [2, 3]],
+        'record': {
+            'time': '2025-01-02 09:35:00', 'type': 'BUY', 'price': 3.5, 'quantity': 100,
+            'commission': 5.0, 'profit': None, 'position': 800, 'cash': 9645.0, 'grid_level': 3
+        }
+    }
+
+
+def test_dumps_options(encoder):
+    """测试排序键、中文输出和不支持类型报错"""
+    text = dumps({'b': 1, 'a': '网格'}, sort_keys=True)
+    assert text.index('"a"') < text.index('"b"')
+    assert json.loads(text) == {'a': '网格', 'b': 1}
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+
+def test_jsonify_uses_provider(app, client):
+    """测试jsonify经由自定义提供者编码NumPy类型和datetime"""
+    from flask import jsonify
+
+    @app.route('/test/json')
+    def numpy_payload():
+        return jsonify({'success': True, 'data': {'curve': np.linspace(0, 1, 3), 'time': datetime(2025, 1, 2)}})
+
+    response = client.get('/test/json')
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'data': {'curve': [0.0, 0.5, 1.0], 'time': '2025-01-02 00:00:00'}}
+
+
+def test_formatters_round_like_python_round():
+    """测试交易记录和资产曲线按Python的round舍入（2.675、0.0025等小数上np.round结果不同）"""
+    service = BacktestService()
+    records = [
+        TradeRecord(datetime(2025, 1, 2, 9, 35), 'BUY', 0.0025, 100, 2.675, None, 100, 1.005),
+        TradeRecord(datetime(2025, 1, 2, 9, 40), 'SELL', 2.0005, 100, 0.015, 0.015, 0, 2.675, grid_level=1)
+    ]
+    formatted = service._format_trade_records(records)
+    assert [(r['price'], r['commission'], r['profit'], r['cash']) for r in formatted] == [
+        (round(0.0025, 3), round(2.675, 2), None, round(1.005, 2)),
+        (round(2.0005, 3), round(0.015, 2), round(0.015, 2), round(2.675, 2))
+    ]
+    assert formatted[0]['commission'] == 2.67 and formatted[1]['profit'] == 0.01
+
+    curve = EquityCurve.from_arrays(np.array([1735781700, 1735782000]), np.array([2.675, 0.015]), np.array([1.0, 1.0]))
+    assert [point['total_asset'] for point in service._format_equity_curve(curve)] == [2.67, 0.01]
@@ -0,0 +1,77 @@
+"""
+列式K线序列单元测试
+"""
+
+import numpy as np
+from datetime import datetime, timedelta
+from app.algorithms.backtest.models import KBar, KBarSeries
+
+
+def make_rows():
+    return [
+        {'date': '2025-01-10 09:40:00', 'open': 3.52, 'high': 3.53, 'low': 3.50, 'close': 3.51, 'volume': 9000},
+        {'date': '2025-01-10 09:30:00', 'open': 3.50, 'high': 3.51, 'low': 3.49, 'close': 3.505, 'volume': 10000},
+        {'date': '2025-01-10 09:35:00', 'open': '3.505', 'high': '3.52', 'low': '3.50', 'close': '3.515', 'volume': '12000'},
+    ]
+
+
+def test_from_records_sorted():
+    """测试由行数据创建序列并按时间排序"""
+    series = KBarSeries.from_records(make_rows())
+
+    assert len(series) == 3
+    assert series.times.dtype == np.int64
+    assert series.close.dtype == np.float64
+    assert np.all(np.diff(series.times) > 0)
+    assert series.close.tolist() == [3.505, 3.515, 3.51]
+
+
+def test_kbar_view():
+    """测试按下标访问返回KBar"""
+    series = KBarSeries.from_records(make_rows())
+    kbar = series[0]
+
+    assert isinstance(kbar, KBar)
+    assert kbar.time == datetime(2025, 1, 10, 9, 30)
+    assert kbar.open == 3.50
+    assert kbar.volume == 10000
+    assert series[-1].time == datetime(2025, 1, 10, 9, 40)
+    assert [k.time.minute for k in series] == [30, 35, 40]
+
+
+def test_from_kbars_roundtrip():
+    """测试KBar列表与序列互相转换"""
+    base_time = datetime(2025, 1, 10, 9, 30)
+    kbars = [KBar(base_time + timedelta(minutes=5 * i), 3.5, 3.6, 3.4, 3.55, 1000 + i) for i in range(5)]
+
+    assert KBarSeries.from_kbars(kbars).to_kbars() == kbars
+
+
+def test_slice_is_zero_copy():
+    """测试切片共享底层数组"""
+    series = KBarSeries.from_records(make_rows())
+    view = series[1:]
+
+    assert len(view) == 2
+    assert np.shares_memory(view.close, series.close)
+    assert np.shares_memory(view.times, series.times)
+
+
+def test_slice_time():
+    """测试按时间范围切片（闭区间）"""
+    series = KBarSeries.from_records(make_rows())
+
+    view = series.slice_time(datetime(2025, 1, 10, 9, 35), datetime(2025, 1, 10, 9, 40))
+    assert [k.time.minute for k in view] == [35, 40]
+    assert np.shares_memory(view.close, series.close)
+
+    assert len(series.slice_time(start=datetime(2025, 1, 10, 9, 36))) == 1
+    assert len(series.slice_time(end=datetime(2025, 1, 10, 9, 29))) == 0
+
+
+def test_empty_series():
+    """测试空序列"""
+    series = KBarSeries.from_records([])
+
+    assert len(series) == 0
+    assert not series
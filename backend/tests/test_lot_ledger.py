@@ -0,0 +1,93 @@
+"""
+FIFO持仓批次账本单元测试
+"""
+
+import copy
+import pytest
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.lot_ledger import LotLedger
+from app.algorithms.backtest.metrics import MetricsCalculator
+from app.algorithms.backtest.models import KBarSeries, BacktestConfig
+from app.algorithms.backtest.multi_engine import MultiStrategyBacktestEngine
+from tests.test_vectorized_engine import make_random_kline, make_strategy
+
+
+def test_fifo_matching():
+    """测试卖出从最早的买入批次开始配对，手续费按数量分摊"""
+    ledger = LotLedger()
+    ledger.buy(3.50, 150, 1.5)
+    ledger.buy(3.45, 100, 1.0)
+
+    profit = ledger.sell(3.55, 200, 2.0)
+    # 150股 3.50->3.55 与 50股 3.45->3.55
+    assert ledger.pair_profits == pytest.approx([150 * (0.05 - 0.01 - 0.01), 50 * (0.10 - 0.01 - 0.01)])
+    assert profit == pytest.approx(sum(ledger.pair_profits))
+    assert ledger.open_quantity == 50
+    assert ledger.lots[0][1] == 3.45
+
+    ledger.sell(3.40, 50, 0.5)
+    assert ledger.pair_profits[-1] == pytest.approx(50 * (-0.05 - 0.01 - 0.01))
+    assert ledger.open_quantity == 0 and not ledger.lots
+    assert ledger.win_rate == pytest.approx(2 / 3)
+
+
+def test_empty_ledger():
+    """测试空账本"""
+    ledger = LotLedger()
+    assert ledger.win_rate == 0.0
+    assert ledger.realized_profit == 0.0
+    assert ledger.sell(3.5, 0, 0) == 0.0
+
+
+@pytest.mark.parametrize('grid_type', ['等差', '等比'])
+def test_engine_sell_profit_from_ledger(grid_type):
+    """测试引擎卖出盈亏来自FIFO账本，账本未平仓数量等于期末持仓"""
+    series = KBarSeries.from_kbars(make_random_kline(4))
+    result = BacktestEngine(make_strategy(grid_type), BacktestConfig()).run(series)
+
+    ledger = result['lot_ledger']
+    sells = [record for record in result['trade_records'] if record.type == 'SELL']
+    assert sells
+    assert sum(record.profit for record in sells) == pytest.approx(ledger.realized_profit)
+    assert ledger.open_quantity == result['final_state']['position']
+
+    # 重放交易记录得到相同的配对
+    assert LotLedger.from_trades(result['trade_records']).pair_profits == pytest.approx(ledger.pair_profits)
+
+
+def test_metrics_read_engine_ledger():
+    """测试指标直接读取引擎账本，与重放交易记录的结果一致"""
+    series = KBarSeries.from_kbars(make_random_kline(6))
+    result = BacktestEngine(make_strategy('等差'), BacktestConfig()).run(series)
+    calc = MetricsCalculator()
+    args = dict(initial_capital=10000, final_capital=result['final_state']['total_asset'],
+                equity_curve=result['equity_curve'], trade_records=result['trade_records'],
+                price_curve=series, grid_count=10)
+
+    metrics, _ = calc.calculate_all(lot_ledger=result['lot_ledger'], **args)
+    replayed, _ = calc.calculate_all(**args)
+    assert metrics.win_rate == replayed.win_rate == LotLedger.from_trades(result['trade_records']).win_rate
+
+
+def test_multi_engine_ledgers_match_reference():
+    """测试多策略引擎的各策略账本与单策略引擎一致"""
+    series = KBarSeries.from_kbars(make_random_kline(7))
+    strategies = [make_strategy('等差'), make_strategy('等比')]
+    results = MultiStrategyBacktestEngine(copy.deepcopy(strategies), BacktestConfig()).run(series)
+
+    for strategy, result in zip(strategies, results):
+        expected = BacktestEngine(copy.deepcopy(strategy), BacktestConfig()).run(series)
+        assert result['lot_ledger'] == expected['lot_ledger']
+
+
+def test_combine_ledgers():
+    """测试合并账本的配对盈亏"""
+    first, second = LotLedger(), LotLedger()
+    first.buy(1.0, 100, 0)
+    first.sell(1.1, 100, 0)
+    second.buy(2.0, 100, 0)
+    second.sell(1.9, 100, 0)
+
+    combined = LotLedger.combine([first, second])
+    assert combined.win_rate == 0.5
+    assert combined.realized_profit == pytest.approx(0)
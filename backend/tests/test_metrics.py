@@ -3,9 +3,364 @@
 """
 
 import pytest
+import numpy as np
 from datetime import datetime, timedelta
-from app.algorithms.backtest.metrics import MetricsCalculator, PerformanceMetrics
-from app.algorithms.backtest.models import TradeRecord
+from typing import Dict, List, Optional
+from app.algorithms.backtest.metrics import MetricsCalculator, PerformanceMetrics, TradeColumns
+from app.algorithms.backtest.models import TradeRecord, EquityCurve, to_epoch_seconds
+
+
+class BaselineMetricsCalculator:
+    """
+    重构前逐项计算各指标的基线实现（纯Python逐点/逐笔循环），作为向量化calculate_all的独立对照
+
+    资产曲线为字典列表（EquityCurve可通过list()转换），不计算基准对比。配对胜率沿用原实现的
+    逐笔配对循环，只是买入手续费改按批次原始数量分摊（引擎的LotLedger采用该口径）。
+    """
+
+    def __init__(self, trading_days_per_year: int = 244, risk_free_rate: float = 0.03):
+        self.trading_days_per_year = trading_days_per_year
+        self.risk_free_rate = risk_free_rate
+
+    def calculate_all(self,
+                     initial_capital: float,
+                     final_capital: float,
+                     equity_curve: List[Dict],
+                     trade_records: List[TradeRecord],
+                     grid_count: int) -> PerformanceMetrics:
+        """
+        计算所有指标
+
+        Args:
+            initial_capital: 期初资金
+            final_capital: 期末资金
+            equity_curve: 资产曲线
+            trade_records: 交易记录
+            grid_count: 网格总数
+
+        Returns:
+            性能指标
+        """
+        # 计算收益指标
+        total_return = self._calculate_total_return(initial_capital, final_capital)
+        trading_days = self._get_trading_days(equity_curve)
+        annualized_return = self._calculate_annualized_return(total_return, trading_days)
+        absolute_profit = final_capital - initial_capital
+
+        # 计算风险指标
+        max_drawdown = self._calculate_max_drawdown(equity_curve)
+        daily_returns = self._calculate_daily_returns(equity_curve)
+        volatility = self._calculate_volatility(daily_returns)
+        sharpe_ratio = self._calculate_sharpe_ratio(annualized_return, volatility)
+
+        # 计算交易指标
+        buy_trades = sum(1 for t in trade_records if t.type == 'BUY')
+        sell_trades = sum(1 for t in trade_records if t.type == 'SELL')
+        win_rate = self._calculate_win_rate(trade_records)
+        profit_loss_ratio = self._calculate_profit_loss_ratio(trade_records)
+        grid_trigger_rate = self._calculate_grid_trigger_rate(trade_records, grid_count)
+        capital_utilization_rate = self._calculate_capital_utilization_rate(trade_records, equity_curve, initial_capital)
+
+        metrics = PerformanceMetrics(
+            total_return=total_return,
+            annualized_return=annualized_return,
+            absolute_profit=absolute_profit,
+            max_drawdown=max_drawdown,
+            sharpe_ratio=sharpe_ratio,
+            volatility=volatility,
+            total_trades=len(trade_records),
+            buy_trades=buy_trades,
+            sell_trades=sell_trades,
+            win_rate=win_rate,
+            profit_loss_ratio=profit_loss_ratio,
+            grid_trigger_rate=grid_trigger_rate,
+            capital_utilization_rate=capital_utilization_rate
+        )
+
+        return metrics
+
+    def _calculate_total_return(self, initial: float, final: float) -> float:
+        """计算总收益率"""
+        return (final - initial) / initial
+
+    def _calculate_annualized_return(self, total_return: float, trading_days: int) -> float:
+        """计算年化收益率"""
+        if trading_days == 0:
+            return 0.0
+        return total_return * (self.trading_days_per_year / trading_days)
+
+    def _calculate_max_drawdown(self, equity_curve: List[Dict]) -> float:
+        """计算最大回撤"""
+        if not equity_curve:
+            return 0.0
+
+        peak = equity_curve[0]['total_asset']
+        max_dd = 0.0
+
+        for point in equity_curve:
+            asset = point['total_asset']
+            peak = max(peak, asset)
+            drawdown = (peak - asset) / peak if peak > 0 else 0
+            max_dd = max(max_dd, drawdown)
+
+        return -max_dd  # 返回负值表示回撤
+
+    def _calculate_volatility(self, daily_returns: List[float]) -> float:
+        """计算波动率（年化）"""
+        if len(daily_returns) < 2:
+            return 0.0
+
+        std = np.std(daily_returns, ddof=1)
+        return std * np.sqrt(self.trading_days_per_year)
+
+    def _calculate_sharpe_ratio(self, annualized_return: float, volatility: float) -> Optional[float]:
+        """计算夏普比率"""
+        if volatility == 0:
+            return None
+
+        return (annualized_return - self.risk_free_rate) / volatility
+
+    def _calculate_daily_returns(self, equity_curve: List[Dict]) -> List[float]:
+        """计算日收益率序列"""
+        if len(equity_curve) < 2:
+            return []
+
+        returns = []
+        for i in range(1, len(equity_curve)):
+            prev_asset = equity_curve[i-1]['total_asset']
+            curr_asset = equity_curve[i]['total_asset']
+            if prev_asset > 0:
+                returns.append((curr_asset - prev_asset) / prev_asset)
+
+        return returns
+
+    def _calculate_win_rate(self, trade_records: List[TradeRecord]) -> float:
+        """
+        计算配对交易胜率
+        
+        基于FIFO原则匹配买入和卖出交易，计算配对交易的胜率。
+        这种方法更适合网格交易策略，能够真实反映策略的盈利能力。
+        
+        Returns:
+            float: 配对交易胜率 (0.0 - 1.0)
+        """
+        return self._calculate_paired_win_rate(trade_records)
+
+    def _calculate_paired_win_rate(self, trade_records: List[TradeRecord]) -> float:
+        """
+        配对交易胜率计算
+        
+        使用FIFO（先进先出）原则匹配买入和卖出交易：
+        1. 按时间排序所有交易
+        2. 维护买入队列，每次卖出时从最早的买入开始匹配
+        3. 计算每个配对的净盈亏（包含双向手续费）
+        4. 统计盈利配对的比例
+        
+        Args:
+            trade_records: 交易记录列表
+            
+        Returns:
+            float: 配对交易胜率
+        """
+        if not trade_records:
+            return 0.0
+        
+        # 按时间排序交易记录
+        sorted_trades = sorted(trade_records, key=lambda x: x.time)
+        
+        # 买入队列：存储 (买入价格, 数量, 手续费)
+        buy_queue = []
+        paired_profits = []
+        
+        for trade in sorted_trades:
+            if trade.type == 'BUY':
+                # 买入交易加入队列
+                buy_queue.append({
+                    'price': trade.price,
+                    'quantity': trade.quantity,
+                    'lot_quantity': trade.quantity,
+                    'commission': trade.commission,
+                    'time': trade.time
+                })
+            
+            elif trade.type == 'SELL' and buy_queue:
+                # 卖出交易，与买入队列配对
+                sell_quantity = trade.quantity
+                sell_price = trade.price
+                sell_commission = trade.commission
+                
+                # 从最早的买入开始匹配
+                while sell_quantity > 0 and buy_queue:
+                    buy_record = buy_queue[0]
+                    
+                    # 确定本次配对的数量
+                    paired_quantity = min(sell_quantity, buy_record['quantity'])
+                    
+                    # 计算配对交易的净盈亏
+                    buy_cost = buy_record['price'] * paired_quantity
+                    sell_revenue = sell_price * paired_quantity
+                    
+                    # 按比例分摊手续费（买入手续费按批次原始数量分摊，与引擎的LotLedger一致）
+                    buy_commission_portion = (buy_record['commission'] * 
+                                            paired_quantity / buy_record['lot_quantity'])
+                    sell_commission_portion = (sell_commission * 
+                                             paired_quantity / trade.quantity)
+                    
+                    # 净盈亏 = 卖出收入 - 买入成本 - 总手续费
+                    net_profit = (sell_revenue - buy_cost - 
+                                buy_commission_portion - sell_commission_portion)
+                    
+                    paired_profits.append(net_profit)
+                    
+                    # 更新队列和剩余数量
+                    buy_record['quantity'] -= paired_quantity
+                    sell_quantity -= paired_quantity
+                    
+                    # 如果买入记录已完全匹配，从队列中移除
+                    if buy_record['quantity'] == 0:
+                        buy_queue.pop(0)
+        
+        # 计算胜率
+        if not paired_profits:
+            return 0.0
+        
+        profitable_pairs = sum(1 for profit in paired_profits if profit > 0)
+        total_pairs = len(paired_profits)
+        
+        return profitable_pairs / total_pairs
+
+    def _calculate_profit_loss_ratio(self, trade_records: List[TradeRecord]) -> Optional[float]:
+        """计算盈亏比"""
+        profits = [t.profit for t in trade_records if t.profit is not None and t.profit > 0]
+        losses = [abs(t.profit) for t in trade_records if t.profit is not None and t.profit < 0]
+
+        if not profits or not losses:
+            return None
+
+        avg_profit = sum(profits) / len(profits)
+        avg_loss = sum(losses) / len(losses)
+
+        return avg_profit / avg_loss if avg_loss > 0 else None
+
+    def _calculate_grid_trigger_rate(self, trade_records: List[TradeRecord],
+                                    grid_count: int) -> float:
+        """计算网格触发率"""
+        triggered_prices = set(t.price for t in trade_records)
+        return len(triggered_prices) / grid_count if grid_count > 0 else 0.0
+
+    def _calculate_capital_utilization_rate(self, trade_records: List[TradeRecord],
+                                          equity_curve: List[Dict], 
+                                          initial_capital: float) -> float:
+        """
+        计算时间加权的资金利用率
+        
+        资金利用率 = 1 - (时间加权平均现金余额 / 总资金)
+        
+        使用时间加权方式计算平均现金余额，考虑每个现金状态持续的时间长度。
+        时间单位按天计算，同一天内的交易取平均值。
+        
+        Args:
+            trade_records: 交易记录，包含每次交易后的现金余额
+            equity_curve: 资产曲线，用于确定回测时间范围
+            initial_capital: 初始资金
+            
+        Returns:
+            float: 资金利用率 (0.0 - 1.0)
+        """
+        if initial_capital <= 0:
+            return 0.0
+        
+        # 如果没有交易记录，利用率为0（未投资）
+        if not trade_records:
+            return 0.0
+        
+        # 如果没有资产曲线，无法确定时间范围，回退到简单平均
+        if not equity_curve:
+            cash_samples = [initial_capital] + [trade.cash for trade in trade_records]
+            avg_cash = sum(cash_samples) / len(cash_samples)
+            return max(0.0, min(1.0, 1 - (avg_cash / initial_capital)))
+        
+        # 确定回测时间范围
+        start_time = equity_curve[0]['time']
+        end_time = equity_curve[-1]['time']
+        
+        # 按时间排序交易记录
+        sorted_trades = sorted(trade_records, key=lambda x: x.time)
+        
+        # 构建现金余额时间序列：[(日期, 现金余额)]
+        cash_timeline = []
+        
+        # 添加初始状态（回测开始时的现金）
+        start_date = start_time.date()
+        cash_timeline.append((start_date, initial_capital))
+        
+        # 按天聚合交易记录，同一天内取最后的现金余额
+        daily_cash = {}
+        for trade in sorted_trades:
+            trade_date = trade.time.date()
+            daily_cash[trade_date] = trade.cash
+        
+        # 将每日现金余额添加到时间序列
+        for date, cash in sorted(daily_cash.items()):
+            # 如果与起始日期相同，更新起始现金；否则添加新记录
+            if date == start_date:
+                cash_timeline[0] = (date, cash)
+            else:
+                cash_timeline.append((date, cash))
+        
+        # 计算时间加权平均现金余额
+        if len(cash_timeline) == 1:
+            # 只有一个时间点，直接使用该现金余额
+            time_weighted_avg_cash = cash_timeline[0][1]
+        else:
+            total_weighted_cash = 0.0
+            end_date = end_time.date()
+            total_days = (end_date - start_date).days + 1
+            
+            if total_days <= 0:
+                # 时间范围异常，回退到简单平均
+                cash_values = [cash for _, cash in cash_timeline]
+                time_weighted_avg_cash = sum(cash_values) / len(cash_values)
+            else:
+                # 计算每个时间段的加权现金
+                for i in range(len(cash_timeline)):
+                    current_date, current_cash = cash_timeline[i]
+                    
+                    # 确定当前状态的结束日期
+                    if i < len(cash_timeline) - 1:
+                        next_date = cash_timeline[i + 1][0]
+                        period_end = next_date
+                    else:
+                        # 最后一个状态持续到回测结束
+                        period_end = end_date + timedelta(days=1)  # 包含结束日期
+                    
+                    # 计算持续天数
+                    duration_days = (period_end - current_date).days
+                    
+                    # 确保持续天数为正
+                    if duration_days > 0:
+                        weight = duration_days / total_days
+                        total_weighted_cash += current_cash * weight
+                
+                time_weighted_avg_cash = total_weighted_cash
+        
+        # 资金利用率 = 1 - (时间加权平均现金余额 / 总资金)
+        utilization_rate = 1 - (time_weighted_avg_cash / initial_capital)
+        
+        # 确保利用率在合理范围内 (0-1)
+        return max(0.0, min(1.0, utilization_rate))
+
+    def _get_trading_days(self, equity_curve: List[Dict]) -> int:
+        """获取实际交易日数量"""
+        if not equity_curve:
+            return 0
+
+        # 通过时间戳计算交易日
+        dates = set()
+        for point in equity_curve:
+            dates.add(point['time'].date())
+
+        return len(dates)
 
 
 @pytest.fixture
@@ -32,6 +387,19 @@ def price_curve():
     ]
 
 
+def calculate(equity_curve=(), trade_records=(), initial_capital=10000, grid_count=20) -> PerformanceMetrics:
+    """通过calculate_all计算指标（各单项测试只检查其中一个指标）"""
+    metrics, _ = MetricsCalculator().calculate_all(
+        initial_capital=initial_capital,
+        final_capital=initial_capital,
+        equity_curve=list(equity_curve),
+        trade_records=list(trade_records),
+        price_curve=[],
+        grid_count=grid_count
+    )
+    return metrics
+
+
 def test_total_return_calculation():
     """测试总收益率计算"""
     calc = MetricsCalculator()
@@ -41,16 +409,14 @@ def test_total_return_calculation():
 
 def test_max_drawdown_calculation(equity_curve):
     """测试最大回撤计算"""
-    calc = MetricsCalculator()
-    max_dd = calc._calculate_max_drawdown(equity_curve)
+    max_dd = calculate(equity_curve).max_drawdown
     # 从10100回撤到10050，回撤率 = (10100-10050)/10100 ≈ 0.495%
     assert -0.01 < max_dd < 0.0
 
 
 def test_win_rate_calculation():
     """测试配对交易胜率计算"""
-    calc = MetricsCalculator()
-    
+
     # 创建配对交易序列：买入 -> 卖出
     base_time = datetime.now()
     trades = [
@@ -67,14 +433,13 @@ def test_win_rate_calculation():
         TradeRecord(base_time + timedelta(minutes=5), 'SELL', 3.60, 100, 0.72, 18.6, 0, 10000),
     ]
     
-    win_rate = calc._calculate_win_rate(trades)
+    win_rate = calculate(trade_records=trades).win_rate
     assert win_rate == 2/3  # 2个盈利配对 / 3个总配对 = 66.67%
 
 
 def test_paired_win_rate_partial_matching():
     """测试部分匹配的配对交易胜率"""
-    calc = MetricsCalculator()
-    
+
     base_time = datetime.now()
     trades = [
         # 买入200股@3.50
@@ -85,28 +450,26 @@ def test_paired_win_rate_partial_matching():
         TradeRecord(base_time + timedelta(minutes=2), 'SELL', 3.45, 100, 0.69, -6.09, 0, 9995),
     ]
     
-    win_rate = calc._calculate_win_rate(trades)
+    win_rate = calculate(trade_records=trades).win_rate
     assert win_rate == 0.5  # 1个盈利配对 / 2个总配对 = 50%
 
 
 def test_paired_win_rate_no_pairs():
     """测试无配对交易的情况"""
-    calc = MetricsCalculator()
-    
+
     # 只有买入，没有卖出
     trades = [
         TradeRecord(datetime.now(), 'BUY', 3.50, 100, 0.70, None, 100, 9650),
         TradeRecord(datetime.now(), 'BUY', 3.45, 100, 0.69, None, 200, 9305),
     ]
     
-    win_rate = calc._calculate_win_rate(trades)
+    win_rate = calculate(trade_records=trades).win_rate
     assert win_rate == 0.0
 
 
 def test_paired_win_rate_complex_scenario():
     """测试复杂配对场景"""
-    calc = MetricsCalculator()
-    
+
     base_time = datetime.now()
     trades = [
         # 买入150股@3.50
@@ -122,7 +485,7 @@ def test_paired_win_rate_complex_scenario():
         TradeRecord(base_time + timedelta(minutes=3), 'SELL', 3.40, 50, 0.34, -2.84, 0, 9998),
     ]
     
-    win_rate = calc._calculate_win_rate(trades)
+    win_rate = calculate(trade_records=trades).win_rate
     # 应该有3个配对：
     # 1. 150股 3.50->3.55 (盈利)
     # 2. 50股 3.45->3.55 (盈利) 
@@ -133,13 +496,12 @@ def test_paired_win_rate_complex_scenario():
 
 def test_profit_loss_ratio_calculation():
     """测试盈亏比计算"""
-    calc = MetricsCalculator()
     trades = [
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, 10, 700, 10000),  # 盈利10
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, -5, 700, 10000),  # 亏损5
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, 8, 700, 10000),   # 盈利8
     ]
-    pl_ratio = calc._calculate_profit_loss_ratio(trades)
+    pl_ratio = calculate(trade_records=trades).profit_loss_ratio
     expected_avg_profit = (10 + 8) / 2  # 9
     expected_avg_loss = 5  # 5
     expected_ratio = 9 / 5  # 1.8
@@ -148,21 +510,19 @@ def test_profit_loss_ratio_calculation():
 
 def test_grid_trigger_rate_calculation():
     """测试网格触发率计算"""
-    calc = MetricsCalculator()
     trades = [
         TradeRecord(datetime.now(), 'BUY', 3.47, 100, 0.35, None, 800, 9649.65),
         TradeRecord(datetime.now(), 'SELL', 3.50, 100, 0.35, 2.3, 700, 9999.6),
         TradeRecord(datetime.now(), 'BUY', 3.47, 100, 0.35, None, 800, 9649.65),  # 重复价格
     ]
-    trigger_rate = calc._calculate_grid_trigger_rate(trades, 20)
+    trigger_rate = calculate(trade_records=trades, grid_count=20).grid_trigger_rate
     # 触发了2个不同价格的网格
     assert trigger_rate == 2/20
 
 
 def test_capital_utilization_rate_calculation():
     """测试资金利用率计算"""
-    calc = MetricsCalculator()
-    
+
     # 模拟交易记录数据
     base_time = datetime.now()
     trade_records = [
@@ -174,7 +534,7 @@ def test_capital_utilization_rate_calculation():
     initial_capital = 10000
     equity_curve = []  # 不使用equity_curve
     
-    utilization_rate = calc._calculate_capital_utilization_rate(trade_records, equity_curve, initial_capital)
+    utilization_rate = calculate(equity_curve, trade_records, initial_capital).capital_utilization_rate
     
     # 现金样本: [10000(初始), 6500, 10004, 3100]
     # 平均现金 = (10000 + 6500 + 10004 + 3100) / 4 = 7401
@@ -187,19 +547,18 @@ def test_capital_utilization_rate_calculation():
 
 def test_capital_utilization_rate_edge_cases():
     """测试资金利用率边界情况"""
-    calc = MetricsCalculator()
-    
+
     # 空交易记录
-    equity_curve = []
-    assert calc._calculate_capital_utilization_rate([], equity_curve, 10000) == 0.0
+    assert calculate(trade_records=[], initial_capital=10000).capital_utilization_rate == 0.0
     
-    # 初始资金为0
+    # 初始资金为0（无法计算收益率，直接检查calculate_all使用的资金利用率计算）
     trade_records = [TradeRecord(datetime.now(), 'BUY', 3.50, 100, 0.70, None, 100, 5000)]
-    assert calc._calculate_capital_utilization_rate(trade_records, [], 0) == 0.0
+    trades = TradeColumns.from_records(trade_records)
+    assert MetricsCalculator()._capital_utilization_from_arrays(trades, np.empty(0, dtype=np.int64), 0) == 0.0
     
     # 负现金情况（使用杠杆或借贷）
     trade_records = [TradeRecord(datetime.now(), 'BUY', 3.50, 500, 3.50, None, 500, -2000)]  # 负现金-2000
-    utilization_rate = calc._calculate_capital_utilization_rate(trade_records, [], 10000)
+    utilization_rate = calculate(trade_records=trade_records).capital_utilization_rate
     # 现金样本: [10000(初始), -2000]
     # 平均现金 = (10000 + (-2000)) / 2 = 4000
     # 资金利用率 = 1 - (4000 / 10000) = 0.6 = 60%
@@ -207,7 +566,7 @@ def test_capital_utilization_rate_edge_cases():
     assert abs(utilization_rate - expected_rate) < 0.01
     
     # 全部现金情况（无交易）
-    utilization_rate = calc._calculate_capital_utilization_rate([], [], 10000)
+    utilization_rate = calculate(trade_records=[]).capital_utilization_rate
     # 无交易记录，平均现金 = 初始资金 = 10000
     # 资金利用率 = 1 - (10000 / 10000) = 0
     assert utilization_rate == 0.0
@@ -215,14 +574,13 @@ def test_capital_utilization_rate_edge_cases():
 
 def test_capital_utilization_rate_missing_fields():
     """测试资金利用率缺失字段处理"""
-    calc = MetricsCalculator()
-    
+
     # 单笔交易记录
     trade_records = [
         TradeRecord(datetime.now(), 'BUY', 3.50, 200, 1.40, None, 200, 3000),  # 现金3000
     ]
     
-    utilization_rate = calc._calculate_capital_utilization_rate(trade_records, [], 10000)
+    utilization_rate = calculate(trade_records=trade_records).capital_utilization_rate
     # 现金样本: [10000(初始), 3000]
     # 平均现金 = (10000 + 3000) / 2 = 6500
     # 资金利用率 = 1 - (6500 / 10000) = 0.35 = 35%
@@ -276,18 +634,16 @@ def test_calculate_all_metrics(equity_curve, price_curve):
 
 def test_edge_cases():
     """测试边界情况"""
-    calc = MetricsCalculator()
-
     # 空交易记录
-    win_rate = calc._calculate_win_rate([])
+    win_rate = calculate(trade_records=[]).win_rate
     assert win_rate == 0.0
 
     # 空资产曲线
-    max_dd = calc._calculate_max_drawdown([])
+    max_dd = calculate(equity_curve=[]).max_drawdown
     assert max_dd == 0.0
 
     # 波动率为0的情况
-    sharpe = calc._calculate_sharpe_ratio(0.03, 0.0)
+    sharpe = MetricsCalculator()._calculate_sharpe_ratio(0.03, 0.0)
     assert sharpe is None
 
     # 盈亏比无亏损
@@ -295,7 +651,7 @@ def test_edge_cases():
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, 10, 700, 10000),
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, 8, 700, 10000),
     ]
-    pl_ratio = calc._calculate_profit_loss_ratio(trades_no_loss)
+    pl_ratio = calculate(trade_records=trades_no_loss).profit_loss_ratio
     assert pl_ratio is None
 
     # 盈亏比无盈利
@@ -303,5 +659,60 @@ def test_edge_cases():
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, -10, 700, 10000),
         TradeRecord(datetime.now(), 'SELL', 3.5, 100, 0.35, -8, 700, 10000),
     ]
-    pl_ratio = calc._calculate_profit_loss_ratio(trades_no_profit)
-    assert pl_ratio is None
\ No newline at end of file
+    pl_ratio = calculate(trade_records=trades_no_profit).profit_loss_ratio
+    assert pl_ratio is None
+
+def test_equity_curve_buffer_matches_dict_list(equity_curve):
+    """测试资产曲线缓冲区与字典列表计算结果一致"""
+    buffer = EquityCurve.from_arrays(
+        [to_epoch_seconds(p['time']) for p in equity_curve],
+        [p['total_asset'] for p in equity_curve],
+        [p['price'] for p in equity_curve]
+    )
+
+    calc = MetricsCalculator()
+    args = dict(initial_capital=10000, final_capital=10300, trade_records=[], price_curve=[], grid_count=20)
+    assert calc.calculate_all(equity_curve=buffer, **args) == calc.calculate_all(equity_curve=equity_curve, **args)
+    assert list(buffer) == equity_curve
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_calculate_all_matches_reference(seed):
+    """测试向量化指标计算与重构前的逐项基线实现在随机输入上一致"""
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 6, 9, 35)
+
+    # 随机资产曲线：若干交易日，每日若干根5分钟K线
+    times = sorted(
+        to_epoch_seconds(start + timedelta(days=int(day), minutes=5 * int(bar)))
+        for day, bar in zip(rng.integers(0, 40, 300), rng.integers(0, 48, 300))
+    )
+    times = np.unique(times)
+    assets = 100000 * np.exp(np.cumsum(rng.normal(0, 0.004, len(times))))
+    equity_curve = EquityCurve.from_arrays(times, assets, np.full(len(times), 3.5))
+
+    # 随机交易记录：价格取自有限网格，卖出带盈亏，部分交易落在回测开始日
+    trade_count = int(rng.integers(0, 60))
+    trade_times = rng.choice(times, trade_count)
+    trade_records = []
+    for time in sorted(trade_times.tolist()):
+        trade_type = 'BUY' if rng.random() < 0.5 else 'SELL'
+        trade_records.append(TradeRecord(
+            time=datetime(1970, 1, 1) + timedelta(seconds=int(time)),
+            type=trade_type,
+            price=round(3.4 + 0.01 * int(rng.integers(0, 20)), 2),
+            quantity=100 * int(rng.integers(1, 5)),
+            commission=float(rng.uniform(0.1, 5)),
+            profit=None if trade_type == 'BUY' else float(rng.normal(0, 20)),
+            position=0,
+            cash=float(rng.uniform(0, 100000))
+        ))
+
+    calc = MetricsCalculator()
+    args = dict(initial_capital=100000, final_capital=float(assets[-1]),
+                equity_curve=equity_curve, trade_records=trade_records, grid_count=20)
+    metrics, _ = calc.calculate_all(price_curve=[{'close': 3.5}, {'close': 3.6}], **args)
+    expected = BaselineMetricsCalculator().calculate_all(**{**args, 'equity_curve': list(equity_curve)})
+
+    for name, value in expected.__dict__.items():
+        assert getattr(metrics, name) == pytest.approx(value, rel=1e-9, abs=1e-12), name
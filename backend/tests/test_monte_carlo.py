@@ -0,0 +1,108 @@
+"""
+蒙特卡洛稳健性检验单元测试
+"""
+
+import pytest
+from unittest.mock import patch
+import numpy as np
+from app.algorithms.backtest.monte_carlo import (
+    BootstrapPathGenerator, day_offsets, path_seeds, summarize_distribution
+)
+from app.services.backtest_service import BacktestService
+from tests.test_vectorized_engine import make_strategy
+from tests.test_walk_forward import make_daily_kline, BARS_PER_DAY
+
+
+@pytest.fixture
+def daily_series():
+    return make_daily_kline(20)[1]
+
+
+def test_day_offsets(daily_series):
+    """测试按日期分组K线"""
+    offsets = day_offsets(daily_series)
+    assert len(offsets) == 21
+    assert np.all(np.diff(offsets) == BARS_PER_DAY)
+
+
+def test_generated_path_shape(daily_series):
+    """测试合成路径的长度、时间和价格结构"""
+    generator = BootstrapPathGenerator(daily_series, block_days=3)
+    path = generator.generate(np.random.default_rng(0))
+
+    assert len(path) == len(daily_series)
+    assert np.all(np.diff(path.times) > 0)
+    # 合成路径的第k个交易日沿用历史第k个交易日的日期
+    assert np.array_equal(day_offsets(path), day_offsets(daily_series))
+    assert path.open[0] == pytest.approx(daily_series.open[0])
+    assert np.all(path.high >= np.maximum(path.open, path.close) - 1e-4)
+    assert np.all(path.low <= np.minimum(path.open, path.close) + 1e-4)
+
+
+def test_generated_path_preserves_intraday_returns(daily_series):
+    """测试每块内的K线收益率与源K线一致"""
+    generator = BootstrapPathGenerator(daily_series, block_days=20)
+    path = generator.generate(np.random.default_rng(1))
+    # 分块即全部历史时，路径与历史一致
+    assert np.allclose(path.close, daily_series.close, atol=1e-3)
+
+
+def test_path_seeds_are_reproducible(daily_series):
+    """测试相同根种子生成相同路径"""
+    generator = BootstrapPathGenerator(daily_series, block_days=2)
+    entropy, seeds = path_seeds(3, seed=42)
+    _, again = path_seeds(3, seed=42)
+    assert entropy == 42
+
+    first = [generator.generate(np.random.default_rng(seed)).close for seed in seeds]
+    second = [generator.generate(np.random.default_rng(seed)).close for seed in again]
+    for a, b in zip(first, second):
+        assert np.array_equal(a, b)
+    assert not np.array_equal(first[0], first[1])
+
+
+def test_summarize_distribution():
+    """测试分布统计"""
+    summary = summarize_distribution(range(101), digits=2)
+    assert summary['mean'] == 50
+    assert summary['min'] == 0 and summary['max'] == 100
+    assert summary['p5'] == 5 and summary['p50'] == 50 and summary['p95'] == 95
+    assert summarize_distribution([]) == {}
+
+
+def test_run_monte_carlo(daily_series):
+    """测试蒙特卡洛检验返回分布且结果可复现"""
+    service = BacktestService()
+    trading_days = ['2025-01-03', '2025-01-02']
+
+    def run():
+        return service.run_monte_carlo(
+            etf_code='510300',
+            exchange_code='XSHG',
+            grid_strategy=make_strategy('等差'),
+            paths=10,
+            block_days=3,
+            seed=7,
+            max_workers=1
+        )
+
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days), \
+            patch.object(service.data_service, 'get_5min_kline', return_value=daily_series):
+        result = run()
+        again = run()
+
+    assert result['monte_carlo']['completed'] == 10
+    assert result['monte_carlo']['seed'] == '7'
+    assert [row['path'] for row in result['paths']] == list(range(10))
+    for key in ('total_return', 'max_drawdown', 'total_trades'):
+        distribution = result['distributions'][key]
+        assert distribution['min'] <= distribution['p50'] <= distribution['max']
+    assert 0 <= result['historical_return_rank'] <= 1
+    assert result['paths'] == again['paths']
+
+
+def test_run_monte_carlo_rejects_invalid_paths():
+    """测试路径数超出范围"""
+    service = BacktestService()
+    with pytest.raises(ValueError, match="路径数"):
+        service.run_monte_carlo('510300', 'XSHG', make_strategy('等差'), paths=0)
@@ -0,0 +1,74 @@
+"""
+多策略同步回测引擎单元测试
+"""
+
+import copy
+import random
+import numpy as np
+import pytest
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.multi_engine import MultiStrategyBacktestEngine
+from app.algorithms.backtest.models import KBarSeries, BacktestConfig
+from tests.test_vectorized_engine import make_random_kline, make_strategy, assert_same_equity
+
+
+def make_strategies(seed: int, count: int = 24):
+    """生成网格类型、步长、单笔数量、资金和价格区间各不相同的策略"""
+    rng = random.Random(seed)
+    strategies = []
+    for _ in range(count):
+        strategy = make_strategy(
+            rng.choice(['等差', '等比']),
+            base_amount=rng.choice([0, 30000, 90000]),
+            grid_amount=rng.choice([15000, 70000])
+        )
+        strategy['grid_config']['step_size'] = rng.choice([0.01, 0.02, 0.05, 0.1])
+        strategy['grid_config']['step_ratio'] = rng.choice([0.002, 0.005, 0.01])
+        strategy['grid_config']['single_trade_quantity'] = rng.choice([100, 500, 1000, 3000])
+        strategy['price_range'] = {'lower': rng.choice([9.0, 9.5, 9.8]), 'upper': rng.choice([10.2, 10.5, 11.0])}
+        strategy['price_levels'] = np.round(np.arange(9.0, 11.0, strategy['grid_config']['step_size']), 2).tolist()
+        strategies.append(strategy)
+    return strategies
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_matches_reference_engine(seed):
+    """测试每个策略的结果与逐K线引擎逐笔一致"""
+    kline = KBarSeries.from_kbars(make_random_kline(seed, count=2000))
+    strategies = make_strategies(seed)
+    config = BacktestConfig()
+
+    results = MultiStrategyBacktestEngine(copy.deepcopy(strategies), config).run(kline)
+
+    assert len(results) == len(strategies)
+    for strategy, result in zip(strategies, results):
+        reference = BacktestEngine(copy.deepcopy(strategy), config).run(kline)
+        assert result['trade_records'] == reference['trade_records']
+        assert_same_equity(result['equity_curve'], reference['equity_curve'])
+        assert result['final_state'] == reference['final_state']
+
+
+def test_state_vector():
+    """测试状态向量与单策略状态一致"""
+    kline = make_random_kline(5, count=500)
+    strategies = make_strategies(5, count=4)
+    config = BacktestConfig()
+
+    engine = MultiStrategyBacktestEngine(copy.deepcopy(strategies), config)
+    engine.run(kline)
+
+    assert len(engine.state) == 4
+    for k, strategy in enumerate(strategies):
+        reference = BacktestEngine(copy.deepcopy(strategy), config)
+        reference.run(kline)
+        assert engine.state.to_state(k, engine.ledgers[k]) == reference.state
+
+
+def test_empty_input():
+    """测试空策略列表和空K线数据"""
+    with pytest.raises(ValueError, match="策略列表为空"):
+        MultiStrategyBacktestEngine([], BacktestConfig())
+
+    engine = MultiStrategyBacktestEngine([make_strategy('等差')], BacktestConfig())
+    with pytest.raises(ValueError, match="K线数据为空"):
+        engine.run([])
@@ -0,0 +1,84 @@
+"""
+多标的组合回测单元测试
+"""
+
+import pytest
+from unittest.mock import patch
+import numpy as np
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.models import KBarSeries, BacktestConfig
+from app.algorithms.backtest.portfolio import PricePanel, PortfolioBacktestEngine
+from app.services.backtest_service import BacktestService
+from tests.test_vectorized_engine import make_random_kline, make_strategy
+
+
+def test_panel_alignment():
+    """测试多标的K线按时间对齐"""
+    a = KBarSeries.from_kbars(make_random_kline(1, count=10))
+    b = KBarSeries.from_kbars(make_random_kline(2, count=10))[3:8]
+    panel = PricePanel.from_series([a, b])
+
+    assert np.array_equal(panel.times, a.times)
+    assert np.isnan(panel.close[:3, 1]).all() and np.isnan(panel.close[8:, 1]).all()
+    assert np.array_equal(panel.close[3:8, 1], b.close)
+    assert np.array_equal(panel.column(1).times, b.times)
+
+    filled = panel.filled_close()
+    assert np.all(filled[:3, 1] == b.close[0])
+    assert np.all(filled[8:, 1] == b.close[-1])
+
+
+@pytest.mark.parametrize('grid_type', ['等差', '等比'])
+def test_single_symbol_matches_engine(grid_type):
+    """测试单标的组合回测与单标的引擎逐笔一致"""
+    series = KBarSeries.from_kbars(make_random_kline(5))
+    expected = BacktestEngine(make_strategy(grid_type), BacktestConfig()).run(series)
+    result = PortfolioBacktestEngine([make_strategy(grid_type)], BacktestConfig()).run(PricePanel.from_series([series]))
+
+    records = result['symbols'][0]['trade_records']
+    assert [(r.time, r.type, r.price, r.quantity, r.cash) for r in records] == \
+        [(r.time, r.type, r.price, r.quantity, r.cash) for r in expected['trade_records']]
+    assert np.allclose(result['equity_curve'].assets, expected['equity_curve'].assets)
+    assert result['final_state']['total_asset'] == pytest.approx(expected['final_state']['total_asset'])
+
+
+def test_shared_cash_pool():
+    """测试多标的共用资金池，分账资产之和等于组合资产"""
+    series = [KBarSeries.from_kbars(make_random_kline(seed)) for seed in (11, 12, 13)]
+    strategies = [make_strategy('等差', base_amount=10000, grid_amount=20000) for _ in series]
+    result = PortfolioBacktestEngine(strategies, BacktestConfig()).run(PricePanel.from_series(series))
+
+    sleeves = np.sum([item['equity_curve'].assets for item in result['symbols']], axis=0)
+    assert np.allclose(sleeves, result['equity_curve'].assets)
+    assert result['equity_curve'].assets[0] == pytest.approx(90000, rel=0.01)
+    assert result['final_state']['cash'] >= 0
+
+    # 所有交易记录中的现金为共享现金，且始终非负
+    records = [record for item in result['symbols'] for record in item['trade_records']]
+    assert all(record.cash >= 0 for record in records)
+
+
+def test_run_portfolio_backtest():
+    """测试组合回测服务并发加载K线并汇总指标"""
+    series = {
+        '510300': KBarSeries.from_kbars(make_random_kline(21, count=600)),
+        '510500': KBarSeries.from_kbars(make_random_kline(22, count=600))[100:]
+    }
+    symbols = [
+        {'etfCode': code, 'exchangeCode': 'XSHG', 'type': 'ETF', 'gridStrategy': make_strategy('等差')}
+        for code in series
+    ]
+
+    service = BacktestService()
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=['2025-01-03', '2025-01-02']), \
+            patch.object(service.data_service, 'get_5min_kline',
+                         side_effect=lambda code, *args: series[code]):
+        result = service.run_portfolio_backtest(symbols)
+
+    assert result['backtest_period']['total_bars'] == 600
+    assert [item['etf_code'] for item in result['symbols']] == ['510300', '510500']
+    assert result['symbols'][1]['total_bars'] == 500
+    assert len(result['equity_curve']) == 600
+    assert result['trading_metrics']['total_trades'] == len(result['trade_records'])
+    times = [record['time'] for record in result['trade_records']]
+    assert times == sorted(times)
@@ -0,0 +1,108 @@
+"""
+回测结果缓存单元测试
+"""
+
+import os
+import numpy as np
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.algorithms.backtest.models import KBarSeries, BacktestConfig
+from app.services.backtest_service import BacktestService
+from app.services.result_cache import ResultCache, result_cache_key
+from app.algorithms.backtest.checkpoint import CheckpointStore
+from tests.test_vectorized_engine import make_random_kline, make_strategy
+
+
+@pytest.fixture
+def series():
+    return KBarSeries.from_kbars(make_random_kline(8, count=600))
+
+
+def make_key(series, **overrides):
+    args = {
+        'symbol': 'XSHG:510300', 'start_date': '2025-01-02', 'end_date': '2025-01-20',
+        'grid_strategy': make_strategy('等差'), 'custom_grid_params': None,
+        'config': BacktestConfig(), 'kline_data': series
+    }
+    args.update(overrides)
+    return result_cache_key(**args)
+
+
+def test_cache_key_components(series):
+    """测试缓存键覆盖策略、参数、配置和K线数据"""
+    key = make_key(series)
+    assert make_key(series) == key
+    assert make_key(series, custom_grid_params={}) == key
+
+    changed = make_strategy('等差')
+    changed['grid_config']['step_size'] = 0.06
+    assert make_key(series, grid_strategy=changed) != key
+    assert make_key(series, custom_grid_params={'gridStepSize': 0.06}) != key
+    assert make_key(series, config=BacktestConfig(engine='reference')) != key
+    assert make_key(series, end_date='2025-01-21') != key
+
+    revised = KBarSeries(series.times, series.open, series.high, series.low, series.close.copy(), series.volume)
+    revised.close[-1] += 0.001
+    assert make_key(revised) != key
+
+
+def test_lru_eviction(tmp_path):
+    """测试总大小超出上限时淘汰最久未使用的结果"""
+    cache = ResultCache(str(tmp_path), max_bytes=250)
+    payload = {'data': 'x' * 90}
+    cache.set('a', payload)
+    cache.set('b', payload)
+    # 将a、b的使用时间依次设为更早，再访问a使其成为最近使用
+    os.utime(tmp_path / 'a.json', (1, 1))
+    os.utime(tmp_path / 'b.json', (2, 2))
+    assert cache.get('a') == payload
+
+    cache.set('c', payload)
+    assert cache.get('b') is None
+    assert cache.get('a') == payload
+    assert cache.get('c') == payload
+
+
+def test_corrupted_entry(tmp_path):
+    """测试损坏的缓存文件被删除"""
+    cache = ResultCache(str(tmp_path))
+    (tmp_path / 'bad.json').write_text('{', encoding='utf-8')
+    assert cache.get('bad') is None
+    assert not (tmp_path / 'bad.json').exists()
+
+
+def test_numpy_values_round_trip(tmp_path):
+    """测试含NumPy标量和数组、datetime的结果可以写入并读回，无法序列化的结果抛出TypeError"""
+    cache = ResultCache(str(tmp_path))
+    cache.set('numpy', {
+        'total_return': np.float64(0.0525),
+        'total_trades': np.int64(12),
+        'curve': np.array([1.5, 2.5]),
+        'time': datetime(2025, 1, 2, 9, 35)
+    })
+    assert cache.get('numpy') == {
+        'total_return': 0.0525, 'total_trades': 12, 'curve': [1.5, 2.5], 'time': '2025-01-02 09:35:00'
+    }
+
+    with pytest.raises(TypeError):
+        cache.set('invalid', {'value': object()})
+    assert cache.get('invalid') is None
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_run_backtest_uses_cache(tmp_path, series):
+    """测试相同回测请求第二次直接返回缓存结果"""
+    service = BacktestService()
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=['2025-01-20', '2025-01-02']), \
+            patch.object(service.data_service, 'get_5min_kline', return_value=series), \
+            patch.object(BacktestService, 'checkpoint_store', CheckpointStore(str(tmp_path / 'ckpt'))), \
+            patch.object(BacktestService, 'result_cache', ResultCache(str(tmp_path / 'results'))):
+        first = service.run_backtest('510300', 'XSHG', make_strategy('等差'))
+        with patch.object(BacktestService, '_execute_backtest', side_effect=AssertionError("不应重新回测")):
+            second = service.run_backtest('510300', 'XSHG', make_strategy('等差'))
+        third = service.run_backtest('510300', 'XSHG', make_strategy('等差'), backtest_config={'engine': 'reference'})
+
+    assert second == first
+    assert third['performance_metrics'] == first['performance_metrics']
+    assert len(list((tmp_path / 'results').glob('*.json'))) == 2
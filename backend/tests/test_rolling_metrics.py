@@ -0,0 +1,139 @@
+"""
+测试滚动指标序列（回撤曲线、滚动收益率、波动率和夏普比率）
+"""
+
+import pytest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from app.algorithms.backtest.checkpoint import CheckpointStore
+from app.algorithms.backtest.metrics import MetricsCalculator
+from app.algorithms.backtest.models import EquityCurve
+from app.services.backtest_service import BacktestService
+from app.services.result_cache import ResultCache
+from app.routes.grid_routes import REQUEST_LIMITS
+from app.utils.validation import validate_backtest_request
+from tests.test_vectorized_engine import make_strategy
+from tests.test_walk_forward import make_daily_kline, BARS_PER_DAY
+
+
+def make_equity_curve(days: int, seed: int = 3) -> EquityCurve:
+    """生成按交易日排列的5分钟资产曲线"""
+    _, series = make_daily_kline(days, seed=seed)
+    assets = 100000 * series.close / series.close[0]
+    return EquityCurve.from_arrays(series.times, assets, series.close)
+
+
+def naive_rolling(assets: np.ndarray, window: int, periods_per_year: int, risk_free_rate: float) -> dict:
+    """按pandas逐窗口计算的参考结果"""
+    values = pd.Series(assets)
+    returns = values.pct_change()
+    volatility = returns.rolling(window).std() * np.sqrt(periods_per_year)
+    return {
+        'return': (values / values.shift(window) - 1).to_numpy(),
+        'volatility': volatility.to_numpy(),
+        'sharpe': ((returns.rolling(window).mean() * periods_per_year - risk_free_rate) / volatility).to_numpy()
+    }
+
+
+@pytest.mark.parametrize('resolution', ['daily', 'intraday'])
+def test_rolling_matches_naive(resolution):
+    """测试滚动指标与逐窗口计算一致"""
+    equity_curve = make_equity_curve(30)
+    calc = MetricsCalculator(risk_free_rate=0.03)
+    result = calc.calculate_rolling(equity_curve, windows=[5, 10], resolution=resolution)
+
+    if resolution == 'daily':
+        assert len(result['times']) == 30
+        assert result['periods_per_year'] == calc.trading_days_per_year
+        assets = equity_curve.assets[BARS_PER_DAY - 1::BARS_PER_DAY]
+    else:
+        assert len(result['times']) == len(equity_curve)
+        assert result['periods_per_year'] == calc.trading_days_per_year * BARS_PER_DAY
+        assets = equity_curve.assets
+
+    for window in (5, 10):
+        expected = naive_rolling(assets, window, result['periods_per_year'], 0.03)
+        for name in ('return', 'volatility', 'sharpe'):
+            actual = result['rolling'][window][name]
+            assert np.isnan(actual[:window]).all()
+            np.testing.assert_allclose(actual[window:], expected[name][window:], rtol=1e-7)
+
+    peaks = np.maximum.accumulate(assets)
+    np.testing.assert_allclose(result['drawdown'], assets / peaks - 1)
+    assert result['drawdown'].max() == 0
+
+
+def test_rolling_window_longer_than_curve():
+    """测试窗口超过序列长度时全部为NaN，收益率恒定时波动率为0、夏普为NaN"""
+    times = np.arange(5) * 86400
+    assets = 10000 * 1.01 ** np.arange(5)
+    result = MetricsCalculator().calculate_rolling(
+        EquityCurve.from_arrays(times, assets, np.ones(5)), windows=[3, 10]
+    )
+    assert np.isnan(result['rolling'][10]['volatility']).all()
+    assert result['rolling'][3]['volatility'][3:] == pytest.approx([0.0, 0.0])
+    assert np.isnan(result['rolling'][3]['sharpe']).all()
+
+
+def test_rolling_rejects_invalid_options():
+    """测试非法粒度和窗口被拒绝"""
+    calc = MetricsCalculator()
+    with pytest.raises(ValueError, match="粒度"):
+        calc.calculate_rolling(make_equity_curve(2), resolution='weekly')
+    with pytest.raises(ValueError, match="滚动窗口"):
+        calc.calculate_rolling(make_equity_curve(2), windows=[1])
+
+
+@pytest.mark.parametrize('options, valid', [
+    (True, True),
+    ({'windows': [5, 20], 'resolution': 'intraday'}, True),
+    ({'resolution': 'weekly'}, False),
+    ({'windows': []}, False),
+    ({'windows': [1]}, False),
+    ({'windows': [5, 5]}, False),
+    ({'windows': [2, 3, 4, 5, 6, 7]}, False),
+    ('daily', False),
+])
+def test_validate_rolling_metrics(options, valid):
+    """测试回测请求中的滚动指标选项校验"""
+    data = {
+        'etfCode': '510300', 'exchangeCode': 'XSHG', 'gridStrategy': make_strategy('等差'),
+        'rollingMetrics': options
+    }
+    assert validate_backtest_request(data, REQUEST_LIMITS)['valid'] is valid
+
+
+def test_run_backtest_rolling_section(tmp_path):
+    """测试回测结果仅在请求时包含滚动指标部分，且请求选项参与缓存键"""
+    trading_days, series = make_daily_kline(25)
+    service = BacktestService()
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days[::-1]), \
+            patch.object(service.data_service, 'get_5min_kline', return_value=series), \
+            patch.object(BacktestService, 'checkpoint_store', CheckpointStore(str(tmp_path / 'ckpt'))), \
+            patch.object(BacktestService, 'result_cache', ResultCache(str(tmp_path / 'results'))):
+        plain = service.run_backtest('510300', 'XSHG', make_strategy('等差'))
+        rolling = service.run_backtest('510300', 'XSHG', make_strategy('等差'),
+                                       rolling_metrics={'windows': [5]})
+
+    assert 'rolling_metrics' not in plain
+    section = rolling['rolling_metrics']
+    assert section['resolution'] == 'daily'
+    assert section['windows'] == [5]
+    assert len(section['times']) == len(trading_days)
+    assert set(section['series']) == {'drawdown', 'return_5', 'volatility_5', 'sharpe_5'}
+    assert section['series']['return_5'][:5] == [None] * 5
+    assert all(value is not None for value in section['series']['volatility_5'][5:])
+    # 按日的回撤不会超过按5分钟K线计算的最大回撤
+    assert rolling['performance_metrics']['max_drawdown'] - 1e-4 <= min(section['series']['drawdown']) <= 0
+
+
+def test_chunked_backtest_rejects_intraday_rolling():
+    """测试分段回测不支持按K线计算滚动指标"""
+    trading_days, _ = make_daily_kline(130)
+    service = BacktestService()
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days[::-1]):
+        with pytest.raises(ValueError, match="仅支持按日计算滚动指标"):
+            service.run_backtest('510300', 'XSHG', make_strategy('等差'),
+                                 custom_grid_params={'startDate': trading_days[0], 'endDate': trading_days[-1]},
+                                 rolling_metrics={'resolution': 'intraday'})
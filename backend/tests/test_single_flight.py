@@ -0,0 +1,152 @@
+"""
+外部API请求合并测试
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+import pytest
+from app.external import single_flight
+from app.external.base_provider import BaseProvider
+from app.external.file_cache_manager import FileCacheManager
+from app.external.single_flight import SingleFlight, file_lock, file_lock_path, single_flight_key
+
+
+class DemoProvider(BaseProvider):
+    """测试用提供商：不读取配置文件，外部请求由MagicMock代替"""
+
+    def __init__(self, cache_dir, request):
+        self.provider_name = 'demo'
+        self.auth_strategy = None
+        self.http_client = MagicMock()
+        self.http_client.request_with_auth.side_effect = request
+        self.cache_manager = FileCacheManager(str(cache_dir))
+        self.config = {
+            'base_url': 'https://api.example.com',
+            'endpoints': {'daily': {'method': 'GET', 'path': '/daily', 'cache_ttl': 300}}
+        }
+
+    def _create_auth_strategy(self):
+        return None
+
+
+def slow_request(calls, delay=0.2):
+    """模拟耗时的外部请求，记录调用次数"""
+    def request(**kwargs):
+        calls.append(kwargs['url'])
+        time.sleep(delay)
+        return {'code': 200, 'data': [{'close': 3.5}]}
+    return request
+
+
+def test_single_flight_key():
+    """测试合并键：参数顺序和数字/字符串形式不影响，不同参数或请求体得到不同的键"""
+    key = single_flight_key('tsanghi', 'etf_daily', {'ticker': 510300, 'start_date': '2025-01-01'})
+    assert key == single_flight_key('tsanghi', 'etf_daily', {'start_date': '2025-01-01', 'ticker': '510300'})
+    assert key == single_flight_key('tsanghi', 'etf_daily', {'ticker': 510300, 'start_date': '2025-01-01'}, {'data': None})
+    assert key != single_flight_key('tsanghi', 'etf_daily', {'ticker': 510500, 'start_date': '2025-01-01'})
+    assert key != single_flight_key('tsanghi', 'etf_5min', {'ticker': 510300, 'start_date': '2025-01-01'})
+    assert key != single_flight_key('tsanghi', 'etf_daily', {'ticker': 510300, 'start_date': '2025-01-01'}, {'data': {'a': 1}})
+
+
+def test_single_flight_shares_result_and_error():
+    """测试并发调用只执行一次，等待者共享结果和异常"""
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {'value': 1}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, 'key', func)
+        started.wait(5)
+        followers = [pool.submit(flight.do, 'key', func) for _ in range(3)]
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert len(calls) == 1
+    assert results[0] == ({'value': 1}, False)
+    assert all(result == ({'value': 1}, True) for result in results[1:])
+    assert flight.pending() == 0
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("上游错误")
+
+    started.clear()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, 'key', failing)
+        started.wait(5)
+        follower = pool.submit(flight.do, 'key', failing)
+        for future in (leader, follower):
+            with pytest.raises(ValueError, match="上游错误"):
+                future.result()
+    assert flight.pending() == 0
+
+
+def test_call_api_coalesces_concurrent_requests(tmp_path):
+    """测试多个提供商实例并发请求相同数据只调用一次外部API，各自得到独立的副本"""
+    calls = []
+    request = slow_request(calls)
+    providers = [DemoProvider(tmp_path, request) for _ in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(provider.call_api, 'daily', {'ticker': '510300'}) for provider in providers]
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result == {'code': 200, 'data': [{'close': 3.5}]} for result in results)
+    results[0]['data'].clear()
+    assert results[1]['data'] == [{'close': 3.5}]
+
+    # 不同参数分别请求
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda ticker: providers[0].call_api('daily', {'ticker': ticker}), ['510500', '159915']))
+    assert len(calls) == 3
+
+
+def test_call_api_rechecks_cache_after_file_lock(tmp_path):
+    """测试等待跨进程文件锁期间其他进程写入缓存后，获得锁直接使用缓存"""
+    calls = []
+    provider = DemoProvider(tmp_path, slow_request(calls, delay=0))
+    params = {'ticker': '510300'}
+    key = single_flight_key('demo', 'daily', params)
+    lock_path = file_lock_path(tmp_path / '.locks', key)
+
+    if single_flight.fcntl is None:
+        pytest.skip('当前平台不支持文件锁')
+
+    # 另一个文件描述符持有锁，模拟其他工作进程正在请求
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        with file_lock(lock_path, timeout=1) as acquired:
+            assert acquired
+            future = pool.submit(provider.call_api, 'daily', params)
+            time.sleep(0.2)
+            assert not future.done()
+            provider.cache_manager.set('demo', 'daily', params, {'code': 200, 'data': 'cached'}, 300)
+
+        assert future.result(timeout=5) == {'code': 200, 'data': 'cached'}
+    assert not calls
+
+    # 锁等待超时后不加锁继续请求
+    with file_lock(lock_path, timeout=1):
+        with file_lock(lock_path, timeout=0.1) as acquired:
+            assert not acquired
+
+
+def test_file_lock_pool(tmp_path):
+    """测试合并键映射到固定数量的锁文件，同一个键总是使用同一个锁文件"""
+    keys = [single_flight_key('demo', 'daily', {'ticker': str(510000 + i)}) for i in range(500)]
+    paths = {file_lock_path(tmp_path, key) for key in keys}
+    assert len(paths) <= single_flight.FILE_LOCK_POOL_SIZE
+    assert file_lock_path(tmp_path, keys[0]) == file_lock_path(tmp_path, keys[0])
+
+    providers = [DemoProvider(tmp_path, slow_request([], delay=0)) for _ in range(2)]
+    for i in range(100):
+        providers[i % 2].call_api('daily', {'ticker': str(510000 + i)})
+    assert len(list((tmp_path / '.locks').iterdir())) <= single_flight.FILE_LOCK_POOL_SIZE
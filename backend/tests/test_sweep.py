@@ -0,0 +1,172 @@
+"""
+网格参数扫描单元测试
+"""
+
+import pytest
+from unittest.mock import patch
+from app.algorithms.backtest.models import KBarSeries
+from app.algorithms.backtest.parallel import run_parallel
+from app.algorithms.backtest.sweep import expand_range, SweepGrid, TopK
+from app.services.backtest_service import BacktestService
+from tests.test_vectorized_engine import make_random_kline
+
+
+@pytest.fixture
+def kline_series():
+    return KBarSeries.from_kbars(make_random_kline(3, count=600))
+
+
+@pytest.fixture
+def grid_strategy():
+    return {
+        'current_price': 10.0,
+        'price_range': {'lower': 9.0, 'upper': 11.0},
+        'grid_config': {
+            'type': '等差',
+            'step_size': 0.05,
+            'count': 40,
+            'single_trade_quantity': 1000
+        },
+        'fund_allocation': {
+            'base_position_amount': 30000,
+            'grid_trading_amount': 70000
+        }
+    }
+
+
+def test_expand_range():
+    """测试参数范围展开"""
+    assert expand_range(0.05) == [0.05]
+    assert expand_range([100, 200]) == [100, 200]
+    assert expand_range({'start': 0.01, 'end': 0.05, 'step': 0.01}) == [0.01, 0.02, 0.03, 0.04, 0.05]
+
+    with pytest.raises(ValueError):
+        expand_range({'start': 1, 'end': 0, 'step': 0.1})
+    with pytest.raises(ValueError):
+        expand_range({'start': 0, 'end': 1, 'step': 0})
+
+
+def test_sweep_grid_skips_invalid_price_range():
+    """测试参数组合生成并跳过无效价格区间"""
+    grid = SweepGrid({'priceLower': [9.0, 10.0], 'priceUpper': [10.0, 11.0]})
+
+    assert (grid.size, grid.skipped) == (3, 1)
+    assert list(grid) == [
+        {'priceLower': 9.0, 'priceUpper': 10.0},
+        {'priceLower': 9.0, 'priceUpper': 11.0},
+        {'priceLower': 10.0, 'priceUpper': 11.0},
+    ]
+
+    # 组合数与实际生成的组合一致（含其他扫描参数）
+    grid = SweepGrid({
+        'priceLower': {'start': 9.0, 'end': 10.5, 'step': 0.1},
+        'priceUpper': [10.0, 10.2, 9.5, 11.0],
+        'gridStepSize': [0.02, 0.05]
+    })
+    assert grid.size == len(list(grid))
+    assert grid.size + grid.skipped == 16 * 4 * 2
+
+    with pytest.raises(ValueError, match="没有有效的参数组合"):
+        SweepGrid({'priceLower': [10.0, 11.0], 'priceUpper': [9.0, 10.0]})
+
+    with pytest.raises(ValueError, match="不支持扫描的参数"):
+        SweepGrid({'unknown': [1]})
+
+
+def test_top_k():
+    """测试在线Top-K选择"""
+    top = TopK(3)
+    for score in [0.1, 0.5, None, 0.3, 0.9, 0.2]:
+        top.push(score, score)
+
+    assert len(top) == 3
+    assert top.results() == [0.9, 0.5, 0.3]
+
+
+def _series_summary(kline_data, context, task):
+    return task, len(kline_data), float(kline_data.close.sum()) * context
+
+
+def test_run_parallel_shares_series(kline_series):
+    """测试进程池通过共享内存读取K线"""
+    expected_sum = float(kline_series.close.sum())
+    serial = sorted(run_parallel(_series_summary, range(4), kline_series, context=2, max_workers=1))
+    parallel = sorted(run_parallel(_series_summary, range(4), kline_series, context=2, max_workers=2))
+
+    assert serial == parallel
+    assert parallel[0] == (0, len(kline_series), expected_sum * 2)
+
+
+def test_run_sweep_ranks_results(kline_series, grid_strategy):
+    """测试参数扫描只加载一次K线并返回排名"""
+    service = BacktestService()
+    trading_days = ['2025-01-03', '2025-01-02']
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days), \
+            patch.object(service.data_service, 'get_5min_kline', return_value=kline_series) as get_kline:
+        result = service.run_sweep(
+            etf_code='510300',
+            exchange_code='XSHG',
+            grid_strategy=grid_strategy,
+            sweep_params={
+                'gridStepSize': {'start': 0.03, 'end': 0.07, 'step': 0.02},
+                'singleTradeQuantity': [500, 1000]
+            },
+            top_k=4,
+            sort_by='total_return',
+            max_workers=1
+        )
+
+    assert get_kline.call_count == 1
+    assert result['sweep']['total_candidates'] == 6
+    assert result['sweep']['evaluated'] + result['sweep']['failed'] == 6
+    assert len(result['results']) == 4
+    returns = [row['total_return'] for row in result['results']]
+    assert returns == sorted(returns, reverse=True)
+    assert [row['rank'] for row in result['results']] == [1, 2, 3, 4]
+
+
+def test_run_sweep_totals_exclude_invalid_price_range(kline_series, grid_strategy):
+    """测试跳过的无效价格区间不计入参数组合数，进度最终达到参数组合数"""
+    service = BacktestService()
+    reports = []
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=['2025-01-03', '2025-01-02']), \
+            patch.object(service.data_service, 'get_5min_kline', return_value=kline_series):
+        result = service.run_sweep(
+            etf_code='510300',
+            exchange_code='XSHG',
+            grid_strategy=grid_strategy,
+            sweep_params={'priceLower': [9.0, 10.0, 11.0], 'priceUpper': [10.5, 11.5]},
+            top_k=10,
+            sort_by='total_return',
+            max_workers=1,
+            progress=reports.append
+        )
+
+    sweep = result['sweep']
+    assert (sweep['total_candidates'], sweep['skipped']) == (5, 1)
+    assert sweep['evaluated'] + sweep['failed'] == sweep['total_candidates']
+    assert reports[-1]['candidates_processed'] == reports[-1]['total_candidates'] == 5
+    # 原始策略不应被扫描修改
+    assert grid_strategy['grid_config']['step_size'] == 0.05
+
+
+def test_run_sweep_rejects_unknown_sort_key(grid_strategy):
+    """测试不支持的排序指标"""
+    service = BacktestService()
+    with pytest.raises(ValueError, match="不支持的排序指标"):
+        service.run_sweep('510300', 'XSHG', grid_strategy, {'gridStepSize': [0.05]}, sort_by='unknown')
+
+
+def test_sweep_batch_matches_reference_engine(kline_series, grid_strategy):
+    """测试多策略引擎批量回测与逐个参考引擎回测结果一致"""
+    from app.algorithms.backtest.models import BacktestConfig
+    from app.services.backtest_service import _evaluate_sweep_batch
+
+    batch = list(SweepGrid({'gridStepSize': [0.02, 0.05], 'singleTradeQuantity': [500, 1000]}))
+    context = {'grid_strategy': grid_strategy, 'custom_grid_params': {}, 'country': 'CHN'}
+
+    vectorized = _evaluate_sweep_batch(kline_series, {**context, 'config': BacktestConfig()}, batch)
+    reference = _evaluate_sweep_batch(kline_series, {**context, 'config': BacktestConfig(engine='reference')}, batch)
+
+    assert vectorized == reference
+    assert all('error' not in row for row in vectorized)
@@ -224,4 +224,70 @@ class TestTradingLogic:
         # 验证降级为0底仓
         assert state.position == 0
         assert state.cash == 100000
-        assert trade is None
\ No newline at end of file
+        assert trade is None
+    def test_grid_level_lookup(self, grid_config, fee_calc):
+        """测试初始档位取最接近基准价的价格水平，档位换算为原列表下标"""
+        logic = TradingLogic(grid_config, fee_calc, price_levels=[10.2, 9.8, 10.0, 9.9, 10.1])
+        assert logic.initial_grid_index(9.96) == 2
+        assert logic.initial_grid_index(9.94) == 1
+        assert logic.initial_grid_index(9.5) == 0
+        assert logic.initial_grid_index(10.5) == 4
+        assert [logic.grid_level(index) for index in range(5)] == [1, 3, 2, 4, 0]
+        assert logic.grid_level(-1) is None
+        assert logic.grid_level(5) is None
+        assert TradingLogic(grid_config, fee_calc).initial_grid_index(10.0) is None
+        assert TradingLogic(grid_config, fee_calc).grid_level(None) is None
+
+    def test_trade_tagged_with_grid_level(self, grid_config, fee_calc):
+        """测试成交记录标记触发的网格买卖点所在档位"""
+        levels = [round(9.5 + 0.1 * i, 1) for i in range(11)]
+        logic = TradingLogic(grid_config, fee_calc, price_levels=levels)
+        state, _ = logic.execute_initial_position(
+            first_kbar=KBar(datetime(2024, 1, 1, 9, 30), 10.0, 10.0, 10.0, 10.0, 1000000),
+            base_position_amount=30000,
+            total_capital=100000,
+            strategy_base_price=10.0,
+            price_lower=9.0,
+            price_upper=11.0
+        )
+
+        # 最低价跌破买入点9.9，买入记入9.9档
+        state, buy = logic.check_and_execute(state, KBar(None, 9.95, 9.95, 9.85, 9.9, 1000))
+        assert buy.type == 'BUY'
+        assert levels[buy.grid_level] == 9.9
+
+        # 最高价突破卖出点（按成交价9.9125计算为10.0125），卖出记入10.0档
+        state, sell = logic.check_and_execute(state, KBar(None, 9.95, 10.05, 9.95, 10.0, 1000))
+        assert sell.type == 'SELL'
+        assert levels[sell.grid_level] == 10.0
+
+    def test_grid_level_follows_ladder_after_drift(self, grid_config, fee_calc):
+        """测试按均价成交后网格阶梯偏离价格水平，档位仍按成交跨越的档位数精确移动"""
+        levels = [round(9.5 + 0.1 * i, 1) for i in range(11)]
+        logic = TradingLogic(grid_config, fee_calc, price_levels=levels)
+        state, _ = logic.execute_initial_position(
+            first_kbar=KBar(datetime(2024, 1, 1, 9, 30), 10.0, 10.0, 10.0, 10.0, 1000000),
+            base_position_amount=30000,
+            total_capital=100000,
+            strategy_base_price=10.0,
+            price_lower=9.0,
+            price_upper=11.0
+        )
+
+        # 最低价9.65跌破买入点9.9两个完整档位，三倍买入记入9.9档，档位下移三档到9.7
+        state, buy = logic.check_and_execute(state, KBar(None, 9.9, 9.9, 9.65, 9.65, 1000))
+        assert (buy.type, buy.quantity, levels[buy.grid_level]) == ('BUY', 300, 9.9)
+        # 基准价重新锚定到成交均价9.775，最接近的价格水平是9.8，档位仍为9.7
+        assert state.base_price == pytest.approx(9.775)
+        assert levels[logic.grid_level(state.grid_index)] == 9.7
+
+        # 卖出点9.875最接近9.9，但成交记入基准档位上方一档9.8
+        state, sell = logic.check_and_execute(state, KBar(None, 9.8, 9.88, 9.8, 9.85, 1000))
+        assert (sell.type, sell.quantity, levels[sell.grid_level]) == ('SELL', 100, 9.8)
+
+        # 大幅下跌跨越五档，档位移出价格水平范围后成交不再标记档位
+        state, buy = logic.check_and_execute(state, KBar(None, 9.8, 9.8, 9.3, 9.4, 1000))
+        assert (buy.quantity, levels[buy.grid_level]) == (500, 9.7)
+        state, buy = logic.check_and_execute(state, KBar(None, 9.45, 9.45, 9.4, 9.42, 1000))
+        assert buy.type == 'BUY' and buy.grid_level is None
+        assert logic.grid_level(state.grid_index) is None
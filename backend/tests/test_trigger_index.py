@@ -0,0 +1,43 @@
+"""
+网格触发索引单元测试
+"""
+
+import numpy as np
+import pytest
+from app.algorithms.backtest.trigger_index import TriggerIndex
+
+
+def brute_force(low, high, start, buy_price, sell_price):
+    for i in range(start, len(low)):
+        if low[i] <= buy_price or high[i] >= sell_price:
+            return i
+    return -1
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100, 1000])
+def test_find_next_matches_brute_force(size):
+    """测试查询结果与逐个扫描一致"""
+    rng = np.random.default_rng(size)
+    close = 10 + np.cumsum(rng.normal(0, 0.03, size))
+    low = close - np.abs(rng.normal(0, 0.02, size))
+    high = close + np.abs(rng.normal(0, 0.02, size))
+    low[rng.random(size) < 0.1] = np.inf
+    index = TriggerIndex(low, high)
+
+    for _ in range(200):
+        start = int(rng.integers(0, size + 1))
+        buy_price = float(rng.uniform(9.0, 10.0))
+        sell_price = float(rng.uniform(10.0, 11.0))
+        assert index.find_next(start, buy_price, sell_price) == brute_force(low, high, start, buy_price, sell_price)
+
+
+def test_find_next_boundaries():
+    """测试触发价等于买卖点以及无触发的情况"""
+    low = np.array([5.0, 4.9, 5.0, 5.0])
+    high = np.array([5.1, 5.1, 5.2, 5.1])
+    index = TriggerIndex(low, high)
+
+    assert index.find_next(0, 4.9, 6.0) == 1
+    assert index.find_next(2, 4.9, 5.2) == 2
+    assert index.find_next(3, 4.9, 5.2) == -1
+    assert index.find_next(4, 4.9, 5.2) == -1
@@ -9,8 +9,9 @@ import json
 from app.utils.validation import (
     validate_required, validate_string, validate_integer, validate_enum, validate_email,
     validate_all, validate_with_rules, validate_json, validate_query,
-    validate_form, validate_combined, VALIDATION_RULES
+    validate_form, validate_combined, VALIDATION_RULES, validate_portfolio_request
 )
+from app.routes.grid_routes import REQUEST_LIMITS
 
 
 @pytest.fixture
@@ -214,5 +215,21 @@ class TestValidationRules:
         assert result is not None
 
 
+class TestRequestLimits:
+    """请求参数取值范围测试类"""
+
+    def test_limits_passed_in_by_caller(self):
+        """测试校验使用调用方传入的取值范围"""
+        symbol = {
+            'etfCode': '510300', 'exchangeCode': 'XSHG',
+            'gridStrategy': {'current_price': 1, 'price_range': {}, 'grid_config': {}, 'fund_allocation': {}}
+        }
+        data = {'symbols': [symbol, {**symbol, 'etfCode': '510500'}]}
+        assert validate_portfolio_request(data, REQUEST_LIMITS)['valid'] is True
+
+        result = validate_portfolio_request(data, {**REQUEST_LIMITS, 'max_portfolio_symbols': 1})
+        assert result == {'valid': False, 'error': '组合标的数不能超过1个'}
+
+
 if __name__ == '__main__':
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+向量化回测引擎单元测试
+"""
+
+import copy
+import random
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from app.algorithms.backtest.engine import BacktestEngine
+from app.algorithms.backtest.vectorized_engine import VectorizedBacktestEngine
+from app.algorithms.backtest.models import KBar, KBarSeries, BacktestConfig
+
+
+def make_random_kline(seed: int, count: int = 1500, start_price: float = 10.0):
+    """生成随机游走K线（价格保留3位小数）"""
+    rng = random.Random(seed)
+    base_time = datetime(2025, 1, 2, 9, 30)
+    kline = []
+    price = start_price
+    for i in range(count):
+        open_price = price
+        close_price = round(max(0.5, open_price + rng.gauss(0, 0.03)), 3)
+        high = round(max(open_price, close_price) + abs(rng.gauss(0, 0.02)), 3)
+        low = round(min(open_price, close_price) - abs(rng.gauss(0, 0.02)), 3)
+        kline.append(KBar(base_time + timedelta(minutes=5 * i), open_price, high, low, close_price, 10000))
+        price = close_price
+    return kline
+
+
+def make_strategy(grid_type: str, base_amount: float = 30000, grid_amount: float = 70000):
+    return {
+        'current_price': 10.0,
+        'price_range': {'lower': 9.0, 'upper': 11.0},
+        'grid_config': {
+            'type': grid_type,
+            'step_size': 0.05,
+            'step_ratio': 0.005,
+            'count': 40,
+            'single_trade_quantity': 1000
+        },
+        'fund_allocation': {
+            'base_position_amount': base_amount,
+            'grid_trading_amount': grid_amount
+        }
+    }
+
+
+def assert_same_equity(curve, expected):
+    assert np.array_equal(curve.times, expected.times)
+    assert np.array_equal(curve.assets, expected.assets)
+    assert np.array_equal(curve.prices, expected.prices)
+
+
+def run_both(strategy, kline):
+    config = BacktestConfig()
+    reference = BacktestEngine(copy.deepcopy(strategy), config).run(kline)
+    vectorized = VectorizedBacktestEngine(copy.deepcopy(strategy), config).run(kline)
+    return reference, vectorized
+
+
+@pytest.mark.parametrize('grid_type', ['等差', '等比'])
+@pytest.mark.parametrize('seed', [1, 2, 3, 4])
+def test_matches_reference_engine(grid_type, seed):
+    """测试与逐K线引擎逐笔一致"""
+    kline = make_random_kline(seed)
+    reference, vectorized = run_both(make_strategy(grid_type), kline)
+
+    assert len(reference['trade_records']) > 1
+    assert vectorized['trade_records'] == reference['trade_records']
+    assert_same_equity(vectorized['equity_curve'], reference['equity_curve'])
+    assert vectorized['final_state'] == reference['final_state']
+
+
+def test_matches_reference_with_insufficient_cash():
+    """测试资金不足、触发但不成交的场景"""
+    kline = make_random_kline(7, start_price=10.3)
+    strategy = make_strategy('等差', base_amount=90000, grid_amount=15000)
+    reference, vectorized = run_both(strategy, kline)
+
+    assert vectorized['trade_records'] == reference['trade_records']
+    assert_same_equity(vectorized['equity_curve'], reference['equity_curve'])
+    assert vectorized['final_state'] == reference['final_state']
+
+
+def test_matches_reference_outside_price_range():
+    """测试价格超出网格范围后停止交易"""
+    kline = make_random_kline(11, start_price=10.8)
+    reference, vectorized = run_both(make_strategy('等比'), kline)
+
+    assert vectorized['trade_records'] == reference['trade_records']
+    assert vectorized['final_state'] == reference['final_state']
+
+
+def test_empty_data():
+    """测试空数据异常"""
+    engine = VectorizedBacktestEngine(make_strategy('等差'), BacktestConfig())
+    with pytest.raises(ValueError, match="K线数据为空"):
+        engine.run([])
+
+
+def test_accepts_kbar_series():
+    """测试直接使用列式K线序列回测"""
+    kline = make_random_kline(5)
+    reference, _ = run_both(make_strategy('等差'), kline)
+    vectorized = VectorizedBacktestEngine(make_strategy('等差'), BacktestConfig()).run(KBarSeries.from_kbars(kline))
+
+    assert vectorized['trade_records'] == reference['trade_records']
+    assert_same_equity(vectorized['equity_curve'], reference['equity_curve'])
@@ -0,0 +1,144 @@
+"""
+滚动前向优化单元测试
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import numpy as np
+from app.algorithms.backtest.models import KBarSeries, to_epoch_seconds
+from app.algorithms.backtest.walk_forward import split_windows, summarize_windows
+from app.services.backtest_service import BacktestService
+from tests.test_vectorized_engine import make_strategy
+
+BARS_PER_DAY = 48
+
+
+@pytest.fixture
+def grid_strategy():
+    return make_strategy('等差')
+
+
+def make_daily_kline(days: int, seed: int = 7):
+    """生成按交易日排列的5分钟K线（每日48根，跳过周末）"""
+    rng = np.random.default_rng(seed)
+    trading_days = []
+    day = datetime(2024, 1, 2)
+    while len(trading_days) < days:
+        if day.weekday() < 5:
+            trading_days.append(day)
+        day += timedelta(days=1)
+
+    times = np.array([
+        to_epoch_seconds(day + timedelta(hours=9, minutes=30 + 5 * k))
+        for day in trading_days for k in range(BARS_PER_DAY)
+    ])
+    close = np.round(10 + np.cumsum(rng.normal(0, 0.03, len(times))), 3)
+    open_ = np.append(10.0, close[:-1])
+    high = np.round(np.maximum(open_, close) + np.abs(rng.normal(0, 0.02, len(times))), 3)
+    low = np.round(np.minimum(open_, close) - np.abs(rng.normal(0, 0.02, len(times))), 3)
+    series = KBarSeries(times, open_, high, low, close, np.full(len(times), 10000))
+    return [day.strftime('%Y-%m-%d') for day in trading_days], series
+
+
+def test_concat_sorts_and_deduplicates():
+    """测试分段K线拼接按时间排序并去重"""
+    _, series = make_daily_kline(3)
+    merged = KBarSeries.concat([series[96:], series[:100], KBarSeries.empty()])
+    assert np.array_equal(merged.times, series.times)
+    assert np.array_equal(merged.close, series.close)
+
+
+def test_split_windows():
+    """测试按交易日切分滚动窗口"""
+    trading_days, series = make_daily_kline(30)
+    windows = split_windows(trading_days, series, in_sample_days=10, out_of_sample_days=5)
+
+    assert len(windows) == 4
+    first = windows[0]
+    assert first.in_sample == (0, 10 * BARS_PER_DAY)
+    assert first.out_of_sample == (10 * BARS_PER_DAY, 15 * BARS_PER_DAY)
+    assert first.in_sample_dates == (trading_days[0], trading_days[9])
+    assert first.out_of_sample_dates == (trading_days[10], trading_days[14])
+    # 默认步长等于样本外交易日数，相邻窗口的样本外区间首尾相接
+    for previous, current in zip(windows, windows[1:]):
+        assert current.out_of_sample[0] == previous.out_of_sample[1]
+
+    assert len(split_windows(trading_days, series, 10, 5, step_days=10)) == 2
+    assert split_windows(trading_days, series, 20, 20) == []
+
+
+def test_split_windows_skips_days_without_bars():
+    """测试样本外没有K线的窗口被跳过"""
+    trading_days, series = make_daily_kline(10)
+    # 最后3个交易日停牌
+    series = series[:7 * BARS_PER_DAY]
+    windows = split_windows(trading_days, series, in_sample_days=5, out_of_sample_days=2, step_days=1)
+    assert [window.out_of_sample_dates[0] for window in windows] == trading_days[5:7]
+
+
+def test_summarize_windows():
+    """测试样本外表现汇总"""
+    rows = [
+        {'in_sample': {'best': {'total_return': 0.02, 'annualized_return': 0.2}},
+         'out_of_sample': {'total_return': 0.01, 'annualized_return': 0.1}},
+        {'in_sample': {'best': {'total_return': 0.04, 'annualized_return': 0.4}},
+         'out_of_sample': {'total_return': -0.01, 'annualized_return': -0.1}},
+        {'error': '样本内窗口没有可用的参数组合'}
+    ]
+    summary = summarize_windows(rows)
+    assert summary['completed_windows'] == 2
+    assert summary['failed_windows'] == 1
+    assert summary['compounded_return'] == pytest.approx(1.01 * 0.99 - 1, abs=1e-4)
+    assert summary['profitable_windows_ratio'] == 0.5
+    assert summary['walk_forward_efficiency'] == 0.0
+
+
+def test_run_walk_forward(grid_strategy):
+    """测试滚动前向优化分段加载K线并逐窗口选优、验证"""
+    trading_days, series = make_daily_kline(40)
+
+    def get_5min_kline(etf_code, exchange_code, start_date, end_date, type):
+        end = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) - timedelta(seconds=1)
+        return series.slice_time(datetime.strptime(start_date, '%Y-%m-%d'), end)
+
+    service = BacktestService()
+    with patch.object(service.data_service, 'get_trading_calendar', return_value=trading_days[::-1]), \
+            patch.object(service.data_service, 'get_5min_kline', side_effect=get_5min_kline), \
+            patch('app.services.backtest_service.KLINE_FETCH_CHUNK_DAYS', 15):
+        result = service.run_walk_forward(
+            etf_code='510300',
+            exchange_code='XSHG',
+            grid_strategy=grid_strategy,
+            sweep_params={'gridStepSize': [0.03, 0.05, 0.08]},
+            walk_forward={
+                'startDate': trading_days[0],
+                'endDate': trading_days[-1],
+                'inSampleDays': 10,
+                'outOfSampleDays': 10
+            },
+            max_workers=1
+        )
+
+    assert result['backtest_period']['total_bars'] == len(series)
+    assert result['walk_forward']['windows'] == 3
+    assert [row['index'] for row in result['windows']] == [0, 1, 2]
+    for row in result['windows']:
+        assert 'error' not in row
+        assert row['in_sample']['evaluated'] == 3
+        assert row['in_sample']['best']['params']['gridStepSize'] in (0.03, 0.05, 0.08)
+        assert row['out_of_sample']['total_bars'] == 10 * BARS_PER_DAY
+        assert 'total_return' in row['out_of_sample']
+    assert result['summary']['completed_windows'] == 3
+    # 原始策略不应被修改
+    assert grid_strategy['grid_config']['step_size'] == 0.05
+
+
+def test_run_walk_forward_rejects_long_span(grid_strategy):
+    """测试超过最大时间跨度"""
+    service = BacktestService()
+    with pytest.raises(ValueError, match="时间跨度"):
+        service.run_walk_forward(
+            '510300', 'XSHG', grid_strategy, {'gridStepSize': [0.05]},
+            {'startDate': '2015-01-01', 'endDate': '2024-12-31', 'inSampleDays': 60, 'outOfSampleDays': 20}
+        )